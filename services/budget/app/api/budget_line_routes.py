@@ -1,7 +1,10 @@
 # /services/budget/app/api/budget_routes.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
+from app.api.pagination import Cursor, PageSize, page_items
+from app.core.config import settings
+from app.crud.budget_line_crud import BudgetLineFilters
 from app.db.session import SessionLocal
 from app.schemas import BudgetLine, BudgetLineCreate, BudgetLineUpdate
 from uuid import UUID
@@ -26,8 +29,17 @@ def get_db():
 
 
 @router.get("/", response_model=List[BudgetLine])
-def get_budget_lines_view(db: Session = Depends(get_db), valid_user=Depends(get_validated_user)):
-    return get_budget_lines_service(db, valid_user)
+def get_budget_lines_view(
+    request: Request,
+    response: Response,
+    filters: BudgetLineFilters = Depends(),
+    cursor: Cursor = None,
+    limit: PageSize = settings.PAGE_SIZE_DEFAULT,
+    db: Session = Depends(get_db),
+    valid_user=Depends(get_validated_user),
+):
+    page = get_budget_lines_service(db, valid_user, filters=filters, cursor=cursor, limit=limit)
+    return page_items(page, request, response)
 
 
 @router.post("/", response_model=BudgetLine)
@@ -42,9 +54,19 @@ def create_budget_line_view(
 
 @router.get("/by-budget/{budget_id}", response_model=List[BudgetLine])
 def get_budget_lines_by_budget_view(
-    budget_id: UUID, db: Session = Depends(get_db), valid_user=Depends(get_validated_user)
+    budget_id: UUID,
+    request: Request,
+    response: Response,
+    filters: BudgetLineFilters = Depends(),
+    cursor: Cursor = None,
+    limit: PageSize = settings.PAGE_SIZE_DEFAULT,
+    db: Session = Depends(get_db),
+    valid_user=Depends(get_validated_user),
 ):
-    return get_budget_lines_service(db, budget_id=budget_id, valid_user=valid_user)
+    page = get_budget_lines_service(
+        db, budget_id=budget_id, valid_user=valid_user, filters=filters, cursor=cursor, limit=limit
+    )
+    return page_items(page, request, response)
 
 
 @router.get("/{budget_line_id}", response_model=BudgetLine)
@@ -3,25 +3,30 @@ import json
 import logging
 import traceback
 import urllib.parse
+from datetime import date
 
 import httpx
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from uuid import uuid4, UUID  # noqa: F401
 
+from app.api.pagination import Cursor, PageSize, page_items
 from app.core.config import settings
+from app.crud.budget_crud import BudgetFilters
 from app.db.session import SessionLocal
-from app.schemas.budget_schema import BudgetCreate, BudgetUpdate, BudgetWithLines
-from app.schemas.budget_line_schema import BudgetLine
+from app.schemas.budget_schema import BudgetCreate, BudgetUpdate, BudgetWithTotals
 from app.schemas.with_lines_schema import CreateBudgetWithLinesRequest
-from app.services.budget_line_services import get_budget_lines_service
+from app.services.exchange_rate_services import convert_budget_lines_service
 from app.services.budget_services import (
+    budget_ndjson,
     create_budget_service,
     create_budget_with_lines_service,
-    get_budget_service,
+    get_budget_detail_service,
+    get_budget_totals,
     update_budget_service,
+    with_budget_totals,
     list_budget_service,
     delete_budget_service,
 )
@@ -55,19 +60,46 @@ async def create_budget_endpoint(
     return await create_budget_service(budget, valid_user, db, include_user_datails=True)
 
 
-@router.get("/{budget_id}", response_model=BudgetWithLines)
+@router.get("/{budget_id}", response_model=BudgetWithTotals)
 async def get_budget_endpoint(
     budget_id: UUID,
+    include_lines: bool = True,
+    include_totals: bool = False,
+    stream: bool = False,
     db: Session = Depends(get_db),
     valid_user=Depends(get_validated_user),
 ):
-    budget = await get_budget_service(budget_id, valid_user, db, include_user_details=True)
-    if budget:
-        budget_lines = get_budget_lines_service(db=db, valid_user=valid_user, budget_id=budget_id)
-        budget["lines"] = [BudgetLine.model_validate(line) for line in budget_lines]
+    """
+    The budget with its lines and categories, loaded in one query.
+
+    With stream=true (and include_lines) the response is NDJSON instead: the
+    budget first, then one record per line, read in batches for very large budgets.
+    """
+    streaming = stream and include_lines
+    budget = await get_budget_detail_service(
+        budget_id, valid_user, db, include_lines=include_lines and not streaming
+    )
+    if include_totals:
+        budget["totals"] = get_budget_totals(db, [budget_id])[budget_id]
+    if streaming:
+        return StreamingResponse(
+            budget_ndjson(db, budget, settings.BUDGET_LINES_STREAM_BATCH),
+            media_type="application/x-ndjson",
+        )
     return budget
 
 
+@router.get("/{budget_id}/converted")
+def get_budget_converted_endpoint(
+    budget_id: UUID,
+    currency: str,
+    rate_date: date | None = None,
+    db: Session = Depends(get_db),
+    valid_user=Depends(get_validated_user),
+):
+    return convert_budget_lines_service(db, valid_user, budget_id, currency, rate_date)
+
+
 @router.patch("/{budget_id}", response_model=BudgetUpdate)
 async def update_budget_endpoint(
     budget_id: UUID,
@@ -85,10 +117,26 @@ async def update_budget_endpoint(
 
 @router.get("/")
 async def get_all_budgets_endpoint(
-    db: Session = Depends(get_db), valid_user=Depends(get_validated_user)
+    request: Request,
+    response: Response,
+    filters: BudgetFilters = Depends(),
+    cursor: Cursor = None,
+    limit: PageSize = settings.PAGE_SIZE_DEFAULT,
+    include_totals: bool = False,
+    db: Session = Depends(get_db),
+    valid_user=Depends(get_validated_user),
 ):
-
-    return await list_budget_service(db=db, valid_user=valid_user, include_user_details=True)
+    page = await list_budget_service(
+        db=db,
+        valid_user=valid_user,
+        include_user_details=True,
+        filters=filters,
+        cursor=cursor,
+        limit=limit,
+    )
+    if include_totals:
+        page.items = with_budget_totals(db, page.items)
+    return page_items(page, request, response)
 
 
 @router.post("/with-lines")
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import os
+import uuid
+
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import select
-from typing import List
+from sqlalchemy.exc import IntegrityError
+from typing import Callable, List
 
 # from app.db.session import get_db
 from app.schemas.mapping_schema import (
@@ -16,12 +22,16 @@ from app.schemas.mapping_schema import (
     MappingSuggestion,
     NgoMappingCreate,
     NgoMapping,
+    IngestionJobAccepted,
+    IngestionJobStatus,
 )
 from app.models.mapping import (
     DonorFieldModel,
     NgoMappingModel,
 )
 from app.services.mapping_service import suggest_mapping
+from app.services.ingestion_jobs import IngestionJob, ingestion_runner, job_events, job_store
+from app.core.config import settings
 from app.db.session import SessionLocal
 from app.crud.budget_donor_template_crud import (
     bulk_create_donor_fields,
@@ -33,7 +43,6 @@ from app.crud.budget_donor_template_crud import (
 )
 from app.schemas.budget_line_schema import BudgetCategoryCreate, BudgetCategory
 from app.crud.budget_category_crud import create_budget_category, list_budget_categories
-from app.services.mapping_service import suggest_semantic_mapping
 from shared.security.dependencies import get_validated_user  # noqa: F401
 
 router = APIRouter(prefix="/donor-mapping", tags=["Donor Mapping"])
@@ -48,23 +57,111 @@ def get_db():
 
 
 @router.post("/ping")
-def ping(db: Session = Depends(get_db), valid_user=Depends(get_validated_user)):
-    from app.services.template_detection.spreadsheet_reader import ExcelStructureDetector
+def ping(
+    donor_template_id: int | None = None,
+    db: Session = Depends(get_db),
+    valid_user=Depends(get_validated_user),
+):
+    from app.services.template_fingerprint_service import suggest_mappings_for_upload
 
     file_path = "/app/uploads/Donor_budget_template.xlsx"
     # detected_structure = detect_excel_structure(file_path)
     # df = load_raw_sheet(file_path)
-    excel_reader = ExcelStructureDetector(file_path)
-    # Use the high-level pipeline to get a cleaned DataFrame
-    df = excel_reader.detect_structure()
-
-    # Serialize detections to JSON
-    extracted_keywords = excel_reader.filter_list_of_possible_fields(df)
-    suggested_mappings = suggest_semantic_mapping(extracted_keywords, db, valid_user)
-    return suggested_mappings
+    # Known donor templates reuse their stored mappings; a previously seen file
+    # is served from the detection cache
+    return suggest_mappings_for_upload(file_path, db, valid_user, donor_template_id)
     # return {"message": "pong"}
 
 
+# --- Upload ingestion ---
+UPLOAD_EXTENSIONS = (".xlsx", ".xlsm")
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+
+def _ingest(valid_user, donor_template_id: int | None):
+    """Job body: detection and mapping for one upload, on its own DB session."""
+    from app.services.template_fingerprint_service import suggest_mappings_for_upload
+
+    def work(file_path: str, report_stage: Callable[[str], None]):
+        db = SessionLocal()
+        try:
+            return suggest_mappings_for_upload(
+                file_path, db, valid_user, donor_template_id, report_stage
+            )
+        finally:
+            db.close()
+
+    return work
+
+
+@router.post("/uploads", response_model=IngestionJobAccepted, status_code=202)
+def upload_workbook(
+    request: Request,
+    file: UploadFile = File(...),
+    donor_template_id: int | None = None,
+    valid_user=Depends(get_validated_user),
+):
+    """Store an uploaded workbook and start detecting and mapping it in the background."""
+    file_name = os.path.basename(file.filename or "")
+    if not file_name.lower().endswith(UPLOAD_EXTENSIONS):
+        raise HTTPException(400, "Only .xlsx / .xlsm workbooks are supported")
+
+    job_id = str(uuid.uuid4())
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    file_path = os.path.join(settings.UPLOAD_DIR, f"{job_id}{os.path.splitext(file_name)[1]}")
+    written = 0
+    try:
+        with open(file_path, "wb") as out:
+            while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > settings.MAX_UPLOAD_BYTES:
+                    raise HTTPException(413, "Workbook too large")
+                out.write(chunk)
+
+        job = ingestion_runner.submit(
+            file_path,
+            file_name,
+            _ingest(valid_user, donor_template_id),
+            job_id=job_id,
+            owner=valid_user,
+        )
+    except BaseException:
+        # Once submitted the job removes the file; until then nothing else would
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return IngestionJobAccepted(
+        job_id=job.id,
+        status=job.status,
+        status_url=str(request.url_for("get_ingestion_job", job_id=job.id)),
+        events_url=str(request.url_for("stream_ingestion_job", job_id=job.id)),
+    )
+
+
+def _visible_job(job_id: str, valid_user) -> IngestionJob:
+    """The job, or 404 if it does not exist or belongs to someone else."""
+    job = job_store.get(job_id)
+    if not job or not job.visible_to(valid_user):
+        raise HTTPException(404, "Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobStatus)
+def get_ingestion_job(job_id: str, valid_user=Depends(get_validated_user)):
+    return _visible_job(job_id, valid_user)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_ingestion_job(job_id: str, valid_user=Depends(get_validated_user)):
+    """Job progress as server-sent events, ending once the job has finished."""
+    await asyncio.to_thread(_visible_job, job_id, valid_user)
+    return StreamingResponse(
+        job_events(job_store, job_id, poll_interval=settings.INGESTION_SSE_POLL_INTERVAL),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # --- Templates ---
 @router.post("/templates", response_model=DonorTemplate)
 def create_template(
@@ -110,13 +207,17 @@ def create_budget_category_endpoint(
     db: Session = Depends(get_db),
     valid_user=Depends(get_validated_user),
 ):
-    return create_budget_category(
-        db,
-        user_id=valid_user["user_id"],
-        name=payload.name,
-        code=payload.code,
-        donor_template_id=payload.donor_template_id,
-    )
+    try:
+        return create_budget_category(
+            db,
+            user_id=valid_user["user_id"],
+            name=payload.name,
+            code=payload.code,
+            donor_template_id=payload.donor_template_id,
+        )
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(409, "Category already exists for this template")
 
 
 @router.get("/categories", response_model=List[BudgetCategory])
@@ -155,7 +256,7 @@ def suggest(
         .all()
     )
     # donor_fields = [row[0] for row in donor_fields]
-    suggestions = suggest_mapping(payload.ngo_fields, donor_fields)
+    suggestions = suggest_mapping(payload.ngo_fields, donor_fields, top_k=payload.top_k)
     return MappingResponse(suggestions=[MappingSuggestion(**s) for s in suggestions])
 
 
@@ -0,0 +1,25 @@
+"""Query parameters and response headers shared by the paginated list endpoints.
+
+List bodies stay plain JSON arrays; the cursor for the next page is sent in
+``X-Next-Cursor`` and as an RFC 8288 ``Link: <...>; rel="next"`` header and is
+absent on the last page.
+"""
+
+from typing import Annotated, List
+
+from fastapi import Query, Request, Response
+
+from app.core.config import settings
+from app.crud.pagination import Page
+
+Cursor = Annotated[str | None, Query(description="next_cursor of the previous page")]
+PageSize = Annotated[int, Query(ge=1, le=settings.PAGE_SIZE_MAX)]
+
+
+def page_items(page: Page, request: Request, response: Response) -> List:
+    """The page's items, with the next-page headers set on `response`."""
+    if page.next_cursor:
+        next_url = request.url.include_query_params(cursor=page.next_cursor)
+        response.headers["X-Next-Cursor"] = page.next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return page.items
@@ -25,6 +25,40 @@ class Settings(BaseSettings):
     REDIS_URL: str
     RULE_BASED_MAPPING_ENABLED: bool = False
     USE_SEMANTIC_EMBEDDINGS: bool = True  # Use Sentence Transformers for embeddings
+    EMBEDDING_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    EMBEDDING_MODEL_WARMUP: bool = False  # Load the embedding model at startup, not first use
+    EMBEDDING_MODEL_VERSION: str = "1"  # Bump to invalidate cached vectors
+    EMBEDDING_CACHE_DTYPE: str = "float32"  # or "float16" to halve Redis memory
+    EMBEDDING_CACHE_TTL: int = 86400
+    # Nearest-neighbour reuse of approved / frequently used semantic mappings
+    MAPPING_HISTORY_INDEX_PATH: str = str(BASE_DIR.parent / "data" / "mapping_history_index.npz")
+    MAPPING_HISTORY_MIN_TIMES_USED: int = 3
+    MAPPING_HISTORY_MIN_SCORE: float = 0.9
+    MAPPING_HISTORY_SYNC_OVERLAP: float = 300.0  # seconds re-read behind the sync watermark
+    SPREADSHEET_READER_BACKEND: str = "openpyxl"  # or "sax" for very large donor workbooks
+    # Template detection results cached by file SHA-256 (Redis LRU + in-process LRU)
+    DETECTION_CACHE_MAX_ENTRIES: int = 5000
+    DETECTION_CACHE_LOCAL_SIZE: int = 64
+    # Sheets of a multi-sheet workbook are detected in parallel processes
+    DETECTION_MAX_WORKERS: int = min(4, os.cpu_count() or 1)
+    DETECTION_SHEET_TIMEOUT: float = 30.0  # seconds; slower sheets are left out
+    # Uploaded workbooks are ingested by background jobs (see ingestion_jobs)
+    UPLOAD_DIR: str = "/app/uploads"
+    MAX_UPLOAD_BYTES: int = 50 * 1024 * 1024
+    INGESTION_MAX_CONCURRENT_JOBS: int = 2
+    INGESTION_JOB_TTL: int = 3600  # seconds a finished job's status is kept
+    INGESTION_SSE_POLL_INTERVAL: float = 0.5
+    # Uploads whose structural fingerprint is this similar to a known donor template reuse it
+    TEMPLATE_MATCH_THRESHOLD: float = 0.85
+    # Budget categories by (name, donor template) are cached in-process for this many seconds;
+    # a category changed through another worker can be served stale until then
+    CATEGORY_CACHE_TTL: float = 300.0
+    CATEGORY_CACHE_MAX_ENTRIES: int = 4096
+    # List endpoints are keyset-paginated; clients may ask for up to PAGE_SIZE_MAX rows
+    PAGE_SIZE_DEFAULT: int = 100
+    PAGE_SIZE_MAX: int = 500
+    # GET /budgets/{id}?stream=true reads and sends lines this many at a time
+    BUDGET_LINES_STREAM_BATCH: int = 1000
     # Databases
     budget_database_url: str
     # RabbitMQ
@@ -1,6 +1,10 @@
+from typing import Iterable
+from sqlalchemy import or_, select
 from sqlalchemy.orm import Session
+from app.crud.budget_summary_crud import move_category_summaries
 from app.models.budget import BudgetCategoryModel
-from uuid import UUID
+from app.utils.db import dialect_insert
+from uuid import UUID, uuid4
 
 
 def create_budget_category(
@@ -35,6 +39,70 @@ def get_budget_category_by_name_and_template_id(
     )
 
 
+CategoryKey = tuple[str, int | None]  # (name, donor_template_id)
+
+
+def get_budget_categories_by_keys(
+    session: Session, keys: Iterable[CategoryKey]
+) -> dict[CategoryKey, BudgetCategoryModel]:
+    """Categories for any number of (name, donor_template_id) keys, in one query."""
+    keys = set(keys)
+    if not keys:
+        return {}
+    template_ids = {template_id for _, template_id in keys}
+    scopes = []
+    if None in template_ids:
+        scopes.append(BudgetCategoryModel.donor_template_id.is_(None))
+    if template_ids - {None}:
+        scopes.append(BudgetCategoryModel.donor_template_id.in_(template_ids - {None}))
+    query = select(BudgetCategoryModel).where(
+        BudgetCategoryModel.name.in_({name for name, _ in keys}), or_(*scopes)
+    )
+    found: dict[CategoryKey, BudgetCategoryModel] = {}
+    for category in session.scalars(query):
+        key = (category.name, category.donor_template_id)
+        if key in keys:
+            found.setdefault(key, category)
+    return found
+
+
+def create_budget_categories(
+    session: Session, user_id: UUID | None, codes: dict[CategoryKey, str | None]
+) -> dict[CategoryKey, BudgetCategoryModel]:
+    """
+    Create a category for every key in `codes` ((name, donor_template_id) -> code).
+
+    One INSERT ... ON CONFLICT DO NOTHING RETURNING: keys that exist already
+    (e.g. created by a concurrent import) are read back instead of failing.
+    Nothing is committed: the caller owns the transaction.
+    """
+    if not codes:
+        return {}
+    statement = dialect_insert(session)(BudgetCategoryModel).values(
+        [
+            {
+                "id": uuid4(),
+                "name": name,
+                "code": code,
+                "donor_template_id": template_id,
+                "created_by": user_id,
+                "updated_by": user_id,
+            }
+            for (name, template_id), code in codes.items()
+        ]
+    )
+    created = session.scalars(
+        statement.on_conflict_do_nothing(
+            index_elements=[BudgetCategoryModel.name, BudgetCategoryModel.donor_template_id]
+        ).returning(BudgetCategoryModel)
+    )
+    found = {(c.name, c.donor_template_id): c for c in created}
+    lost = [key for key in codes if key not in found]
+    if lost:
+        found.update(get_budget_categories_by_keys(session, lost))
+    return found
+
+
 def get_budget_category(session: Session, category_id: UUID) -> BudgetCategoryModel | None:
     return session.query(BudgetCategoryModel).filter(BudgetCategoryModel.id == category_id).first()
 
@@ -62,6 +130,8 @@ def update_budget_category(
 def delete_budget_category(session: Session, category_id: UUID) -> bool:
     category = get_budget_category(session, category_id)
     if category:
+        # budget_lines.category_id is SET NULL on delete; their totals follow them
+        move_category_summaries(session, category.id)
         session.delete(category)
         session.commit()
         return True
@@ -1,8 +1,23 @@
-from sqlalchemy.orm import Session
-from app.models.budget import BudgetModel, BudgetStatus
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.orm import Session, contains_eager
+from app.crud.pagination import Page, paginate
+from app.models.budget import BudgetLineModel, BudgetModel, BudgetStatus
 from uuid import UUID
 
 
+@dataclass
+class BudgetFilters:
+    """Server-side filters for list_budgets; also the query parameters of GET /budgets/."""
+
+    status: BudgetStatus | None = None
+    funding_customer_id: UUID | None = None
+    external_funder_name: str | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+
 def create_budget(
     session: Session,
     user_id: UUID,
@@ -11,7 +26,9 @@ def create_budget(
     external_funder_name: str | None = None,
     owner_id: UUID | None = None,
     status: BudgetStatus | None = None,
+    commit: bool = True,
 ) -> BudgetModel:
+    """Add a budget; with `commit=False` it is only flushed into the caller's transaction."""
     budget = BudgetModel(
         name=name,
         owner_id=owner_id,
@@ -22,6 +39,9 @@ def create_budget(
         status=status or BudgetStatus.draft,
     )
     session.add(budget)
+    if not commit:
+        session.flush()
+        return budget
     session.commit()
     session.refresh(budget)
     return budget
@@ -38,11 +58,48 @@ def get_budget(
     return query.filter(BudgetModel.id == budget_id).first()
 
 
-def list_budgets(session: Session, customer_id: UUID | None = None, limit: int = 100):
+def get_budget_with_lines(
+    session: Session, budget_id: UUID, customer_id: UUID | None = None
+) -> BudgetModel | None:
+    """The budget with its lines (newest first) and their categories, in one query."""
+    query = (
+        select(BudgetModel)
+        .outerjoin(BudgetModel.lines)
+        .outerjoin(BudgetLineModel.category)
+        .options(contains_eager(BudgetModel.lines).contains_eager(BudgetLineModel.category))
+        .where(BudgetModel.id == budget_id)
+        .order_by(BudgetLineModel.created_at.desc(), BudgetLineModel.id.desc())
+        # Replace a lines collection already loaded in this session
+        .execution_options(populate_existing=True)
+    )
+    if customer_id:
+        query = query.where(BudgetModel.owner_id == customer_id)
+    return session.scalars(query).unique().one_or_none()
+
+
+def list_budgets(
+    session: Session,
+    customer_id: UUID | None = None,
+    filters: BudgetFilters | None = None,
+    cursor: str | None = None,
+    limit: int | None = 100,
+) -> Page[BudgetModel]:
+    """One page of budgets, newest first; pass the returned next_cursor for the next."""
     query = session.query(BudgetModel)
     if customer_id:
         query = query.filter(BudgetModel.owner_id == customer_id)
-    return query.limit(limit).all()
+    filters = filters or BudgetFilters()
+    if filters.status:
+        query = query.filter(BudgetModel.status == filters.status)
+    if filters.funding_customer_id:
+        query = query.filter(BudgetModel.funding_customer_id == filters.funding_customer_id)
+    if filters.external_funder_name:
+        query = query.filter(BudgetModel.external_funder_name == filters.external_funder_name)
+    if filters.created_from:
+        query = query.filter(BudgetModel.created_at >= filters.created_from)
+    if filters.created_to:
+        query = query.filter(BudgetModel.created_at < filters.created_to)
+    return paginate(query, BudgetModel, cursor, limit)
 
 
 def update_budget_name(session: Session, budget_id: UUID, new_name: str) -> BudgetModel | None:
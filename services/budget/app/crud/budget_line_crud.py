@@ -1,6 +1,12 @@
-from sqlalchemy.orm import Session
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator, Sequence
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session, joinedload
+from app.crud.budget_summary_crud import apply_summary_deltas, summary_deltas
+from app.crud.pagination import Page, paginate
 from app.models.budget import BudgetLineModel, BudgetModel
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from app.schemas import BudgetLineCreate
 
@@ -29,36 +35,120 @@ def create_budget_line(
         updated_by=user_id,
     )
     session.add(budget_line)
+    apply_summary_deltas(session, summary_deltas([(budget_id, category_id, amount)]))
     session.commit()
     session.refresh(budget_line)
     return budget_line
 
 
+def bulk_create_budget_lines(
+    session: Session, user_id: UUID, budget_id: UUID, lines: list[dict]
+) -> list[BudgetLineModel]:
+    """
+    Insert all `lines` of a budget with one multi-row INSERT ... RETURNING.
+
+    Each line is a dict of category_id, description, amount and extra_fields.
+    Nothing is committed: the caller owns the transaction.
+    """
+    if not lines:
+        return []
+    rows = [
+        {
+            "id": uuid4(),
+            "budget_id": budget_id,
+            "category_id": line.get("category_id"),
+            "description": line.get("description"),
+            "amount": line.get("amount"),
+            "extra_fields": line.get("extra_fields"),
+            "created_by": user_id,
+            "updated_by": user_id,
+        }
+        for line in lines
+    ]
+    created = list(session.scalars(insert(BudgetLineModel).values(rows).returning(BudgetLineModel)))
+    apply_summary_deltas(
+        session,
+        summary_deltas((budget_id, line.get("category_id"), line.get("amount")) for line in lines),
+    )
+    return created
+
+
 def get_budget_line(session: Session, budget_line_id: UUID) -> BudgetLineModel | None:
     return session.query(BudgetLineModel).filter(BudgetLineModel.id == budget_line_id).first()
 
 
+@dataclass
+class BudgetLineFilters:
+    """Server-side filters for list_budget_lines; query parameters of GET /budget-lines/."""
+
+    category_id: UUID | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+
 def list_budget_lines(
     session: Session,
     budget_id: UUID | None = None,
     customer_id: UUID | None = None,
-    limit: int = 100,
-):
+    filters: BudgetLineFilters | None = None,
+    cursor: str | None = None,
+    limit: int | None = 100,
+) -> Page[BudgetLineModel]:
+    """One page of budget lines, newest first; `limit=None` for all of them."""
     query = session.query(BudgetLineModel)
     if budget_id:
         query = query.filter(BudgetLineModel.budget_id == budget_id)
     if customer_id:
         query = query.join(BudgetLineModel.budget).filter(BudgetModel.owner_id == customer_id)
-    return query.limit(limit).all()
+    filters = filters or BudgetLineFilters()
+    if filters.category_id:
+        query = query.filter(BudgetLineModel.category_id == filters.category_id)
+    if filters.created_from:
+        query = query.filter(BudgetLineModel.created_at >= filters.created_from)
+    if filters.created_to:
+        query = query.filter(BudgetLineModel.created_at < filters.created_to)
+    return paginate(query, BudgetLineModel, cursor, limit)
+
+
+def iter_budget_lines(
+    session: Session, budget_id: UUID, batch_size: int = 1000
+) -> Iterator[Sequence[BudgetLineModel]]:
+    """Every line of a budget with its category, newest first, `batch_size` at a time.
+
+    Rows come from a server-side cursor where the driver has one, so memory
+    stays flat however many lines the budget has.
+    """
+    query = (
+        select(BudgetLineModel)
+        .options(joinedload(BudgetLineModel.category))
+        .where(BudgetLineModel.budget_id == budget_id)
+        .order_by(BudgetLineModel.created_at.desc(), BudgetLineModel.id.desc())
+        .execution_options(yield_per=batch_size)
+    )
+    yield from session.scalars(query).partitions()
 
 
 def list_budget_lines_by_category(
-    session: Session, category_id: UUID | None = None, limit: int = 100
-):
-    query = session.query(BudgetLineModel)
-    if category_id:
-        query = query.filter(BudgetLineModel.category_id == category_id)
-    return query.limit(limit).all()
+    session: Session,
+    category_id: UUID | None = None,
+    cursor: str | None = None,
+    limit: int | None = 100,
+) -> Page[BudgetLineModel]:
+    return list_budget_lines(
+        session, filters=BudgetLineFilters(category_id=category_id), cursor=cursor, limit=limit
+    )
+
+
+def _lock_line(session: Session, budget_line_id: UUID):
+    """The line's committed (amount,) row, locked until the transaction ends; None if gone.
+
+    Summary deltas are taken against this rather than the loaded object, so
+    concurrent writers of one line queue up instead of both applying a
+    delta against the same old amount.
+    """
+    return session.execute(
+        select(BudgetLineModel.amount).where(BudgetLineModel.id == budget_line_id).with_for_update()
+    ).first()
 
 
 def update_budget_line(
@@ -67,6 +157,11 @@ def update_budget_line(
     if new_budget_line.description is not None:
         existing_line.description = new_budget_line.description
     if new_budget_line.amount is not None:
+        locked = _lock_line(session, existing_line.id)
+        if locked is not None:
+            key = (existing_line.budget_id, existing_line.category_id)
+            change = new_budget_line.amount - (locked.amount or 0.0)
+            apply_summary_deltas(session, {key: (change, 0)})
         existing_line.amount = new_budget_line.amount
     if new_budget_line.extra_fields is not None:
         existing_line.extra_fields = {
@@ -79,6 +174,20 @@ def update_budget_line(
 
 
 def delete_budget_line(session: Session, budget_line: BudgetLineModel) -> bool:
+    locked = _lock_line(session, budget_line.id)
+    if locked is not None:  # not already deleted by a concurrent request
+        line = (budget_line.budget_id, budget_line.category_id, locked.amount)
+        apply_summary_deltas(session, summary_deltas([line], sign=-1))
     session.delete(budget_line)
     session.commit()
     return True
+
+
+def list_budget_line_amounts(session: Session, budget_id: UUID) -> list[tuple[UUID, float | None]]:
+    """(id, amount) for every line of a budget, without loading full ORM objects."""
+    rows = (
+        session.query(BudgetLineModel.id, BudgetLineModel.amount)
+        .filter(BudgetLineModel.budget_id == budget_id)
+        .all()
+    )
+    return [(row.id, row.amount) for row in rows]
@@ -0,0 +1,116 @@
+"""Incremental maintenance of the budget_summaries read model.
+
+Line writes in budget_line_crud (and the archive importer) pass their
+effect on (budget, category) totals to apply_summary_deltas inside their
+own transaction, so the summary commits or rolls back with the lines.
+"""
+
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.budget import BudgetLineModel
+from app.models.budget_summary import BudgetSummaryModel
+from app.utils.db import dialect_insert
+
+SummaryKey = tuple[UUID, UUID | None]  # (budget_id, category_id)
+
+
+def summary_deltas(
+    lines: Iterable[tuple[UUID, UUID | None, float | None]], sign: int = 1
+) -> dict[SummaryKey, tuple[float, int]]:
+    """(amount, line count) change per (budget, category) of adding (sign=1) or
+    removing (sign=-1) `lines`, given as (budget_id, category_id, amount)."""
+    deltas: dict[SummaryKey, tuple[float, int]] = {}
+    for budget_id, category_id, amount in lines:
+        total, count = deltas.get((budget_id, category_id), (0.0, 0))
+        deltas[(budget_id, category_id)] = (total + sign * (amount or 0.0), count + sign)
+    return deltas
+
+
+def apply_summary_deltas(session: Session, deltas: dict[SummaryKey, tuple[float, int]]) -> None:
+    """Add `deltas` to budget_summaries with one upsert. Nothing is committed."""
+    if not deltas:
+        return
+    table = BudgetSummaryModel.__table__
+    # A fixed row order keeps concurrent writers from deadlocking on each other's rows
+    rows = [
+        {
+            "budget_id": budget_id,
+            "category_id": category_id,
+            "total_amount": total,
+            "line_count": count,
+        }
+        for (budget_id, category_id), (total, count) in sorted(
+            deltas.items(), key=lambda item: (str(item[0][0]), str(item[0][1]))
+        )
+    ]
+    statement = dialect_insert(session)(table).values(rows)
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c.budget_id, table.c.category_id],
+            set_={
+                "total_amount": table.c.total_amount + statement.excluded.total_amount,
+                "line_count": table.c.line_count + statement.excluded.line_count,
+                "updated_at": func.now(),
+            },
+        )
+    )
+
+
+def move_category_summaries(
+    session: Session, category_id: UUID, target_id: UUID | None = None
+) -> None:
+    """Fold `category_id`'s summary rows into `target_id` (the NULL category by default).
+
+    Deleting a category sets its lines' category_id to NULL, so its totals
+    move with them. Call it in the delete's transaction. Nothing is committed.
+    """
+    table = BudgetSummaryModel.__table__
+    rows = session.execute(
+        select(table.c.budget_id, table.c.total_amount, table.c.line_count)
+        .where(table.c.category_id == category_id)
+        .with_for_update()
+    ).all()
+    if not rows:
+        return
+    session.execute(delete(table).where(table.c.category_id == category_id))
+    apply_summary_deltas(
+        session, {(budget_id, target_id): (total, count) for budget_id, total, count in rows}
+    )
+
+
+def list_budget_summaries(session: Session, budget_ids: list[UUID]) -> list[BudgetSummaryModel]:
+    if not budget_ids:
+        return []
+    return list(
+        session.scalars(
+            select(BudgetSummaryModel).where(BudgetSummaryModel.budget_id.in_(budget_ids))
+        )
+    )
+
+
+def rebuild_budget_summaries(session: Session, budget_ids: list[UUID] | None = None) -> int:
+    """Recompute summaries from budget_lines (all budgets, or `budget_ids`).
+
+    Returns the number of summary rows written. Nothing is committed.
+    """
+    aggregate = select(
+        BudgetLineModel.budget_id,
+        BudgetLineModel.category_id,
+        func.coalesce(func.sum(BudgetLineModel.amount), 0.0),
+        func.count(),
+    ).group_by(BudgetLineModel.budget_id, BudgetLineModel.category_id)
+    clear = delete(BudgetSummaryModel)
+    if budget_ids is not None:
+        aggregate = aggregate.where(BudgetLineModel.budget_id.in_(budget_ids))
+        clear = clear.where(BudgetSummaryModel.budget_id.in_(budget_ids))
+    session.execute(clear)
+    result = session.execute(
+        insert(BudgetSummaryModel.__table__).from_select(
+            ["budget_id", "category_id", "total_amount", "line_count"], aggregate
+        )
+    )
+    return result.rowcount
@@ -0,0 +1,70 @@
+from datetime import date, datetime
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.exchange_rate import ExchangeRateModel
+from app.utils.db import dialect_insert
+from shared.services.exchange_rate_service import ExchangeRate
+
+_CONFLICT_COLUMNS = ["rate_date", "base_currency", "quote_currency"]
+
+
+def bulk_upsert_exchange_rates(
+    session: Session,
+    rates: list[ExchangeRate],
+    source: str | None = None,
+    chunk_size: int = 1000,
+) -> int:
+    """
+    Insert or overwrite rates with multi-row INSERT ... ON CONFLICT statements.
+    """
+    rows = [
+        {
+            "rate_date": r.rate_date,
+            "base_currency": r.base_currency,
+            "quote_currency": r.quote_currency,
+            "rate": r.rate,
+            "source": source,
+        }
+        for r in rates
+    ]
+    for start in range(0, len(rows), chunk_size):
+        end = start + chunk_size
+        stmt = dialect_insert(session)(ExchangeRateModel).values(rows[start:end])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=_CONFLICT_COLUMNS,
+            set_={
+                "rate": stmt.excluded.rate,
+                "source": stmt.excluded.source,
+                "imported_at": func.now(),
+            },
+        )
+        session.execute(stmt)
+    session.commit()
+    return len(rows)
+
+
+def exchange_rates_version(session: Session) -> datetime | None:
+    """Cheap change marker for the stored rates: when they were last imported."""
+    return session.query(func.max(ExchangeRateModel.imported_at)).scalar()
+
+
+def get_exchange_rates_on_or_before(
+    session: Session, base_currency: str, on_date: date
+) -> list[ExchangeRateModel]:
+    """All rates of the latest table published on or before on_date."""
+    latest = (
+        select(func.max(ExchangeRateModel.rate_date))
+        .where(
+            ExchangeRateModel.base_currency == base_currency,
+            ExchangeRateModel.rate_date <= on_date,
+        )
+        .scalar_subquery()
+    )
+    return (
+        session.query(ExchangeRateModel)
+        .filter(
+            ExchangeRateModel.base_currency == base_currency,
+            ExchangeRateModel.rate_date == latest,
+        )
+        .all()
+    )
@@ -1,3 +1,6 @@
+from datetime import datetime
+
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
 from uuid import UUID
 from app.models.mapping import SemanticFieldMappingModel
@@ -14,6 +17,103 @@ def list_semantic_field_mappings(
     return query.limit(limit).all()
 
 
+def list_approved_semantic_field_mappings(session: Session) -> list[tuple[str, str, str]]:
+    """(normalized_value, mapped_to, mapped_key) of every human-approved mapping."""
+    rows = (
+        session.query(
+            SemanticFieldMappingModel.normalized_value,
+            SemanticFieldMappingModel.mapped_to,
+            SemanticFieldMappingModel.mapped_key,
+        )
+        .filter(
+            SemanticFieldMappingModel.approved.is_(True),
+            SemanticFieldMappingModel.mapped_to != "ignored",
+            SemanticFieldMappingModel.mapped_key != "",
+        )
+        .order_by(SemanticFieldMappingModel.created_at, SemanticFieldMappingModel.id)
+        .all()
+    )
+    return [(row[0], row[1], row[2]) for row in rows]
+
+
+def approved_semantic_field_mappings_version(session: Session) -> tuple:
+    """Cheap change marker for the approved mappings: (count, last change time)."""
+    model = SemanticFieldMappingModel
+    count, last_changed = (
+        session.query(
+            func.count(model.id),
+            func.max(func.coalesce(model.updated_at, model.created_at)),
+        )
+        .filter(model.approved.is_(True))
+        .one()
+    )
+    return count, last_changed
+
+
+def list_semantic_field_mapping_changes(session: Session, since: datetime | None = None):
+    """Rows created or updated at/after `since` (all rows when None), oldest first.
+
+    Each row is (id, normalized_value, mapped_to, mapped_key, confidence,
+    approved, times_used, changed_at).
+    """
+    model = SemanticFieldMappingModel
+    changed_at = func.coalesce(model.updated_at, model.created_at)
+    query = session.query(
+        model.id,
+        model.normalized_value,
+        model.mapped_to,
+        model.mapped_key,
+        model.confidence,
+        model.approved,
+        model.times_used,
+        changed_at.label("changed_at"),
+    )
+    if since is not None:
+        query = query.filter(changed_at >= since)
+    return query.order_by(changed_at, model.id).all()
+
+
+def get_semantic_field_mappings_by_normalized_values(
+    session: Session,
+    normalized_values: list[str],
+    chunk_size: int = 1000,
+) -> dict[str, SemanticFieldMappingModel]:
+    """
+    Map each known normalized value to its oldest mapping, with one IN query
+    per `chunk_size` values.
+    """
+    found: dict[str, SemanticFieldMappingModel] = {}
+    for start in range(0, len(normalized_values), chunk_size):
+        end = start + chunk_size
+        rows = (
+            session.query(SemanticFieldMappingModel)
+            .filter(SemanticFieldMappingModel.normalized_value.in_(normalized_values[start:end]))
+            .order_by(SemanticFieldMappingModel.created_at, SemanticFieldMappingModel.id)
+            .all()
+        )
+        for row in rows:
+            found.setdefault(row.normalized_value, row)
+    return found
+
+
+def increment_semantic_field_mapping_usage(session: Session, usage: dict[UUID, int]) -> None:
+    """
+    Add usage[id] to times_used, issuing one UPDATE per distinct increment.
+    Does not commit.
+    """
+    by_increment: dict[int, list[UUID]] = {}
+    for mapping_id, count in usage.items():
+        by_increment.setdefault(count, []).append(mapping_id)
+    model = SemanticFieldMappingModel
+    for count, ids in by_increment.items():
+        session.execute(
+            update(model)
+            .where(model.id.in_(ids))
+            .values(times_used=model.times_used + count)
+            .execution_options(synchronize_session=False)
+        )
+
+
 def create_semantic_field_mapping(
     session: Session,
     user_id: UUID,
@@ -0,0 +1,76 @@
+from uuid import UUID
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.models.mapping import MappingRuleModel
+
+
+def _scope_filter(customer_id: UUID | None, donor_template_id: int | None):
+    """Global rules plus those for this customer and/or donor template."""
+    model = MappingRuleModel
+    return (
+        or_(model.customer_id.is_(None), model.customer_id == customer_id),
+        or_(model.donor_template_id.is_(None), model.donor_template_id == donor_template_id),
+    )
+
+
+def list_mapping_rules(
+    session: Session,
+    customer_id: UUID | None = None,
+    donor_template_id: int | None = None,
+) -> list[MappingRuleModel]:
+    return (
+        session.query(MappingRuleModel)
+        .filter(*_scope_filter(customer_id, donor_template_id))
+        .order_by(MappingRuleModel.priority, MappingRuleModel.created_at, MappingRuleModel.id)
+        .all()
+    )
+
+
+def mapping_rules_version(
+    session: Session,
+    customer_id: UUID | None = None,
+    donor_template_id: int | None = None,
+) -> tuple:
+    """Cheap change marker for a rule scope: (count, last change time)."""
+    model = MappingRuleModel
+    count, last_changed = (
+        session.query(
+            func.count(model.id),
+            func.max(func.coalesce(model.updated_at, model.created_at)),
+        )
+        .filter(*_scope_filter(customer_id, donor_template_id))
+        .one()
+    )
+    return count, last_changed
+
+
+def create_mapping_rule(
+    session: Session,
+    user_id: UUID | None,
+    pattern: str,
+    mapped_to: str,
+    mapped_key: str | None = None,
+    confidence: float = 0.9,
+    priority: int = 100,
+    match_type: str = "contains",
+    customer_id: UUID | None = None,
+    donor_template_id: int | None = None,
+) -> MappingRuleModel:
+    rule = MappingRuleModel(
+        pattern=pattern,
+        match_type=match_type,
+        mapped_to=mapped_to,
+        mapped_key=mapped_key,
+        confidence=confidence,
+        priority=priority,
+        customer_id=customer_id,
+        donor_template_id=donor_template_id,
+        created_by=user_id,
+        updated_by=user_id,
+    )
+    session.add(rule)
+    session.commit()
+    session.refresh(rule)
+    return rule
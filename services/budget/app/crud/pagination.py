@@ -0,0 +1,59 @@
+"""Keyset pagination on (created_at, id), newest first.
+
+Pages are fetched with ``WHERE (created_at, id) < (:created_at, :id)`` so
+every page costs the same however deep the client has paged, given a
+composite index ending in (created_at, id). Cursors are opaque to clients:
+urlsafe base64 of the last row's key.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Generic, List, TypeVar
+from uuid import UUID
+
+from fastapi import status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+from app.core.exceptions import DomainError
+
+T = TypeVar("T")
+
+
+@dataclass
+class Page(Generic[T]):
+    items: List[T] = field(default_factory=list)
+    next_cursor: str | None = None
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    raw = json.dumps([created_at.isoformat(), str(row_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (ValueError, TypeError) as exc:
+        raise DomainError("Invalid cursor", status.HTTP_400_BAD_REQUEST) from exc
+
+
+def paginate(query: Query, model, cursor: str | None = None, limit: int | None = 100) -> Page:
+    """One page of `query` ordered newest first; `limit=None` returns every row."""
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < (created_at, row_id))
+    if limit is None:
+        return Page(query.all())
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return Page(rows)
+    last = rows[limit - 1]
+    return Page(rows[:limit], encode_cursor(last.created_at, last.id))
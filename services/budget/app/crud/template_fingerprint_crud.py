@@ -0,0 +1,100 @@
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.mapping import TemplateFingerprintModel
+
+
+def list_template_fingerprints(
+    session: Session, fingerprint_version: int, customer_id: UUID | None
+) -> list:
+    """(id, header_labels, skeleton) of a customer's fingerprints of this version, oldest first."""
+    model = TemplateFingerprintModel
+    return (
+        session.query(model.id, model.header_labels, model.skeleton)
+        .filter(
+            model.fingerprint_version == fingerprint_version,
+            (
+                model.customer_id.is_(None)
+                if customer_id is None
+                else model.customer_id == customer_id
+            ),
+        )
+        .order_by(model.created_at, model.id)
+        .all()
+    )
+
+
+def template_fingerprints_version(session: Session) -> tuple:
+    """Cheap change marker for the stored fingerprints: (count, last change time)."""
+    model = TemplateFingerprintModel
+    count, last_changed = session.query(
+        func.count(model.id),
+        func.max(func.coalesce(model.updated_at, model.created_at)),
+    ).one()
+    return count, last_changed
+
+
+def get_template_fingerprint(
+    session: Session, fingerprint_id: UUID
+) -> TemplateFingerprintModel | None:
+    return session.get(TemplateFingerprintModel, fingerprint_id)
+
+
+def save_template_fingerprint(
+    session: Session,
+    user_id: UUID | None,
+    customer_id: UUID | None,
+    donor_template_id: int,
+    digest: str,
+    fingerprint_version: int,
+    header_labels: list[str],
+    skeleton: list[str],
+    structure: dict | None = None,
+    mappings: dict | None = None,
+) -> TemplateFingerprintModel:
+    """Store a customer's template fingerprint, replacing the payload if it is already known."""
+    model = TemplateFingerprintModel
+    fingerprint = (
+        session.query(model)
+        .filter(
+            model.donor_template_id == donor_template_id,
+            model.digest == digest,
+            (
+                model.customer_id.is_(None)
+                if customer_id is None
+                else model.customer_id == customer_id
+            ),
+        )
+        .first()
+    )
+    if fingerprint is None:
+        fingerprint = TemplateFingerprintModel(
+            donor_template_id=donor_template_id,
+            digest=digest,
+            customer_id=customer_id,
+            created_by=user_id,
+        )
+        session.add(fingerprint)
+    fingerprint.fingerprint_version = fingerprint_version
+    fingerprint.header_labels = header_labels
+    fingerprint.skeleton = skeleton
+    fingerprint.structure = structure
+    fingerprint.mappings = mappings
+    fingerprint.updated_by = user_id
+    session.commit()
+    session.refresh(fingerprint)
+    return fingerprint
+
+
+def update_template_fingerprint_mappings(
+    session: Session, fingerprint_id: UUID, mappings: dict
+) -> TemplateFingerprintModel | None:
+    """Replace a stored template's mapping snapshot; None if it has been deleted."""
+    fingerprint = get_template_fingerprint(session, fingerprint_id)
+    if fingerprint is None:
+        return None
+    fingerprint.mappings = mappings
+    session.commit()
+    return fingerprint
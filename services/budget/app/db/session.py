@@ -1,4 +1,6 @@
 # /services/budget/app/db/session.py
+from functools import lru_cache
+
 from sqlalchemy import create_engine
 from app.core.config import settings
 from sqlalchemy.orm import sessionmaker
@@ -8,3 +10,11 @@ SQLALCHEMY_DATABASE_URL = settings.budget_database_url
 
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+@lru_cache(maxsize=None)
+def session_factory(database_url: str | None = None) -> sessionmaker:
+    """SessionLocal, or a factory for another database (the scripts' --database-url)."""
+    if database_url is None:
+        return SessionLocal
+    return sessionmaker(bind=create_engine(database_url), autocommit=False, autoflush=False)
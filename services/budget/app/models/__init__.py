@@ -1,21 +1,29 @@
 from app.models.budget import BudgetModel, BudgetLineModel
+from app.models.budget_summary import BudgetSummaryModel
 from app.models.mapping import (
     NgoMappingModel,
     DonorTemplateModel,
     DonorFieldModel,
     SemanticFieldMappingModel,
+    MappingRuleModel,
+    TemplateFingerprintModel,
 )
 from app.models.budget_templates import UploadedTemplateModel, TemplateToBudgetMappingModel
 from app.models.user_cache import UserProfileModel
+from app.models.exchange_rate import ExchangeRateModel
 
 __all__ = [
     "BudgetModel",
     "BudgetLineModel",
+    "BudgetSummaryModel",
     "NgoMappingModel",
     "DonorTemplateModel",
     "DonorFieldModel",
     "UploadedTemplateModel",
     "TemplateToBudgetMappingModel",
     "SemanticFieldMappingModel",
+    "MappingRuleModel",
+    "TemplateFingerprintModel",
     "UserProfileModel",
+    "ExchangeRateModel",
 ]
@@ -1,7 +1,17 @@
 # /services/budget/app/models/budget.py
 from __future__ import annotations
 import uuid
-from sqlalchemy import String, ForeignKey, Float, JSON, Integer, Enum as SQLEnum, text
+from sqlalchemy import (
+    String,
+    ForeignKey,
+    Float,
+    JSON,
+    Integer,
+    Enum as SQLEnum,
+    Index,
+    UniqueConstraint,
+    text,
+)
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from app.utils.db import GUID
 
@@ -17,6 +27,26 @@ if TYPE_CHECKING:
 
 class BudgetModel(Base, AuditMixin):
     __tablename__ = "budgets"
+    # Keyset pagination (see crud.pagination): one index per list filter, ending in (created_at, id)
+    __table_args__ = (
+        Index("ix_budgets_created_at_id", "created_at", "id"),
+        Index("ix_budgets_owner_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_budgets_owner_status_created_at_id", "owner_id", "status", "created_at", "id"),
+        Index(
+            "ix_budgets_owner_funder_created_at_id",
+            "owner_id",
+            "funding_customer_id",
+            "created_at",
+            "id",
+        ),
+        Index(
+            "ix_budgets_owner_funder_name_created_at_id",
+            "owner_id",
+            "external_funder_name",
+            "created_at",
+            "id",
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         GUID(),
@@ -47,6 +77,11 @@ class BudgetModel(Base, AuditMixin):
 
 class BudgetLineModel(Base, AuditMixin):
     __tablename__ = "budget_lines"
+    __table_args__ = (
+        Index("ix_budget_lines_created_at_id", "created_at", "id"),
+        Index("ix_budget_lines_budget_created_at_id", "budget_id", "created_at", "id"),
+        Index("ix_budget_lines_category_created_at_id", "category_id", "created_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         GUID(), primary_key=True, index=True, default=lambda: uuid.uuid4()
@@ -69,6 +104,15 @@ class BudgetLineModel(Base, AuditMixin):
 
 class BudgetCategoryModel(Base, AuditMixin):
     __tablename__ = "budget_categories"
+    __table_args__ = (
+        # One category per name and template; NULL template ids compare equal
+        UniqueConstraint(
+            "name",
+            "donor_template_id",
+            name="uq_budget_categories_name_template",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         GUID(), primary_key=True, index=True, default=lambda: uuid.uuid4()
@@ -0,0 +1,41 @@
+from __future__ import annotations
+import uuid
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import DateTime, Float, ForeignKey, Integer, UniqueConstraint, func
+from app.models.base import Base
+from app.utils.db import GUID
+
+
+class BudgetSummaryModel(Base):
+    """Running total and line count of one budget's lines in one category.
+
+    A read model kept in step with budget_lines by budget_summary_crud in the
+    same transaction as every line write; a budget's total is the sum of its
+    rows. Rebuild with ``python -m scripts.rebuild_budget_summaries``.
+    """
+
+    __tablename__ = "budget_summaries"
+    __table_args__ = (
+        UniqueConstraint(
+            "budget_id",
+            "category_id",
+            name="uq_budget_summaries_budget_category",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    budget_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(), ForeignKey("budgets.id", ondelete="CASCADE"), nullable=False
+    )
+    category_id: Mapped[uuid.UUID | None] = mapped_column(
+        GUID(),
+        nullable=True,
+        comment="No foreign key: totals outlive a deleted category until the next rebuild",
+    )
+    total_amount: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    line_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,31 @@
+from __future__ import annotations
+from datetime import date, datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, Float, Date, DateTime, Index, UniqueConstraint, func
+from app.models.base import Base
+
+
+class ExchangeRateModel(Base):
+    """One published rate: ``1 base_currency == rate quote_currency`` on rate_date."""
+
+    __tablename__ = "exchange_rates"
+    __table_args__ = (
+        UniqueConstraint(
+            "rate_date", "base_currency", "quote_currency", name="uq_exchange_rates_date_pair"
+        ),
+        Index("ix_exchange_rates_base_currency_rate_date", "base_currency", "rate_date"),
+        # max(imported_at) tells every process when rates were last imported
+        Index("ix_exchange_rates_imported_at", "imported_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    rate_date: Mapped[date] = mapped_column(Date, nullable=False)
+    base_currency: Mapped[str] = mapped_column(String(3), nullable=False)
+    quote_currency: Mapped[str] = mapped_column(String(3), nullable=False)
+    rate: Mapped[float] = mapped_column(Float, nullable=False)
+    source: Mapped[str | None] = mapped_column(
+        String(255), nullable=True, comment="File or feed the rate was imported from"
+    )
+    imported_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
@@ -3,7 +3,7 @@ import uuid
 from enum import Enum
 from typing import TYPE_CHECKING
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, Float, Boolean, Enum as SQLEnum, ForeignKey
+from sqlalchemy import String, Integer, Float, Boolean, Enum as SQLEnum, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from app.models.base import Base
 from shared.db.audit_mixin import AuditMixin
@@ -132,3 +132,90 @@ class NgoMappingModel(Base):
     confidence: Mapped[float] = mapped_column(Float, nullable=False)
 
     donor_field: Mapped["DonorFieldModel"] = relationship(back_populates="mappings")
+
+
+class MappingRuleModel(Base, AuditMixin):
+    """Keyword rule for the rule-based mapping tier.
+
+    Rules without customer_id / donor_template_id apply to everyone; scoped
+    rules are added on top of the built-in set for that customer or template.
+    """
+
+    __tablename__ = "mapping_rules"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        GUID(),
+        primary_key=True,
+        default=lambda: uuid.uuid4(),
+    )
+    customer_id: Mapped[uuid.UUID | None] = mapped_column(GUID(), nullable=True)
+    donor_template_id: Mapped[int | None] = mapped_column(
+        ForeignKey("donor_templates.id", ondelete="CASCADE"), nullable=True
+    )
+    pattern: Mapped[str] = mapped_column(
+        String,
+        nullable=False,
+        comment="Normalized phrase, e.g. 'staff'",
+    )
+    match_type: Mapped[str] = mapped_column(
+        String(16),
+        nullable=False,
+        default="contains",
+        comment="contains | exact",
+    )
+    mapped_to: Mapped[str] = mapped_column(String, nullable=False)
+    mapped_key: Mapped[str | None] = mapped_column(String, nullable=True)
+    confidence: Mapped[float] = mapped_column(Float, nullable=False, default=0.9)
+    priority: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=100,
+        comment="Lower wins when several rules match",
+    )
+
+    __table_args__ = (Index("ix_mapping_rules_scope", "customer_id", "donor_template_id"),)
+
+
+class TemplateFingerprintModel(Base, AuditMixin):
+    """Structural fingerprint of an upload recognised as a DonorTemplateModel.
+
+    Keeps the detection output and semantic mappings produced for it, so a
+    later upload by the same customer with the same (or a near-identical)
+    layout reuses them.
+    """
+
+    __tablename__ = "template_fingerprints"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        GUID(),
+        primary_key=True,
+        default=lambda: uuid.uuid4(),
+    )
+    donor_template_id: Mapped[int] = mapped_column(
+        ForeignKey("donor_templates.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    digest: Mapped[str] = mapped_column(
+        String(64),
+        nullable=False,
+        index=True,
+        comment="sha256 of the normalized header labels and category skeleton",
+    )
+    customer_id: Mapped[uuid.UUID | None] = mapped_column(
+        GUID(),
+        nullable=True,
+        index=True,
+        comment="Customer whose upload it was; only their uploads are matched against it",
+    )
+    fingerprint_version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    header_labels: Mapped[list] = mapped_column(JSONB, nullable=False)
+    skeleton: Mapped[list] = mapped_column(JSONB, nullable=False)
+    structure: Mapped[dict | None] = mapped_column(
+        JSONB,
+        nullable=True,
+        comment="detect_excel_structure output for the template",
+    )
+    mappings: Mapped[dict | None] = mapped_column(
+        JSONB,
+        nullable=True,
+        comment="suggest_semantic_mapping output for the template's labels",
+    )
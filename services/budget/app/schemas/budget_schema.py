@@ -1,6 +1,28 @@
+from uuid import UUID
+
+from pydantic import BaseModel
+
 from shared.schemas.budget_schema import BudgetBase  # noqa: F401
 from shared.schemas.budget_schema import BudgetCreate  # noqa: F401
 from shared.schemas.budget_schema import Budget  # noqa: F401
 from shared.schemas.budget_schema import BudgetUpdate  # noqa: F401
 from shared.schemas.budget_schema import BudgetWithLines  # noqa: F401
 from shared.schemas.budget_schema import BudgetStatus  # noqa: F401
+
+
+class CategoryTotals(BaseModel):
+    category_id: UUID | None = None
+    total_amount: float = 0.0
+    line_count: int = 0
+
+
+class BudgetTotals(BaseModel):
+    """Totals read from the budget_summaries read model, not from the lines."""
+
+    total_amount: float = 0.0
+    line_count: int = 0
+    categories: list[CategoryTotals] = []
+
+
+class BudgetWithTotals(BudgetWithLines):
+    totals: BudgetTotals | None = None
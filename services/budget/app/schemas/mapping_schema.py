@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List
+from typing import Any, Dict, List
 from pydantic import BaseModel, Field
 from app.schemas.budget_line_schema import BudgetCategory
 
@@ -49,15 +49,22 @@ class DonorField(DonorFieldBase):
 
 
 # NGO Mapping Schemas
+class MappingAlternative(BaseModel):
+    donor_field: str
+    confidence: float
+
+
 class MappingSuggestion(BaseModel):
     ngo_field: str
     donor_field: str
     confidence: float
+    alternatives: List[MappingAlternative] = []
 
 
 class MappingRequest(BaseModel):
     ngo_fields: List[str]
     donor_template_id: int
+    top_k: int = Field(default=1, ge=1, le=20, description="Donor field alternatives per field")
 
 
 class MappingResponse(BaseModel):
@@ -79,3 +86,25 @@ class NgoMapping(NgoMappingBase):
     id: int
 
     model_config = {"from_attributes": True}
+
+
+# Upload ingestion jobs
+class IngestionJobStatus(BaseModel):
+    id: str
+    file_name: str
+    status: str
+    stage: str | None = None
+    progress: float
+    result: Dict[str, Any] | None = None
+    error: str | None = None
+    created_at: float
+    updated_at: float
+
+    model_config = {"from_attributes": True}
+
+
+class IngestionJobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+    events_url: str
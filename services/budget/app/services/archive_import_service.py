@@ -0,0 +1,387 @@
+"""Bulk import of legacy budget workbooks (see scripts/import_budget_archive.py).
+
+Each workbook becomes one ai_draft budget: its active sheet goes through the
+template_detection pipeline, its labels through suggest_semantic_mapping,
+and the budget, any new categories and every line are written with bulk
+INSERTs in a single transaction. Files are spread over a process pool, each
+worker with its own database session; one bad file fails alone.
+
+Progress is appended to a JSON-lines manifest keyed by file SHA-256, so an
+interrupted run resumes where it stopped and renamed or copied files are
+not imported twice.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.logging import get_logger
+from app.crud.budget_summary_crud import apply_summary_deltas, summary_deltas
+from app.db.session import session_factory
+from app.models.budget import BudgetLineModel, BudgetModel
+from app.schemas.budget_schema import BudgetStatus
+from app.services.budget_category_services import (
+    category_code,
+    invalidating_categories_on_error,
+    resolve_categories,
+)
+from app.services.mapping_service import suggest_semantic_mapping
+from app.services.template_detection.detection_cache import file_digest
+from app.services.template_detection.detector import (
+    classify_row,
+    detect_sheet_from_rows,
+    infer_currency,
+)
+from app.services.template_detection.xlsx_reader import OpenpyxlReader, RowRecord, SheetReader
+
+logger = get_logger(__name__)
+
+IMPORTED = "imported"
+EMPTY = "empty"  # no budget lines found; nothing written
+FAILED = "failed"
+DONE = (IMPORTED, EMPTY)
+
+_NUMBERING = re.compile(r"^\d+\.\s+")
+_FILLED_IN_ROW_TYPES = ("metadata", "signature")
+_AMOUNT_LABELS = ("total", "amount", "cost")
+
+
+@dataclass(frozen=True)
+class ImportOptions:
+    owner_id: uuid.UUID
+    user_id: uuid.UUID | None = None
+    donor_template_id: int | None = None
+    external_funder_name: str | None = None
+    default_currency: str = "GBP"
+    # None: the service database (app.db.session)
+    database_url: str | None = None
+
+
+@dataclass
+class ParsedBudget:
+    sheet: str
+    labels: List[str]  # metadata, header and category labels, for semantic mapping
+    metadata: Dict[str, Any]  # metadata label -> first value beside it
+    amount_label: str | None
+    lines: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class ImportResult:
+    path: str
+    sha256: str
+    status: str
+    budget_id: str | None = None
+    lines: int = 0
+    error: str | None = None
+    seconds: float = 0.0
+
+
+@dataclass
+class ImportSummary:
+    files: int = 0
+    imported: int = 0
+    empty: int = 0
+    skipped: int = 0
+    failed: int = 0
+    lines: int = 0
+    seconds: float = 0.0
+    failures: List[Dict[str, str]] = field(default_factory=list)
+
+    @property
+    def files_per_second(self) -> float:
+        processed = self.imported + self.empty + self.failed
+        return processed / self.seconds if self.seconds else 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.lines / self.seconds if self.seconds else 0.0
+
+    def add(self, result: ImportResult) -> None:
+        if result.status == IMPORTED:
+            self.imported += 1
+            self.lines += result.lines
+        elif result.status == EMPTY:
+            self.empty += 1
+        else:
+            self.failed += 1
+            self.failures.append({"path": result.path, "error": result.error or ""})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **asdict(self),
+            "files_per_second": round(self.files_per_second, 2),
+            "rows_per_second": round(self.rows_per_second, 2),
+        }
+
+
+# -- parsing -------------------------------------------------------------------
+
+
+def _amount_column(columns: List[dict]) -> dict | None:
+    """Rightmost total / amount / cost column, else the rightmost numeric one."""
+    for col in reversed(columns):
+        if any(label in col["normalized"] for label in _AMOUNT_LABELS):
+            return col
+    numeric = [c for c in columns if c["type"] == "number"]
+    return numeric[-1] if numeric else None
+
+
+def _first_text(values: List[Any]) -> str:
+    first = values[0] if values else None
+    return first.strip() if isinstance(first, str) else ""
+
+
+def parse_budget_workbook(file_path: str, reader: SheetReader | None = None) -> ParsedBudget:
+    """Budget lines of the workbook's active sheet, grouped under their categories.
+
+    The header is detected like detect_excel_structure, skipping metadata
+    rows ("Project name: ...") so they are not taken for it. Rows below it
+    that classify_row calls example items become lines, their amount read
+    from the header's total column. Formula cells give Excel's cached values.
+    A sheet without a header row has no lines.
+    """
+    reader = reader or OpenpyxlReader(file_path, data_only=True)
+    sheet = reader.active_sheet()
+
+    def layout_rows() -> Iterable[RowRecord]:
+        for record in reader.iter_rows(sheet):
+            text = _first_text(record[1])
+            if not text or classify_row(text) not in _FILLED_IN_ROW_TYPES:
+                yield record
+
+    detected = detect_sheet_from_rows(layout_rows())
+    if detected is None:  # not a budget table
+        return ParsedBudget(sheet=sheet, labels=[], metadata={}, amount_label=None)
+    header_row, columns, _ = detected
+    amount = _amount_column(columns)
+
+    parsed = ParsedBudget(
+        sheet=sheet,
+        labels=[c["label"] for c in columns],
+        metadata={},
+        amount_label=amount["label"] if amount else None,
+    )
+    category: str | None = None
+    for row_number, values, _ in reader.iter_rows(sheet):
+        text = _first_text(values)
+        row_type = classify_row(text) if text else None
+        if row_type in _FILLED_IN_ROW_TYPES:
+            label = text.rstrip(":").strip()
+            parsed.metadata[label] = next((v for v in values[1:] if v not in (None, "")), None)
+            parsed.labels.append(label)
+        elif row_number <= header_row:
+            continue
+        elif row_type == "category":
+            category = _NUMBERING.sub("", text)
+            parsed.labels.append(category)
+        elif row_type == "example_item":
+            value = values[amount["index"]] if amount and amount["index"] < len(values) else None
+            parsed.lines.append(
+                {
+                    "row": row_number,
+                    "category": category,
+                    "description": text,
+                    "amount": (
+                        float(value)
+                        if isinstance(value, (int, float)) and not isinstance(value, bool)
+                        else None
+                    ),
+                }
+            )
+    return parsed
+
+
+# -- writing -------------------------------------------------------------------
+
+
+def write_budget(
+    db: Session,
+    options: ImportOptions,
+    name: str,
+    currency: str,
+    lines: List[Dict[str, Any]],
+    source: str,
+) -> uuid.UUID:
+    """Insert a budget with its categories and lines in one transaction."""
+    budget_id = uuid.uuid4()
+    try:
+        db.execute(
+            insert(BudgetModel),
+            [
+                {
+                    "id": budget_id,
+                    "name": name,
+                    "owner_id": options.owner_id,
+                    "external_funder_name": options.external_funder_name,
+                    "local_currency": currency,
+                    "status": BudgetStatus.ai_draft,
+                    "donor_template_id": options.donor_template_id,
+                    "created_by": options.user_id,
+                    "updated_by": options.user_id,
+                }
+            ],
+        )
+        template_id = options.donor_template_id
+        categories = resolve_categories(
+            db,
+            options.user_id,
+            {
+                (ln["category"], template_id): category_code(ln["category"])
+                for ln in lines
+                if ln["category"]
+            },
+        )
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "budget_id": budget_id,
+                "category_id": (
+                    categories[(ln["category"], template_id)].id if ln["category"] else None
+                ),
+                "description": ln["description"],
+                "amount": ln["amount"],
+                "extra_fields": {"source_file": source, "source_row": ln["row"]},
+                "created_by": options.user_id,
+                "updated_by": options.user_id,
+            }
+            for ln in lines
+        ]
+        with invalidating_categories_on_error():
+            db.execute(insert(BudgetLineModel), rows)
+        apply_summary_deltas(
+            db, summary_deltas((budget_id, row["category_id"], row["amount"]) for row in rows)
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return budget_id
+
+
+def import_budget_file(path: str, sha256: str, options: ImportOptions) -> ImportResult:
+    """Parse, map and store one workbook; errors are returned, not raised."""
+    started = time.perf_counter()
+    result = ImportResult(path=path, sha256=sha256, status=FAILED)
+    try:
+        parsed = parse_budget_workbook(path)
+        if not parsed.lines:
+            result.status = EMPTY
+        else:
+            db = session_factory(options.database_url)()
+            try:
+                valid_user = {"user_id": options.user_id, "customer_id": options.owner_id}
+                mapping = suggest_semantic_mapping(
+                    list(dict.fromkeys(parsed.labels)), db, valid_user, options.donor_template_id
+                )
+                name = _budget_name(parsed, mapping) or os.path.splitext(os.path.basename(path))[0]
+                currency = infer_currency(parsed.amount_label or "") or options.default_currency
+                result.budget_id = str(
+                    write_budget(db, options, name, currency, parsed.lines, os.path.basename(path))
+                )
+            finally:
+                db.close()
+            result.status = IMPORTED
+            result.lines = len(parsed.lines)
+    except Exception as exc:
+        result.error = f"{type(exc).__name__}: {exc}"
+    result.seconds = round(time.perf_counter() - started, 3)
+    return result
+
+
+def _budget_name(parsed: ParsedBudget, mapping: Dict[str, Any]) -> str | None:
+    """Value next to the metadata label mapped to project_name, if any."""
+    for suggestion in mapping.get("suggestions", []):
+        if suggestion.get("mapped_key") == "project_name":
+            value = parsed.metadata.get(suggestion["raw_value"])
+            if value not in (None, ""):
+                return str(value).strip()
+    return None
+
+
+# -- manifest and fan-out ------------------------------------------------------
+
+
+def load_manifest(manifest_path: str) -> Dict[str, Dict[str, Any]]:
+    """Latest manifest record per SHA-256; a truncated last line is ignored."""
+    records: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(manifest_path):
+        return records
+    with open(manifest_path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            records[record["sha256"]] = record
+    return records
+
+
+def import_archive(
+    paths: Iterable[str],
+    options: ImportOptions,
+    manifest_path: str,
+    max_workers: int = 1,
+    on_result: Callable[[ImportResult], None] | None = None,
+) -> ImportSummary:
+    """Import every workbook in `paths` not already recorded as done in the manifest.
+
+    With `max_workers` > 1 files are imported in parallel processes. Each
+    finished file is appended to the manifest straight away.
+    """
+    started = time.perf_counter()
+    summary = ImportSummary()
+    done = {sha for sha, rec in load_manifest(manifest_path).items() if rec["status"] in DONE}
+
+    pending: List[tuple[str, str]] = []
+    for path in paths:
+        summary.files += 1
+        sha256 = file_digest(path)
+        if sha256 in done:
+            summary.skipped += 1
+            continue
+        done.add(sha256)  # later copies of the same file are skipped too
+        pending.append((path, sha256))
+
+    with open(manifest_path, "a", encoding="utf-8") as manifest:
+
+        def record(result: ImportResult) -> None:
+            manifest.write(json.dumps(asdict(result)) + "\n")
+            manifest.flush()
+            summary.add(result)
+            if result.status == FAILED:
+                logger.warning("archive_import_failed", path=result.path, error=result.error)
+            if on_result:
+                on_result(result)
+
+        if max_workers <= 1 or len(pending) <= 1:
+            for path, sha256 in pending:
+                record(import_budget_file(path, sha256, options))
+        else:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers, mp_context=context) as pool:
+                futures = {
+                    pool.submit(import_budget_file, path, sha256, options): (path, sha256)
+                    for path, sha256 in pending
+                }
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as exc:  # the worker process itself died
+                        path, sha256 = futures[future]
+                        result = ImportResult(path, sha256, FAILED, error=repr(exc))
+                    record(result)
+
+    summary.seconds = round(time.perf_counter() - started, 3)
+    return summary
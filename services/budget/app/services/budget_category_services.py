@@ -1,19 +1,131 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from uuid import UUID
 
-from app.models.budget import BudgetCategoryModel
+from app.core.config import settings
 from app.crud.budget_category_crud import (
+    CategoryKey,
+    create_budget_categories,
+    delete_budget_category,
+    get_budget_categories_by_keys,
     get_budget_category,
-    create_budget_category,
-    get_budget_category_by_name_and_template_id,
+    update_budget_category,
 )
 from app.core.exceptions import DomainError
+from app.schemas import BudgetCategory
 from fastapi import status
 
+DEFAULT_CATEGORY_NAME = "Miscellaneous"
+DEFAULT_CATEGORY_CODE = "MISC"
+
+
+def category_code(name: str) -> str:
+    return "_".join(name.split()).upper()
+
+
+class CategoryCache:
+    """Process-local TTL cache of committed categories by (name, donor_template_id).
+
+    The category vocabulary rarely changes, so entries live for `ttl`
+    seconds; the least recently stored are dropped beyond `max_entries`.
+    Updates and deletes through this module drop their key, but only in
+    this process: other workers keep serving the old entry until it expires
+    or a line insert using it fails (see invalidating_categories_on_error).
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[CategoryKey, tuple[float, BudgetCategory]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[CategoryKey]) -> dict[CategoryKey, BudgetCategory]:
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry[0] <= now:
+                    del self._entries[key]
+                    continue
+                found[key] = entry[1]
+        return found
+
+    def put_many(self, categories: dict[CategoryKey, BudgetCategory]) -> None:
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, category in categories.items():
+                self._entries.pop(key, None)
+                self._entries[key] = (expires, category)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[CategoryKey] | None = None) -> None:
+        """Drop `keys`, or every entry when None."""
+        with self._lock:
+            if keys is None:
+                self._entries.clear()
+                return
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+category_cache = CategoryCache(settings.CATEGORY_CACHE_TTL, settings.CATEGORY_CACHE_MAX_ENTRIES)
+
+
+@contextmanager
+def invalidating_categories_on_error() -> Iterator[None]:
+    """Clear category_cache when the wrapped write of resolved categories fails a constraint.
+
+    A category deleted by another worker can still be cached here; lines
+    written with its id then fail the foreign key. That request fails, the
+    next one reads the categories again.
+    """
+    try:
+        yield
+    except IntegrityError:
+        category_cache.invalidate()
+        raise
+
+
+def resolve_categories(
+    db: Session, user_id: UUID | None, codes: dict[CategoryKey, str | None]
+) -> dict[CategoryKey, BudgetCategory]:
+    """Category for every (name, donor_template_id) key in `codes` (key -> code).
+
+    Served from category_cache where possible; the rest is read in one query
+    and the still-missing keys are created in one INSERT. Nothing is
+    committed. Only categories that already existed are cached: ones created
+    here are picked up by a later lookup, once this transaction has committed.
+    """
+    resolved = category_cache.get_many(codes)
+    pending = [key for key in codes if key not in resolved]
+    if not pending:
+        return resolved
+    existing = {
+        key: BudgetCategory.model_validate(row)
+        for key, row in get_budget_categories_by_keys(db, pending).items()
+    }
+    category_cache.put_many(existing)
+    resolved.update(existing)
+    created = create_budget_categories(
+        db, user_id, {key: codes[key] for key in pending if key not in existing}
+    )
+    resolved.update((key, BudgetCategory.model_validate(row)) for key, row in created.items())
+    return resolved
+
 
 def get_or_create_category_service(
     db: Session, valid_user: dict, category_id: UUID | None = None, category_name: str | None = None
-) -> BudgetCategoryModel:
+) -> BudgetCategory:
     """The service to get or create a budget category.
     the idea is if category_id is not provided, then try to fetch 'Miscellaneous' category,
     if it does not exist, create it."""
@@ -25,18 +137,55 @@ def get_or_create_category_service(
                 "Budget Category not found",
                 status.HTTP_404_NOT_FOUND,
             )
-        return category
+        return BudgetCategory.model_validate(category)
 
     donor_template_id = None
-    name = "Miscellaneous"
-    code = "MISC"
+    name = DEFAULT_CATEGORY_NAME
+    code = DEFAULT_CATEGORY_CODE
     if category_name:
         name = category_name
-        code = "_".join(category_name.split()).upper()
+        code = category_code(category_name)
+
+    key = (name, donor_template_id)
+    return resolve_categories(db, valid_user["user_id"], {key: code})[key]
+
+
+def get_or_create_categories_service(
+    db: Session, valid_user: dict, category_names: list[str | None]
+) -> dict[str, BudgetCategory]:
+    """Bulk get_or_create_category_service by name, keyed by the resolved name.
+
+    Empty names resolve to the 'Miscellaneous' category. Nothing is committed.
+    """
+    codes: dict[CategoryKey, str | None] = {
+        (name, None): category_code(name)
+        for name in sorted({name for name in category_names if name})
+    }
+    if any(not name for name in category_names):
+        codes.setdefault((DEFAULT_CATEGORY_NAME, None), DEFAULT_CATEGORY_CODE)
+    resolved = resolve_categories(db, valid_user["user_id"], codes)
+    return {name: category for (name, _), category in resolved.items()}
+
 
-    category = get_budget_category_by_name_and_template_id(db, name, donor_template_id)
+def update_category_service(
+    db: Session, category_id: UUID, name: str, code: str | None = None
+) -> BudgetCategory | None:
+    """Rename or recode a category and drop its old key from category_cache."""
+    category = get_budget_category(db, category_id)
+    if category is None:
+        return None
+    old_key = (category.name, category.donor_template_id)
+    updated = update_budget_category(db, category_id, name, code)
+    category_cache.invalidate([old_key])
+    return None if updated is None else BudgetCategory.model_validate(updated)
 
-    if category:
-        return category
 
-    return create_budget_category(db, valid_user["user_id"], name, code, donor_template_id)
+def delete_category_service(db: Session, category_id: UUID) -> bool:
+    """Delete a category (its lines move to no category) and drop it from category_cache."""
+    category = get_budget_category(db, category_id)
+    if category is None:
+        return False
+    key = (category.name, category.donor_template_id)
+    deleted = delete_budget_category(db, category_id)
+    category_cache.invalidate([key])
+    return deleted
@@ -5,6 +5,7 @@ from app.crud.budget_crud import (
     list_budgets,
 )
 from app.crud.budget_line_crud import (
+    BudgetLineFilters,
     create_budget_line,
     get_budget_line,
     list_budget_lines,
@@ -12,11 +13,19 @@ from app.crud.budget_line_crud import (
     delete_budget_line,
 )
 from app.core.exceptions import DomainError, PermissionDenied
-from app.services.budget_category_services import get_or_create_category_service
+from app.crud.pagination import Page
+from app.services.budget_category_services import (
+    get_or_create_category_service,
+    invalidating_categories_on_error,
+)
 from app.services.customer_client import validate_customer_can_fund, validate_customer_can_own
 from app.schemas.budget_schema import BudgetCreate
 from uuid import UUID
 from app.schemas import BudgetLineCreate, BudgetLineUpdate
+from app.schemas.budget_line_schema import BudgetCategory, BudgetLine
+
+_LINE_FIELDS = tuple(name for name in BudgetLine.model_fields if name != "category")
+_CATEGORY_FIELDS = tuple(BudgetCategory.model_fields)
 
 
 def create_budget_line_service(
@@ -39,15 +48,16 @@ def create_budget_line_service(
         db, valid_user, category_id=budget_line.category_id, category_name=budget_line.category_name
     )
 
-    return create_budget_line(
-        db,
-        user_id=valid_user["user_id"],
-        budget_id=budget_line.budget_id,
-        category_id=category.id,
-        description=budget_line.description,
-        amount=budget_line.amount,
-        extra_fields=budget_line.extra_fields,
-    )
+    with invalidating_categories_on_error():
+        return create_budget_line(
+            db,
+            user_id=valid_user["user_id"],
+            budget_id=budget_line.budget_id,
+            category_id=category.id,
+            description=budget_line.description,
+            amount=budget_line.amount,
+            extra_fields=budget_line.extra_fields,
+        )
 
 
 def update_budget_service(budget_id: UUID, budget: BudgetCreate, valid_user: dict, db):
@@ -76,11 +86,32 @@ def update_budget_service(budget_id: UUID, budget: BudgetCreate, valid_user: dic
     )
 
 
+def serialize_budget_lines(lines) -> list[dict]:
+    """Lines as plain BudgetLine-shaped dicts, each distinct category built once.
+
+    Reads loaded attributes only (no per-line model validation); the
+    response model or JSON encoder does the rest in one pass.
+    """
+    categories: dict = {}
+    serialized = []
+    for line in lines:
+        category = line.category
+        if category is not None and category.id not in categories:
+            categories[category.id] = {name: getattr(category, name) for name in _CATEGORY_FIELDS}
+        item = {name: getattr(line, name) for name in _LINE_FIELDS}
+        item["category"] = categories[category.id] if category is not None else None
+        serialized.append(item)
+    return serialized
+
+
 def get_budget_lines_service(
     db,
     valid_user,
     budget_id=None,
-):
+    filters: BudgetLineFilters | None = None,
+    cursor: str | None = None,
+    limit: int | None = 100,
+) -> Page:
     if budget_id:
         budget = (
             get_budget(db, budget_id)
@@ -93,11 +124,15 @@ def get_budget_lines_service(
                 status.HTTP_400_BAD_REQUEST,
             )
 
-        return list_budget_lines(db, budget_id=budget_id)
+        return list_budget_lines(
+            db, budget_id=budget_id, filters=filters, cursor=cursor, limit=limit
+        )
     else:
         if valid_user["role"] == "superuser":
-            return list_budget_lines(db)
-        return list_budget_lines(db, customer_id=valid_user["customer_id"])
+            return list_budget_lines(db, filters=filters, cursor=cursor, limit=limit)
+        return list_budget_lines(
+            db, customer_id=valid_user["customer_id"], filters=filters, cursor=cursor, limit=limit
+        )
 
 
 def get_budget_line_by_id_service(
@@ -123,11 +158,11 @@ def get_budget_line_by_id_service(
     return budget_line
 
 
-def list_budget_service(valid_user, db):
+def list_budget_service(valid_user, db, cursor: str | None = None, limit: int | None = 100) -> Page:
     if valid_user["role"] == "superuser":
-        return list_budgets(db)
+        return list_budgets(db, cursor=cursor, limit=limit)
 
-    return list_budgets(db, customer_id=valid_user["customer_id"])
+    return list_budgets(db, customer_id=valid_user["customer_id"], cursor=cursor, limit=limit)
 
 
 def update_budget_line_service(
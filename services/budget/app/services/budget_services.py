@@ -1,21 +1,39 @@
 import asyncio
 from fastapi import status, HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic_core import to_json
 from app.crud.budget_crud import (
+    BudgetFilters,
     create_budget,
     get_budget,
+    get_budget_with_lines,
     update_budget,
     list_budgets,
     delete_budget,
 )
-from app.crud.budget_line_crud import delete_budget_line
+from app.crud.budget_line_crud import bulk_create_budget_lines, iter_budget_lines
+from app.crud.budget_summary_crud import list_budget_summaries
+from app.crud.pagination import Page
 from app.core.exceptions import DomainError, PermissionDenied
 
+from app.services.budget_category_services import (
+    DEFAULT_CATEGORY_NAME,
+    get_or_create_categories_service,
+    invalidating_categories_on_error,
+)
+from app.services.budget_line_services import serialize_budget_lines
 from app.services.customer_client import validate_customer_can_fund, validate_customer_can_own
-from app.schemas.budget_schema import BudgetCreate, BudgetStatus
+from app.schemas.budget_schema import (
+    BudgetCreate,
+    BudgetStatus,
+    BudgetTotals,
+    BudgetWithTotals,
+    CategoryTotals,
+)
 from app.schemas.with_lines_schema import CreateBudgetWithLinesRequest
 from uuid import UUID
 
-from typing import List
+from typing import Iterable, Iterator, List
 from app.models import BudgetModel
 
 from app.services.user_client import get_customers_by_ids
@@ -28,6 +46,7 @@ async def create_budget_service(
     db,
     include_user_datails: bool = False,
     budget_status: BudgetStatus | None = None,
+    commit: bool = True,
 ):
 
     if budget.funding_customer_id:
@@ -53,6 +72,7 @@ async def create_budget_service(
         external_funder_name=budget.external_funder_name,
         owner_id=owner_id,
         status=budget_status,
+        commit=commit,
     )
     if not include_user_datails:
         return new_budget
@@ -112,18 +132,90 @@ async def get_budget_service(budget_id, valid_user, db, include_user_details: bo
     return result[0]
 
 
-async def list_budget_service(valid_user, db, include_user_details: bool = False):
+async def get_budget_detail_service(budget_id, valid_user, db, include_lines: bool = True) -> dict:
+    """The enriched budget with, if asked, all its lines and their categories.
+
+    The budget, lines and categories come from a single query, which is also
+    the ownership check; lines are serialised in bulk.
+    """
+    customer_id = None if valid_user["role"] == "superuser" else valid_user["customer_id"]
+    budget = (get_budget_with_lines if include_lines else get_budget)(db, budget_id, customer_id)
+    if not budget:
+        raise DomainError(
+            "Budget Not found",
+            status.HTTP_400_BAD_REQUEST,
+        )
+    result = (await populate_budget_with_user_details([budget], valid_user))[0]
+    result["lines"] = serialize_budget_lines(budget.lines) if include_lines else []
+    return result
+
+
+def budget_ndjson(db, budget: dict, batch_size: int) -> Iterator[bytes]:
+    """`budget` (without lines), then each of its lines: one JSON document per line.
+
+    Lines are read and encoded `batch_size` at a time. The session is closed
+    once the stream ends, as the request may have released it already.
+    """
+    try:
+        header = BudgetWithTotals.model_validate(budget).model_dump(mode="json", exclude={"lines"})
+        yield to_json(header) + b"\n"
+        for batch in iter_budget_lines(db, budget["id"], batch_size):
+            yield b"".join(to_json(line) + b"\n" for line in serialize_budget_lines(batch))
+    finally:
+        db.close()
+
+
+async def list_budget_service(
+    valid_user,
+    db,
+    include_user_details: bool = False,
+    filters: BudgetFilters | None = None,
+    cursor: str | None = None,
+    limit: int | None = 100,
+) -> Page:
     if valid_user["role"] == "superuser":
-        return list_budgets(db)
+        return list_budgets(db, filters=filters, cursor=cursor, limit=limit)
 
     customer_id = valid_user.get("customer_id")
     if not customer_id:
-        return []
+        return Page()
 
-    budgets = list_budgets(db, customer_id=customer_id)
+    page = list_budgets(db, customer_id=customer_id, filters=filters, cursor=cursor, limit=limit)
     if not include_user_details:
-        return budgets
-    return await populate_budget_with_user_details(budgets=budgets, valid_user=valid_user)
+        return page
+    enriched = await populate_budget_with_user_details(budgets=page.items, valid_user=valid_user)
+    return Page(enriched, page.next_cursor)
+
+
+def get_budget_totals(db, budget_ids: Iterable[UUID]) -> dict[UUID, BudgetTotals]:
+    """Totals per budget from the budget_summaries read model, without reading any line."""
+    budget_ids = list(budget_ids)
+    per_budget: dict[UUID, dict[UUID | None, tuple[float, int]]] = {}
+    for row in list_budget_summaries(db, budget_ids):
+        # GUID columns load as str on Postgres and UUID elsewhere
+        per_category = per_budget.setdefault(UUID(str(row.budget_id)), {})
+        total, count = per_category.get(row.category_id, (0.0, 0))
+        per_category[row.category_id] = (total + row.total_amount, count + row.line_count)
+    totals = {}
+    for budget_id in budget_ids:
+        categories = [
+            CategoryTotals(category_id=category_id, total_amount=total, line_count=count)
+            for category_id, (total, count) in per_budget.get(budget_id, {}).items()
+            if count
+        ]
+        totals[budget_id] = BudgetTotals(
+            total_amount=sum(c.total_amount for c in categories),
+            line_count=sum(c.line_count for c in categories),
+            categories=categories,
+        )
+    return totals
+
+
+def with_budget_totals(db, budgets: list) -> list[dict]:
+    """`budgets` (models or enriched dicts) as dicts with a ``totals`` entry."""
+    items = [b if isinstance(b, dict) else jsonable_encoder(b) for b in budgets]
+    totals = get_budget_totals(db, [UUID(str(item["id"])) for item in items])
+    return [{**item, "totals": totals[UUID(str(item["id"]))]} for item in items]
 
 
 async def delete_budget_service(budget_id: UUID, valid_user: dict, db):
@@ -140,12 +232,15 @@ async def create_budget_with_lines_service(
     valid_user: dict,
     db,
 ):
+    """Create a budget and all its lines in one transaction.
+
+    Categories are resolved in bulk (one lookup, one insert for the missing
+    names) and the lines are written with a single multi-row INSERT. Any
+    error rolls the whole transaction back.
+    """
     # Deferred import to avoid circular dependency
-    from app.services.budget_line_services import create_budget_line_service
-    from app.schemas import BudgetLineCreate
+    from app.schemas.budget_line_schema import BudgetLine
 
-    new_budget = None
-    created_lines = []
     try:
         owner_id = request.owner_id or valid_user.get("customer_id")
         new_budget = await create_budget_service(
@@ -158,48 +253,49 @@ async def create_budget_with_lines_service(
             valid_user,
             db,
             budget_status=BudgetStatus.ai_draft,
+            commit=False,
         )
-
-        for line_input in request.lines:
-            line = create_budget_line_service(
+        categories = get_or_create_categories_service(
+            db, valid_user, [line.category_name for line in request.lines]
+        )
+        with invalidating_categories_on_error():
+            created_lines = bulk_create_budget_lines(
                 db,
-                valid_user,
-                BudgetLineCreate(
-                    budget_id=new_budget.id,
-                    description=line_input.description,
-                    amount=line_input.amount,
-                    category_name=line_input.category_name,
-                    extra_fields=line_input.extra_fields,
-                ),
+                valid_user["user_id"],
+                new_budget.id,
+                [
+                    {
+                        "category_id": categories[line.category_name or DEFAULT_CATEGORY_NAME].id,
+                        "description": line.description,
+                        "amount": line.amount,
+                        "extra_fields": line.extra_fields,
+                    }
+                    for line in request.lines
+                ],
             )
-            created_lines.append(line)
-
-        from app.schemas.budget_line_schema import BudgetLine
-
-        enriched = await get_budget_service(
-            new_budget.id, valid_user, db, include_user_details=True
-        )
-        enriched["lines"] = [BudgetLine.model_validate(ln) for ln in created_lines]
-        return enriched
-
+        # Serialise before committing (the commit expires the returned rows),
+        # with the resolved categories rather than a lazy load per line
+        by_id = {category.id: category for category in categories.values()}
+        lines = [
+            BudgetLine.model_validate({**vars(ln), "category": by_id[ln.category_id]})
+            for ln in created_lines
+        ]
+        db.commit()
     except (HTTPException, DomainError):
-        # Validation/permission errors — roll back any lines created before re-raising
-        for line in reversed(created_lines):
-            delete_budget_line(db, line)
-        if new_budget:
-            delete_budget(db, new_budget)
+        # Validation/permission errors — nothing was committed
+        db.rollback()
         raise
     except Exception as e:
-        # Unexpected DB/infra error — compensating transaction then 500
-        for line in reversed(created_lines):
-            delete_budget_line(db, line)
-        if new_budget:
-            delete_budget(db, new_budget)
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create budget with lines. Changes have been rolled back.",
         ) from e
 
+    enriched = await get_budget_service(new_budget.id, valid_user, db, include_user_details=True)
+    enriched["lines"] = lines
+    return enriched
+
 
 async def populate_budget_with_user_details(budgets: List[BudgetModel], valid_user: dict):
     # Collect unique user and customer IDs
@@ -0,0 +1,96 @@
+"""Precomputed embedding index over the canonical mapping vocabulary.
+
+The vocabulary is the built-in phrases (FIELD_PATTERNS, CATEGORY_KEYWORDS)
+plus any human-approved SemanticFieldMappingModel rows. It is embedded once
+into an L2-normalised matrix, so scoring a batch of unknown values is a
+single matrix product instead of one cosine call per (value, phrase) pair.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, List, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.vectors import l2_normalize
+
+
+@dataclass(frozen=True, slots=True)
+class CanonicalEntry:
+    phrase: str
+    mapped_to: str
+    mapped_key: str
+
+
+class CanonicalIndex:
+    """Normalised phrase matrix with parallel label arrays."""
+
+    def __init__(self, entries: Sequence[CanonicalEntry], vectors: np.ndarray):
+        self.entries: Tuple[CanonicalEntry, ...] = tuple(entries)
+        self.mapped_to = np.array([e.mapped_to for e in self.entries], dtype=object)
+        self.mapped_key = np.array([e.mapped_key for e in self.entries], dtype=object)
+        self.matrix = l2_normalize(vectors)
+
+    @classmethod
+    def build(
+        cls,
+        entries: Sequence[CanonicalEntry],
+        embed: Callable[[List[str]], np.ndarray],
+    ) -> "CanonicalIndex":
+        return cls(entries, embed([e.phrase for e in entries]))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def match(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Best entry per input row: (entry indices, cosine scores).
+
+        Ties go to the earliest entry, so the order entries were given in
+        decides precedence.
+        """
+        scores = l2_normalize(vectors) @ self.matrix.T
+        best = np.argmax(scores, axis=1)
+        return best, scores[np.arange(len(best)), best]
+
+
+class CanonicalIndexCache:
+    """Holds the current CanonicalIndex and rebuilds it when the vocabulary changes.
+
+    `fingerprint(db)` is a cheap query that changes whenever the DB vocabulary
+    may have changed; only then are the rows reloaded with `load_entries(db)`,
+    and the index is re-embedded only if the entries actually differ.
+    """
+
+    def __init__(
+        self,
+        base_entries: Sequence[CanonicalEntry],
+        embed: Callable[[List[str]], np.ndarray],
+        load_entries: Callable[[Any], Sequence[CanonicalEntry]],
+        fingerprint: Callable[[Any], Hashable],
+    ):
+        self._base_entries = tuple(base_entries)
+        self._embed = embed
+        self._load_entries = load_entries
+        self._fingerprint = fingerprint
+        self._index: CanonicalIndex | None = None
+        self._db_fingerprint: Hashable = None
+        self._lock = threading.Lock()
+
+    def get(self, db) -> CanonicalIndex:
+        fingerprint = self._fingerprint(db)
+        with self._lock:
+            if self._index is not None and fingerprint == self._db_fingerprint:
+                return self._index
+            # Built-ins first so they win ties; duplicates keep their first position
+            entries = tuple(dict.fromkeys(self._base_entries + tuple(self._load_entries(db))))
+            if self._index is None or entries != self._index.entries:
+                self._index = CanonicalIndex.build(entries, self._embed)
+            self._db_fingerprint = fingerprint
+            return self._index
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._index = None
+            self._db_fingerprint = None
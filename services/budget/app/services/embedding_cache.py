@@ -0,0 +1,85 @@
+"""Redis cache for embedding vectors, read and written a whole batch at a time.
+
+Vectors are stored as packed little-endian float32 (or float16) bytes rather
+than JSON, so a hit decodes with ``np.frombuffer`` instead of a JSON parse.
+Keys hash the normalised text together with the model name and a version, so
+switching models never serves stale vectors:
+
+    emb:v2:{model}:{model_version}:{sha1(normalised text)}
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+KEY_PREFIX = "emb:v2"
+
+
+def normalize_text(text: str) -> str:
+    """Case- and whitespace-insensitive form used for cache keys.
+
+    The embedding model is uncased, so texts that differ only in case or
+    spacing embed identically and can share an entry.
+    """
+    return " ".join(text.lower().split())
+
+
+class EmbeddingCache:
+    """Batch get/set of embedding vectors with one Redis round trip each way."""
+
+    def __init__(
+        self,
+        client: Any,
+        model_name: str,
+        model_version: str,
+        ttl: int = 86400,
+        dtype: str = "float32",
+    ):
+        self.client = client
+        self.ttl = ttl
+        self._dtype = np.dtype(dtype).newbyteorder("<")
+        self._namespace = f"{KEY_PREFIX}:{model_name}:{model_version}:{self._dtype.str}"
+
+    def key(self, text: str) -> str:
+        digest = hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"{self._namespace}:{digest}"
+
+    def get_many(self, texts: Sequence[str]) -> List[np.ndarray | None]:
+        """One MGET for all `texts`; misses (and Redis errors) come back as None."""
+        if not self.client or not texts:
+            return [None] * len(texts)
+        try:
+            raw_values = self.client.mget([self.key(t) for t in texts])
+        except Exception as exc:
+            logger.warning("embedding_cache_unavailable", op="mget", error=str(exc))
+            return [None] * len(texts)
+        return [self._decode(raw) for raw in raw_values]
+
+    def set_many(self, vectors: Dict[str, np.ndarray]) -> None:
+        """Store all `vectors` (text -> vector) with one pipelined SETEX batch."""
+        if not self.client or not vectors:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for text, vec in vectors.items():
+                pipe.setex(self.key(text), self.ttl, self._encode(vec))
+            pipe.execute()
+        except Exception as exc:
+            logger.warning("embedding_cache_unavailable", op="setex", error=str(exc))
+
+    def _encode(self, vec: np.ndarray) -> bytes:
+        return np.asarray(vec, dtype=self._dtype).tobytes()
+
+    def _decode(self, raw: bytes | None) -> np.ndarray | None:
+        if not raw or len(raw) % self._dtype.itemsize:
+            return None
+        vec = np.frombuffer(raw, dtype=self._dtype)
+        # float32 entries are returned zero-copy; float16 is widened on read
+        return vec if vec.dtype == np.float32 else vec.astype(np.float32)
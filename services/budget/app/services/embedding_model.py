@@ -0,0 +1,119 @@
+"""Process-wide owner of the sentence-transformers embedding model.
+
+The model is loaded once per process, on first use (or at startup when
+``EMBEDDING_MODEL_WARMUP`` is set), and shared by every caller. Load time,
+inference latency and batch sizes are recorded as Prometheus metrics and
+exposed on ``/metrics``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, List
+
+import numpy as np
+from prometheus_client import Histogram
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+MODEL_LOAD_SECONDS = Histogram(
+    "budget_embedding_model_load_seconds",
+    "Time spent loading the embedding model",
+    ["model"],
+    buckets=(0.5, 1, 2, 5, 10, 20, 40, 80),
+)
+INFERENCE_SECONDS = Histogram(
+    "budget_embedding_inference_seconds",
+    "Latency of one batched encode() call",
+    ["model"],
+)
+BATCH_SIZE = Histogram(
+    "budget_embedding_batch_size",
+    "Number of texts passed to one encode() call",
+    ["model"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+
+
+class EmbeddingModelManager:
+    """Lazily loads one SentenceTransformer, once, thread-safely.
+
+    Only loading is locked: encode() calls from different threads run
+    concurrently on the shared model.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._model: Any = None
+        self._load_attempted = False
+        self._load_seconds: float | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        """Return the loaded model, loading it on first call; None if unavailable."""
+        if self._load_attempted:
+            return self._model
+        with self._lock:
+            if not self._load_attempted:
+                self._model = self._load()
+                self._load_attempted = True
+        return self._model
+
+    def _load(self) -> Any:
+        started = time.perf_counter()
+        try:
+            from sentence_transformers import SentenceTransformer
+
+            model = SentenceTransformer(self.model_name)
+        except Exception as exc:
+            logger.warning("embedding_model_unavailable", model=self.model_name, error=str(exc))
+            return None
+        self._load_seconds = time.perf_counter() - started
+        MODEL_LOAD_SECONDS.labels(self.model_name).observe(self._load_seconds)
+        logger.info(
+            "embedding_model_loaded",
+            model=self.model_name,
+            load_seconds=round(self._load_seconds, 3),
+        )
+        return model
+
+    def use(self, model: Any) -> None:
+        """Serve `model` (anything with ``encode(texts)``) instead of loading one."""
+        with self._lock:
+            self._model = model
+            self._load_attempted = True
+
+    @property
+    def available(self) -> bool:
+        return self.get() is not None
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed `texts` in one batch and return an (n, dim) float32 matrix."""
+        model = self.get()
+        if model is None:
+            raise RuntimeError(f"Embedding model {self.model_name} is not available")
+        BATCH_SIZE.labels(self.model_name).observe(len(texts))
+        with INFERENCE_SECONDS.labels(self.model_name).time():
+            return np.asarray(model.encode(texts), dtype=np.float32)
+
+    def warmup(self) -> bool:
+        """Load the model and run one tiny encode so the first request is not cold."""
+        if not self.available:
+            return False
+        self.encode(["warmup"])
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model_name,
+            "loaded": self._model is not None,
+            "load_attempted": self._load_attempted,
+            "load_seconds": self._load_seconds,
+        }
+
+
+embedding_manager = EmbeddingModelManager(settings.EMBEDDING_MODEL_NAME)
@@ -0,0 +1,118 @@
+import functools
+from datetime import date
+from pathlib import Path
+from uuid import UUID
+
+import numpy as np
+from fastapi import status
+
+from app.core.exceptions import DomainError
+from app.crud.budget_crud import get_budget
+from app.crud.budget_line_crud import list_budget_line_amounts
+from app.crud.exchange_rate_crud import (
+    bulk_upsert_exchange_rates,
+    exchange_rates_version,
+    get_exchange_rates_on_or_before,
+)
+from app.utils.currency import validate_currency
+from shared.services.exchange_rate_service import (
+    DEFAULT_BASE_CURRENCY,
+    ExchangeRate,
+    ExchangeRateNotFound,
+    RateTable,
+    RateTableCache,
+    parse_rates_file,
+)
+
+
+def _load_rates(db, base_currency: str, on_date: date) -> list[ExchangeRate]:
+    rows = get_exchange_rates_on_or_before(db, base_currency, on_date)
+    if not rows:
+        raise ExchangeRateNotFound(f"No {base_currency} exchange rates on or before {on_date}")
+    return [
+        ExchangeRate(
+            rate_date=row.rate_date,
+            base_currency=row.base_currency,
+            quote_currency=row.quote_currency,
+            rate=row.rate,
+        )
+        for row in rows
+    ]
+
+
+# Tables are kept until rates are imported again, by this process or any
+# other: every lookup compares the latest import time (exchange_rates_version).
+rate_tables = RateTableCache()
+
+
+def get_rate_table(db, on_date: date | None = None) -> RateTable:
+    return rate_tables.get(
+        on_date or date.today(),
+        DEFAULT_BASE_CURRENCY,
+        loader=functools.partial(_load_rates, db),
+        version=exchange_rates_version(db),
+    )
+
+
+def import_exchange_rates_service(
+    db, file_path: str | Path, base_currency: str = DEFAULT_BASE_CURRENCY
+) -> int:
+    """Load a CSV or ECB XML rates file into exchange_rates and reset the cache."""
+    rates = parse_rates_file(file_path, base_currency)
+    count = bulk_upsert_exchange_rates(db, rates, source=Path(file_path).name)
+    rate_tables.invalidate()
+    return count
+
+
+def convert_budget_lines_service(
+    db,
+    valid_user: dict,
+    budget_id: UUID,
+    to_currency: str,
+    on_date: date | None = None,
+) -> dict:
+    """Convert every line amount of a budget from its local currency in one pass."""
+    if not validate_currency(to_currency):
+        raise DomainError(
+            f"Unknown currency '{to_currency}'",
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
+    budget = (
+        get_budget(db, budget_id)
+        if valid_user["role"] == "superuser"
+        else get_budget(db, budget_id, valid_user["customer_id"])
+    )
+    if not budget:
+        raise DomainError(
+            "Budget Not found",
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    if not budget.local_currency:
+        raise DomainError("Budget has no local currency", status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    rows = list_budget_line_amounts(db, budget_id)
+    table = get_rate_table(db, on_date)
+    from_currency = budget.local_currency.upper()
+    amounts = np.array(
+        [np.nan if amount is None else amount for _, amount in rows], dtype=np.float64
+    )
+    converted = table.convert(amounts, from_currency, to_currency)
+
+    return {
+        "budget_id": budget_id,
+        "from_currency": from_currency,
+        "to_currency": to_currency.upper(),
+        "rate_date": table.rate_date,
+        "rate": table.rate(from_currency, to_currency),
+        "total": float(np.nansum(converted)),
+        "lines": [
+            {
+                "id": line_id,
+                "amount": amount,
+                "converted_amount": None if np.isnan(value) else value,
+            }
+            for (line_id, amount), value in zip(rows, converted.tolist())
+        ],
+    }
@@ -0,0 +1,246 @@
+"""Background ingestion of uploaded donor workbooks.
+
+An upload is written to UPLOAD_DIR and answered with a job id straight away;
+detection and semantic mapping (suggest_mappings_for_upload) run on a small
+thread pool, off the request workers. Job state is kept in-process and, when
+Redis is configured, under ``ingest-job:{id}`` so any replica can report
+status and stream progress:
+
+    queued -> running (stage: fields, fingerprint, mapping) -> succeeded | failed
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict
+
+from prometheus_client import Counter, Histogram
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+KEY_PREFIX = "ingest-job"
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+INGESTION_JOBS = Counter(
+    "budget_ingestion_jobs_total", "Spreadsheet ingestion jobs by outcome", ["status"]
+)
+INGESTION_DURATION = Histogram(
+    "budget_ingestion_job_seconds", "Time from job start to finish", ["status"]
+)
+
+
+@dataclass
+class IngestionJob:
+    id: str
+    file_name: str
+    # Uploader; only they (or a superuser) may read the job
+    user_id: str | None = None
+    customer_id: str | None = None
+    status: str = QUEUED
+    stage: str | None = None
+    progress: float = 0.0
+    result: Dict[str, Any] | None = None
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def visible_to(self, valid_user: Dict[str, Any]) -> bool:
+        if valid_user.get("role") == "superuser":
+            return True
+        return (self.user_id, self.customer_id) == (
+            _str_or_none(valid_user.get("user_id")),
+            _str_or_none(valid_user.get("customer_id")),
+        )
+
+
+def _str_or_none(value: Any) -> str | None:
+    return None if value is None else str(value)
+
+
+class IngestionJobStore:
+    """Job state, in-process and mirrored to Redis when a client is given.
+
+    Redis errors are logged; the in-process copy is then authoritative for
+    jobs this process runs. Finished jobs expire after `ttl` seconds.
+    """
+
+    def __init__(self, client: Any, ttl: int = 3600):
+        self.client = client
+        self.ttl = ttl
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._lock = threading.Lock()
+
+    def key(self, job_id: str) -> str:
+        return f"{KEY_PREFIX}:{job_id}"
+
+    def save(self, job: IngestionJob) -> None:
+        job.updated_at = time.time()
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        if not self.client:
+            return
+        try:
+            raw = json.dumps(asdict(job), default=str)
+            self.client.set(self.key(job.id), raw, ex=self.ttl)
+        except Exception as exc:
+            logger.warning("ingestion_job_store_unavailable", op="save", error=str(exc))
+
+    def get(self, job_id: str) -> IngestionJob | None:
+        if self.client:
+            try:
+                raw = self.client.get(self.key(job_id))
+                if raw is not None:
+                    return IngestionJob(**json.loads(raw))
+            except Exception as exc:
+                logger.warning("ingestion_job_store_unavailable", op="get", error=str(exc))
+        with self._lock:
+            job = self._jobs.get(job_id)
+            # Hand out a copy: the runner keeps mutating its own
+            return None if job is None else IngestionJob(**asdict(job))
+
+    def update(self, job: IngestionJob, **changes: Any) -> None:
+        for name, value in changes.items():
+            setattr(job, name, value)
+        self.save(job)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.ttl
+        expired = [k for k, j in self._jobs.items() if j.finished and j.updated_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+# stage -> progress reported when it starts
+STAGES = {"fields": 0.1, "fingerprint": 0.4, "mapping": 0.5}
+
+
+class IngestionRunner:
+    """Runs ingestion jobs on a bounded thread pool and records their progress."""
+
+    def __init__(self, store: IngestionJobStore, max_workers: int = 2):
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="ingest")
+
+    def submit(
+        self,
+        file_path: str,
+        file_name: str,
+        work: Callable[[str, Callable[[str], None]], Dict[str, Any]],
+        job_id: str | None = None,
+        owner: Dict[str, Any] | None = None,
+    ) -> IngestionJob:
+        """Queue `work(file_path, report_stage)`; its return value becomes the job result.
+
+        `owner` is the uploading user (a validated user dict). The uploaded
+        file is deleted once the job finishes.
+        """
+        owner = owner or {}
+        job = IngestionJob(
+            id=job_id or str(uuid.uuid4()),
+            file_name=file_name,
+            user_id=_str_or_none(owner.get("user_id")),
+            customer_id=_str_or_none(owner.get("customer_id")),
+        )
+        self.store.save(job)
+        try:
+            self._executor.submit(self._run, job, file_path, work)
+        except RuntimeError as exc:  # shutting down
+            self.store.update(job, status=FAILED, error=str(exc))
+            raise
+        logger.info("ingestion_job_queued", job_id=job.id, file_name=file_name)
+        return job
+
+    def _run(self, job: IngestionJob, file_path: str, work: Callable) -> None:
+        started = time.perf_counter()
+        self.store.update(job, status=RUNNING)
+
+        def report_stage(stage: str) -> None:
+            self.store.update(job, stage=stage, progress=STAGES.get(stage, job.progress))
+
+        outcome: Dict[str, Any]
+        try:
+            result = work(file_path, report_stage)
+            outcome = {"status": SUCCEEDED, "stage": None, "progress": 1.0, "result": result}
+        except Exception as exc:
+            logger.exception("ingestion_job_failed", job_id=job.id, error=str(exc))
+            outcome = {"status": FAILED, "error": str(exc)}
+        # The upload is gone by the time anyone sees the job finished
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+        self.store.update(job, **outcome)
+        INGESTION_JOBS.labels(status=job.status).inc()
+        INGESTION_DURATION.labels(status=job.status).observe(time.perf_counter() - started)
+        logger.info("ingestion_job_finished", job_id=job.id, status=job.status)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def job_events(
+    store: IngestionJobStore,
+    job_id: str,
+    poll_interval: float = 0.5,
+    heartbeat: float = 15.0,
+) -> AsyncIterator[str]:
+    """Server-sent events for a job: one ``progress`` event per state change.
+
+    Ends after the event carrying the finished state. Comment lines are sent
+    while nothing changes so proxies keep the connection open.
+    """
+    last_update = None
+    quiet_since = time.monotonic()
+    while True:
+        job = await asyncio.to_thread(store.get, job_id)
+        if job is None:
+            yield _event("error", {"id": job_id, "error": "job not found"})
+            return
+        if job.updated_at != last_update:
+            last_update = job.updated_at
+            quiet_since = time.monotonic()
+            yield _event("progress", asdict(job))
+            if job.finished:
+                return
+        elif time.monotonic() - quiet_since >= heartbeat:
+            quiet_since = time.monotonic()
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(poll_interval)
+
+
+def _event(name: str, data: Dict[str, Any]) -> str:
+    return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+# Optional Redis backing; without it status is only visible on this replica
+_redis_client = None
+if settings.REDIS_URL:
+    try:
+        import redis
+
+        _redis_client = redis.from_url(settings.REDIS_URL)
+    except Exception:
+        _redis_client = None
+
+job_store = IngestionJobStore(_redis_client, ttl=settings.INGESTION_JOB_TTL)
+ingestion_runner = IngestionRunner(job_store, max_workers=settings.INGESTION_MAX_CONCURRENT_JOBS)
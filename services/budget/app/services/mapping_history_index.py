@@ -0,0 +1,239 @@
+"""Nearest-neighbour index over historical semantic field mappings.
+
+Approved or frequently used SemanticFieldMappingModel rows are embedded once
+and kept as an L2-normalised matrix, so a batch of unseen spreadsheet labels
+("Staff salaries (GBP)") can be resolved against everything mapped before
+with one matrix product. Queries use brute-force NumPy; when ``hnswlib`` is
+installed and the index is large, an HNSW graph is used instead.
+
+The index is synced incrementally from the DB (only rows changed since the
+last sync are read and embedded; a short overlap behind the watermark is
+re-read so rows from transactions that committed late are not missed) and
+persisted to an ``.npz`` file so a
+restarted process does not re-embed the whole history.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.core.logging import get_logger
+from app.utils.vectors import l2_normalize
+
+try:
+    import hnswlib
+except ImportError:  # optional: brute force is used without it
+    hnswlib = None
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True, slots=True)
+class HistoryRecord:
+    id: str
+    normalized_value: str
+    mapped_to: str
+    mapped_key: str | None
+    confidence: float
+
+
+@dataclass(frozen=True, slots=True)
+class HistoryChange:
+    """One changed DB row; ineligible rows are removed from the index."""
+
+    record: HistoryRecord
+    eligible: bool
+    changed_at: datetime
+
+
+class MappingHistoryIndex:
+    """Thread-safe, incrementally synced vector index of past mappings.
+
+    `namespace` identifies the embedding space (model name and version); a
+    persisted file written for another namespace is ignored and rebuilt.
+    Each sync re-reads `overlap` behind the watermark: a transaction that
+    commits after a sync can carry an earlier timestamp than rows already
+    seen. Re-read rows that did not change are skipped, not re-embedded.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None,
+        namespace: str,
+        embed: Callable[[List[str]], np.ndarray],
+        load_changes: Callable[[Any, datetime | None], Sequence[HistoryChange]],
+        ann_min_size: int = 20000,
+        overlap: timedelta = timedelta(minutes=5),
+    ):
+        self.path = Path(path) if path else None
+        self.namespace = namespace
+        self._embed = embed
+        self._load_changes = load_changes
+        self._ann_min_size = ann_min_size
+        self._overlap = overlap
+        self._records: List[HistoryRecord] = []
+        self._positions: Dict[str, int] = {}
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._watermark: datetime | None = None
+        self._ann: Any = None
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    # -- sync -------------------------------------------------------------
+
+    def sync(self, db) -> int:
+        """Apply DB rows changed since the last sync; returns how many entries changed."""
+        with self._lock:
+            self._ensure_loaded()
+            since = self._watermark - self._overlap if self._watermark else None
+            changes = self._load_changes(db, since)
+            if not changes:
+                return 0
+            changed = self._apply(changes)
+            latest = max(c.changed_at for c in changes)
+            self._watermark = max(self._watermark, latest) if self._watermark else latest
+            if changed:
+                self._ann = None
+                self._save()
+            return changed
+
+    def _apply(self, changes: Sequence[HistoryChange]) -> int:
+        latest = {c.record.id: c for c in changes}
+        removed = {rid for rid, c in latest.items() if not c.eligible and rid in self._positions}
+        if removed:
+            keep = [i for i, r in enumerate(self._records) if r.id not in removed]
+            self._records = [self._records[i] for i in keep]
+            self._vectors = self._vectors[keep]
+            self._positions = {r.id: i for i, r in enumerate(self._records)}
+
+        # The overlap window re-reads rows already indexed; only real changes count
+        upserts = [
+            c.record
+            for c in latest.values()
+            if c.eligible
+            and (
+                c.record.id not in self._positions
+                or self._records[self._positions[c.record.id]] != c.record
+            )
+        ]
+        if upserts:
+            vectors = l2_normalize(self._embed([r.normalized_value for r in upserts]))
+            if not self._records:
+                self._vectors = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+            appended = []
+            for record, vec in zip(upserts, vectors):
+                pos = self._positions.get(record.id)
+                if pos is None:
+                    self._positions[record.id] = len(self._records)
+                    self._records.append(record)
+                    appended.append(vec)
+                else:
+                    self._records[pos] = record
+                    self._vectors[pos] = vec
+            if appended:
+                self._vectors = np.vstack([self._vectors, np.stack(appended)])
+        return len(removed) + len(upserts)
+
+    # -- query ------------------------------------------------------------
+
+    def query(
+        self, vectors: np.ndarray, min_score: float
+    ) -> List[Tuple[HistoryRecord, float] | None]:
+        """Nearest historical mapping per input row, or None below `min_score`."""
+        vectors = l2_normalize(vectors)
+        with self._lock:
+            self._ensure_loaded()
+            if not self._records or not len(vectors):
+                return [None] * len(vectors)
+            best, scores = self._nearest(vectors)
+            records = self._records
+        return [
+            (records[i], round(s, 4)) if s >= min_score else None
+            for i, s in zip(best.tolist(), scores.tolist())
+        ]
+
+    def _nearest(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if hnswlib is not None and len(self._records) >= self._ann_min_size:
+            labels, distances = self._ann_index().knn_query(vectors, k=1)
+            return labels[:, 0].astype(np.intp), 1.0 - distances[:, 0]
+        scores = vectors @ self._vectors.T
+        best = np.argmax(scores, axis=1)
+        return best, scores[np.arange(len(best)), best]
+
+    def _ann_index(self) -> Any:
+        if self._ann is None:
+            ann = hnswlib.Index(space="cosine", dim=self._vectors.shape[1])
+            ann.init_index(max_elements=len(self._records), ef_construction=200, M=16)
+            ann.add_items(self._vectors, np.arange(len(self._records)))
+            ann.set_ef(64)
+            self._ann = ann
+        return self._ann
+
+    # -- persistence ------------------------------------------------------
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta["format"] != FORMAT_VERSION or meta["namespace"] != self.namespace:
+                    logger.info("mapping_history_index_stale", path=str(self.path))
+                    return
+                self._vectors = data["vectors"].astype(np.float32)
+            self._records = [HistoryRecord(**r) for r in meta["records"]]
+            self._positions = {r.id: i for i, r in enumerate(self._records)}
+            watermark = meta["watermark"]
+            self._watermark = datetime.fromisoformat(watermark) if watermark else None
+        except Exception as exc:
+            logger.warning("mapping_history_index_unreadable", path=str(self.path), error=str(exc))
+            self._records, self._positions, self._watermark = [], {}, None
+            self._vectors = np.zeros((0, 0), dtype=np.float32)
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        meta = {
+            "format": FORMAT_VERSION,
+            "namespace": self.namespace,
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+            "records": [asdict(r) for r in self._records],
+        }
+        # A unique temp file per writer, renamed over the target: readers in
+        # other workers see the old or the new index, never a partial one
+        tmp = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                np.savez(fh, vectors=self._vectors, meta=np.array(json.dumps(meta)))
+            os.replace(tmp, self.path)
+        except OSError as exc:
+            logger.warning("mapping_history_index_not_saved", path=str(self.path), error=str(exc))
+            if tmp and os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def reset(self) -> None:
+        """Forget everything; the next sync re-reads the full history."""
+        with self._lock:
+            self._records, self._positions, self._watermark = [], {}, None
+            self._vectors = np.zeros((0, 0), dtype=np.float32)
+            self._ann = None
+            self._loaded = True
@@ -3,11 +3,30 @@ import json
 import re
 import difflib
 import numpy as np
-from typing import List, Dict
+from datetime import datetime, timedelta
+from typing import List, Dict, Tuple
 from app.core.config import settings
 from sqlalchemy.orm import Session
-from app.models.mapping import SemanticFieldMappingModel
-from app.crud.mapping_crud import bulk_create_semantic_field_mappings
+from app.crud.mapping_crud import (
+    approved_semantic_field_mappings_version,
+    bulk_create_semantic_field_mappings,
+    get_semantic_field_mappings_by_normalized_values,
+    increment_semantic_field_mapping_usage,
+    list_approved_semantic_field_mappings,
+    list_semantic_field_mapping_changes,
+)
+from app.models.mapping import MappingSource
+from app.services.canonical_index import CanonicalEntry, CanonicalIndexCache
+from app.crud.mapping_rule_crud import list_mapping_rules, mapping_rules_version
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_model import embedding_manager
+from app.services.rule_engine import EXACT, Rule, RuleSet, RuleSetCache
+from app.services.mapping_history_index import (
+    HistoryChange,
+    HistoryRecord,
+    MappingHistoryIndex,
+)
+from app.utils.vectors import l2_normalize
 
 # Optional Redis cache
 redis_client = None
@@ -20,17 +39,17 @@ if REDIS_URL:
     except Exception:
         redis_client = None
 
+embedding_cache = EmbeddingCache(
+    redis_client,
+    model_name=settings.EMBEDDING_MODEL_NAME,
+    model_version=settings.EMBEDDING_MODEL_VERSION,
+    ttl=settings.EMBEDDING_CACHE_TTL,
+    dtype=settings.EMBEDDING_CACHE_DTYPE,
+)
+
 # Sentence Transformers (free, open-source embeddings)
 RULE_BASED_MAPPING_ENABLED = settings.RULE_BASED_MAPPING_ENABLED
 USE_SEMANTIC_EMBEDDINGS = getattr(settings, "USE_SEMANTIC_EMBEDDINGS", True)
-embedding_model = None
-try:
-    from sentence_transformers import SentenceTransformer
-
-    # Lightweight model: 22MB, very fast, works on CPU
-    embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
-except Exception:
-    embedding_model = None
 
 
 def _cache_get(key: str) -> dict | list | None:
@@ -46,6 +65,23 @@ def _cache_get(key: str) -> dict | list | None:
         return None
 
 
+def _cache_get_many(keys: List[str]) -> List[dict | list | None]:
+    """Get several values with one MGET; misses and errors come back as None."""
+    if not redis_client or not keys:
+        return [None] * len(keys)
+    try:
+        raw_values = redis_client.mget(keys)
+    except Exception:
+        return [None] * len(keys)
+    values: List[dict | list | None] = []
+    for raw in raw_values:
+        try:
+            values.append(json.loads(raw) if raw else None)
+        except Exception:
+            values.append(None)
+    return values
+
+
 def _cache_set(key: str, value: list[float] | dict, ttl: int = 86400) -> None:
     """Set value in cache with TTL."""
     if not redis_client:
@@ -56,32 +92,50 @@ def _cache_set(key: str, value: list[float] | dict, ttl: int = 86400) -> None:
         pass
 
 
-def _embedding(text: str) -> list[float]:
-    """Get embedding for text using Sentence Transformers.
+def _fallback_vector(text: str) -> np.ndarray:
+    """Character frequency vector (very rough), used when the model is unavailable."""
+    codes = [ord(ch) for ch in text.lower() if ord(ch) < 128]
+    vec = np.bincount(np.array(codes, dtype=np.int64), minlength=128).astype(np.float32)
+    norm = np.linalg.norm(vec) or 1.0
+    return vec / norm
 
-    Falls back to difflib-based matching if model unavailable.
-    Caches results in Redis if available.
+
+def _embed_batch(texts: List[str]) -> np.ndarray:
+    """Embed `texts` into an (n, dim) float32 matrix.
+
+    Cached vectors come back from one MGET; all misses go through a single
+    batched `encode()` call and are written back in one pipelined batch.
+    Without the model every text gets a _fallback_vector, which is never
+    cached: its dimension differs from the model's, and the cache namespace
+    belongs to the model.
     """
-    key = f"emb:{text.lower()}"
-    cached = _cache_get(key)
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    if not (USE_SEMANTIC_EMBEDDINGS and embedding_manager.available):
+        return np.stack([_fallback_vector(t) for t in texts])
 
-    if cached:
-        return cached  # type: ignore[return-value]
+    vectors = embedding_cache.get_many(texts)
+    misses = [i for i, vec in enumerate(vectors) if vec is None]
 
-    if embedding_model and USE_SEMANTIC_EMBEDDINGS:
+    if misses:
+        miss_texts = list(dict.fromkeys(texts[i] for i in misses))
         # Using Sentence Transformers (free, CPU-friendly)
-        emb = list(embedding_model.encode(text).tolist())  # type: ignore[union-attr]
-    else:
-        # Fallback: character frequency vector (very rough)
-        vec = np.zeros(128, dtype=float)
-        for ch in text.lower():
-            if 0 <= ord(ch) < 128:
-                vec[ord(ch)] += 1.0
-        norm = np.linalg.norm(vec) or 1.0
-        emb = (vec / norm).tolist()
+        encoded = embedding_manager.encode(miss_texts)
+        fresh = dict(zip(miss_texts, encoded))
+        for i in misses:
+            vectors[i] = fresh[texts[i]]
+        embedding_cache.set_many(fresh)
+
+    return np.stack(vectors)  # type: ignore[arg-type]
+
+
+def _embedding(text: str) -> list[float]:
+    """Get embedding for text using Sentence Transformers.
 
-    _cache_set(key, emb)
-    return emb
+    Falls back to a character frequency vector if model unavailable.
+    Caches results in Redis if available.
+    """
+    return _embed_batch([text])[0].tolist()
 
 
 def _cosine(a: list[float], b: list[float]) -> float:
@@ -91,40 +145,81 @@ def _cosine(a: list[float], b: list[float]) -> float:
     return float(np.dot(va, vb) / denom)
 
 
-def suggest_mapping(ngo_fields: List[str], donor_fields: List[str]) -> List[Dict]:
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k best scores per row, best first."""
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    order = np.argsort(-np.take_along_axis(scores, idx, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1)
+
+
+def _to_confidence(score: float) -> float:
+    # Normalize score to 0-1 range (cosine can be negative)
+    return round(max(0.0, min(1.0, (float(score) + 1.0) / 2.0)), 3)
+
+
+def suggest_mapping(ngo_fields: List[str], donor_fields: List[str], top_k: int = 1) -> List[Dict]:
     """
-    Returns [{ngo_field, donor_field, confidence}] using Sentence Transformers
-    embeddings, with fallback to difflib.
+    Returns [{ngo_field, donor_field, confidence, alternatives}] using Sentence
+    Transformers embeddings, with fallback to difflib.
 
-    Uses cosine similarity for matching with semantic embeddings.
+    Both field lists are embedded in one batch each and scored with a single
+    cosine-similarity matmul. `alternatives` holds the `top_k` best donor
+    fields (best first) when more than one is requested.
     """
-    embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
     if not donor_fields:
         return []
 
     # If embeddings unavailable, use difflib
-    if not embedding_model or not USE_SEMANTIC_EMBEDDINGS:
+    if not USE_SEMANTIC_EMBEDDINGS or not embedding_manager.available:
         suggestions: List[Dict] = []
         for nf in ngo_fields:
-            match = difflib.get_close_matches(nf, donor_fields, n=1, cutoff=0.0)
-            best = match[0] if match else donor_fields[0]
-            conf = difflib.SequenceMatcher(a=nf.lower(), b=best.lower()).ratio()
-            suggestions.append({"ngo_field": nf, "donor_field": best, "confidence": round(conf, 3)})
+            matches = difflib.get_close_matches(nf, donor_fields, n=max(top_k, 1), cutoff=0.0)
+            ranked = [
+                {
+                    "donor_field": df,
+                    "confidence": round(
+                        difflib.SequenceMatcher(a=nf.lower(), b=df.lower()).ratio(), 3
+                    ),
+                }
+                for df in (matches or donor_fields[:1])
+            ]
+            suggestions.append(
+                {
+                    "ngo_field": nf,
+                    "donor_field": ranked[0]["donor_field"],
+                    "confidence": ranked[0]["confidence"],
+                    "alternatives": ranked if top_k > 1 else [],
+                }
+            )
         return suggestions
 
+    if not ngo_fields:
+        return []
+
     # With Sentence Transformers embeddings
-    donor_vecs = {df: _embedding(df) for df in donor_fields}
+    ngo_matrix = l2_normalize(_embed_batch(ngo_fields))
+    donor_matrix = l2_normalize(_embed_batch(donor_fields))
+    scores = ngo_matrix @ donor_matrix.T
+    best = _top_k(scores, max(top_k, 1))
+
     out: List[Dict] = []
-    for nf in ngo_fields:
-        nf_vec = _embedding(nf)
-        best_field, best_score = donor_fields[0], -1.0
-        for df, dv in donor_vecs.items():
-            score = _cosine(nf_vec, dv)
-            if score > best_score:
-                best_field, best_score = df, score
-        # Normalize score to 0-1 range (cosine can be negative)
-        confidence = max(0.0, min(1.0, (best_score + 1.0) / 2.0))
-        out.append({"ngo_field": nf, "donor_field": best_field, "confidence": round(confidence, 3)})
+    for row, nf in enumerate(ngo_fields):
+        ranked = [
+            {"donor_field": donor_fields[col], "confidence": _to_confidence(scores[row, col])}
+            for col in best[row]
+        ]
+        out.append(
+            {
+                "ngo_field": nf,
+                "donor_field": ranked[0]["donor_field"],
+                "confidence": ranked[0]["confidence"],
+                "alternatives": ranked if top_k > 1 else [],
+            }
+        )
     return out
 
 
@@ -182,38 +277,93 @@ FIELD_PATTERNS = {
 }
 
 
-def rule_based_suggestion(value: str):
-    v = normalize_value(value)
-
-    if v in CURRENCY_CODES:
-        return ("currency", "currency", 0.99)
-
-    for h in HEADER_KEYWORDS:
-        if h in v:
-            return ("header_metadata", None, 0.95)
+# Built-in rules, in the precedence the original cascade applied them
+DEFAULT_RULES = (
+    [Rule(code, "currency", "currency", 0.99, 0, EXACT) for code in sorted(CURRENCY_CODES)]
+    + [Rule(h, "header_metadata", None, 0.95, 10) for h in HEADER_KEYWORDS]
+    + [Rule(k, "budget_field", c, 0.96, 20) for k, c in FIELD_PATTERNS.items()]
+    + [Rule(k, "budget_category", c, 0.94, 30) for k, c in CATEGORY_KEYWORDS.items()]
+)
+
+
+def _load_scoped_rules(db: Session, scope: Tuple) -> List[Rule]:
+    return [
+        Rule(
+            normalize_value(row.pattern),
+            row.mapped_to,
+            row.mapped_key,
+            row.confidence,
+            row.priority,
+            row.match_type,
+        )
+        for row in list_mapping_rules(db, *scope)
+    ]
+
+
+# Compiled rule sets per (customer_id, donor_template_id)
+rule_sets = RuleSetCache(
+    DEFAULT_RULES,
+    load_rules=_load_scoped_rules,
+    fingerprint=lambda db, scope: mapping_rules_version(db, *scope),
+)
+
+
+def rule_based_suggestion(value: str, rule_set: RuleSet | None = None):
+    rule = (rule_set or rule_sets.base).match(normalize_value(value))
+    if rule is None:
+        return None
+    return (rule.mapped_to, rule.mapped_key, rule.confidence)
 
-    for k, canonical in FIELD_PATTERNS.items():
-        if k in v:
-            return ("budget_field", canonical, 0.96)
 
-    for k, canonical in CATEGORY_KEYWORDS.items():
-        if k in v:
-            return ("budget_category", canonical, 0.94)
+def rule_based_suggestions(values: List[str], rule_set: RuleSet | None = None):
+    """Classify a whole column in one pass; None where no rule matches."""
+    return (rule_set or rule_sets.base).classify([normalize_value(v) for v in values])
 
-    return None
 
+def resolve_stored_mappings(db: Session, counts: Dict[str, int]) -> Dict[str, Dict]:
+    """Current stored mapping per normalized value, with one IN query.
 
-def suggest_semantic_mapping(values: List[str], db: Session, valid_user: Dict) -> Dict:
+    times_used of each mapping found grows by counts[normalized value] and
+    is committed.
+    """
+    resolved: Dict[str, Dict] = {}
+    existing = get_semantic_field_mappings_by_normalized_values(db, list(counts))
+    usage = {row.id: counts[normalized] for normalized, row in existing.items()}
+    # Read the rows before committing: the commit expires them
+    for normalized, row in existing.items():
+        resolved[normalized] = {
+            "mapped_to": row.mapped_to,
+            "mapped_key": row.mapped_key,
+            "confidence": row.confidence,
+            "source": row.source.value,
+            "times_used": row.times_used + usage[row.id],
+        }
+    increment_semantic_field_mapping_usage(db, usage)
+    db.commit()  # commit the times_used updates
+    return resolved
+
+
+def suggest_semantic_mapping(
+    values: List[str],
+    db: Session,
+    valid_user: Dict,
+    donor_template_id: int | None = None,
+) -> Dict:
     """
     Suggest semantic mappings using rule-based heuristics.
     Returns [{ngo_field, mapped_to, mapped_key, confidence}]
+
+    Without rules, values are deduplicated by normalized form and resolved as
+    sets: one IN query against known mappings, one cache MGET for the rest,
+    one usage UPDATE per distinct increment, then a single embedding batch
+    for whatever is still unknown.
     """
     suggestions: List[Dict] = []
-    unknown: List[Dict] = []
-    for raw in values:
-        normalized = normalize_value(raw)
-        if RULE_BASED_MAPPING_ENABLED:
-            rule_suggestion = rule_based_suggestion(normalized)
+    if RULE_BASED_MAPPING_ENABLED:
+        rule_set = rule_sets.get(db, (valid_user.get("customer_id"), donor_template_id))
+        normalized_values = [normalize_value(raw) for raw in values]
+        matches = rule_based_suggestions(normalized_values, rule_set)
+        for raw, normalized, rule_suggestion in zip(values, normalized_values, matches):
             if rule_suggestion:
                 mapped_to, mapped_key, confidence = rule_suggestion
             else:
@@ -228,46 +378,49 @@ def suggest_semantic_mapping(values: List[str], db: Session, valid_user: Dict) -
                     "source": "rule",
                 }
             )
-        else:
-            existing = (
-                db.query(SemanticFieldMappingModel).filter_by(normalized_value=normalized).first()
+        return {"suggestions": suggestions, "unknown": []}
+
+    # normalized value -> every raw cell that normalizes to it, in input order
+    occurrences: Dict[str, List[str]] = {}
+    for raw in values:
+        occurrences.setdefault(normalize_value(raw), []).append(raw)
+
+    resolved = resolve_stored_mappings(
+        db, {normalized: len(raws) for normalized, raws in occurrences.items()}
+    )
+
+    misses = [n for n in occurrences if n not in resolved]
+    cached = _cache_get_many([f"template_mapping:{n}" for n in misses])
+    for normalized, value in zip(misses, cached):
+        if isinstance(value, dict):
+            resolved[normalized] = {
+                "mapped_to": value["mapped_to"],
+                "mapped_key": value["mapped_key"],
+                "confidence": value["confidence"],
+                "source": value.get("source", "ai"),
+            }
+
+    for raw in values:
+        normalized = normalize_value(raw)
+        if normalized in resolved:
+            suggestions.append(
+                {"raw_value": raw, "normalized_value": normalized, **resolved[normalized]}
             )
-            if existing:
-                # TODO this will not update DB, need to commit later
-                existing.times_used += 1
-                suggestions.append(
-                    {
-                        "raw_value": raw,
-                        "normalized_value": normalized,
-                        "mapped_to": existing.mapped_to,
-                        "mapped_key": existing.mapped_key,
-                        "confidence": existing.confidence,
-                        "source": existing.source.value,
-                        "times_used": existing.times_used,
-                    }
-                )
-            else:
-                if value := _cache_get(f"template_mapping:{normalized}"):
-                    if isinstance(value, dict):
-                        suggestions.append(
-                            {
-                                "raw_value": raw,
-                                "normalized_value": normalized,
-                                "mapped_to": value["mapped_to"],
-                                "mapped_key": value["mapped_key"],
-                                "confidence": value["confidence"],
-                                "source": value.get("source", "ai"),
-                            }
-                        )
-                else:
-                    unknown.append({"raw_value": raw, "normalized_value": normalized})
-    db.commit()  # commit any times_used updates
+
+    unknown: List[Dict] = [
+        {"raw_value": raws[0], "normalized_value": normalized}
+        for normalized, raws in occurrences.items()
+        if normalized not in resolved
+    ]
 
     # Use embedding-based semantic matching for unknown fields
-    if unknown and embedding_model and USE_SEMANTIC_EMBEDDINGS:
-        unknown_suggestions = _match_unknown_fields(unknown, db)
-        for item in unknown_suggestions:
-            suggestions.append(item)
+    if unknown and USE_SEMANTIC_EMBEDDINGS and embedding_manager.available:
+        vectors = _embed_batch([item["raw_value"] for item in unknown])
+        history_suggestions, unknown, vectors = _match_history(unknown, vectors, db)
+        unknown_suggestions = _match_unknown_fields(unknown, db, vectors)
+        for item in history_suggestions + unknown_suggestions:
+            for raw in occurrences[item["normalized_value"]]:
+                suggestions.append({**item, "raw_value": raw})
             # Cache result
             _cache_set(
                 f"template_mapping:{item['normalized_value']}",
@@ -275,11 +428,17 @@ def suggest_semantic_mapping(values: List[str], db: Session, valid_user: Dict) -
                     "mapped_to": item["mapped_to"],
                     "mapped_key": item.get("mapped_key"),
                     "confidence": item["confidence"],
-                    "source": "semantic",
+                    "source": item["source"],
                 },
                 ttl=7 * 86400,
             )
-        bulk_create_semantic_field_mappings(db, valid_user["user_id"], unknown_suggestions)
+        if unknown_suggestions:
+            # "semantic" is not a stored MappingSource; embedding matches persist as AI
+            bulk_create_semantic_field_mappings(
+                db,
+                valid_user["user_id"],
+                [{**item, "source": MappingSource.AI} for item in unknown_suggestions],
+            )
         unknown = []
 
     return {"suggestions": suggestions, "unknown": unknown}
@@ -302,97 +461,127 @@ ALLOWED_MAPPED_TO = [
 ]
 
 
-def _match_unknown_fields(unknown_items: List[Dict], db: Session) -> List[Dict]:
+# Categories come first so they win exact ties with fields, as before
+_CANONICAL_ENTRIES = [
+    CanonicalEntry(pattern, "budget_category", canonical)
+    for pattern, canonical in CATEGORY_KEYWORDS.items()
+] + [
+    CanonicalEntry(pattern, "budget_field", canonical)
+    for pattern, canonical in FIELD_PATTERNS.items()
+]
+
+SIMILARITY_THRESHOLD = 0.5
+
+canonical_index = CanonicalIndexCache(
+    base_entries=_CANONICAL_ENTRIES,
+    embed=_embed_batch,
+    load_entries=lambda db: [
+        CanonicalEntry(*row) for row in list_approved_semantic_field_mappings(db)
+    ],
+    fingerprint=approved_semantic_field_mappings_version,
+)
+
+
+def _load_history_changes(db: Session, since: datetime | None) -> List[HistoryChange]:
+    return [
+        HistoryChange(
+            record=HistoryRecord(
+                id=str(row.id),
+                normalized_value=row.normalized_value,
+                mapped_to=row.mapped_to,
+                mapped_key=row.mapped_key or None,
+                confidence=row.confidence if row.confidence is not None else 1.0,
+            ),
+            eligible=row.mapped_to != "ignored"
+            and (row.approved or row.times_used >= settings.MAPPING_HISTORY_MIN_TIMES_USED),
+            changed_at=row.changed_at,
+        )
+        for row in list_semantic_field_mapping_changes(db, since)
+    ]
+
+
+mapping_history = MappingHistoryIndex(
+    path=settings.MAPPING_HISTORY_INDEX_PATH or None,
+    namespace=f"{settings.EMBEDDING_MODEL_NAME}:{settings.EMBEDDING_MODEL_VERSION}",
+    embed=_embed_batch,
+    load_changes=_load_history_changes,
+    overlap=timedelta(seconds=settings.MAPPING_HISTORY_SYNC_OVERLAP),
+)
+
+
+def _match_history(
+    unknown_items: List[Dict], vectors: np.ndarray, db: Session
+) -> Tuple[List[Dict], List[Dict], np.ndarray]:
+    """
+    Resolve unknown items from the nearest previously mapped value.
+
+    Returns (suggestions, still-unknown items, their vectors).
+    """
+    mapping_history.sync(db)
+    matches = mapping_history.query(vectors, settings.MAPPING_HISTORY_MIN_SCORE)
+
+    results: List[Dict] = []
+    remaining: List[int] = []
+    for i, (item, match) in enumerate(zip(unknown_items, matches)):
+        if match is None:
+            remaining.append(i)
+            continue
+        record, score = match
+        results.append(
+            {
+                "raw_value": item["raw_value"],
+                "normalized_value": item["normalized_value"],
+                "mapped_to": record.mapped_to,
+                "mapped_key": record.mapped_key,
+                "confidence": round(record.confidence * score, 3),
+                "source": "history",
+                "matched_value": record.normalized_value,
+            }
+        )
+    return results, [unknown_items[i] for i in remaining], vectors[remaining]
+
+
+def _match_unknown_fields(
+    unknown_items: List[Dict], db: Session, vectors: np.ndarray | None = None
+) -> List[Dict]:
     """
     Match unknown fields using semantic embeddings against known canonical fields.
 
     Strategy:
-    1. Try to match against existing FIELD_PATTERNS using embeddings
+    1. Score all items at once against the canonical index (FIELD_PATTERNS,
+       CATEGORY_KEYWORDS and approved DB mappings) with one matrix product
     2. Use similarity threshold to classify fields
     3. Return structured mappings
     """
-    if not embedding_model:
+    if not embedding_manager.available or not unknown_items:
         return []
 
-    results = []
+    index = canonical_index.get(db)
+    if vectors is None:
+        vectors = _embed_batch([item["raw_value"] for item in unknown_items])
+    best, scores = index.match(vectors)
 
-    # Build canonical field vectors
-    canonical_fields = {}
-    for pattern, canonical in FIELD_PATTERNS.items():
-        vec = _embedding(pattern)
-        canonical_fields[canonical] = vec
-
-    # Category keywords
-    category_vectors = {}
-    for pattern, canonical in CATEGORY_KEYWORDS.items():
-        vec = _embedding(pattern)
-        category_vectors[canonical] = vec
-
-    # Match unknown items
-    for item in unknown_items:
-        raw_value = item["raw_value"]
-        normalized = item["normalized_value"]
-
-        item_vec = _embedding(raw_value)
-
-        # Try to match against budget fields
-        best_field = None
-        best_score_field = -1.0
-        for field_name, field_vec in canonical_fields.items():
-            score = _cosine(item_vec, field_vec)
-            if score > best_score_field:
-                best_score_field = score
-                best_field = field_name
-
-        # Try to match against budget categories
-        best_category = None
-        best_score_category = -1.0
-        for cat_name, cat_vec in category_vectors.items():
-            score = _cosine(item_vec, cat_vec)
-            if score > best_score_category:
-                best_score_category = score
-                best_category = cat_name
-
-        # Decide best match with confidence threshold
-        SIMILARITY_THRESHOLD = 0.5
-
-        if best_score_field > best_score_category and best_score_field > SIMILARITY_THRESHOLD:
-            # Field match
-            confidence = max(0.0, min(1.0, (best_score_field + 1.0) / 2.0))
-            results.append(
-                {
-                    "raw_value": raw_value,
-                    "normalized_value": normalized,
-                    "mapped_to": "budget_field",
-                    "mapped_key": best_field,
-                    "confidence": round(confidence, 3),
-                    "source": "semantic",
-                }
-            )
-        elif best_score_category > SIMILARITY_THRESHOLD:
-            # Category match
-            confidence = max(0.0, min(1.0, (best_score_category + 1.0) / 2.0))
-            results.append(
-                {
-                    "raw_value": raw_value,
-                    "normalized_value": normalized,
-                    "mapped_to": "budget_category",
-                    "mapped_key": best_category,
-                    "confidence": round(confidence, 3),
-                    "source": "semantic",
-                }
+    results = []
+    for item, entry_idx, score in zip(unknown_items, best.tolist(), scores.tolist()):
+        if score > SIMILARITY_THRESHOLD:
+            entry = index.entries[entry_idx]
+            mapped_to, mapped_key, confidence = (
+                entry.mapped_to,
+                entry.mapped_key,
+                _to_confidence(score),
             )
         else:
             # Low confidence - mark as ignored
-            results.append(
-                {
-                    "raw_value": raw_value,
-                    "normalized_value": normalized,
-                    "mapped_to": "ignored",
-                    "mapped_key": None,
-                    "confidence": 0.0,
-                    "source": "semantic",
-                }
-            )
+            mapped_to, mapped_key, confidence = ("ignored", None, 0.0)
+        results.append(
+            {
+                "raw_value": item["raw_value"],
+                "normalized_value": item["normalized_value"],
+                "mapped_to": mapped_to,
+                "mapped_key": mapped_key,
+                "confidence": confidence,
+                "source": "semantic",
+            }
+        )
 
     return results
@@ -0,0 +1,163 @@
+"""Compiled keyword rules for the cheap first mapping tier.
+
+All "contains" patterns of a rule set are compiled into one Aho–Corasick
+automaton, so classifying a value costs one pass over its characters no
+matter how many phrases the set holds. "exact" patterns are a dict lookup.
+
+When several rules match, the lowest ``priority`` wins and ties go to the
+rule that was added first, which reproduces the original if/for cascade:
+exact currency codes, then header keywords, then field patterns, then
+category keywords, each in declaration order.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Sequence, Tuple
+
+EXACT = "exact"
+CONTAINS = "contains"
+
+RuleMatch = Tuple[str, str | None, float]
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    pattern: str
+    mapped_to: str
+    mapped_key: str | None
+    confidence: float
+    priority: int = 100
+    match_type: str = CONTAINS
+
+
+class RuleSet:
+    """Immutable, compiled set of rules; build once and share."""
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules: Tuple[Rule, ...] = tuple(rules)
+        # rank = (priority, declaration order); smaller wins
+        self._exact: Dict[str, Tuple[Tuple[int, int], Rule]] = {}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[Tuple[int, int], Rule] | None] = [None]
+        for order, rule in enumerate(self.rules):
+            rank = (rule.priority, order)
+            if rule.match_type == EXACT:
+                if rule.pattern not in self._exact or rank < self._exact[rule.pattern][0]:
+                    self._exact[rule.pattern] = (rank, rule)
+            elif rule.pattern:
+                self._add_pattern(rule.pattern, rank, rule)
+        self._link()
+
+    def _add_pattern(self, pattern: str, rank: Tuple[int, int], rule: Rule) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(None)
+            state = nxt
+        current = self._out[state]
+        if current is None or rank < current[0]:
+            self._out[state] = (rank, rule)
+
+    def _link(self) -> None:
+        """Breadth-first failure links; each state keeps the best output on its suffix chain."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                inherited = self._out[self._fail[nxt]]
+                own = self._out[nxt]
+                if inherited is not None and (own is None or inherited[0] < own[0]):
+                    self._out[nxt] = inherited
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def match(self, value: str) -> Rule | None:
+        """Highest-priority rule matching an already normalized `value`."""
+        best = self._exact.get(value)
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in value:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            hit = out[state]
+            if hit is not None and (best is None or hit[0] < best[0]):
+                best = hit
+        return best[1] if best is not None else None
+
+    def classify(self, values: Sequence[str]) -> List[RuleMatch | None]:
+        """Batch form of `match`: (mapped_to, mapped_key, confidence) or None per value.
+
+        Repeated values in a column are matched once.
+        """
+        seen: Dict[str, RuleMatch | None] = {}
+        results: List[RuleMatch | None] = []
+        for value in values:
+            if value not in seen:
+                rule = self.match(value)
+                seen[value] = (
+                    None if rule is None else (rule.mapped_to, rule.mapped_key, rule.confidence)
+                )
+            results.append(seen[value])
+        return results
+
+
+class RuleSetCache:
+    """LRU of compiled RuleSets keyed by scope (e.g. customer and donor template).
+
+    `fingerprint(db, scope)` is a cheap change marker for the scope's stored
+    rules; the set is only reloaded and recompiled when it changes.
+    """
+
+    def __init__(
+        self,
+        base_rules: Sequence[Rule],
+        load_rules: Callable[[Any, Any], Sequence[Rule]],
+        fingerprint: Callable[[Any, Any], Hashable],
+        maxsize: int = 128,
+    ):
+        self.base = RuleSet(base_rules)
+        self._base_rules = tuple(base_rules)
+        self._load_rules = load_rules
+        self._fingerprint = fingerprint
+        self._maxsize = maxsize
+        self._sets: OrderedDict[Hashable, Tuple[Hashable, RuleSet]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db, scope: Hashable) -> RuleSet:
+        fingerprint = self._fingerprint(db, scope)
+        with self._lock:
+            cached = self._sets.get(scope)
+            if cached is not None and cached[0] == fingerprint:
+                self._sets.move_to_end(scope)
+                return cached[1]
+
+        extra = tuple(self._load_rules(db, scope))
+        rule_set = RuleSet(self._base_rules + extra) if extra else self.base
+
+        with self._lock:
+            self._sets[scope] = (fingerprint, rule_set)
+            self._sets.move_to_end(scope)
+            while len(self._sets) > self._maxsize:
+                self._sets.popitem(last=False)
+        return rule_set
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._sets.clear()
@@ -0,0 +1,308 @@
+"""Content-addressed cache for template detection results.
+
+Every NGO applying to the same funder uploads the same blank donor form, so
+detection output is cached under the SHA-256 of the file bytes together with
+DETECTOR_VERSION. A repeat upload is answered from an in-process LRU or from
+Redis without opening the workbook:
+
+    tpl-detect:{DETECTOR_VERSION}:{sha256}:{kind}   -> JSON result
+    tpl-detect:lru                                  -> sorted set, key -> last use
+    tpl-detect:version                              -> version the entries belong to
+
+Redis holds at most ``max_entries`` results; the least recently used are
+evicted on write. When DETECTOR_VERSION changes, the first process to see
+it deletes every entry written by the old version.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.template_detection.detector import (
+    detect_excel_structure,
+    detect_row_semantic_structure,
+    is_partial,
+)
+from app.services.template_detection.fingerprint import TemplateFingerprint, compute_fingerprint
+from app.services.template_detection.spreadsheet_reader import ExcelStructureDetector
+from app.services.template_detection.xlsx_reader import get_reader
+
+logger = get_logger(__name__)
+
+# Bump whenever detector / spreadsheet_reader output changes for the same file
+DETECTOR_VERSION = "1"
+
+KEY_PREFIX = "tpl-detect"
+LRU_KEY = f"{KEY_PREFIX}:lru"
+VERSION_KEY = f"{KEY_PREFIX}:version"
+
+# kinds of cached result
+STRUCTURE = "structure"
+ROW_SEMANTICS = "row_semantics"
+POSSIBLE_FIELDS = "possible_fields"
+FINGERPRINT = "fingerprint"
+
+CACHE_REQUESTS = Counter(
+    "budget_detection_cache_requests_total",
+    "Template detection cache lookups",
+    ["kind", "result"],
+)
+
+
+def file_digest(source: str | bytes, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 hex digest of a file path or of raw upload bytes."""
+    if isinstance(source, bytes):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    with open(source, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DetectionCache:
+    """Two-level (process LRU, then Redis) cache of JSON detection results.
+
+    Works without Redis (``client=None``) as a plain in-process LRU; Redis
+    errors are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        version: str = DETECTOR_VERSION,
+        max_entries: int = 5000,
+        local_size: int = 64,
+    ):
+        self.client = client
+        self.version = version
+        self.max_entries = max_entries
+        self.local_size = local_size
+        # Results are kept serialized so every hit hands out a fresh object
+        self._local: OrderedDict[Tuple[str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._version_checked = False
+
+    def key(self, digest: str, kind: str) -> str:
+        return f"{KEY_PREFIX}:{self.version}:{digest}:{kind}"
+
+    # -- lookups ---------------------------------------------------------------
+
+    def get(self, digest: str, kind: str) -> Any | None:
+        raw = self._local_get(digest, kind)
+        if raw is None:
+            raw = self._redis_get(self.key(digest, kind))
+            if raw is not None:
+                self._local_put(digest, kind, raw)
+        CACHE_REQUESTS.labels(kind=kind, result="miss" if raw is None else "hit").inc()
+        return None if raw is None else json.loads(raw)
+
+    def set(self, digest: str, kind: str, value: Any) -> None:
+        raw = json.dumps(value)
+        self._local_put(digest, kind, raw)
+        self._redis_set(self.key(digest, kind), raw)
+
+    def get_or_compute(
+        self,
+        digest: str,
+        kind: str,
+        compute: Callable[[], Any],
+        cacheable: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        """Cached result, else `compute()`; stored unless `cacheable` rejects it."""
+        cached = self.get(digest, kind)
+        if cached is not None:
+            return cached
+        value = compute()
+        if cacheable is None or cacheable(value):
+            self.set(digest, kind, value)
+        return value
+
+    def invalidate(self, digest: str | None = None) -> None:
+        """Drop one file's results, or everything when `digest` is None."""
+        with self._lock:
+            if digest is None:
+                self._local.clear()
+            else:
+                for local_key in [k for k in self._local if k[0] == digest]:
+                    del self._local[local_key]
+        if not self.client:
+            return
+        try:
+            if digest is None:
+                self._purge(lambda key: True)
+            else:
+                prefix = self.key(digest, "")
+                self._purge(lambda key: key.startswith(prefix))
+        except Exception as exc:
+            logger.warning("detection_cache_unavailable", op="invalidate", error=str(exc))
+
+    # -- process LRU -------------------------------------------------------------
+
+    def _local_get(self, digest: str, kind: str) -> str | None:
+        with self._lock:
+            raw = self._local.get((digest, kind))
+            if raw is not None:
+                self._local.move_to_end((digest, kind))
+            return raw
+
+    def _local_put(self, digest: str, kind: str, raw: str) -> None:
+        with self._lock:
+            self._local[(digest, kind)] = raw
+            self._local.move_to_end((digest, kind))
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    # -- Redis -------------------------------------------------------------------
+
+    def _redis_get(self, key: str) -> str | None:
+        if not self.client:
+            return None
+        try:
+            self._ensure_version()
+            pipe = self.client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.zadd(LRU_KEY, {key: time.time()}, xx=True)
+            raw, _ = pipe.execute()
+        except Exception as exc:
+            logger.warning("detection_cache_unavailable", op="get", error=str(exc))
+            return None
+        if raw is None:
+            return None
+        return raw.decode("utf-8") if isinstance(raw, bytes) else raw
+
+    def _redis_set(self, key: str, raw: str) -> None:
+        if not self.client:
+            return
+        try:
+            self._ensure_version()
+            pipe = self.client.pipeline(transaction=False)
+            pipe.set(key, raw)
+            pipe.zadd(LRU_KEY, {key: time.time()})
+            pipe.zcard(LRU_KEY)
+            size = pipe.execute()[-1]
+            if size > self.max_entries:
+                self._evict(size - self.max_entries)
+        except Exception as exc:
+            logger.warning("detection_cache_unavailable", op="set", error=str(exc))
+
+    def _evict(self, count: int) -> None:
+        victims = self.client.zrange(LRU_KEY, 0, count - 1)
+        if victims:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.delete(*victims)
+            pipe.zrem(LRU_KEY, *victims)
+            pipe.execute()
+
+    def _purge(self, match: Callable[[str], bool]) -> int:
+        """Delete tracked entries whose key satisfies `match`."""
+        members = [_text(m) for m in self.client.zrange(LRU_KEY, 0, -1)]
+        victims = [m for m in members if match(m)]
+        if victims:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.delete(*victims)
+            pipe.zrem(LRU_KEY, *victims)
+            pipe.execute()
+        return len(victims)
+
+    def _ensure_version(self) -> None:
+        """Once per process: drop entries left behind by another DETECTOR_VERSION."""
+        if self._version_checked:
+            return
+        stored = self.client.get(VERSION_KEY)
+        if stored is None or _text(stored) != self.version:
+            current = f"{KEY_PREFIX}:{self.version}:"
+            purged = self._purge(lambda key: not key.startswith(current))
+            self.client.set(VERSION_KEY, self.version)
+            logger.info(
+                "detection_cache_version_changed",
+                previous=None if stored is None else _text(stored),
+                version=self.version,
+                purged=purged,
+            )
+        self._version_checked = True
+
+
+def _text(value: str | bytes) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+# Optional Redis backing; without it results are only cached in-process
+_redis_client = None
+if settings.REDIS_URL:
+    try:
+        import redis
+
+        _redis_client = redis.from_url(settings.REDIS_URL)
+    except Exception:
+        _redis_client = None
+
+detection_cache = DetectionCache(
+    _redis_client,
+    max_entries=settings.DETECTION_CACHE_MAX_ENTRIES,
+    local_size=settings.DETECTION_CACHE_LOCAL_SIZE,
+)
+
+
+# -- cached entry points --------------------------------------------------------
+# `digest` may be passed when the caller already hashed the upload.
+
+
+def cached_excel_structure(file_path: str, digest: str | None = None) -> Dict[str, Any]:
+    """detect_excel_structure, answered from the cache for a previously seen file.
+
+    A structure missing sheets that timed out is returned but not cached, so
+    the next upload of the file is detected again.
+    """
+    return detection_cache.get_or_compute(
+        digest or file_digest(file_path),
+        STRUCTURE,
+        lambda: detect_excel_structure(
+            file_path,
+            reader=get_reader(file_path, settings.SPREADSHEET_READER_BACKEND),
+            max_workers=settings.DETECTION_MAX_WORKERS,
+            sheet_timeout=settings.DETECTION_SHEET_TIMEOUT,
+        ),
+        cacheable=lambda structure: not is_partial(structure),
+    )
+
+
+def cached_row_semantic_structure(file_path: str, digest: str | None = None) -> Dict[str, Any]:
+    """detect_row_semantic_structure, answered from the cache for a previously seen file."""
+    return detection_cache.get_or_compute(
+        digest or file_digest(file_path),
+        ROW_SEMANTICS,
+        lambda: detect_row_semantic_structure(file_path),
+    )
+
+
+def cached_possible_fields(file_path: str, digest: str | None = None) -> List[str]:
+    """Candidate field labels (ExcelStructureDetector.stream_possible_fields), cached."""
+    return detection_cache.get_or_compute(
+        digest or file_digest(file_path),
+        POSSIBLE_FIELDS,
+        lambda: ExcelStructureDetector(
+            file_path, reader=get_reader(file_path, settings.SPREADSHEET_READER_BACKEND)
+        ).stream_possible_fields(),
+    )
+
+
+def cached_fingerprint(file_path: str, digest: str | None = None) -> TemplateFingerprint:
+    """Structural fingerprint (see fingerprint.compute_fingerprint), cached."""
+    data = detection_cache.get_or_compute(
+        digest or file_digest(file_path),
+        FINGERPRINT,
+        lambda: compute_fingerprint(
+            file_path, reader=get_reader(file_path, settings.SPREADSHEET_READER_BACKEND)
+        ).to_dict(),
+    )
+    return TemplateFingerprint.from_dict(data)
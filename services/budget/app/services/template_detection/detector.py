@@ -1,10 +1,23 @@
-from typing import Any
+import copy
+import functools
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable, Iterator
 
 from openpyxl import load_workbook
 
+from app.core.logging import get_logger
+from app.services.template_detection.xlsx_reader import OpenpyxlReader, RowRecord, SheetReader
+
 # from ..normalizer import normalize_label
 import re
 
+logger = get_logger(__name__)
+
 
 def normalize_label(label: str) -> str:
     if not label:
@@ -26,11 +39,17 @@ def infer_currency(label: str) -> str | None:
 
 
 def infer_column_type(ws, col_idx: int, start_row: int, sample_size: int = 10) -> str:
+    values = (
+        ws.cell(row=r, column=col_idx).value for r in range(start_row, start_row + sample_size)
+    )
+    return _column_type(values)
+
+
+def _column_type(values: Iterable[Any]) -> str:
     numeric = 0
     text = 0
 
-    for r in range(start_row, start_row + sample_size):
-        val = ws.cell(row=r, column=col_idx).value
+    for val in values:
         if isinstance(val, (int, float)):
             numeric += 1
         elif isinstance(val, str):
@@ -58,24 +77,27 @@ def detect_columns(ws, header_row: int) -> list[dict]:
         if not cell.value:
             continue
 
-        label = str(cell.value).strip()
-        normalized = normalize_label(label)
-
         column_type = infer_column_type(ws, idx + 1, header_row + 1)
+        columns.append(_column(idx, cell.value, column_type))
 
-        col = {
-            "index": idx,
-            "label": label,
-            "normalized": normalized,
-            "type": column_type,
-        }
+    return columns
 
-        if column_type == "currency":
-            col["currency"] = infer_currency(label)
 
-        columns.append(col)
+def _column(idx: int, value: Any, column_type: str) -> dict:
+    label = str(value).strip()
+    normalized = normalize_label(label)
 
-    return columns
+    col = {
+        "index": idx,
+        "label": label,
+        "normalized": normalized,
+        "type": column_type,
+    }
+
+    if column_type == "currency":
+        col["currency"] = infer_currency(label)
+
+    return col
 
 
 def detect_totals(ws, columns: list[dict]) -> dict:
@@ -104,42 +126,267 @@ def detect_sections(columns: list[dict]) -> dict | None:
     return None
 
 
-def detect_excel_structure(file_path: str) -> dict:
-    wb = load_workbook(file_path, data_only=False)
-
-    structure: dict[str, Any] = {"version": 1, "sheets": []}
+def detect_sheet_from_rows(
+    rows: Iterable[RowRecord], max_scan_rows: int = 20, sample_size: int = 10
+) -> tuple[int, list[dict], dict] | None:
+    """Header row, columns and totals from one streamed pass over a sheet's rows.
 
-    for sheet_name in wb.sheetnames:
-        ws = wb[sheet_name]
+    Same results as detect_header_row / detect_columns / detect_totals on a
+    loaded worksheet. Only the header row and the `sample_size` rows below
+    it are kept, as a grid padded to the header's width whose columns are
+    typed together; "total" cells are picked up during the same scan.
+    """
+    header_row: int | None = None
+    window: list[list[Any]] = []  # header row, then its sample rows
+    total_rows: list[int] = []
 
-        header_row = detect_header_row(ws)
+    for row_number, values, _ in rows:
         if header_row is None:
-            continue
+            if row_number > max_scan_rows:
+                return None
+            if sum(isinstance(v, str) for v in values) >= 2:
+                header_row = row_number
+                window.append(values)
+        elif row_number <= header_row + sample_size:
+            window.append(values)
+
+        for val in values:
+            if isinstance(val, str) and "total" in val.lower():
+                total_rows.append(row_number)
+
+    if header_row is None:
+        return None
+
+    header = window[0]
+    types = _column_types(window[1:], len(header))
+    columns = [_column(idx, value, types[idx]) for idx, value in enumerate(header) if value]
+    totals = {
+        "row_indices": total_rows,
+        "columns": [c["index"] for c in columns if "total" in c["normalized"]],
+    }
+    return header_row, columns, totals
 
-        columns = detect_columns(ws, header_row)
-        totals = detect_totals(ws, columns)
-
-        structure["sheets"].append(
-            {
-                "sheet_name": sheet_name,
-                "is_primary": sheet_name.lower() in ("budget", "summary"),
-                "header": {
-                    "row_index": header_row,
-                    "raw_labels": [c["label"] for c in columns],
-                },
-                "data": {
-                    "start_row": header_row + 1,
-                    "end_row": None,
-                },
-                "columns": columns,
-                "sections": detect_sections(columns),
-                "totals": totals,
-            }
-        )
 
+def _column_types(samples: list[list[Any]], width: int) -> list[str]:
+    """_column_type of every column of `samples`; short rows count as empty cells."""
+    if not samples:
+        return [_column_type(()) for _ in range(width)]
+    grid = [row[:width] + [None] * (width - len(row)) for row in samples]
+    return [_column_type(column) for column in zip(*grid)]
+
+
+def _sheet_structure(sheet_name: str, header_row: int, columns: list[dict], totals: dict) -> dict:
+    return {
+        "sheet_name": sheet_name,
+        "is_primary": sheet_name.lower() in ("budget", "summary"),
+        "header": {
+            "row_index": header_row,
+            "raw_labels": [c["label"] for c in columns],
+        },
+        "data": {
+            "start_row": header_row + 1,
+            "end_row": None,
+        },
+        "columns": columns,
+        "sections": detect_sections(columns),
+        "totals": totals,
+    }
+
+
+def detect_excel_structure(
+    file_path: str,
+    reader: SheetReader | None = None,
+    max_workers: int = 1,
+    sheet_timeout: float | None = None,
+) -> dict:
+    """Structure of every sheet with a detectable header row.
+
+    Each sheet is streamed once through `reader` (see xlsx_reader; read-only
+    openpyxl by default), so the workbook is never loaded into memory. The
+    worksheet helpers above give the same results on a loaded workbook.
+    With `max_workers` > 1 the sheets
+    are streamed in parallel (see detect_sheets_parallel); a sheet taking
+    longer than `sheet_timeout` seconds is left out and named under
+    ``timed_out_sheets``, which marks the result partial (see is_partial).
+    The deadline is checked as rows arrive, so in-process a reader that
+    stalls before yielding a row is not cut off; the parallel path also
+    stops waiting for such a sheet (see detect_sheets_parallel).
+    """
+    structure: dict[str, Any] = {"version": 1, "sheets": []}
+    reader = reader or OpenpyxlReader(file_path)
+
+    if max_workers > 1:
+        # Workers get a copy of `reader` itself, so its options survive the trip
+        sheets, timed_out = detect_sheets_parallel(
+            functools.partial(copy.copy, reader), reader.sheet_names(), max_workers, sheet_timeout
+        )
+    else:
+        sheets, timed_out = _collect(
+            (name, _detect_sheet(reader, name, sheet_timeout)) for name in reader.sheet_names()
+        )
+    structure["sheets"] = sheets
+    if timed_out:
+        structure["timed_out_sheets"] = timed_out
     return structure
 
 
+def is_partial(structure: dict) -> bool:
+    """True when sheets were left out for running over the timeout.
+
+    A partial structure says nothing about the workbook itself, so it must
+    not be cached or stored with a template fingerprint.
+    """
+    return bool(structure.get("timed_out_sheets"))
+
+
+# -- parallel sheet detection ----------------------------------------------------
+
+
+class SheetTimeout(TimeoutError):
+    pass
+
+
+# _detect_sheet result for a sheet that ran over its timeout
+TIMED_OUT = "timed_out"
+
+
+def _within(
+    rows: Iterable[RowRecord], deadline: float, check_every: int = 256
+) -> Iterator[RowRecord]:
+    for count, row in enumerate(rows):
+        if count % check_every == 0 and time.monotonic() > deadline:
+            raise SheetTimeout()
+        yield row
+
+
+def _detect_sheet(
+    reader: SheetReader, sheet_name: str, sheet_timeout: float | None
+) -> dict | str | None:
+    """One sheet's structure; None without a header row, TIMED_OUT when over `sheet_timeout`."""
+    rows: Iterable[RowRecord] = reader.iter_rows(sheet_name)
+    if sheet_timeout is not None:
+        rows = _within(rows, time.monotonic() + sheet_timeout)
+    try:
+        detected = detect_sheet_from_rows(rows)
+    except SheetTimeout:
+        logger.warning("sheet_detection_timed_out", sheet=sheet_name, timeout=sheet_timeout)
+        return TIMED_OUT
+    return None if detected is None else _sheet_structure(sheet_name, *detected)
+
+
+def _collect(results: Iterable[tuple[str, dict | str | None]]) -> tuple[list[dict], list[str]]:
+    """(detected sheet structures, names of sheets that timed out), in sheet order."""
+    sheets: list[dict] = []
+    timed_out: list[str] = []
+    for name, result in results:
+        if result == TIMED_OUT:
+            timed_out.append(name)
+        elif isinstance(result, dict):
+            sheets.append(result)
+    return sheets, timed_out
+
+
+def _detect_sheet_worker(
+    reader_factory: Callable[[], SheetReader], sheet_name: str, sheet_timeout: float | None
+) -> dict | str | None:
+    # Runs in a pool process, which opens its own reader
+    return _detect_sheet(reader_factory(), sheet_name, sheet_timeout)
+
+
+# Pools are kept per size and reused across calls: starting processes costs
+# more than detecting a typical sheet
+_pools: dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(max_workers: int) -> ProcessPoolExecutor:
+    with _pools_lock:
+        pool = _pools.get(max_workers)
+        if pool is None:
+            # "spawn": forking a process that runs web-server threads is unsafe
+            pool = ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("spawn"))
+            _pools[max_workers] = pool
+        return pool
+
+
+# Extra wait for a sheet's result beyond sheet_timeout: process start-up,
+# pickling, and finishing the row that was being parsed
+RESULT_MARGIN = 5.0
+
+
+def _discard_pool(max_workers: int, terminate: bool = False) -> None:
+    """Stop using a pool; `terminate` also kills its workers (stuck in a sheet)."""
+    with _pools_lock:
+        pool = _pools.pop(max_workers, None)
+    if pool is None:
+        return
+    # shutdown() leaves a worker running until its task returns, which a
+    # stuck one never does; the executor has no public way to kill it
+    processes = list((getattr(pool, "_processes", None) or {}).values()) if terminate else []
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+def detect_sheets_parallel(
+    reader_factory: Callable[[], SheetReader],
+    sheet_names: list[str],
+    max_workers: int,
+    sheet_timeout: float | None = None,
+) -> tuple[list[dict], list[str]]:
+    """(sheet structures, timed-out sheet names) of `sheet_names`, one sheet per pool process.
+
+    Each worker opens the workbook with its own `reader_factory()`, which
+    must be picklable (a reader class, a functools.partial, ...), so
+    wall-clock time follows the slowest sheets rather than the sheet count.
+
+    `sheet_timeout` is checked between rows inside the worker, which gives
+    up on the sheet and is free for the next one. A worker stuck opening
+    the workbook or parsing one huge row never reaches that check, so the
+    results are also awaited only until every sheet has had its turn plus
+    RESULT_MARGIN. Sheets still running then are reported as timed out and
+    the pool is replaced, killing its workers. If the pool breaks (a worker
+    crashed), the sheets are detected in-process instead. A workbook with a
+    single sheet is handled in-process.
+    """
+    if len(sheet_names) <= 1:
+        return _detect_sheets_in_process(reader_factory, sheet_names, sheet_timeout)
+
+    workers = min(max_workers, len(sheet_names))
+    deadline = None
+    if sheet_timeout is not None:
+        turns = math.ceil(len(sheet_names) / workers)
+        deadline = time.monotonic() + turns * sheet_timeout + RESULT_MARGIN
+    results: list[dict | str | None] = []
+    try:
+        pool = _pool(workers)
+        futures = [
+            pool.submit(_detect_sheet_worker, reader_factory, name, sheet_timeout)
+            for name in sheet_names
+        ]
+        for name, future in zip(sheet_names, futures):
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                results.append(future.result(timeout=wait))
+            except FutureTimeout:
+                logger.warning("sheet_detection_stuck", sheet=name, timeout=sheet_timeout)
+                results.append(TIMED_OUT)
+    except BrokenProcessPool:
+        logger.warning("sheet_detection_pool_broken", workers=workers)
+        _discard_pool(workers)
+        return _detect_sheets_in_process(reader_factory, sheet_names, sheet_timeout)
+    if not all(future.done() for future in futures):
+        _discard_pool(workers, terminate=True)
+    return _collect(zip(sheet_names, results))
+
+
+def _detect_sheets_in_process(
+    reader_factory: Callable[[], SheetReader], sheet_names: list[str], sheet_timeout: float | None
+) -> tuple[list[dict], list[str]]:
+    reader = reader_factory()
+    return _collect((name, _detect_sheet(reader, name, sheet_timeout)) for name in sheet_names)
+
+
 def classify_row(text: str) -> str | None:
     t = text.lower().strip()
 
@@ -0,0 +1,189 @@
+"""Structural fingerprints of donor budget templates.
+
+Two uploads of the same donor form differ in the values NGOs typed in, not
+in their layout. A fingerprint keeps only the layout:
+
+- header labels: the detected header row, each passed through normalize_label
+- skeleton: the category rows from classify_row (category, category_total,
+  grand_total) in sheet order, numbering stripped and normalized
+
+``digest`` identifies an exact structural match; ``similarity`` (Jaccard
+over header and skeleton features) scores near matches, so a form with one
+renamed category still resolves to its known template.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Sequence, Tuple
+
+from app.services.template_detection.detector import classify_row, normalize_label
+from app.services.template_detection.xlsx_reader import OpenpyxlReader, RowRecord, SheetReader
+
+# Bump when the features below change; stored fingerprints of another
+# version are ignored
+FINGERPRINT_VERSION = 1
+
+SKELETON_ROW_TYPES = ("category", "category_total", "grand_total")
+_FILLED_IN_ROW_TYPES = ("metadata", "signature")
+
+_NUMBERING = re.compile(r"^\d+\.\s+")
+
+
+@dataclass(frozen=True, slots=True)
+class TemplateFingerprint:
+    header_labels: Tuple[str, ...]
+    skeleton: Tuple[str, ...]
+
+    @property
+    def features(self) -> frozenset[str]:
+        return frozenset(
+            [f"h:{label}" for label in self.header_labels]
+            + [f"s:{entry}" for entry in self.skeleton]
+        )
+
+    @property
+    def digest(self) -> str:
+        payload = json.dumps([FINGERPRINT_VERSION, self.header_labels, self.skeleton])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def similarity(self, other: "TemplateFingerprint") -> float:
+        return _jaccard(len(self.features & other.features), self.features, other.features)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"header_labels": list(self.header_labels), "skeleton": list(self.skeleton)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TemplateFingerprint":
+        return cls(tuple(data["header_labels"]), tuple(data["skeleton"]))
+
+
+def fingerprint_rows(rows: Iterable[RowRecord], max_scan_rows: int = 20) -> TemplateFingerprint:
+    """Fingerprint of one sheet from a single pass over its rows.
+
+    The header row is found like detect_header_row (the first of the top
+    `max_scan_rows` rows with at least two text cells), except that
+    metadata and signature rows ("Organisation name: Acme") are skipped:
+    their values differ between NGOs filling in the same form.
+    """
+    header: Tuple[str, ...] = ()
+    skeleton: List[str] = []
+    for row_number, values, _ in rows:
+        first_cell = values[0] if values else None
+        text = first_cell.strip() if isinstance(first_cell, str) else ""
+        row_type = classify_row(text) if text else None
+
+        if not header and row_number <= max_scan_rows and row_type not in _FILLED_IN_ROW_TYPES:
+            if sum(isinstance(v, str) for v in values) >= 2:
+                header = tuple(normalize_label(str(v).strip()) for v in values if v)
+
+        if row_type in SKELETON_ROW_TYPES:
+            skeleton.append(f"{row_type}:{normalize_label(_NUMBERING.sub('', text))}")
+    return TemplateFingerprint(header, tuple(skeleton))
+
+
+def compute_fingerprint(file_path: str, reader: SheetReader | None = None) -> TemplateFingerprint:
+    """Fingerprint of the workbook's active sheet, streamed through `reader`."""
+    return fingerprint_rows((reader or OpenpyxlReader(file_path)).iter_rows())
+
+
+class FingerprintIndex:
+    """Known fingerprints, matched exactly by digest or by Jaccard similarity.
+
+    Candidates are found through an inverted index of features, so only
+    templates sharing at least one header label or category are scored.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[Hashable, TemplateFingerprint]] = ()):
+        self._keys: List[Hashable] = []
+        self._features: List[frozenset[str]] = []
+        self._by_digest: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = {}
+        for key, fingerprint in entries:
+            self.add(key, fingerprint)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: Hashable, fingerprint: TemplateFingerprint) -> None:
+        position = len(self._keys)
+        features = fingerprint.features
+        self._keys.append(key)
+        self._features.append(features)
+        self._by_digest.setdefault(fingerprint.digest, position)
+        for feature in features:
+            self._postings.setdefault(feature, []).append(position)
+
+    def match(
+        self, fingerprint: TemplateFingerprint, threshold: float
+    ) -> Tuple[Hashable, float] | None:
+        """Best known entry scoring at least `threshold`; ties go to the earliest added.
+
+        A sheet with no header and no category rows matches nothing.
+        """
+        features = fingerprint.features
+        if not features:
+            return None
+        exact = self._by_digest.get(fingerprint.digest)
+        if exact is not None:
+            return self._keys[exact], 1.0
+
+        shared: Dict[int, int] = {}
+        for feature in features:
+            for position in self._postings.get(feature, ()):
+                shared[position] = shared.get(position, 0) + 1
+
+        best: Tuple[float, int] | None = None
+        for position, overlap in shared.items():
+            score = _jaccard(overlap, features, self._features[position])
+            if best is None or (score, -position) > (best[0], -best[1]):
+                best = (score, position)
+        if best is None or best[0] < threshold:
+            return None
+        return self._keys[best[1]], round(best[0], 4)
+
+
+def _jaccard(overlap: int, a: frozenset[str], b: frozenset[str]) -> float:
+    union = len(a) + len(b) - overlap
+    return overlap / union if union else 0.0
+
+
+class FingerprintIndexCache:
+    """Holds a FingerprintIndex of stored templates per scope, rebuilt when they change.
+
+    A scope (e.g. the owning customer) only ever matches its own templates;
+    its fingerprints are loaded with `load(db, scope)` as (key, fingerprint)
+    pairs. `version(db)` is a cheap change marker for all stored
+    fingerprints; when it moves every index is rebuilt on next use.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[Any, Hashable], Sequence[Tuple[Hashable, TemplateFingerprint]]],
+        version: Callable[[Any], Hashable],
+    ):
+        self._load = load
+        self._version = version
+        self._indexes: Dict[Hashable, FingerprintIndex] = {}
+        self._db_version: Hashable = None
+        self._lock = threading.Lock()
+
+    def get(self, db, scope: Hashable = None) -> FingerprintIndex:
+        version = self._version(db)
+        with self._lock:
+            if version != self._db_version:
+                self._indexes.clear()
+                self._db_version = version
+            index = self._indexes.get(scope)
+            if index is None:
+                index = self._indexes[scope] = FingerprintIndex(self._load(db, scope))
+            return index
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+            self._db_version = None
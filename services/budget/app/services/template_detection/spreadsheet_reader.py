@@ -1,7 +1,7 @@
 """Spreadsheet structure detection utilities.
 
 Public API
-- ExcelStructureDetector(file_path)
+- ExcelStructureDetector(file_path, reader=None)
     - read_sheet_with_pandas() -> DataFrame
     - read_sheet_with_openpyxl() -> (DataFrame, formula_flags)
     - filter_out_formula_rows(df) -> DataFrame
@@ -9,21 +9,30 @@ Public API
     - remove_numeric_rows(df) -> DataFrame
     - to_detection_json(df) -> str
     - detect_structure() -> DataFrame  # high-level pipeline
+    - iter_clean_rows() / iter_detections() / stream_possible_fields()
+        # the same pipeline as one read-only streaming pass, no DataFrames
 
 These helpers read Excel sheets and return a cleaned DataFrame where
 rows that are formulas or mostly numeric are removed, ready for
-downstream template detection logic.
+downstream template detection logic. The streaming methods produce the
+same result from openpyxl's read-only mode without loading the workbook
+or building DataFrames, so large uploads stay within a row of memory.
+They read through a SheetReader (see xlsx_reader); pass
+``reader=SaxXlsxReader(path)`` to stream the raw XML instead of openpyxl.
 """
 
-from typing import Any
+from typing import Any, Iterator
 
 from openpyxl import load_workbook
 from openpyxl.utils import get_column_letter
 
 # from ..normalizer import normalize_label
 import re
+import numpy as np
 import pandas as pd
 
+from app.services.template_detection.xlsx_reader import OpenpyxlReader, SheetReader
+
 # numeric_pattern = re.compile(r"^\s*[-+]?\d*\.?\d+\s*$")
 numeric_pattern = re.compile(
     r"""
@@ -54,14 +63,132 @@ def is_numeric(val):
     return bool(numeric_pattern.match(val_str))
 
 
+def is_numeric_cell(val: Any) -> bool:
+    """Cell test used by remove_numeric_rows: numeric-like values are blanked.
+
+    Unlike is_numeric, falsy values ("" and 0) are kept, matching the
+    DataFrame pipeline.
+    """
+    if val is None:
+        return True
+    return bool(val) and bool(numeric_pattern.match(str(val)))
+
+
+# Column-wise forms of the cell tests above, used by the DataFrame pipeline.
+# Each returns boolean ndarrays shaped like `frame`. str(val) is computed once
+# per cell by astype(str); sheets repeat labels and amounts a lot, so the
+# strip/regex work then runs once per distinct text through the Series.str
+# methods (the pattern ends in \s*$, so fullmatch agrees with re.match).
+
+
+def _distinct_text(frame: pd.DataFrame) -> tuple[np.ndarray, pd.Series]:
+    """str(val) of every cell as (codes shaped like `frame`, distinct texts)."""
+    codes, uniques = pd.factorize(frame.astype(str).to_numpy(dtype=object).ravel())
+    return codes.reshape(frame.shape), pd.Series(uniques, dtype=object)
+
+
+def _is_none(values: np.ndarray) -> np.ndarray:
+    # Elementwise `is None`; NaN is a value to the cell tests above
+    return np.equal(values, np.array(None, dtype=object))
+
+
+def _fullmatch_numeric(texts: pd.Series) -> np.ndarray:
+    return texts.str.fullmatch(numeric_pattern).to_numpy(dtype=bool)
+
+
+def numeric_cell_mask(frame: pd.DataFrame) -> np.ndarray:
+    """is_numeric_cell applied to every cell of `frame`."""
+    values = frame.to_numpy(dtype=object)
+    codes, texts = _distinct_text(frame)
+    return _is_none(values) | (values.astype(bool) & _fullmatch_numeric(texts)[codes])
+
+
+def label_cell_masks(frame: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(is_str, is_numeric, stripped text) for every cell of `frame`.
+
+    is_numeric is is_numeric() per cell; stripped is str(val).strip().
+    """
+    values = frame.to_numpy(dtype=object)
+    codes, texts = _distinct_text(frame)
+    stripped = texts.str.strip()
+    numeric = (stripped == "").to_numpy(dtype=bool) | _fullmatch_numeric(stripped)
+    # str(val) == val holds exactly for str cells, so this is isinstance(val, str)
+    is_str = texts.to_numpy(dtype=object)[codes] == values
+    is_numeric_ = _is_none(values) | numeric[codes]
+    return is_str, is_numeric_, stripped.to_numpy(dtype=object)[codes]
+
+
 class ExcelStructureDetector:
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, reader: SheetReader | None = None):
 
         self.file_path = file_path
+        self.reader = reader or OpenpyxlReader(file_path)
         self.data: list[list[Any]] = []
         self.formula_flags: list[list[Any]] = []
-        self.wb = load_workbook(file_path, data_only=False)
-        self.ws = self.wb.active
+        self._wb: Any = None
+
+    @property
+    def wb(self) -> Any:
+        """Fully loaded workbook for the DataFrame pipeline, opened on first use.
+
+        The streaming methods never touch it.
+        """
+        if self._wb is None:
+            self._wb = load_workbook(self.file_path, data_only=False)
+        return self._wb
+
+    @property
+    def ws(self) -> Any:
+        return self.wb.active
+
+    # -- streaming mode ------------------------------------------------------
+    # One pass over the reader's rows; memory is bounded by the current row.
+
+    def iter_rows(self) -> Iterator[tuple[int, list[Any], bool]]:
+        """Yield (row_number, values, has_formula) for the active sheet, streamed."""
+        return self.reader.iter_rows()
+
+    def iter_clean_rows(self) -> Iterator[tuple[int, list[Any]]]:
+        """Streaming equivalent of detect_structure().
+
+        Skips formula rows, blanks numeric-like cells (None) and drops rows
+        left with no values; yields (row_number, values).
+        """
+        for row_number, values, has_formula in self.iter_rows():
+            if has_formula:
+                continue
+            cleaned = [None if is_numeric_cell(v) else v for v in values]
+            if any(v is not None for v in cleaned):
+                yield row_number, cleaned
+
+    def iter_detections(self) -> Iterator[dict]:
+        """Streaming equivalent of to_detection_json(detect_structure())."""
+        for row_number, values in self.iter_clean_rows():
+            for col_idx, val in enumerate(values, start=1):
+                if not is_numeric(val):
+                    col = get_column_letter(col_idx)
+                    yield {
+                        "coordinate": f"{col}{row_number}",
+                        "row": row_number,
+                        "col": col,
+                        "value": val,
+                        "suggested_field": "unknown",
+                        "confidence": 0.0,
+                    }
+
+    def stream_possible_fields(self) -> list[str]:
+        """Streaming equivalent of filter_list_of_possible_fields(detect_structure()).
+
+        Labels are returned once each, in sheet order.
+        """
+        fields: dict[str, None] = {}
+        for row_number, values in self.iter_clean_rows():
+            for val in values:
+                if val and isinstance(val, str) and not is_numeric(val):
+                    fields.setdefault(val.strip(), None)
+        return list(fields)
+
+    # -- DataFrame pipeline ----------------------------------------------------
 
     def read_sheet_with_pandas(self) -> pd.DataFrame:
         """Read the active sheet into a pandas DataFrame (text only).
@@ -142,9 +269,7 @@ class ExcelStructureDetector:
         body = df.iloc[1:]
 
         # Create a boolean mask: True for cells that are numeric-like
-        mask_numeric = body.iloc[:, 1:].applymap(
-            lambda v: bool(v) and bool(numeric_pattern.match(str(v))) if v is not None else True
-        )
+        mask_numeric = numeric_cell_mask(body.iloc[:, 1:])
 
         # Replace numeric-like values with None
         body.iloc[:, 1:] = body.iloc[:, 1:].mask(mask_numeric, other=None)
@@ -157,38 +282,41 @@ class ExcelStructureDetector:
         return df_cleaned
 
     def filter_list_of_possible_fields(self, df: pd.DataFrame) -> list[str]:
-        """Extract a list of possible field names from the cleaned DataFrame."""
-        possible_fields = set()
+        """Extract a list of possible field names from the cleaned DataFrame.
 
-        for r_idx, row in df.iloc[1:].iterrows():  # skip header
-            for c_idx, val in enumerate(row[1:], start=1):  # skip first column (row numbers)
-                if val and isinstance(val, str) and not is_numeric(val):
-                    possible_fields.add(val.strip())
-
-        return list(possible_fields)
+        Labels are returned once each, in sheet order.
+        """
+        # skip header row and first column (row numbers)
+        is_str, is_numeric_, stripped = label_cell_masks(df.iloc[1:, 1:])
+        # Boolean indexing is row-major: the cells come in a cell-by-cell walk's order
+        labels = stripped[is_str & ~is_numeric_]
+        return list(dict.fromkeys(labels.tolist()))
 
     def to_detection_json(self, df: pd.DataFrame) -> list[dict]:
         """Serialize detection results (from cleaned DataFrame) to a JSON string."""
 
         output = []
 
-        for r_idx, row in df.iloc[1:].iterrows():  # skip header
-            for c_idx, val in enumerate(row[1:], start=1):  # skip first column (row numbers)
-                if not is_numeric(val):
-                    coordinate = f"{df.iloc[0, c_idx]}{row[0]}"  # column letter + row number
+        letters = df.iloc[0, 1:].to_numpy(dtype=object)  # header row: column letters
+        row_numbers = df.iloc[1:, 0].to_numpy(dtype=object)
+        cells = df.iloc[1:, 1:]
+        _, is_numeric_, _ = label_cell_masks(cells)
+        values = cells.to_numpy(dtype=object)
+
+        # Row-major (row, column) positions of the non-numeric cells
+        for r_pos, c_pos in zip(*np.nonzero(~is_numeric_)):
+            row_number, col = row_numbers[r_pos], letters[c_pos]
+            output.append(
+                {
+                    "coordinate": f"{col}{row_number}",  # column letter + row number
+                    "row": row_number,
+                    "col": col,
+                    "value": values[r_pos, c_pos],
                     # For now, dummy suggested field + confidence
-                    suggested_field = "unknown"
-                    confidence = 0.0
-                    output.append(
-                        {
-                            "coordinate": coordinate,
-                            "row": row[0],
-                            "col": df.iloc[0, c_idx],
-                            "value": val,
-                            "suggested_field": suggested_field,
-                            "confidence": confidence,
-                        }
-                    )
+                    "suggested_field": "unknown",
+                    "confidence": 0.0,
+                }
+            )
 
         # Dump to JSON
         # json_str = json.dumps(output, indent=2)
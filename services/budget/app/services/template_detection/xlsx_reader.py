@@ -0,0 +1,370 @@
+"""Sheet reader backends for template detection.
+
+Detection only needs cell coordinates, values, value kinds and whether a
+cell holds a formula, so readers expose exactly that:
+
+- iter_cells(sheet) -> (row, col, kind, value) tuples for non-empty cells
+- iter_rows(sheet)  -> (row_number, values, has_formula), dense from row 1
+  and padded to the sheet width, like openpyxl's read-only iter_rows
+
+Backends
+- OpenpyxlReader: openpyxl in read-only mode (one cell object per cell)
+- SaxXlsxReader: streams xl/sharedStrings.xml and the worksheet XML straight
+  from the zip with an incremental parser; no per-cell objects are kept
+
+Values match openpyxl with ``data_only=False``: formulas come back as
+"=..." strings (shared formulas translated per cell), date-formatted
+numbers as datetimes. Array and data-table formulas are returned as
+their "=..." text rather than openpyxl's formula objects.
+"""
+
+from __future__ import annotations
+
+import posixpath
+import zipfile
+from typing import Any, Iterator, List, Protocol, Tuple
+from xml.etree.ElementTree import iterparse
+
+from openpyxl import load_workbook
+from openpyxl.formula.translate import Translator
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.cell import (
+    column_index_from_string,
+    coordinate_from_string,
+    get_column_letter,
+)
+from openpyxl.utils.datetime import (
+    CALENDAR_MAC_1904,
+    CALENDAR_WINDOWS_1900,
+    from_excel,
+    from_ISO8601,
+)
+
+# kind of a CellRecord value
+STRING, NUMBER, BOOL, DATE, ERROR, FORMULA = "s", "n", "b", "d", "e", "f"
+
+CellRecord = Tuple[int, int, str, Any]
+RowRecord = Tuple[int, List[Any], bool]
+
+_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_ROW, _CELL, _VALUE, _FORMULA = _MAIN + "row", _MAIN + "c", _MAIN + "v", _MAIN + "f"
+_INLINE, _TEXT, _SI, _RPH = _MAIN + "is", _MAIN + "t", _MAIN + "si", _MAIN + "rPh"
+_SHEET_DATA, _DIMENSION = _MAIN + "sheetData", _MAIN + "dimension"
+
+
+class SheetReader(Protocol):
+    def sheet_names(self) -> List[str]: ...
+
+    def active_sheet(self) -> str: ...
+
+    def iter_cells(self, sheet: str | None = None) -> Iterator[CellRecord]: ...
+
+    def iter_rows(self, sheet: str | None = None) -> Iterator[RowRecord]: ...
+
+
+def get_reader(file_path: str, backend: str = "openpyxl") -> SheetReader:
+    """Reader for `file_path` by backend name: "openpyxl" or "sax"."""
+    if backend == "sax":
+        return SaxXlsxReader(file_path)
+    if backend == "openpyxl":
+        return OpenpyxlReader(file_path)
+    raise ValueError(f"Unknown xlsx reader backend: {backend}")
+
+
+class OpenpyxlReader:
+    """Read-only openpyxl backend.
+
+    With ``data_only=True`` formula cells give the value Excel last cached
+    for them instead of their "=..." text.
+    """
+
+    _KINDS = {"s": STRING, "n": NUMBER, "b": BOOL, "d": DATE, "e": ERROR, "f": FORMULA}
+
+    def __init__(self, file_path: str, data_only: bool = False):
+        self.file_path = file_path
+        self.data_only = data_only
+
+    def _open(self) -> Any:
+        return load_workbook(self.file_path, read_only=True, data_only=self.data_only)
+
+    def sheet_names(self) -> List[str]:
+        wb = self._open()
+        try:
+            return list(wb.sheetnames)
+        finally:
+            wb.close()
+
+    def active_sheet(self) -> str:
+        wb = self._open()
+        try:
+            return wb.active.title
+        finally:
+            wb.close()
+
+    def iter_rows(self, sheet: str | None = None) -> Iterator[RowRecord]:
+        wb = self._open()
+        try:
+            ws = wb[sheet] if sheet else wb.active
+            for row_number, row in enumerate(ws.iter_rows(), start=1):
+                values = [cell.value for cell in row]
+                has_formula = any(getattr(cell, "data_type", None) == "f" for cell in row)
+                yield row_number, values, has_formula
+        finally:
+            wb.close()
+
+    def iter_cells(self, sheet: str | None = None) -> Iterator[CellRecord]:
+        wb = self._open()
+        try:
+            ws = wb[sheet] if sheet else wb.active
+            for row_number, row in enumerate(ws.iter_rows(), start=1):
+                for col, cell in enumerate(row, start=1):
+                    if cell.value is not None:
+                        yield row_number, col, self._KINDS.get(cell.data_type, STRING), cell.value
+        finally:
+            wb.close()
+
+
+class SaxXlsxReader:
+    """Incremental-XML backend reading the xlsx zip directly.
+
+    Workbook metadata (sheet list, shared strings, date styles) is read once
+    per reader; worksheet XML is streamed and each row is discarded as soon
+    as its cells have been yielded.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._sheets: List[Tuple[str, str]] | None = None
+        self._active = 0
+        self._epoch = CALENDAR_WINDOWS_1900
+        self._shared_strings: List[str] | None = None
+        self._date_styles: set[int] = set()
+        self._timedelta_styles: set[int] = set()
+
+    # -- workbook metadata ---------------------------------------------------
+
+    def _load_workbook_meta(self, zf: zipfile.ZipFile) -> None:
+        if self._sheets is not None:
+            return
+        targets = {}
+        with zf.open("xl/_rels/workbook.xml.rels") as fh:
+            for _, elem in iterparse(fh):
+                if elem.tag == _PKG_REL + "Relationship":
+                    target = elem.get("Target", "")
+                    if target.startswith("/"):
+                        path = target.lstrip("/")
+                    else:
+                        path = posixpath.normpath(posixpath.join("xl", target))
+                    targets[elem.get("Id")] = path
+        sheets = []
+        with zf.open("xl/workbook.xml") as fh:
+            for _, elem in iterparse(fh):
+                if elem.tag == _MAIN + "sheet":
+                    sheets.append((elem.get("name", ""), targets.get(elem.get(_REL + "id"), "")))
+                elif elem.tag == _MAIN + "workbookView":
+                    self._active = int(elem.get("activeTab", 0))
+                elif elem.tag == _MAIN + "workbookPr":
+                    if elem.get("date1904") in ("1", "true"):
+                        self._epoch = CALENDAR_MAC_1904
+        self._sheets = sheets
+        self._load_styles(zf)
+
+    def _load_styles(self, zf: zipfile.ZipFile) -> None:
+        if "xl/styles.xml" not in zf.namelist():
+            return
+        custom: dict[int, str] = {}
+        formats: List[int] = []
+        in_cell_xfs = False
+        with zf.open("xl/styles.xml") as fh:
+            for event, elem in iterparse(fh, events=("start", "end")):
+                if elem.tag == _MAIN + "cellXfs":
+                    in_cell_xfs = event == "start"
+                elif event == "end" and elem.tag == _MAIN + "numFmt":
+                    custom[int(elem.get("numFmtId", 0))] = elem.get("formatCode", "")
+                elif event == "end" and in_cell_xfs and elem.tag == _MAIN + "xf":
+                    formats.append(int(elem.get("numFmtId", 0)))
+        for style_id, fmt_id in enumerate(formats):
+            fmt = custom.get(fmt_id, BUILTIN_FORMATS.get(fmt_id, "General"))
+            if is_date_format(fmt):
+                self._date_styles.add(style_id)
+            if is_timedelta_format(fmt):
+                self._timedelta_styles.add(style_id)
+
+    def _strings(self, zf: zipfile.ZipFile) -> List[str]:
+        if self._shared_strings is None:
+            strings: List[str] = []
+            if "xl/sharedStrings.xml" in zf.namelist():
+                with zf.open("xl/sharedStrings.xml") as fh:
+                    for _, elem in iterparse(fh):
+                        if elem.tag == _SI:
+                            strings.append(_text_content(elem).replace("x005F_", ""))
+                            elem.clear()
+            self._shared_strings = strings
+        return self._shared_strings
+
+    def sheet_names(self) -> List[str]:
+        with zipfile.ZipFile(self.file_path) as zf:
+            self._load_workbook_meta(zf)
+        return [name for name, _ in self._sheets or []]
+
+    def active_sheet(self) -> str:
+        names = self.sheet_names()
+        return names[self._active] if 0 <= self._active < len(names) else names[0]
+
+    def _sheet_path(self, sheet: str | None) -> str:
+        name = sheet or self.active_sheet()
+        for sheet_name, path in self._sheets or []:
+            if sheet_name == name:
+                return path
+        raise KeyError(f"Worksheet {name} does not exist.")
+
+    # -- cells ---------------------------------------------------------------
+
+    def iter_cells(self, sheet: str | None = None) -> Iterator[CellRecord]:
+        for record in self._iter_sheet(sheet):
+            if not isinstance(record, int):  # skip the sheet-width marker
+                yield record
+
+    def iter_rows(self, sheet: str | None = None) -> Iterator[RowRecord]:
+        width: int | None = None
+        next_row = 1
+        current = 0
+        values: List[Any] = []
+        has_formula = False
+
+        for record in self._iter_sheet(sheet):
+            if isinstance(record, int):  # sheet width from <dimension>
+                width = record
+                continue
+            row, col, kind, value = record
+            if row != current:
+                if current:
+                    yield from self._pad_rows(next_row, current, values, has_formula, width)
+                    next_row = current + 1
+                current, values, has_formula = row, [], False
+            if len(values) < col:
+                values.extend([None] * (col - len(values)))
+            values[col - 1] = value
+            has_formula = has_formula or kind == FORMULA
+        if current:
+            yield from self._pad_rows(next_row, current, values, has_formula, width)
+
+    @staticmethod
+    def _pad_rows(
+        first: int, row: int, values: List[Any], has_formula: bool, width: int | None
+    ) -> Iterator[RowRecord]:
+        """Empty rows up to `row`, then `row` itself, all padded to `width`."""
+        size = max(width or 0, len(values))
+        for empty in range(first, row):
+            yield empty, [None] * size, False
+        yield row, values + [None] * (size - len(values)), has_formula
+
+    def _iter_sheet(self, sheet: str | None) -> Iterator[CellRecord | int]:
+        with zipfile.ZipFile(self.file_path) as zf:
+            self._load_workbook_meta(zf)
+            strings = self._strings(zf)
+            path = self._sheet_path(sheet)
+            shared_formulae: dict[str, Translator] = {}
+            row_number = 0
+            sheet_data = None
+            with zf.open(path) as fh:
+                for event, elem in iterparse(fh, events=("start", "end")):
+                    tag = elem.tag
+                    if event == "start":
+                        if tag == _ROW:
+                            row_number = int(elem.get("r", row_number + 1))
+                            col_number = 0
+                        elif tag == _SHEET_DATA:
+                            sheet_data = elem
+                        continue
+                    if tag == _CELL:
+                        coordinate = elem.get("r")
+                        if coordinate:
+                            letters, row_number = coordinate_from_string(coordinate)
+                            col_number = column_index_from_string(letters)
+                        else:
+                            col_number += 1
+                        record = self._parse_cell(
+                            elem, row_number, col_number, strings, shared_formulae
+                        )
+                        if record is not None:
+                            yield record
+                    elif tag == _ROW:
+                        elem.clear()
+                        if sheet_data is not None:
+                            sheet_data.remove(elem)
+                    elif tag == _DIMENSION:
+                        ref = elem.get("ref", "")
+                        last = ref.split(":")[-1]
+                        if last:
+                            yield column_index_from_string(coordinate_from_string(last)[0])
+
+    def _parse_cell(
+        self,
+        elem: Any,
+        row: int,
+        col: int,
+        strings: List[str],
+        shared_formulae: dict[str, Translator],
+    ) -> CellRecord | None:
+        data_type = elem.get("t", "n")
+        formula = elem.find(_FORMULA)
+        if formula is not None:
+            text = "=" + (formula.text or "")
+            if formula.get("t") == "shared":
+                idx = formula.get("si")
+                coordinate = f"{get_column_letter(col)}{row}"
+                if idx in shared_formulae:
+                    text = shared_formulae[idx].translate_formula(coordinate)
+                elif text != "=":
+                    shared_formulae[idx] = Translator(text, coordinate)
+            return row, col, FORMULA, text
+
+        if data_type == "inlineStr":
+            inline = elem.find(_INLINE)
+            if inline is None:
+                return None
+            return row, col, STRING, _text_content(inline)
+
+        raw = elem.findtext(_VALUE) or None
+        if raw is None:
+            return None
+        if data_type == "n":
+            value: Any = float(raw) if ("." in raw or "E" in raw or "e" in raw) else int(raw)
+            style = int(elem.get("s", 0))
+            if style in self._date_styles:
+                try:
+                    return (
+                        row,
+                        col,
+                        DATE,
+                        from_excel(value, self._epoch, timedelta=style in self._timedelta_styles),
+                    )
+                except (OverflowError, ValueError):
+                    return row, col, ERROR, "#VALUE!"
+            return row, col, NUMBER, value
+        if data_type == "s":
+            return row, col, STRING, strings[int(raw)]
+        if data_type == "b":
+            return row, col, BOOL, bool(int(raw))
+        if data_type == "str":
+            return row, col, STRING, raw
+        if data_type == "e":
+            return row, col, ERROR, raw
+        if data_type == "d":
+            return row, col, DATE, from_ISO8601(raw)
+        return row, col, STRING, raw
+
+
+def _text_content(elem: Any) -> str:
+    """Plain text of a shared/inline string: <t> plus rich-text runs, minus phonetics."""
+    parts = []
+    for child in elem:
+        if child.tag == _TEXT:
+            parts.append(child.text or "")
+        elif child.tag != _RPH:
+            for t in child.iter(_TEXT):
+                parts.append(t.text or "")
+    return "".join(parts)
@@ -0,0 +1,245 @@
+"""Recognise uploads of known donor templates by their structural fingerprint.
+
+Most uploads are a known donor form with different values filled in. When
+an upload's fingerprint matches a stored template's (see
+template_detection.fingerprint) above TEMPLATE_MATCH_THRESHOLD, the labels
+the template knows skip embedding: they are resolved against the current
+semantic_field_mappings in one query, so later corrections win over the
+stored snapshot. Only labels the template never had go through
+suggest_semantic_mapping, and their results are added to the snapshot.
+Fingerprints are stored per customer and an upload is only matched against
+its own customer's, so one NGO's mapping decisions are never served to
+another.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple, cast
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.crud.template_fingerprint_crud import (
+    get_template_fingerprint,
+    list_template_fingerprints,
+    save_template_fingerprint,
+    template_fingerprints_version,
+    update_template_fingerprint_mappings,
+)
+from app.models.mapping import TemplateFingerprintModel
+from app.services.mapping_service import (
+    normalize_value,
+    resolve_stored_mappings,
+    suggest_semantic_mapping,
+)
+from app.services.template_detection.detection_cache import (
+    cached_excel_structure,
+    cached_fingerprint,
+    cached_possible_fields,
+    file_digest,
+)
+from app.services.template_detection.detector import is_partial
+from app.services.template_detection.fingerprint import (
+    FINGERPRINT_VERSION,
+    FingerprintIndexCache,
+    TemplateFingerprint,
+)
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class TemplateMatch:
+    fingerprint_id: UUID
+    donor_template_id: int
+    score: float
+    structure: Dict[str, Any] | None
+    mappings: Dict[str, Any] | None
+
+
+def _load_fingerprints(db: Session, customer_id: Any) -> List[Tuple[UUID, TemplateFingerprint]]:
+    return [
+        (row.id, TemplateFingerprint(tuple(row.header_labels), tuple(row.skeleton)))
+        for row in list_template_fingerprints(db, FINGERPRINT_VERSION, customer_id)
+    ]
+
+
+known_templates = FingerprintIndexCache(_load_fingerprints, template_fingerprints_version)
+
+
+def match_known_template(
+    db: Session,
+    fingerprint: TemplateFingerprint,
+    customer_id: UUID | None,
+    threshold: float | None = None,
+) -> TemplateMatch | None:
+    """The customer's stored template most similar to `fingerprint`, if close enough."""
+    threshold = settings.TEMPLATE_MATCH_THRESHOLD if threshold is None else threshold
+    scope = None if customer_id is None else str(customer_id)
+    hit = known_templates.get(db, scope).match(fingerprint, threshold)
+    if hit is None:
+        return None
+    fingerprint_id, score = hit
+    row = get_template_fingerprint(db, cast(UUID, fingerprint_id))
+    if row is None:  # deleted since the index was built
+        known_templates.invalidate()
+        return None
+    return TemplateMatch(row.id, row.donor_template_id, score, row.structure, row.mappings)
+
+
+def remember_template(
+    db: Session,
+    user_id: UUID | None,
+    customer_id: UUID | None,
+    donor_template_id: int,
+    fingerprint: TemplateFingerprint,
+    structure: Dict[str, Any] | None = None,
+    mappings: Dict[str, Any] | None = None,
+) -> TemplateFingerprintModel:
+    """Index `fingerprint` under a donor template together with its detection output."""
+    row = save_template_fingerprint(
+        db,
+        user_id,
+        customer_id,
+        donor_template_id,
+        digest=fingerprint.digest,
+        fingerprint_version=FINGERPRINT_VERSION,
+        header_labels=list(fingerprint.header_labels),
+        skeleton=list(fingerprint.skeleton),
+        structure=structure,
+        mappings=mappings,
+    )
+    known_templates.invalidate()
+    return row
+
+
+def reuse_mappings(stored: Dict[str, Any], values: List[str]) -> Tuple[Dict[str, Dict], List[str]]:
+    """Split `values` into stored suggestions (by raw value) and labels still to map.
+
+    Labels the template left unknown are mapped again, in case they can be
+    resolved now.
+    """
+    by_value: Dict[str, Dict] = {}
+    for suggestion in stored.get("suggestions", []):
+        by_value.setdefault(suggestion["raw_value"], suggestion)
+    reused = {value: by_value[value] for value in values if value in by_value}
+    novel = [value for value in values if value not in reused]
+    return reused, novel
+
+
+def refresh_reused(db: Session, reused: Dict[str, Dict]) -> Dict[str, Dict]:
+    """`reused` with every label that has a stored mapping replaced by it.
+
+    Counts as a use of those mappings. Labels without one (e.g. matched by
+    a rule or the history index) keep their snapshot suggestion.
+    """
+    counts: Dict[str, int] = {}
+    for value in reused:
+        normalized = normalize_value(value)
+        counts[normalized] = counts.get(normalized, 0) + 1
+    current = resolve_stored_mappings(db, counts)
+    refreshed = {}
+    for value, suggestion in reused.items():
+        normalized = normalize_value(value)
+        if normalized in current:
+            suggestion = {"raw_value": value, "normalized_value": normalized, **current[normalized]}
+        refreshed[value] = suggestion
+    return refreshed
+
+
+def merge_mappings(stored: Dict[str, Any], suggestions: List[Dict], unknown: List[Dict]) -> Dict:
+    """The stored snapshot updated with this upload's suggestions and unknown labels."""
+    by_value = {s["raw_value"]: s for s in stored.get("suggestions", [])}
+    for suggestion in suggestions:
+        # times_used changes on every upload; the snapshot does not keep it
+        by_value[suggestion["raw_value"]] = {
+            key: value for key, value in suggestion.items() if key != "times_used"
+        }
+    still_unknown = {
+        item["raw_value"]: item
+        for item in stored.get("unknown", []) + unknown
+        if item["raw_value"] not in by_value
+    }
+    return {"suggestions": list(by_value.values()), "unknown": list(still_unknown.values())}
+
+
+def suggest_mappings_for_upload(
+    file_path: str,
+    db: Session,
+    valid_user: Dict,
+    donor_template_id: int | None = None,
+    report_stage: Callable[[str], None] | None = None,
+) -> Dict:
+    """suggest_semantic_mapping for an uploaded workbook, reusing a known template's mappings.
+
+    Same result shape as suggest_semantic_mapping, plus ``template_match``
+    ({donor_template_id, score} or None). An unrecognised upload given a
+    `donor_template_id` is remembered as that template. `report_stage` is
+    called as each stage (fields, fingerprint, mapping) starts.
+    """
+    report = report_stage or (lambda stage: None)
+    digest = file_digest(file_path)
+    report("fields")
+    values = cached_possible_fields(file_path, digest)
+    report("fingerprint")
+    fingerprint = cached_fingerprint(file_path, digest)
+    match = match_known_template(db, fingerprint, valid_user.get("customer_id"))
+    report("mapping")
+    if match is None or not match.mappings:
+        mappings = suggest_semantic_mapping(values, db, valid_user, donor_template_id)
+        if donor_template_id is not None and fingerprint.features:
+            structure = cached_excel_structure(file_path, digest)
+            if is_partial(structure):
+                # Remembered on a later upload that detects in time
+                logger.warning(
+                    "template_not_remembered",
+                    donor_template_id=donor_template_id,
+                    timed_out_sheets=structure["timed_out_sheets"],
+                )
+            else:
+                remember_template(
+                    db,
+                    valid_user.get("user_id"),
+                    valid_user.get("customer_id"),
+                    donor_template_id,
+                    fingerprint,
+                    structure=structure,
+                    mappings=mappings,
+                )
+        return {**mappings, "template_match": None}
+
+    reused, novel = reuse_mappings(match.mappings, values)
+    reused = refresh_reused(db, reused)
+    logger.info(
+        "known_template_matched",
+        donor_template_id=match.donor_template_id,
+        score=match.score,
+        reused=len(reused),
+        novel=len(novel),
+    )
+    fresh: Dict[str, Any] = {"suggestions": [], "unknown": []}
+    if novel:
+        fresh = suggest_semantic_mapping(
+            novel, db, valid_user, donor_template_id=match.donor_template_id
+        )
+
+    fresh_by_value: Dict[str, List[Dict]] = {}
+    for suggestion in fresh["suggestions"]:
+        fresh_by_value.setdefault(suggestion["raw_value"], []).append(suggestion)
+    suggestions: List[Dict] = []
+    for value in values:
+        if value in reused:
+            suggestions.append(reused[value])
+        else:
+            suggestions.extend(fresh_by_value.get(value, []))
+    merged = merge_mappings(match.mappings, suggestions, fresh["unknown"])
+    if merged != match.mappings:
+        update_template_fingerprint_mappings(db, match.fingerprint_id, merged)
+    return {
+        "suggestions": suggestions,
+        "unknown": fresh["unknown"],
+        "template_match": {"donor_template_id": match.donor_template_id, "score": match.score},
+    }
@@ -1,2 +1,10 @@
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
 from shared.db.type_decorators import GUID  # noqa: F401
 from shared.db.audit_mixin import AuditMixin  # noqa: F401
+
+
+def dialect_insert(session):
+    """insert() construct of the session's dialect, for ON CONFLICT clauses."""
+    return sqlite_insert if session.get_bind().dialect.name == "sqlite" else pg_insert
@@ -0,0 +1,137 @@
+"""Benchmark: template detection and semantic mapping stages on synthetic donor workbooks.
+
+Run from services/budget:
+
+    python -m benchmarks.detection_mapping_benchmark [--rows 2000] [--sheets 3] \
+        [--formula-density 0.5] [--no-merged-headers] [--repeat 7] \
+        [--output results.json] [--compare baseline.json]
+
+Every stage is timed on the same generated workbook (see workbooks.py) and
+reported as p50/p95 wall time, peak RSS and peak traced allocation. Mapping
+runs offline (see offline.py): character-frequency embeddings, no Redis,
+a fresh in-memory database per run. With ``--output`` the results are saved
+as JSON; ``--compare`` prints the p50/p95 change against an earlier file.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import warnings
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.services import mapping_service
+from app.services.mapping_service import suggest_mapping, suggest_semantic_mapping
+from app.services.template_detection.detector import (
+    detect_excel_structure,
+    detect_row_semantic_structure,
+)
+from app.services.template_detection.spreadsheet_reader import ExcelStructureDetector
+from benchmarks.harness import compare, environment, measure, save_report
+from benchmarks.offline import fresh_session, offline_mapping
+from benchmarks.workbooks import WorkbookSpec, write_donor_workbook
+
+DONOR_FIELDS = [
+    "Personnel",
+    "Salaries",
+    "Travel and transport",
+    "Equipment and supplies",
+    "Rent and utilities",
+    "Capacity building",
+    "Audit fees",
+    "Monitoring and evaluation",
+    "Communications",
+    "Indirect costs",
+    "Unit",
+    "Quantity",
+    "Unit cost",
+    "Total cost",
+    "Budget line description",
+    "Project title",
+    "Implementing organisation",
+    "Project duration",
+]
+
+Stage = Tuple[str, Callable[[Any], Any], Callable[[], Any]]
+
+
+def stages(path: str) -> List[Stage]:
+    """(name, fn, setup) per benchmarked entry point."""
+    fields = ExcelStructureDetector(path).stream_possible_fields()
+
+    def fresh_mapping_state():
+        mapping_service.mapping_history.reset()
+        return fresh_session()
+
+    def no_setup():
+        return None
+
+    return [
+        (
+            "ExcelStructureDetector.detect_structure",
+            lambda _: ExcelStructureDetector(path).detect_structure(),
+            no_setup,
+        ),
+        ("detect_excel_structure", lambda _: detect_excel_structure(path), no_setup),
+        ("detect_row_semantic_structure", lambda _: detect_row_semantic_structure(path), no_setup),
+        ("suggest_mapping", lambda _: suggest_mapping(fields, DONOR_FIELDS, top_k=3), no_setup),
+        (
+            "suggest_semantic_mapping",
+            lambda db: suggest_semantic_mapping(fields, db, {"user_id": None}),
+            fresh_mapping_state,
+        ),
+    ]
+
+
+def run(spec: WorkbookSpec, repeat: int = 5, warmup: int = 1) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as tmp, offline_mapping():
+        path = os.path.join(tmp, "donor.xlsx")
+        write_donor_workbook(path, spec)
+        for name, fn, setup in stages(path):
+            results[name] = measure(fn, setup, repeat=repeat, warmup=warmup)
+    return {"environment": environment(), "workbook": spec.to_dict(), "stages": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000, help="line items per sheet")
+    parser.add_argument("--sheets", type=int, default=3)
+    parser.add_argument("--formula-density", type=float, default=0.5)
+    parser.add_argument("--no-merged-headers", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per stage")
+    parser.add_argument("--output", help="save the results as JSON")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")  # pandas chained-assignment noise from detect_structure
+
+    spec = WorkbookSpec(
+        rows=args.rows,
+        sheets=args.sheets,
+        formula_density=args.formula_density,
+        merged_headers=not args.no_merged_headers,
+        seed=args.seed,
+    )
+    report = run(spec, repeat=args.repeat, warmup=args.warmup)
+
+    print(f"{'stage':<40} {'p50 ms':>10} {'p95 ms':>10} {'peak RSS MB':>12} {'alloc MB':>9}")
+    for name, stats in report["stages"].items():
+        print(
+            f"{name:<40} {stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f} "
+            f"{stats['peak_rss_mb']:>12.1f} {stats['alloc_peak_mb']:>9.2f}"
+        )
+    if args.output:
+        save_report(args.output, report)
+        print(f"\nWrote {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        print(f"\nvs. {args.compare} ({baseline.get('environment', {}).get('commit')})")
+        for name, delta in compare(report, baseline).items():
+            print(f"{name:<40} {delta['p50_ms']:>+10.1%} {delta['p95_ms']:>+10.1%}")
+
+
+if __name__ == "__main__":
+    main()
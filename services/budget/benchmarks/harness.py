@@ -0,0 +1,130 @@
+"""Timing, memory and JSON-report helpers shared by the benchmarks."""
+
+import json
+import os
+import platform
+import resource
+import subprocess
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict
+
+import numpy as np
+
+
+def _rss_bytes() -> int:
+    """Current resident set size; the process peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _RssSampler:
+    """Highest RSS seen while the block runs, sampled every `interval` seconds."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "_RssSampler":
+        self.peak = _rss_bytes()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def measure(
+    fn: Callable[[Any], Any],
+    setup: Callable[[], Any] = lambda: None,
+    repeat: int = 5,
+    warmup: int = 1,
+) -> Dict[str, float]:
+    """Wall time percentiles, peak RSS and traced allocations of ``fn(setup())``.
+
+    `setup` runs outside the timed region before every call. Allocation
+    figures come from one extra tracemalloc run, so tracing overhead does
+    not skew the timings.
+    """
+    for _ in range(warmup):
+        fn(setup())
+
+    baseline = _rss_bytes()
+    timings = []
+    with _RssSampler() as rss:
+        for _ in range(repeat):
+            arg = setup()
+            start = time.perf_counter()
+            fn(arg)
+            timings.append(time.perf_counter() - start)
+
+    arg = setup()
+    tracemalloc.start()
+    try:
+        fn(arg)
+        snapshot = tracemalloc.take_snapshot()
+        _, alloc_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    ms = np.array(timings) * 1000
+    return {
+        "runs": repeat,
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "min_ms": round(float(ms.min()), 3),
+        "peak_rss_mb": round(rss.peak / 2**20, 1),
+        "rss_growth_mb": round(max(0, rss.peak - baseline) / 2**20, 1),
+        "alloc_peak_mb": round(alloc_peak / 2**20, 2),
+        "alloc_blocks": sum(stat.count for stat in snapshot.statistics("filename")),
+    }
+
+
+def environment() -> Dict[str, Any]:
+    """Where the numbers came from: commit, interpreter, machine, time."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def save_report(path: str, report: Dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Relative change of p50 / p95 per stage present in both reports (+0.10 = 10% slower)."""
+    deltas = {}
+    for stage, stats in current["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before:
+            continue
+        deltas[stage] = {
+            key: round(stats[key] / before[key] - 1, 3) if before[key] else 0.0
+            for key in ("p50_ms", "p95_ms")
+        }
+    return deltas
@@ -0,0 +1,63 @@
+"""Deterministic, offline semantic mapping for the benchmarks.
+
+``offline_mapping()`` swaps the sentence-transformers model, for the rest of
+the process, for the character-frequency vectors mapping_service falls back
+to. Within the block it also turns off the
+Redis caches and gives every run a fresh in-memory SQLite database, so
+timings need no model download and do not depend on earlier runs.
+"""
+
+from contextlib import contextmanager
+from typing import Iterator, List
+from unittest.mock import patch
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models.mapping import MappingRuleModel, SemanticFieldMappingModel
+from app.services import mapping_service
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_model import embedding_manager
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_as_json(element, compiler, **kw):
+    return "JSON"
+
+
+class OfflineEmbeddingModel:
+    """Stands in for SentenceTransformer using mapping_service._fallback_vector."""
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return np.stack([mapping_service._fallback_vector(t) for t in texts])
+
+
+def fresh_session() -> Session:
+    """Empty in-memory database with the tables suggest_semantic_mapping reads."""
+    # GUID keys come back from SQLite as text, which breaks insertmanyvalues'
+    # sentinel matching on bulk inserts
+    engine = create_engine("sqlite://", use_insertmanyvalues=False)
+    SemanticFieldMappingModel.__table__.create(engine)
+    MappingRuleModel.__table__.create(engine)
+    return sessionmaker(bind=engine)()
+
+
+@contextmanager
+def offline_mapping() -> Iterator[None]:
+    cache = EmbeddingCache(None, model_name="offline", model_version="0")
+    with (
+        patch.object(mapping_service, "redis_client", None),
+        patch.object(mapping_service, "embedding_cache", cache),
+        patch.object(mapping_service, "USE_SEMANTIC_EMBEDDINGS", True),
+        patch.object(mapping_service, "RULE_BASED_MAPPING_ENABLED", False),
+        patch.object(mapping_service.mapping_history, "path", None),
+    ):
+        embedding_manager.use(OfflineEmbeddingModel())
+        try:
+            yield
+        finally:
+            mapping_service.mapping_history.reset()
+            mapping_service.canonical_index.invalidate()
@@ -0,0 +1,158 @@
+"""Benchmark: vectorized spreadsheet_reader cleaning stages vs. per-cell loops.
+
+Run from services/budget:
+
+    python -m benchmarks.spreadsheet_cleaning_benchmark [--cells 10000 100000]
+
+The ``_legacy_*`` helpers reproduce the applymap / iterrows implementations
+ExcelStructureDetector used before, so both sides clean the same synthetic
+pipeline DataFrame (column-letter header row, row-number first column) and
+must produce identical output.
+"""
+
+import argparse
+import random
+import time
+import warnings
+from datetime import datetime
+
+import pandas as pd
+from openpyxl.utils import get_column_letter
+
+from app.services.template_detection.spreadsheet_reader import (
+    ExcelStructureDetector,
+    is_numeric,
+    is_numeric_cell,
+)
+
+COLUMNS = 10
+SAMPLE_VALUES = [
+    "Staff costs",
+    "Project manager",
+    "month",
+    "12",
+    " 3.5 ",
+    "1 - 3",
+    "",
+    "   ",
+    None,
+    None,
+    0,
+    1200,
+    250.75,
+    True,
+    datetime(2026, 1, 1),
+    "Total project costs",
+]
+
+
+def make_frame(cells: int, seed: int = 0) -> pd.DataFrame:
+    rng = random.Random(seed)
+    rows = max(1, cells // COLUMNS)
+    data = [[""] + [get_column_letter(i + 1) for i in range(COLUMNS)]]
+    for r in range(rows):
+        # one unique label and amount per row, the rest drawn from common values
+        row = [f"Line item {r}", round(r * 1.25, 2)]
+        data.append([r + 1] + row + [rng.choice(SAMPLE_VALUES) for _ in range(COLUMNS - 2)])
+    return pd.DataFrame(data)
+
+
+def _legacy_remove_numeric_rows(df: pd.DataFrame) -> pd.DataFrame:
+    header = df.iloc[0:1]
+    body = df.iloc[1:].copy()
+    mask_numeric = body.iloc[:, 1:].map(is_numeric_cell)
+    body.iloc[:, 1:] = body.iloc[:, 1:].mask(mask_numeric, other=None)
+    body_cleaned = body.dropna(how="all", subset=body.columns[1:]).reset_index(drop=True)
+    return pd.concat([header, body_cleaned]).reset_index(drop=True)
+
+
+def _legacy_possible_fields(df: pd.DataFrame) -> list[str]:
+    possible_fields = set()
+    for r_idx, row in df.iloc[1:].iterrows():
+        for c_idx, val in enumerate(row[1:], start=1):
+            if val and isinstance(val, str) and not is_numeric(val):
+                possible_fields.add(val.strip())
+    return list(possible_fields)
+
+
+def _legacy_detection_json(df: pd.DataFrame) -> list[dict]:
+    output = []
+    for r_idx, row in df.iloc[1:].iterrows():
+        for c_idx, val in enumerate(row[1:], start=1):
+            if not is_numeric(val):
+                output.append(
+                    {
+                        "coordinate": f"{df.iloc[0, c_idx]}{row[0]}",
+                        "row": row[0],
+                        "col": df.iloc[0, c_idx],
+                        "value": val,
+                        "suggested_field": "unknown",
+                        "confidence": 0.0,
+                    }
+                )
+    return output
+
+
+def _timed(fn, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def run(cells: int) -> list[dict]:
+    detector = ExcelStructureDetector("unused.xlsx")
+    frame = make_frame(cells)
+    cases = [
+        (
+            "remove_numeric_rows",
+            lambda: _legacy_remove_numeric_rows(frame),
+            lambda: detector.remove_numeric_rows(frame.copy()),
+        ),
+        (
+            "filter_list_of_possible_fields",
+            lambda: _legacy_possible_fields(frame),
+            lambda: detector.filter_list_of_possible_fields(frame),
+        ),
+        (
+            "to_detection_json",
+            lambda: _legacy_detection_json(frame),
+            lambda: detector.to_detection_json(frame),
+        ),
+    ]
+    results = []
+    for name, legacy, vectorized in cases:
+        legacy_s, expected = _timed(legacy)
+        vectorized_s, actual = _timed(vectorized)
+        if isinstance(expected, pd.DataFrame):
+            assert expected.equals(actual), f"{name}: vectorized output differs"
+        else:
+            assert actual == expected, f"{name}: vectorized output differs"
+        results.append(
+            {
+                "case": name,
+                "cells": cells,
+                "legacy_ms": legacy_s * 1e3,
+                "vectorized_ms": vectorized_s * 1e3,
+                "speedup": legacy_s / vectorized_s if vectorized_s else float("inf"),
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cells", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    print(f"{'case':<32} {'cells':>8} {'legacy ms':>11} {'vector ms':>11} {'speedup':>9}")
+    for cells in args.cells:
+        for row in run(cells):
+            print(
+                f"{row['case']:<32} {row['cells']:>8} {row['legacy_ms']:>11.1f} "
+                f"{row['vectorized_ms']:>11.1f} {row['speedup']:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
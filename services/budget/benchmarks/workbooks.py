@@ -0,0 +1,96 @@
+"""Synthetic donor budget workbooks for the benchmarks.
+
+``write_donor_workbook`` lays every sheet out like a filled-in donor form:
+metadata rows, an optional merged title and merged "Year" group header, the
+column header, numbered categories with their line items and totals, and a
+signature block. Output depends only on the WorkbookSpec (including its
+seed), so benchmark runs on different commits read identical files.
+"""
+
+import random
+from dataclasses import asdict, dataclass
+
+from openpyxl import Workbook
+
+CATEGORIES = [
+    "Staff costs",
+    "Travel",
+    "Equipment",
+    "Office rent",
+    "Training",
+    "Audit",
+    "Monitoring and evaluation",
+    "Communications",
+]
+ITEMS = [
+    "Project manager",
+    "Finance officer",
+    "Field coordinator",
+    "Flights",
+    "Per diem",
+    "Laptops",
+    "Vehicle hire",
+    "Workshop venue",
+    "External audit",
+    "Printing",
+]
+UNITS = ["month", "trip", "day", "unit", "lump sum"]
+HEADER = ["Budget line", "Unit", "Quantity", "Unit cost", "Total (GBP)", "Notes"]
+
+
+@dataclass(frozen=True)
+class WorkbookSpec:
+    rows: int = 1000  # line items per sheet
+    sheets: int = 1
+    formula_density: float = 0.5  # share of line items whose total is a formula
+    merged_headers: bool = True
+    seed: int = 7
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def write_donor_workbook(path: str, spec: WorkbookSpec) -> None:
+    rng = random.Random(spec.seed)
+    wb = Workbook()
+    wb.remove(wb.active)
+    for n in range(spec.sheets):
+        _write_sheet(wb.create_sheet("Budget" if n == 0 else f"Annex {n}"), spec, rng)
+    wb.save(path)
+
+
+def _write_sheet(ws, spec: WorkbookSpec, rng: random.Random) -> None:
+    ws.append(["Project name:", f"Programme {rng.randint(100, 999)}"])
+    ws.append(["Organisation name:", rng.choice(["Acme", "Hope Trust", "River NGO"])])
+    ws.append(["Project period:", "2026-2028"])
+    ws.append([])
+    if spec.merged_headers:
+        ws.append(["Detailed budget"])
+        ws.merge_cells(start_row=ws.max_row, start_column=1, end_row=ws.max_row, end_column=6)
+        ws.append([None, None, "Year 1", None, "Year 2", None])
+        ws.merge_cells(start_row=ws.max_row, start_column=3, end_row=ws.max_row, end_column=4)
+        ws.merge_cells(start_row=ws.max_row, start_column=5, end_row=ws.max_row, end_column=6)
+    ws.append(HEADER)
+
+    per_category = max(1, spec.rows // len(CATEGORIES))
+    written = 0
+    category_totals = []
+    for number, category in enumerate(CATEGORIES, start=1):
+        if written >= spec.rows:
+            break
+        ws.append([f"{number}. {category}"])
+        first = ws.max_row + 1
+        for _ in range(min(per_category, spec.rows - written)):
+            r = ws.max_row + 1
+            quantity = rng.randint(1, 24)
+            unit_cost = round(rng.uniform(10, 5000), 2)
+            total = f"=C{r}*D{r}" if rng.random() < spec.formula_density else quantity * unit_cost
+            note = rng.choice([None, None, "see annex", "estimate"])
+            ws.append([rng.choice(ITEMS), rng.choice(UNITS), quantity, unit_cost, total, note])
+            written += 1
+        ws.append([f"Total {category.lower()}", None, None, None, f"=SUM(E{first}:E{ws.max_row})"])
+        category_totals.append(f"E{ws.max_row}")
+    ws.append(["Total project costs", None, None, None, "=" + "+".join(category_totals)])
+    ws.append([])
+    ws.append(["Authorised signatory:", None])
+    ws.append(["Contact person:", None])
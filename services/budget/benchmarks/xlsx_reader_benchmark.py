@@ -0,0 +1,91 @@
+"""Benchmark: SAX xlsx reader vs. openpyxl read-only on large synthetic sheets.
+
+Run from services/budget:
+
+    python -m benchmarks.xlsx_reader_benchmark [--rows 100000] [--memory]
+
+Each backend streams the same generated workbook through
+ExcelStructureDetector.iter_detections() and detect_excel_structure(), so
+both sides do the full detection pass, not just the XML read. With
+``--memory`` a second run records the peak traced Python allocation.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+from openpyxl import Workbook
+
+from app.services.template_detection.detector import detect_excel_structure
+from app.services.template_detection.spreadsheet_reader import ExcelStructureDetector
+from app.services.template_detection.xlsx_reader import get_reader
+
+BACKENDS = ["openpyxl", "sax"]
+CATEGORIES = ["Staff costs", "Travel", "Equipment", "Office rent", "Training", "Audit"]
+
+
+def write_workbook(path: str, rows: int) -> None:
+    """Donor-style sheet: header, then label/unit/qty/cost/formula/date rows."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Budget")
+    ws.append(["Category", "Description", "Unit", "Quantity", "Unit cost", "Total", "Start"])
+    for i in range(rows):
+        r = i + 2
+        ws.append(
+            [
+                f"{i % 40 + 1}. {CATEGORIES[i % len(CATEGORIES)]}",
+                f"Line item {i}",
+                "month" if i % 3 else "trip",
+                i % 12 + 1,
+                round(100 + i * 0.25, 2),
+                f"=D{r}*E{r}" if i % 10 else None,
+                date(2026, i % 12 + 1, 1),
+            ]
+        )
+    wb.save(path)
+
+
+def _detect(path: str, backend: str) -> int:
+    reader = get_reader(path, backend)
+    detections = sum(1 for _ in ExcelStructureDetector(path, reader=reader).iter_detections())
+    detect_excel_structure(path, reader=reader)
+    return detections
+
+
+def run(rows: int, memory: bool = False) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.xlsx")
+        write_workbook(path, rows)
+        counts = {}
+        for backend in BACKENDS:
+            start = time.perf_counter()
+            counts[backend] = _detect(path, backend)
+            row = {"backend": backend, "seconds": time.perf_counter() - start, "peak_mb": None}
+            if memory:
+                tracemalloc.start()
+                _detect(path, backend)
+                row["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+            results.append(row)
+        assert len(set(counts.values())) == 1, f"backends disagree: {counts}"
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000, help="data rows in the sheet")
+    parser.add_argument("--memory", action="store_true", help="also record peak allocation")
+    args = parser.parse_args()
+
+    print(f"{'backend':<10} {'seconds':>9} {'peak MB':>9}")
+    for row in run(args.rows, args.memory):
+        peak = f"{row['peak_mb']:>9.1f}" if row["peak_mb"] is not None else f"{'-':>9}"
+        print(f"{row['backend']:<10} {row['seconds']:>9.2f} {peak}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,8 @@ from app.services.user_client import (
     close_urls as close_user_client_urls,
 )
 from app.services.event_consumer import init_consumer, close_consumer, start_consumer
+from app.services.embedding_model import embedding_manager
+from app.services.ingestion_jobs import ingestion_runner
 
 from shared.observability import (
     init_observability,
@@ -53,12 +55,18 @@ async def lifespan(app: FastAPI):
         logger.error("startup_timeout", timeout_seconds=30, service="budget")
         raise
 
+    if settings.EMBEDDING_MODEL_WARMUP and settings.USE_SEMANTIC_EMBEDDINGS:
+        # Outside the startup timeout: the first load may download the model
+        warmed = await asyncio.to_thread(embedding_manager.warmup)
+        logger.info("embedding_model_warmup", **embedding_manager.stats(), warmed=warmed)
+
     yield
 
     logger.info("app_shutdown", service="budget")
     await close_user_client_urls()
     await close_consumer()
     logger.info("event_consumer_stopped")
+    ingestion_runner.shutdown()
 
 
 # Donot create dbs on startup, it has to go through migrations.
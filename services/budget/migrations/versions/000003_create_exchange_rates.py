@@ -0,0 +1,57 @@
+"""Create exchange_rates table
+
+Revision ID: 000003
+Revises: 000002
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "000003"
+down_revision: Union[str, Sequence[str], None] = "000002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "exchange_rates",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("rate_date", sa.Date(), nullable=False),
+        sa.Column("base_currency", sa.String(length=3), nullable=False),
+        sa.Column("quote_currency", sa.String(length=3), nullable=False),
+        sa.Column("rate", sa.Float(), nullable=False),
+        sa.Column(
+            "source",
+            sa.String(length=255),
+            nullable=True,
+            comment="File or feed the rate was imported from",
+        ),
+        sa.Column(
+            "imported_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "rate_date", "base_currency", "quote_currency", name="uq_exchange_rates_date_pair"
+        ),
+    )
+    op.create_index(
+        "ix_exchange_rates_base_currency_rate_date",
+        "exchange_rates",
+        ["base_currency", "rate_date"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_exchange_rates_base_currency_rate_date", table_name="exchange_rates")
+    op.drop_table("exchange_rates")
@@ -0,0 +1,60 @@
+"""Create mapping_rules table
+
+Revision ID: 000004
+Revises: 000003
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import shared.db.type_decorators
+
+revision: str = "000004"
+down_revision: Union[str, Sequence[str], None] = "000003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "mapping_rules",
+        sa.Column("id", shared.db.type_decorators.GUID(), nullable=False),
+        sa.Column("customer_id", shared.db.type_decorators.GUID(), nullable=True),
+        sa.Column("donor_template_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "pattern",
+            sa.String(),
+            nullable=False,
+            comment="Normalized phrase, e.g. 'staff'",
+        ),
+        sa.Column("match_type", sa.String(length=16), nullable=False, comment="contains | exact"),
+        sa.Column("mapped_to", sa.String(), nullable=False),
+        sa.Column("mapped_key", sa.String(), nullable=True),
+        sa.Column("confidence", sa.Float(), nullable=False),
+        sa.Column(
+            "priority", sa.Integer(), nullable=False, comment="Lower wins when several rules match"
+        ),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_by", shared.db.type_decorators.GUID(), nullable=True),
+        sa.Column("updated_by", shared.db.type_decorators.GUID(), nullable=True),
+        sa.ForeignKeyConstraint(["donor_template_id"], ["donor_templates.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_mapping_rules_scope",
+        "mapping_rules",
+        ["customer_id", "donor_template_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_mapping_rules_scope", table_name="mapping_rules")
+    op.drop_table("mapping_rules")
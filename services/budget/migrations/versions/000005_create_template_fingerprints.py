@@ -0,0 +1,77 @@
+"""Create template_fingerprints table
+
+Revision ID: 000005
+Revises: 000004
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+import shared.db.type_decorators
+
+revision: str = "000005"
+down_revision: Union[str, Sequence[str], None] = "000004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "template_fingerprints",
+        sa.Column("id", shared.db.type_decorators.GUID(), nullable=False),
+        sa.Column("donor_template_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "digest",
+            sa.String(length=64),
+            nullable=False,
+            comment="sha256 of the normalized header labels and category skeleton",
+        ),
+        sa.Column("fingerprint_version", sa.Integer(), nullable=False),
+        sa.Column("header_labels", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("skeleton", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column(
+            "structure",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+            comment="detect_excel_structure output for the template",
+        ),
+        sa.Column(
+            "mappings",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+            comment="suggest_semantic_mapping output for the template's labels",
+        ),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_by", shared.db.type_decorators.GUID(), nullable=True),
+        sa.Column("updated_by", shared.db.type_decorators.GUID(), nullable=True),
+        sa.ForeignKeyConstraint(["donor_template_id"], ["donor_templates.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_template_fingerprints_donor_template_id"),
+        "template_fingerprints",
+        ["donor_template_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_template_fingerprints_digest"),
+        "template_fingerprints",
+        ["digest"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_template_fingerprints_digest"), table_name="template_fingerprints")
+    op.drop_index(
+        op.f("ix_template_fingerprints_donor_template_id"), table_name="template_fingerprints"
+    )
+    op.drop_table("template_fingerprints")
@@ -0,0 +1,58 @@
+"""Make budget category names unique per donor template
+
+Revision ID: 000006
+Revises: 000005
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "000006"
+down_revision: Union[str, Sequence[str], None] = "000005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Merge existing duplicates into the oldest row before adding the constraint
+    op.execute("""
+        WITH ranked AS (
+            SELECT id,
+                   first_value(id) OVER (
+                       PARTITION BY name, donor_template_id ORDER BY created_at, id
+                   ) AS keep_id
+            FROM budget_categories
+        )
+        UPDATE budget_lines
+        SET category_id = ranked.keep_id
+        FROM ranked
+        WHERE budget_lines.category_id = ranked.id AND ranked.id <> ranked.keep_id
+        """)
+    op.execute("""
+        DELETE FROM budget_categories
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id,
+                       row_number() OVER (
+                           PARTITION BY name, donor_template_id ORDER BY created_at, id
+                       ) AS rank
+                FROM budget_categories
+            ) ranked
+            WHERE rank > 1
+        )
+        """)
+    op.create_unique_constraint(
+        "uq_budget_categories_name_template",
+        "budget_categories",
+        ["name", "donor_template_id"],
+        postgresql_nulls_not_distinct=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("uq_budget_categories_name_template", "budget_categories", type_="unique")
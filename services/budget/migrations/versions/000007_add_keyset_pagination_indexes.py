@@ -0,0 +1,62 @@
+"""Add composite indexes for keyset pagination of budgets and budget lines
+
+Revision ID: 000007
+Revises: 000006
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "000007"
+down_revision: Union[str, Sequence[str], None] = "000006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name -> (table, columns); every list filter ends in the (created_at, id) sort key
+INDEXES = {
+    "ix_budgets_created_at_id": ("budgets", ["created_at", "id"]),
+    "ix_budgets_owner_created_at_id": ("budgets", ["owner_id", "created_at", "id"]),
+    "ix_budgets_owner_status_created_at_id": (
+        "budgets",
+        ["owner_id", "status", "created_at", "id"],
+    ),
+    "ix_budgets_owner_funder_created_at_id": (
+        "budgets",
+        ["owner_id", "funding_customer_id", "created_at", "id"],
+    ),
+    "ix_budgets_owner_funder_name_created_at_id": (
+        "budgets",
+        ["owner_id", "external_funder_name", "created_at", "id"],
+    ),
+    "ix_budget_lines_created_at_id": ("budget_lines", ["created_at", "id"]),
+    "ix_budget_lines_budget_created_at_id": ("budget_lines", ["budget_id", "created_at", "id"]),
+    "ix_budget_lines_category_created_at_id": (
+        "budget_lines",
+        ["category_id", "created_at", "id"],
+    ),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps large tenants' tables writable while the indexes build
+    with op.get_context().autocommit_block():
+        for name, (table, columns) in INDEXES.items():
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, (table, _) in INDEXES.items():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,63 @@
+"""Create budget_summaries read model
+
+Revision ID: 000008
+Revises: 000007
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import shared.db.type_decorators
+
+revision: str = "000008"
+down_revision: Union[str, Sequence[str], None] = "000007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "budget_summaries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("budget_id", shared.db.type_decorators.GUID(), nullable=False),
+        sa.Column(
+            "category_id",
+            shared.db.type_decorators.GUID(),
+            nullable=True,
+            comment="No foreign key: totals outlive a deleted category until the next rebuild",
+        ),
+        sa.Column("total_amount", sa.Float(), nullable=False),
+        sa.Column("line_count", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["budget_id"], ["budgets.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "budget_id",
+            "category_id",
+            name="uq_budget_summaries_budget_category",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+    # Backfill; lines written by instances still running the previous release
+    # while this runs are picked up by `python -m scripts.rebuild_budget_summaries`
+    op.execute("""
+        INSERT INTO budget_summaries (budget_id, category_id, total_amount, line_count)
+        SELECT budget_id, category_id, COALESCE(SUM(amount), 0), COUNT(*)
+        FROM budget_lines
+        GROUP BY budget_id, category_id
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("budget_summaries")
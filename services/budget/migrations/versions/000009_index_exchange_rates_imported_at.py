@@ -0,0 +1,28 @@
+"""Index exchange_rates.imported_at, the change marker of the rate table cache
+
+Revision ID: 000009
+Revises: 000008
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "000009"
+down_revision: Union[str, Sequence[str], None] = "000008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_exchange_rates_imported_at", "exchange_rates", ["imported_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_exchange_rates_imported_at", table_name="exchange_rates")
@@ -0,0 +1,52 @@
+"""Scope template fingerprints to the customer that uploaded them
+
+Revision ID: 000010
+Revises: 000009
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import shared.db.type_decorators
+
+revision: str = "000010"
+down_revision: Union[str, Sequence[str], None] = "000009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "template_fingerprints",
+        sa.Column(
+            "customer_id",
+            shared.db.type_decorators.GUID(),
+            nullable=True,
+            comment="Customer whose upload it was; only their uploads are matched against it",
+        ),
+    )
+    op.create_index(
+        op.f("ix_template_fingerprints_customer_id"),
+        "template_fingerprints",
+        ["customer_id"],
+        unique=False,
+    )
+    # Existing fingerprints belong to their uploader's customer; any whose
+    # uploader is unknown keep NULL, which only uploads without a customer match
+    op.execute("""
+        UPDATE template_fingerprints AS tf
+        SET customer_id = u.customer_id
+        FROM user_profiles AS u
+        WHERE u.user_id = tf.created_by
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_template_fingerprints_customer_id"), table_name="template_fingerprints")
+    op.drop_column("template_fingerprints", "customer_id")
@@ -0,0 +1,91 @@
+"""Bulk-import a directory of legacy budget workbooks as ai_draft budgets.
+
+Run from services/budget:
+
+    python -m scripts.import_budget_archive /data/archive --owner-id <customer uuid> \
+        [--workers 4] [--donor-template-id 7] [--report summary.json]
+
+Workbooks (*.xlsx / *.xlsm, searched recursively) are imported in parallel
+processes. Progress goes to a manifest (default: <directory>/.budget_import_manifest.jsonl)
+keyed by file SHA-256: rerunning the same command skips files already
+imported and retries the ones that failed.
+"""
+
+import argparse
+import json
+import os
+import sys
+import uuid
+from pathlib import Path
+
+from app.services.archive_import_service import ImportOptions, ImportResult, import_archive
+
+PATTERNS = ("*.xlsx", "*.xlsm")
+MANIFEST_NAME = ".budget_import_manifest.jsonl"
+
+
+def find_workbooks(directory: str) -> list[str]:
+    root = Path(directory)
+    found = {p for pattern in PATTERNS for p in root.rglob(pattern)}
+    # Skip Excel's "~$name.xlsx" lock files
+    return sorted(str(p) for p in found if p.is_file() and not p.name.startswith("~$"))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="directory of legacy workbooks")
+    parser.add_argument("--owner-id", type=uuid.UUID, required=True, help="owning customer id")
+    parser.add_argument("--user-id", type=uuid.UUID, help="recorded as created_by")
+    parser.add_argument("--donor-template-id", type=int, help="donor template of the budgets")
+    parser.add_argument("--funder-name", help="external funder name for every budget")
+    parser.add_argument("--currency", default="GBP", help="when a sheet names none")
+    parser.add_argument("--database-url", help="target database (default: the service's)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--manifest", help=f"progress manifest (default: <directory>/{MANIFEST_NAME})"
+    )
+    parser.add_argument("--report", help="also write the summary as JSON to this path")
+    parser.add_argument("--quiet", action="store_true", help="no line per file")
+    args = parser.parse_args(argv)
+
+    paths = find_workbooks(args.directory)
+    options = ImportOptions(
+        owner_id=args.owner_id,
+        user_id=args.user_id,
+        donor_template_id=args.donor_template_id,
+        external_funder_name=args.funder_name,
+        default_currency=args.currency,
+        database_url=args.database_url,
+    )
+
+    def progress(result: ImportResult) -> None:
+        if not args.quiet:
+            detail = result.error if result.error else f"{result.lines} lines"
+            print(f"{result.status:<9} {result.seconds:>7.2f}s  {result.path}  {detail}")
+
+    print(f"{len(paths)} workbooks in {args.directory}")
+    summary = import_archive(
+        paths,
+        options,
+        args.manifest or os.path.join(args.directory, MANIFEST_NAME),
+        max_workers=args.workers,
+        on_result=progress,
+    )
+
+    print()
+    print(f"{'imported':<10} {summary.imported:>8}")
+    print(f"{'empty':<10} {summary.empty:>8}")
+    print(f"{'skipped':<10} {summary.skipped:>8}")
+    print(f"{'failed':<10} {summary.failed:>8}")
+    print(f"{'lines':<10} {summary.lines:>8}")
+    print(f"{'seconds':<10} {summary.seconds:>8.1f}")
+    print(f"{'files/s':<10} {summary.files_per_second:>8.2f}")
+    print(f"{'rows/s':<10} {summary.rows_per_second:>8.1f}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as fh:
+            json.dump(summary.to_dict(), fh, indent=2)
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
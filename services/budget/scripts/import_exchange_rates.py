@@ -0,0 +1,52 @@
+"""Load exchange-rate files into the exchange_rates table.
+
+Run from services/budget, e.g. daily after the ECB publishes:
+
+    python -m scripts.import_exchange_rates eurofxref-daily.xml [more files ...] \
+        [--base-currency EUR]
+
+Files ending in .xml are read as ECB eurofxref XML, anything else as CSV
+(long ``date,base_currency,quote_currency,rate`` or the wide ECB history
+layout). Rates already stored for a date are overwritten. Running services
+pick the new rates up on their next conversion.
+"""
+
+import argparse
+import sys
+import time
+
+from app.db.session import session_factory
+from app.services.exchange_rate_services import import_exchange_rates_service
+from shared.services.exchange_rate_service import DEFAULT_BASE_CURRENCY
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+", help="CSV or ECB XML rates files")
+    parser.add_argument(
+        "--base-currency",
+        default=DEFAULT_BASE_CURRENCY,
+        help=f"base of wide CSV / XML files (default: {DEFAULT_BASE_CURRENCY})",
+    )
+    parser.add_argument("--database-url", help="target database (default: the service's)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    db = session_factory(args.database_url)()
+    try:
+        total = 0
+        for path in args.files:
+            count = import_exchange_rates_service(db, path, args.base_currency.upper())
+            print(f"{count:>8} rates from {path}")
+            total += count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    print(f"{total} rates in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
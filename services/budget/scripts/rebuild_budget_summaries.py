@@ -0,0 +1,60 @@
+"""Recompute the budget_summaries read model from budget_lines.
+
+Run from services/budget:
+
+    python -m scripts.rebuild_budget_summaries [--budget-id <uuid> ...] [--batch-size 500]
+
+Line writes keep the summaries up to date; this is for the backfill after
+the migration and for repairing drift (e.g. lines changed outside the
+service). Budgets are rebuilt in batches, one transaction per batch.
+"""
+
+import argparse
+import sys
+import time
+import uuid
+
+from sqlalchemy import select
+
+from app.crud.budget_summary_crud import rebuild_budget_summaries
+from app.models.budget import BudgetModel
+from app.db.session import session_factory
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--budget-id",
+        type=uuid.UUID,
+        action="append",
+        dest="budget_ids",
+        help="only this budget (repeatable; default: every budget)",
+    )
+    parser.add_argument("--batch-size", type=int, default=500, help="budgets per transaction")
+    parser.add_argument("--database-url", help="target database (default: the service's)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    db = session_factory(args.database_url)()
+    try:
+        budget_ids = args.budget_ids or list(
+            db.scalars(select(BudgetModel.id).order_by(BudgetModel.id))
+        )
+        rows = 0
+        for start in range(0, len(budget_ids), args.batch_size):
+            end = min(start + args.batch_size, len(budget_ids))
+            batch = budget_ids[start:end]
+            rows += rebuild_budget_summaries(db, batch)
+            db.commit()
+            print(f"{end:>8} / {len(budget_ids)} budgets")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    print(f"{rows} summary rows in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
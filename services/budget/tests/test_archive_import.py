@@ -0,0 +1,162 @@
+"""
+Bulk import of legacy budget workbooks.
+"""
+
+import json
+import uuid
+from unittest.mock import patch
+
+import pytest
+from openpyxl import Workbook
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.budget import BudgetCategoryModel, BudgetLineModel, BudgetModel
+from app.models.budget_summary import BudgetSummaryModel
+from app.models.mapping import MappingRuleModel
+from app.services import archive_import_service as service
+from app.services.budget_category_services import category_cache
+from app.services.archive_import_service import (
+    EMPTY,
+    FAILED,
+    IMPORTED,
+    ImportOptions,
+    import_archive,
+    parse_budget_workbook,
+)
+from scripts import import_budget_archive
+
+OWNER = uuid.UUID("00000000-0000-0000-0000-0000000000aa")
+
+
+def _budget_rows(project, staff_amount=36000):
+    return [
+        ["Project name:", project],
+        ["Organisation name:", "Acme"],
+        [None],
+        ["Budget line", "Unit", "Quantity", "Total (USD)"],
+        ["1. Staff costs", None, None, None],
+        ["Project manager", "month", 12, staff_amount],
+        ["Finance officer", "month", 6, 9000],
+        ["Total staff costs", None, None, None],
+        ["2. Travel", None, None, None],
+        ["Flights", "trip", 2, 800.5],
+        ["Total project costs", None, None, None],
+    ]
+
+
+def _save(path, rows):
+    wb = Workbook()
+    for row in rows:
+        wb.active.append(row)
+    wb.save(path)
+    return str(path)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    root = tmp_path / "archive"
+    (root / "2019").mkdir(parents=True)
+    _save(root / "2019" / "water.xlsx", _budget_rows("Clean water"))
+    _save(root / "schools.xlsx", _budget_rows("Schools", staff_amount=1000))
+    _save(root / "copy of schools.xlsx", _budget_rows("Schools", staff_amount=1000))
+    _save(root / "notes.xlsx", [["Just some notes"]])
+    (root / "broken.xlsx").write_bytes(b"not a zip")
+    return root
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'budget.db'}"
+    engine = create_engine(url)
+    for model in (
+        BudgetModel,
+        BudgetCategoryModel,
+        BudgetLineModel,
+        BudgetSummaryModel,
+        MappingRuleModel,
+    ):
+        model.__table__.create(engine)
+    category_cache.invalidate()
+    return url
+
+
+def _rule_mapping(values, db, valid_user, donor_template_id=None):
+    return {
+        "suggestions": [
+            {"raw_value": v, "mapped_to": "budget_field", "mapped_key": "project_name"}
+            for v in values
+            if v == "Project name"
+        ],
+        "unknown": [],
+    }
+
+
+def test_parse_reads_lines_under_their_categories(archive):
+    parsed = parse_budget_workbook(str(archive / "2019" / "water.xlsx"))
+
+    assert parsed.amount_label == "Total (USD)"
+    assert parsed.metadata == {"Project name": "Clean water", "Organisation name": "Acme"}
+    assert [(ln["category"], ln["description"], ln["amount"]) for ln in parsed.lines] == [
+        ("Staff costs", "Project manager", 36000.0),
+        ("Staff costs", "Finance officer", 9000.0),
+        ("Travel", "Flights", 800.5),
+    ]
+
+
+def test_import_is_isolated_per_file_and_resumable(archive, database_url):
+    manifest = str(archive / "manifest.jsonl")
+    options = ImportOptions(owner_id=OWNER, database_url=database_url)
+    paths = import_budget_archive.find_workbooks(str(archive))
+
+    with patch.object(service, "suggest_semantic_mapping", side_effect=_rule_mapping):
+        summary = import_archive(paths, options, manifest)
+
+    assert (summary.files, summary.imported, summary.empty, summary.failed) == (5, 2, 1, 1)
+    assert summary.skipped == 1  # the identical copy
+    assert summary.lines == 6 and summary.rows_per_second > 0
+    assert "broken.xlsx" in summary.failures[0]["path"]
+
+    db = sessionmaker(bind=create_engine(database_url))()
+    budgets = {b.name: b for b in db.query(BudgetModel).all()}
+    assert set(budgets) == {"Clean water", "Schools"}
+    assert budgets["Schools"].local_currency == "USD"
+    assert db.query(BudgetLineModel).count() == 6
+    assert sorted(c.name for c in db.query(BudgetCategoryModel).all()) == [
+        "Staff costs",
+        "Travel",
+    ]
+    statuses = [json.loads(line)["status"] for line in open(manifest)]
+    assert sorted(statuses) == sorted([IMPORTED, IMPORTED, EMPTY, FAILED])
+
+    # Rerun: only the failed file is attempted again
+    with patch.object(service, "suggest_semantic_mapping", side_effect=_rule_mapping):
+        again = import_archive(paths, options, manifest)
+    assert (again.skipped, again.failed, again.imported) == (4, 1, 0)
+    assert db.query(BudgetModel).count() == 2
+    db.close()
+
+
+def test_cli_fans_out_over_processes(archive, database_url, monkeypatch, capsys):
+    # Workers resolve labels with the built-in rules
+    monkeypatch.setenv("RULE_BASED_MAPPING_ENABLED", "true")
+    report = archive / "report.json"
+
+    code = import_budget_archive.main(
+        [
+            str(archive),
+            "--owner-id",
+            str(OWNER),
+            "--database-url",
+            database_url,
+            "--workers",
+            "2",
+            "--report",
+            str(report),
+        ]
+    )
+
+    assert code == 1  # broken.xlsx
+    summary = json.loads(report.read_text())
+    assert (summary["imported"], summary["failed"], summary["lines"]) == (2, 1, 6)
+    assert "rows/s" in capsys.readouterr().out
@@ -0,0 +1,124 @@
+"""
+Batched, cached category resolution in budget_category_services.
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.crud.budget_category_crud import create_budget_categories
+from app.models.budget import BudgetCategoryModel, BudgetLineModel
+from app.models.budget_summary import BudgetSummaryModel
+from app.services import budget_category_services as service
+from app.services.budget_category_services import (
+    CategoryCache,
+    delete_category_service,
+    invalidating_categories_on_error,
+    resolve_categories,
+    update_category_service,
+)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://")
+    BudgetCategoryModel.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all(
+        [
+            BudgetCategoryModel(id=uuid.uuid4(), name="Travel", code="TRAVEL"),
+            BudgetCategoryModel(id=uuid.uuid4(), name="Travel", code="T", donor_template_id=7),
+        ]
+    )
+    session.commit()
+    statements: list[str] = []
+    event.listen(
+        engine, "before_cursor_execute", lambda *args: statements.append(args[2]), named=False
+    )
+    session.info["statements"] = statements
+    monkeypatch.setattr(service, "category_cache", CategoryCache(ttl=60, max_entries=100))
+    yield session
+    session.close()
+
+
+def _verbs(db):
+    verbs = [s.split()[0] for s in db.info["statements"]]
+    db.info["statements"].clear()
+    return verbs
+
+
+def test_resolves_names_and_templates_in_one_query_and_one_insert(db):
+    codes = {("Travel", None): "TRAVEL", ("Travel", 7): "T", ("Staff", 7): "STAFF"}
+
+    resolved = resolve_categories(db, None, codes)
+    db.commit()
+
+    assert _verbs(db) == ["SELECT", "INSERT"]
+    assert {key: c.code for key, c in resolved.items()} == codes
+    assert resolved[("Travel", None)].id != resolved[("Travel", 7)].id
+
+    # Existing categories come from the cache; "Staff" is read once more, now committed
+    assert resolve_categories(db, None, codes) == resolved
+    assert _verbs(db) == ["SELECT"]
+    assert resolve_categories(db, None, codes) == resolved
+    assert _verbs(db) == []
+
+
+def test_concurrently_created_categories_are_read_back(db):
+    existing = db.query(BudgetCategoryModel).filter_by(donor_template_id=7).one()
+
+    created = create_budget_categories(db, None, {("Travel", 7): "OTHER", ("Per diem", 7): "PD"})
+
+    assert created[("Travel", 7)].id == existing.id
+    assert created[("Travel", 7)].code == "T"
+    assert db.query(BudgetCategoryModel).count() == 3
+
+
+def test_updated_and_deleted_categories_leave_the_cache(db):
+    for model in (BudgetLineModel, BudgetSummaryModel):  # touched by a delete
+        model.__table__.create(db.get_bind())
+    codes = {("Travel", None): "TRAVEL", ("Travel", 7): "T"}
+    resolved = resolve_categories(db, None, codes)
+
+    update_category_service(db, resolved[("Travel", None)].id, "Travel", "TRV")
+    assert delete_category_service(db, resolved[("Travel", 7)].id)
+    _verbs(db)
+
+    assert (
+        resolve_categories(db, None, {("Travel", None): "TRAVEL"})[("Travel", None)].code == "TRV"
+    )
+    assert _verbs(db) == ["SELECT"]
+    assert service.category_cache.get_many(codes).keys() == {("Travel", None)}
+
+
+def test_failed_line_write_clears_categories_deleted_elsewhere(db):
+    codes = {("Travel", None): "TRAVEL"}
+    resolve_categories(db, None, codes)
+    # Another worker deletes the category; this process still has it cached
+    db.query(BudgetCategoryModel).filter_by(donor_template_id=None).delete()
+    db.commit()
+
+    with pytest.raises(IntegrityError), invalidating_categories_on_error():
+        raise IntegrityError("INSERT INTO budget_lines", {}, Exception("FOREIGN KEY"))
+
+    assert service.category_cache.get_many(codes) == {}
+
+
+def test_cache_entries_expire_and_are_bounded(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(service.time, "monotonic", lambda: clock[0])
+    cache = CategoryCache(ttl=10, max_entries=2)
+    a, b, c = (object() for _ in range(3))
+
+    cache.put_many({("a", None): a, ("b", None): b})
+    cache.put_many({("c", None): c})
+    assert cache.get_many([("a", None), ("b", None), ("c", None)]) == {
+        ("b", None): b,
+        ("c", None): c,
+    }
+
+    clock[0] += 10
+    assert cache.get_many([("b", None), ("c", None)]) == {}
@@ -0,0 +1,119 @@
+"""
+GET /budgets/{id}: budget, lines and categories from one query, or streamed as NDJSON.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api import budget_routes
+from app.core.config import settings
+from app.models.budget import BudgetCategoryModel, BudgetLineModel, BudgetModel
+from app.models.budget_summary import BudgetSummaryModel
+from main import app
+from tests.factories.user import make_valid_user
+
+CUSTOMER_ID = uuid4()
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _enrich(budgets, valid_user):
+    return [{"id": b.id, "name": b.name} for b in budgets]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    for model in (BudgetModel, BudgetCategoryModel, BudgetLineModel, BudgetSummaryModel):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    budget = BudgetModel(id=uuid4(), name="Water", owner_id=CUSTOMER_ID)
+    staff = BudgetCategoryModel(id=uuid4(), name="Staff", code="STAFF")
+    travel = BudgetCategoryModel(id=uuid4(), name="Travel", code="TRAVEL")
+    session.add_all([budget, staff, travel])
+    for i in range(5):
+        session.add(
+            BudgetLineModel(
+                id=uuid4(),
+                budget_id=budget.id,
+                category_id=(staff if i % 2 else travel).id,
+                description=f"line {i}",
+                amount=100.0 * i,
+                created_at=START + timedelta(days=i),
+            )
+        )
+    session.commit()
+    session.close()  # nothing loaded before the request
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(db):
+    app.dependency_overrides[budget_routes.get_db] = lambda: db
+    app.dependency_overrides[budget_routes.get_validated_user] = lambda: make_valid_user(
+        customer_id=str(CUSTOMER_ID)
+    )
+    with patch(
+        "app.services.budget_services.populate_budget_with_user_details",
+        new=AsyncMock(side_effect=_enrich),
+    ):
+        yield TestClient(app)
+    app.dependency_overrides = {}
+
+
+def _budget_id(db):
+    return db.query(BudgetModel.id).scalar()
+
+
+def test_detail_loads_budget_lines_and_categories_in_one_query(db, client):
+    budget_id = _budget_id(db)
+    db.close()
+    statements: list[str] = []
+    event.listen(
+        db.get_bind(),
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+        named=False,
+    )
+
+    response = client.get(f"/api/v1/budgets/{budget_id}")
+
+    assert response.status_code == 200
+    lines = response.json()["lines"]
+    assert [line["description"] for line in lines] == [f"line {i}" for i in range(4, -1, -1)]
+    assert [line["category"]["name"] for line in lines] == ["Travel", "Staff"] * 2 + ["Travel"]
+    assert len(statements) == 1
+
+
+def test_detail_checks_ownership_once(db, client):
+    budget_id = _budget_id(db)
+    app.dependency_overrides[budget_routes.get_validated_user] = lambda: make_valid_user(
+        customer_id=str(uuid4())
+    )
+
+    assert client.get(f"/api/v1/budgets/{budget_id}").status_code == 400
+    assert client.get(f"/api/v1/budgets/{budget_id}?stream=true").status_code == 400
+
+
+def test_stream_sends_the_budget_then_every_line_as_ndjson(db, client, monkeypatch):
+    monkeypatch.setattr(settings, "BUDGET_LINES_STREAM_BATCH", 2)
+    budget_id = _budget_id(db)
+    expected = client.get(f"/api/v1/budgets/{budget_id}").json()
+
+    response = client.get(f"/api/v1/budgets/{budget_id}", params={"stream": True})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    header, *lines = [json.loads(record) for record in response.text.splitlines()]
+    assert "lines" not in header and header["name"] == "Water"
+    assert lines == expected["lines"]
@@ -21,9 +21,6 @@ client = TestClient(app)
 
 USER_ID = str(uuid4())
 CUSTOMER_ID = str(uuid4())
-_CATEGORY_LOOKUP = (
-    "app.services.budget_category_services.get_budget_category_by_name_and_template_id"
-)
 
 
 def _mock_valid_user():
@@ -73,7 +70,7 @@ class TestPopulateBudgetGracefulDegradation:
         )
 
         with (
-            patch("app.services.budget_services.get_budget", return_value=budget),
+            patch("app.services.budget_services.get_budget_with_lines", return_value=budget),
             patch(
                 "app.services.budget_services.get_users_by_ids_cached",
                 new_callable=AsyncMock,
@@ -84,7 +81,6 @@ class TestPopulateBudgetGracefulDegradation:
                 new_callable=AsyncMock,
                 side_effect=Exception("customers service unavailable"),
             ),
-            patch("app.api.budget_routes.get_budget_lines_service", return_value=[]),
         ):
             response = client.get(f"/api/v1/budgets/{budget.id}")
 
@@ -103,7 +99,7 @@ class TestPopulateBudgetGracefulDegradation:
         )
 
         with (
-            patch("app.services.budget_services.get_budget", return_value=budget),
+            patch("app.services.budget_services.get_budget_with_lines", return_value=budget),
             patch(
                 "app.services.budget_services.get_users_by_ids_cached",
                 new_callable=AsyncMock,
@@ -114,7 +110,6 @@ class TestPopulateBudgetGracefulDegradation:
                 new_callable=AsyncMock,
                 side_effect=ConnectionError("timeout"),
             ),
-            patch("app.api.budget_routes.get_budget_lines_service", return_value=[]),
         ):
             response = client.get(f"/api/v1/budgets/{budget.id}")
 
@@ -131,7 +126,7 @@ class TestPopulateBudgetGracefulDegradation:
         )
 
         with (
-            patch("app.services.budget_services.get_budget", return_value=budget),
+            patch("app.services.budget_services.get_budget_with_lines", return_value=budget),
             patch(
                 "app.services.budget_services.get_users_by_ids_cached",
                 new_callable=AsyncMock,
@@ -142,7 +137,6 @@ class TestPopulateBudgetGracefulDegradation:
                 new_callable=AsyncMock,
                 return_value={},
             ),
-            patch("app.api.budget_routes.get_budget_lines_service", return_value=[]),
         ):
             response = client.get(f"/api/v1/budgets/{budget.id}")
 
@@ -170,7 +164,7 @@ class TestPopulateBudgetGracefulDegradation:
         }
 
         with (
-            patch("app.services.budget_services.get_budget", return_value=budget),
+            patch("app.services.budget_services.get_budget_with_lines", return_value=budget),
             patch(
                 "app.services.budget_services.get_users_by_ids_cached",
                 new_callable=AsyncMock,
@@ -181,7 +175,6 @@ class TestPopulateBudgetGracefulDegradation:
                 new_callable=AsyncMock,
                 return_value=customers_map,
             ),
-            patch("app.api.budget_routes.get_budget_lines_service", return_value=[]),
         ):
             response = client.get(f"/api/v1/budgets/{budget.id}")
 
@@ -221,17 +214,17 @@ class TestAiDraftBudgetStatus:
             updated_by=USER_ID,
         )
         line = BudgetLineFactory.build(budget_id=budget.id, created_by=USER_ID)
+        line.category_id = line.category.id
 
         with (
             patch("app.services.budget_services.create_budget", return_value=budget) as mock_create,
-            patch("app.services.budget_line_services.get_budget", return_value=budget),
             patch(
-                _CATEGORY_LOOKUP,
-                return_value=line.category,
+                "app.services.budget_services.get_or_create_categories_service",
+                return_value={"Personnel": line.category},
             ),
             patch(
-                "app.services.budget_line_services.create_budget_line",
-                return_value=line,
+                "app.services.budget_services.bulk_create_budget_lines",
+                return_value=[line],
             ),
             patch(
                 "app.services.budget_services.get_budget_service",
@@ -0,0 +1,245 @@
+"""
+The budget_summaries read model: kept in step with line writes, rebuildable,
+and served by the budget endpoints without reading lines.
+"""
+
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api import budget_routes
+from app.crud.budget_category_crud import delete_budget_category
+from app.crud.budget_line_crud import (
+    bulk_create_budget_lines,
+    create_budget_line,
+    delete_budget_line,
+    update_budget_line,
+)
+from app.crud.budget_summary_crud import rebuild_budget_summaries
+from app.models.budget import BudgetCategoryModel, BudgetLineModel, BudgetModel
+from app.models.budget_summary import BudgetSummaryModel
+from app.schemas import BudgetLineUpdate
+from app.services.budget_services import get_budget_totals
+from main import app
+from scripts import rebuild_budget_summaries as rebuild_script
+from tests.factories.user import make_valid_user
+
+CUSTOMER_ID = uuid4()
+STAFF, TRAVEL = uuid4(), uuid4()
+TABLES = (BudgetModel, BudgetCategoryModel, BudgetLineModel, BudgetSummaryModel)
+
+
+def _session(url="sqlite://", **kwargs):
+    engine = create_engine(url, **kwargs)
+    for model in TABLES:
+        model.__table__.create(engine)
+    return sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+
+
+@pytest.fixture
+def db():
+    session = _session(connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    session.add(BudgetModel(id=uuid4(), name="Water", owner_id=CUSTOMER_ID))
+    session.commit()
+    yield session
+    session.close()
+
+
+def _budget(db):
+    return db.query(BudgetModel).one()
+
+
+def _totals(db, budget_id):
+    totals = get_budget_totals(db, [budget_id])[budget_id]
+    by_category = {c.category_id: (c.total_amount, c.line_count) for c in totals.categories}
+    return totals.total_amount, totals.line_count, by_category
+
+
+def test_line_writes_keep_totals_in_step(db):
+    budget_id = _budget(db).id
+    staff = create_budget_line(db, None, budget_id, STAFF, "Manager", 1000.0)
+    bulk_create_budget_lines(
+        db,
+        None,
+        budget_id,
+        [
+            {"category_id": STAFF, "description": "Officer", "amount": 500.0},
+            {"category_id": TRAVEL, "description": "Flights", "amount": 250.0},
+            {"category_id": None, "description": "Misc", "amount": None},
+        ],
+    )
+    db.commit()
+    assert _totals(db, budget_id) == (
+        1750.0,
+        4,
+        {STAFF: (1500.0, 2), TRAVEL: (250.0, 1), None: (0.0, 1)},
+    )
+
+    update_budget_line(db, staff, BudgetLineUpdate(budget_id=budget_id, amount=1200.0))
+    flights = db.query(BudgetLineModel).filter_by(description="Flights").one()
+    delete_budget_line(db, flights)
+
+    assert _totals(db, budget_id) == (1700.0, 3, {STAFF: (1700.0, 2), None: (0.0, 1)})
+
+
+def test_summaries_roll_back_with_the_lines(db):
+    budget_id = _budget(db).id
+    bulk_create_budget_lines(
+        db, None, budget_id, [{"category_id": STAFF, "description": "x", "amount": 10.0}]
+    )
+    db.rollback()
+
+    assert _totals(db, budget_id) == (0.0, 0, {})
+    assert db.query(BudgetSummaryModel).count() == 0
+
+
+def test_rebuild_matches_incremental_totals(db):
+    budget_id = _budget(db).id
+    for amount in (100.0, 200.0):
+        create_budget_line(db, None, budget_id, STAFF, "Line", amount)
+    incremental = _totals(db, budget_id)
+    db.query(BudgetSummaryModel).delete()
+    db.commit()
+
+    assert rebuild_budget_summaries(db, [budget_id]) == 1
+    db.commit()
+    assert _totals(db, budget_id) == incremental == (300.0, 2, {STAFF: (300.0, 2)})
+
+
+def test_incremental_summaries_match_a_rebuild_after_mixed_writes(db):
+    budget_id = _budget(db).id
+    staff = create_budget_line(db, None, budget_id, STAFF, "Manager", 1000.0)
+    created = bulk_create_budget_lines(
+        db,
+        None,
+        budget_id,
+        [
+            {"category_id": TRAVEL, "description": "Flights", "amount": 250.0},
+            {"category_id": TRAVEL, "description": "Hotel", "amount": 120.0},
+            {"category_id": None, "description": "Misc", "amount": None},
+        ],
+    )
+    db.commit()
+    flights, hotel, misc = (db.get(BudgetLineModel, line.id) for line in created)
+    update_budget_line(db, staff, BudgetLineUpdate(budget_id=budget_id, amount=900.0))
+    update_budget_line(db, misc, BudgetLineUpdate(budget_id=budget_id, amount=40.0))
+    delete_budget_line(db, hotel)
+    update_budget_line(db, flights, BudgetLineUpdate(budget_id=budget_id, amount=300.0))
+    create_budget_line(db, None, budget_id, STAFF, "Officer", 500.0)
+    delete_budget_line(db, staff)
+    incremental = _totals(db, budget_id)
+
+    rebuild_budget_summaries(db, [budget_id])
+    db.commit()
+
+    assert (
+        _totals(db, budget_id)
+        == incremental
+        == (
+            840.0,
+            3,
+            {STAFF: (500.0, 1), TRAVEL: (300.0, 1), None: (40.0, 1)},
+        )
+    )
+
+
+def test_deleted_category_totals_move_with_its_lines(db):
+    budget_id = _budget(db).id
+    db.add(BudgetCategoryModel(id=TRAVEL, name="Travel", code="TRAVEL"))
+    create_budget_line(db, None, budget_id, TRAVEL, "Flights", 250.0)
+    hotel = create_budget_line(db, None, budget_id, TRAVEL, "Hotel", 120.0)
+    create_budget_line(db, None, budget_id, None, "Misc", 40.0)
+
+    assert delete_budget_category(db, TRAVEL)
+    assert _totals(db, budget_id) == (410.0, 3, {None: (410.0, 3)})
+
+    delete_budget_line(db, db.get(BudgetLineModel, hotel.id))
+    incremental = _totals(db, budget_id)
+    rebuild_budget_summaries(db, [budget_id])
+    db.commit()
+
+    assert _totals(db, budget_id) == incremental == (290.0, 2, {None: (290.0, 2)})
+
+
+def test_update_takes_its_delta_from_the_stored_amount(tmp_path):
+    url = f"sqlite:///{tmp_path / 'budget.db'}"
+    first = _session(url)
+    budget_id = uuid4()
+    first.add(BudgetModel(id=budget_id, name="Water", owner_id=CUSTOMER_ID))
+    first.commit()
+    line = create_budget_line(first, None, budget_id, STAFF, "Manager", 100.0)
+    second = sessionmaker(bind=first.get_bind())()
+    # Another request changed the amount after `line` was loaded
+    update_budget_line(
+        second,
+        second.get(BudgetLineModel, line.id),
+        BudgetLineUpdate(budget_id=budget_id, amount=150.0),
+    )
+
+    update_budget_line(first, line, BudgetLineUpdate(budget_id=budget_id, amount=200.0))
+
+    assert _totals(first, budget_id) == (200.0, 1, {STAFF: (200.0, 1)})
+    second.close()
+    first.close()
+
+
+def test_rebuild_command_backfills_every_budget(tmp_path, capsys):
+    url = f"sqlite:///{tmp_path / 'budget.db'}"
+    db = _session(url)
+    budget_ids = [uuid4(), uuid4(), uuid4()]
+    for budget_id in budget_ids:
+        db.add(BudgetModel(id=budget_id, name="b", owner_id=CUSTOMER_ID))
+        db.add(BudgetLineModel(id=uuid4(), budget_id=budget_id, description="x", amount=5.0))
+    db.commit()
+
+    assert rebuild_script.main(["--database-url", url, "--batch-size", "2"]) == 0
+
+    assert "3 summary rows" in capsys.readouterr().out
+    assert {t.total_amount for t in get_budget_totals(db, budget_ids).values()} == {5.0}
+    db.close()
+
+
+def test_endpoints_return_totals_without_reading_lines(db):
+    budget = _budget(db)
+    create_budget_line(db, None, budget.id, STAFF, "Manager", 1000.0)
+    statements: list[str] = []
+    event.listen(
+        db.get_bind(),
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+        named=False,
+    )
+    app.dependency_overrides[budget_routes.get_db] = lambda: db
+    app.dependency_overrides[budget_routes.get_validated_user] = lambda: make_valid_user(
+        customer_id=str(CUSTOMER_ID)
+    )
+    client = TestClient(app)
+    try:
+        with patch(
+            "app.services.budget_services.populate_budget_with_user_details",
+            new=AsyncMock(
+                side_effect=lambda budgets, valid_user: [
+                    {"id": b.id, "name": b.name} for b in budgets
+                ]
+            ),
+        ):
+            detail = client.get(
+                f"/api/v1/budgets/{budget.id}",
+                params={"include_lines": False, "include_totals": True},
+            ).json()
+            listing = client.get("/api/v1/budgets/", params={"include_totals": True}).json()
+    finally:
+        app.dependency_overrides = {}
+
+    assert detail["lines"] == []
+    assert detail["totals"]["total_amount"] == 1000.0
+    assert detail["totals"]["categories"] == [
+        {"category_id": str(STAFF), "total_amount": 1000.0, "line_count": 1}
+    ]
+    assert listing[0]["totals"]["line_count"] == 1
+    assert not any("FROM budget_lines" in s for s in statements)
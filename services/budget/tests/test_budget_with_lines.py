@@ -1,13 +1,19 @@
 import pytest
 from typing import Any
-from unittest.mock import patch, MagicMock, AsyncMock
+from unittest.mock import patch, AsyncMock
 from fastapi.testclient import TestClient
-from uuid import uuid4
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from uuid import UUID, uuid4
 
 from main import app
-from app.api.budget_routes import get_validated_user
+from app.api.budget_routes import get_db, get_validated_user
+from app.models.budget import BudgetCategoryModel, BudgetLineModel, BudgetModel
+from app.models.budget_summary import BudgetSummaryModel
+from app.schemas.budget_schema import BudgetStatus
+from app.services.budget_category_services import category_cache
 from tests.factories.user import make_valid_user
-from tests.factories.budget import BudgetLineFactory, BudgetCategoryFactory
 
 client = TestClient(app)
 
@@ -28,49 +34,11 @@ VALID_PAYLOAD: dict[str, Any] = {
     ],
 }
 
-_CATEGORY_LOOKUP = (
-    "app.services.budget_category_services" ".get_budget_category_by_name_and_template_id"
-)
-
 
 def _mock_valid_user():
     return make_valid_user(user_id=USER_ID, customer_id=CUSTOMER_ID)
 
 
-def _mock_budget(budget_id=None):
-    m = MagicMock()
-    m.id = budget_id or BUDGET_ID
-    m.name = "Youth Program 2025"
-    m.owner_id = CUSTOMER_ID
-    m.external_funder_name = "Smith Foundation"
-    m.duration_months = 12
-    m.funding_customer_id = None
-    m.created_by = USER_ID
-    m.updated_by = USER_ID
-    m.created_at = None
-    m.updated_at = None
-    m.status = "draft"
-    m.local_currency = "GBP"
-    return m
-
-
-def _mock_line(line_id, category_name="Personnel"):
-    return BudgetLineFactory.build(
-        id=line_id,
-        budget_id=BUDGET_ID,
-        category_id=CATEGORY_ID,
-        description="test",
-        amount=1000.0,
-        category=BudgetCategoryFactory.build(
-            id=CATEGORY_ID, name=category_name, code=category_name.upper()
-        ),
-    )
-
-
-def _mock_category(name="Personnel"):
-    return BudgetCategoryFactory.build(id=CATEGORY_ID, name=name, code=name.upper())
-
-
 def _mock_enriched_budget(lines=None) -> dict:
     return {
         "id": BUDGET_ID,
@@ -85,6 +53,25 @@ def _mock_enriched_budget(lines=None) -> dict:
     }
 
 
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    for model in (BudgetModel, BudgetCategoryModel, BudgetLineModel, BudgetSummaryModel):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    statements: list[str] = []
+    event.listen(
+        engine, "before_cursor_execute", lambda *args: statements.append(args[2]), named=False
+    )
+    session.info["statements"] = statements
+    app.dependency_overrides[get_db] = lambda: session
+    category_cache.invalidate()
+    yield session
+    session.close()
+
+
 @pytest.fixture(autouse=True)
 def override_auth():
     app.dependency_overrides[get_validated_user] = _mock_valid_user
@@ -92,45 +79,62 @@ def override_auth():
     app.dependency_overrides = {}
 
 
+@pytest.fixture
+def enriched():
+    with patch(
+        "app.services.budget_services.get_budget_service",
+        new_callable=AsyncMock,
+        return_value=_mock_enriched_budget(),
+    ) as mock_get:
+        yield mock_get
+
+
 class TestCreateBudgetWithLinesEndpoint:
-    def test_creates_budget_and_all_lines(self):
-        mock_budget = _mock_budget()
-        mock_lines = [_mock_line(LINE_ID_1, "Personnel"), _mock_line(LINE_ID_2, "Supplies")]
-
-        with (
-            patch("app.services.budget_services.create_budget", return_value=mock_budget),
-            patch("app.services.budget_line_services.get_budget", return_value=mock_budget),
-            patch(_CATEGORY_LOOKUP, return_value=_mock_category()),
-            patch("app.services.budget_line_services.create_budget_line", side_effect=mock_lines),
-            patch(
-                "app.services.budget_services.get_budget_service",
-                new_callable=AsyncMock,
-                return_value=_mock_enriched_budget(mock_lines),
-            ),
-        ):
-            response = client.post("/api/v1/budgets/with-lines", json=VALID_PAYLOAD)
+    def test_creates_budget_and_all_lines(self, db, enriched):
+        response = client.post("/api/v1/budgets/with-lines", json=VALID_PAYLOAD)
 
         assert response.status_code == 200
         data = response.json()
         assert data["name"] == "Youth Program 2025"
-        assert len(data["lines"]) == 2
+        assert [(ln["description"], ln["category"]["name"]) for ln in data["lines"]] == [
+            ("2 FTE staff", "Personnel"),
+            ("Program supplies", "Supplies"),
+        ]
+        budget = db.query(BudgetModel).one()
+        assert budget.status == BudgetStatus.ai_draft
+        assert budget.owner_id == UUID(CUSTOMER_ID)
+        assert db.query(BudgetLineModel).filter_by(budget_id=budget.id).count() == 2
+
+    def test_lines_and_categories_are_written_in_bulk(self, db, enriched):
+        db.add(BudgetCategoryModel(id=uuid4(), name="Personnel", code="PERSONNEL"))
+        db.commit()
+        lines = [
+            {"category_name": name, "description": f"Line {i}", "amount": 10.0 * i}
+            for i, name in enumerate(["Personnel", "Supplies", "Travel"] * 20)
+        ]
+        db.info["statements"].clear()
+
+        response = client.post("/api/v1/budgets/with-lines", json={**VALID_PAYLOAD, "lines": lines})
 
-    def test_returns_full_budget_with_enriched_details(self):
-        mock_budget = _mock_budget()
-        mock_line = _mock_line(LINE_ID_1)
+        assert response.status_code == 200
+        assert len(response.json()["lines"]) == 60
+        inserts = [s for s in db.info["statements"] if s.startswith("INSERT")]
+        assert [s.split()[2] for s in inserts] == [
+            "budgets",
+            "budget_categories",
+            "budget_lines",
+            "budget_summaries",
+        ]
+        assert sorted(c.code for c in db.query(BudgetCategoryModel)) == [
+            "PERSONNEL",
+            "SUPPLIES",
+            "TRAVEL",
+        ]
+
+    def test_returns_full_budget_with_enriched_details(self, db, enriched):
         payload = {**VALID_PAYLOAD, "lines": [VALID_PAYLOAD["lines"][0]]}
-        with (
-            patch("app.services.budget_services.create_budget", return_value=mock_budget),
-            patch("app.services.budget_line_services.get_budget", return_value=mock_budget),
-            patch(_CATEGORY_LOOKUP, return_value=_mock_category()),
-            patch("app.services.budget_line_services.create_budget_line", return_value=mock_line),
-            patch(
-                "app.services.budget_services.get_budget_service",
-                new_callable=AsyncMock,
-                return_value=_mock_enriched_budget([mock_line]),
-            ),
-        ):
-            response = client.post("/api/v1/budgets/with-lines", json=payload)
+
+        response = client.post("/api/v1/budgets/with-lines", json=payload)
 
         assert response.status_code == 200
         data = response.json()
@@ -138,6 +142,7 @@ class TestCreateBudgetWithLinesEndpoint:
         assert "owner" in data
         assert "funder" in data
         assert data["funder"]["name"] == "Smith Foundation"
+        assert enriched.call_args.args[0] == db.query(BudgetModel.id).scalar()
 
     def test_requires_authentication(self):
         app.dependency_overrides = {}
@@ -145,76 +150,36 @@ class TestCreateBudgetWithLinesEndpoint:
         assert response.status_code == 401
         app.dependency_overrides[get_validated_user] = _mock_valid_user
 
-    def test_rolls_back_on_second_line_failure(self):
-        """If the second line fails, the first line and budget are cleaned up."""
-        mock_budget = _mock_budget()
-        first_line = _mock_line(LINE_ID_1)
-        call_count = {"n": 0}
-
-        def line_side_effect(*args, **kwargs):
-            call_count["n"] += 1
-            if call_count["n"] == 1:
-                return first_line
-            raise Exception("DB error on second line")
-
-        with (
-            patch("app.services.budget_services.create_budget", return_value=mock_budget),
-            patch("app.services.budget_line_services.get_budget", return_value=mock_budget),
-            patch(_CATEGORY_LOOKUP, return_value=_mock_category()),
-            patch(
-                "app.services.budget_line_services.create_budget_line", side_effect=line_side_effect
-            ),
-            patch("app.services.budget_services.delete_budget_line") as mock_delete_line,
-            patch("app.services.budget_services.delete_budget") as mock_delete_budget,
+    def test_rolls_back_everything_when_lines_fail(self, db, enriched):
+        with patch(
+            "app.services.budget_services.bulk_create_budget_lines",
+            side_effect=Exception("DB error"),
         ):
             response = client.post("/api/v1/budgets/with-lines", json=VALID_PAYLOAD)
 
         assert response.status_code == 500
-        mock_delete_line.assert_called_once()
-        mock_delete_budget.assert_called_once()
-
-    def test_rolls_back_budget_if_first_line_fails(self):
-        """If the very first line fails, no lines to clean up — only budget is deleted."""
-        mock_budget = _mock_budget()
-
-        with (
-            patch("app.services.budget_services.create_budget", return_value=mock_budget),
-            patch("app.services.budget_line_services.get_budget", return_value=mock_budget),
-            patch(_CATEGORY_LOOKUP, return_value=_mock_category()),
-            patch(
-                "app.services.budget_line_services.create_budget_line",
-                side_effect=Exception("DB error"),
-            ),
-            patch("app.services.budget_services.delete_budget_line") as mock_delete_line,
-            patch("app.services.budget_services.delete_budget") as mock_delete_budget,
+        assert db.query(BudgetModel).count() == 0
+        assert db.query(BudgetCategoryModel).count() == 0
+        enriched.assert_not_called()
+
+    def test_rolls_back_budget_if_categories_fail(self, db, enriched):
+        with patch(
+            "app.services.budget_services.get_or_create_categories_service",
+            side_effect=Exception("DB error"),
         ):
             response = client.post("/api/v1/budgets/with-lines", json=VALID_PAYLOAD)
 
         assert response.status_code == 500
-        mock_delete_line.assert_not_called()
-        mock_delete_budget.assert_called_once()
+        assert db.query(BudgetModel).count() == 0
 
-    def test_duration_months_is_optional(self):
+    def test_duration_months_is_optional(self, db, enriched):
         payload = {
             "budget_name": "Simple Budget",
             "external_funder_name": "Donor Corp",
             "lines": [{"category_name": "Travel", "description": "Transport", "amount": 2000.0}],
         }
-        mock_budget = _mock_budget()
-        mock_line = _mock_line(LINE_ID_1, "Travel")
-
-        with (
-            patch("app.services.budget_services.create_budget", return_value=mock_budget),
-            patch("app.services.budget_line_services.get_budget", return_value=mock_budget),
-            patch(_CATEGORY_LOOKUP, return_value=_mock_category("Travel")),
-            patch("app.services.budget_line_services.create_budget_line", return_value=mock_line),
-            patch(
-                "app.services.budget_services.get_budget_service",
-                new_callable=AsyncMock,
-                return_value=_mock_enriched_budget([mock_line]),
-            ),
-        ):
-            response = client.post("/api/v1/budgets/with-lines", json=payload)
+
+        response = client.post("/api/v1/budgets/with-lines", json=payload)
 
         assert response.status_code == 200
 
@@ -0,0 +1,211 @@
+"""
+Tests for the content-addressed template detection cache.
+"""
+
+import itertools
+import types
+
+import pytest
+from openpyxl import Workbook
+
+from app.services.template_detection import detection_cache as module
+from app.services.template_detection.detection_cache import (
+    LRU_KEY,
+    POSSIBLE_FIELDS,
+    STRUCTURE,
+    VERSION_KEY,
+    DetectionCache,
+    file_digest,
+)
+
+
+class FakeRedis:
+    """In-memory stand-in for the handful of commands the cache uses (bytes out)."""
+
+    def __init__(self):
+        self.store: dict[str, bytes] = {}
+        self.zset: dict[str, float] = {}
+        self.round_trips = 0
+
+    def get(self, key):
+        self.round_trips += 1
+        return self.store.get(key)
+
+    def set(self, key, value):
+        self.round_trips += 1
+        self.store[key] = value.encode() if isinstance(value, str) else value
+
+    def zrange(self, key, start, end):
+        self.round_trips += 1
+        members = sorted(self.zset, key=lambda m: (self.zset[m], m))
+        end = len(members) if end == -1 else end + 1
+        return [m.encode() for m in members[start:end]]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.results = []
+
+    def get(self, key):
+        self.results.append(self.client.store.get(key))
+
+    def set(self, key, value):
+        self.client.store[key] = value.encode()
+        self.results.append(True)
+
+    def zadd(self, key, mapping, xx=False):
+        for member, score in mapping.items():
+            if not xx or member in self.client.zset:
+                self.client.zset[member] = score
+        self.results.append(len(mapping))
+
+    def zcard(self, key):
+        self.results.append(len(self.client.zset))
+
+    def delete(self, *keys):
+        for k in keys:
+            self.client.store.pop(k.decode() if isinstance(k, bytes) else k, None)
+        self.results.append(len(keys))
+
+    def zrem(self, key, *members):
+        for m in members:
+            self.client.zset.pop(m.decode() if isinstance(m, bytes) else m, None)
+        self.results.append(len(members))
+
+    def execute(self):
+        self.client.round_trips += 1
+        return self.results
+
+
+class BrokenRedis:
+    def get(self, key):
+        raise ConnectionError("down")
+
+    def pipeline(self, transaction=True):
+        raise ConnectionError("down")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(module, "time", types.SimpleNamespace(time=lambda: next(ticks)))
+
+
+@pytest.fixture
+def client(clock):
+    return FakeRedis()
+
+
+def test_repeat_lookups_skip_compute(client):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"version": 1, "sheets": []}
+
+    cache = DetectionCache(client)
+    assert cache.get_or_compute("abc", STRUCTURE, compute) == {"version": 1, "sheets": []}
+    trips = client.round_trips
+    assert cache.get_or_compute("abc", STRUCTURE, compute) == {"version": 1, "sheets": []}
+    assert client.round_trips == trips  # served in-process
+
+    # Another process shares the Redis entry
+    other = DetectionCache(client)
+    assert other.get_or_compute("abc", STRUCTURE, compute) == {"version": 1, "sheets": []}
+    assert len(calls) == 1
+
+
+def test_hits_return_fresh_objects(client):
+    cache = DetectionCache(client)
+    cache.set("abc", POSSIBLE_FIELDS, ["Staff", "Travel"])
+
+    cache.get("abc", POSSIBLE_FIELDS).append("mutated")
+
+    assert cache.get("abc", POSSIBLE_FIELDS) == ["Staff", "Travel"]
+
+
+def test_least_recently_used_entries_are_evicted(client):
+    cache = DetectionCache(client, max_entries=2, local_size=0)
+    cache.set("a", STRUCTURE, 1)
+    cache.set("b", STRUCTURE, 2)
+    assert cache.get("a", STRUCTURE) == 1  # "b" is now the oldest
+
+    cache.set("c", STRUCTURE, 3)
+
+    assert cache.get("b", STRUCTURE) is None
+    assert cache.get("a", STRUCTURE) == 1 and cache.get("c", STRUCTURE) == 3
+    assert len(client.zset) == 2
+
+
+def test_detector_version_change_purges_old_entries(client):
+    old = DetectionCache(client, version="1")
+    old.set("abc", STRUCTURE, {"version": 1})
+    old.set("def", POSSIBLE_FIELDS, ["Staff"])
+
+    new = DetectionCache(client, version="2")
+    assert new.get("abc", STRUCTURE) is None
+
+    assert client.store[VERSION_KEY] == b"2"
+    assert not [k for k in client.store if k.startswith("tpl-detect:1:")]
+    assert not client.zset
+
+
+def test_invalidate_one_file_or_everything(client):
+    cache = DetectionCache(client)
+    cache.set("abc", STRUCTURE, 1)
+    cache.set("abc", POSSIBLE_FIELDS, ["x"])
+    cache.set("def", STRUCTURE, 2)
+
+    cache.invalidate("abc")
+    assert cache.get("abc", STRUCTURE) is None and cache.get("abc", POSSIBLE_FIELDS) is None
+    assert cache.get("def", STRUCTURE) == 2
+
+    cache.invalidate()
+    assert cache.get("def", STRUCTURE) is None
+    assert LRU_KEY not in client.store and not client.zset
+
+
+def test_redis_errors_fall_back_to_local_cache():
+    cache = DetectionCache(BrokenRedis())
+
+    assert cache.get_or_compute("abc", STRUCTURE, lambda: {"sheets": []}) == {"sheets": []}
+    assert cache.get("abc", STRUCTURE) == {"sheets": []}
+
+
+def test_cached_possible_fields_skip_the_workbook(tmp_path, monkeypatch):
+    wb = Workbook()
+    wb.active.append(["Category", "Total"])
+    wb.active.append(["Staff costs", 1200])
+    path = tmp_path / "donor.xlsx"
+    wb.save(path)
+    monkeypatch.setattr(module, "detection_cache", DetectionCache(None))
+
+    assert module.cached_possible_fields(str(path)) == ["Category", "Total", "Staff costs"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("workbook opened for a cached file")
+
+    monkeypatch.setattr(module, "ExcelStructureDetector", fail)
+    assert module.cached_possible_fields(str(path)) == ["Category", "Total", "Staff costs"]
+    assert file_digest(str(path)) == file_digest(path.read_bytes())
+
+
+def test_timed_out_structures_are_not_cached(tmp_path, monkeypatch):
+    wb = Workbook()
+    wb.active.append(["Category", "Total"])
+    wb.active.append(["Staff costs", 1200])
+    path = str(tmp_path / "donor.xlsx")
+    wb.save(path)
+    monkeypatch.setattr(module, "detection_cache", DetectionCache(None))
+    monkeypatch.setattr(module.settings, "DETECTION_MAX_WORKERS", 1)
+
+    monkeypatch.setattr(module.settings, "DETECTION_SHEET_TIMEOUT", 0)
+    partial = module.cached_excel_structure(path)
+    assert partial["sheets"] == [] and partial["timed_out_sheets"] == ["Sheet"]
+
+    monkeypatch.setattr(module.settings, "DETECTION_SHEET_TIMEOUT", None)
+    assert len(module.cached_excel_structure(path)["sheets"]) == 1
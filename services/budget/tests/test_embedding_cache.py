@@ -0,0 +1,92 @@
+"""
+Tests for the batched binary embedding cache.
+"""
+
+import numpy as np
+import pytest
+
+from app.services.embedding_cache import EmbeddingCache
+
+
+class FakeRedis:
+    """Minimal in-memory client recording round trips."""
+
+    def __init__(self):
+        self.store: dict[str, bytes] = {}
+        self.round_trips = 0
+
+    def mget(self, keys):
+        self.round_trips += 1
+        return [self.store.get(k) for k in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def setex(self, key, ttl, value):
+        self.commands.append((key, value))
+
+    def execute(self):
+        self.client.round_trips += 1
+        self.client.store.update(self.commands)
+
+
+class BrokenRedis:
+    def mget(self, keys):
+        raise ConnectionError("down")
+
+    def pipeline(self, transaction=True):
+        raise ConnectionError("down")
+
+
+@pytest.fixture
+def client():
+    return FakeRedis()
+
+
+def test_round_trip_is_batched_and_binary(client):
+    cache = EmbeddingCache(client, "model", "1")
+    vectors = {f"text {i}": np.random.rand(384).astype(np.float32) for i in range(10)}
+
+    cache.set_many(vectors)
+    hits = cache.get_many(list(vectors) + ["missing"])
+
+    assert client.round_trips == 2
+    assert all(len(raw) == 384 * 4 for raw in client.store.values())
+    for vec, expected in zip(hits, vectors.values()):
+        np.testing.assert_array_equal(vec, expected)
+    assert hits[-1] is None
+
+
+def test_keys_normalise_text_and_include_model(client):
+    cache = EmbeddingCache(client, "model", "1")
+    assert cache.key("Staff  Salaries ") == cache.key("staff salaries")
+    assert cache.key("staff") != EmbeddingCache(client, "model", "2").key("staff")
+    assert cache.key("staff") != EmbeddingCache(client, "other", "1").key("staff")
+
+
+def test_float16_storage_decodes_to_float32(client):
+    cache = EmbeddingCache(client, "model", "1", dtype="float16")
+    cache.set_many({"travel": np.array([0.5, -0.25, 1.0], dtype=np.float32)})
+
+    (vec,) = cache.get_many(["travel"])
+    assert vec.dtype == np.float32
+    np.testing.assert_allclose(vec, [0.5, -0.25, 1.0])
+    assert all(len(raw) == 3 * 2 for raw in client.store.values())
+
+
+def test_redis_errors_are_misses():
+    cache = EmbeddingCache(BrokenRedis(), "model", "1")
+    cache.set_many({"travel": np.ones(3, dtype=np.float32)})
+    assert cache.get_many(["travel", "rent"]) == [None, None]
+
+
+def test_no_client_is_a_noop():
+    cache = EmbeddingCache(None, "model", "1")
+    cache.set_many({"travel": np.ones(3)})
+    assert cache.get_many(["travel"]) == [None]
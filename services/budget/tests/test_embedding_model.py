@@ -0,0 +1,63 @@
+"""
+Tests for the process-wide embedding model manager.
+"""
+
+import sys
+import threading
+import types
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.services.embedding_model import BATCH_SIZE, EmbeddingModelManager
+
+
+@pytest.fixture
+def fake_sentence_transformers():
+    constructor = MagicMock()
+    constructor.return_value.encode.side_effect = lambda texts: np.ones((len(texts), 4))
+    module = types.SimpleNamespace(SentenceTransformer=constructor)
+    with patch.dict(sys.modules, {"sentence_transformers": module}):
+        yield constructor
+
+
+def test_model_is_loaded_lazily_and_once(fake_sentence_transformers):
+    manager = EmbeddingModelManager("test-model")
+    assert fake_sentence_transformers.call_count == 0
+
+    threads = [threading.Thread(target=manager.get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    manager.encode(["a", "b"])
+
+    fake_sentence_transformers.assert_called_once_with("test-model")
+    assert manager.stats()["loaded"] is True
+    assert manager.stats()["load_seconds"] is not None
+
+
+def test_encode_returns_float32_matrix_and_records_batch_size(fake_sentence_transformers):
+    manager = EmbeddingModelManager("batch-model")
+    vectors = manager.encode(["a", "b", "c"])
+
+    assert vectors.shape == (3, 4)
+    assert vectors.dtype == np.float32
+    assert BATCH_SIZE.labels("batch-model")._sum.get() == 3
+
+
+def test_missing_library_marks_model_unavailable():
+    manager = EmbeddingModelManager("missing-model")
+    with patch.dict(sys.modules, {"sentence_transformers": None}):
+        assert manager.available is False
+        assert manager.warmup() is False
+    assert manager.stats()["load_attempted"] is True
+    with pytest.raises(RuntimeError):
+        manager.encode(["a"])
+
+
+def test_warmup_runs_one_encode(fake_sentence_transformers):
+    manager = EmbeddingModelManager("warm-model")
+    assert manager.warmup() is True
+    fake_sentence_transformers.return_value.encode.assert_called_once_with(["warmup"])
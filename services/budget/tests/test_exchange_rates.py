@@ -0,0 +1,150 @@
+"""
+Tests for converting budget line amounts through cached exchange-rate tables.
+"""
+
+from datetime import date, datetime
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from main import app
+from app.api.budget_routes import get_validated_user
+from app.services import exchange_rate_services
+from tests.factories.user import make_valid_user
+from tests.factories.budget import BudgetFactory
+from app.crud.exchange_rate_crud import exchange_rates_version
+from app.models.exchange_rate import ExchangeRateModel
+from scripts import import_exchange_rates
+
+client = TestClient(app)
+
+USER_ID = str(uuid4())
+CUSTOMER_ID = str(uuid4())
+RATES = [
+    ExchangeRateModel(
+        rate_date=date(2025, 1, 3), base_currency="EUR", quote_currency="GBP", rate=0.8
+    ),
+    ExchangeRateModel(
+        rate_date=date(2025, 1, 3), base_currency="EUR", quote_currency="USD", rate=1.25
+    ),
+]
+_RATE_QUERY = "app.services.exchange_rate_services.get_exchange_rates_on_or_before"
+_VERSION_QUERY = "app.services.exchange_rate_services.exchange_rates_version"
+
+
+def _mock_valid_user():
+    return make_valid_user(user_id=USER_ID, customer_id=CUSTOMER_ID)
+
+
+@pytest.fixture(autouse=True)
+def override_auth():
+    app.dependency_overrides[get_validated_user] = _mock_valid_user
+    exchange_rate_services.rate_tables.invalidate()
+    with patch(_VERSION_QUERY, return_value=None):
+        yield
+    app.dependency_overrides = {}
+    exchange_rate_services.rate_tables.invalidate()
+
+
+class TestConvertBudgetLines:
+    def test_converts_all_lines_in_one_pass(self):
+        budget = BudgetFactory.build(owner_id=CUSTOMER_ID, local_currency="GBP")
+        line_ids = [uuid4(), uuid4(), uuid4()]
+        amounts = [(line_ids[0], 80.0), (line_ids[1], None), (line_ids[2], 8.0)]
+
+        with (
+            patch("app.services.exchange_rate_services.get_budget", return_value=budget),
+            patch(
+                "app.services.exchange_rate_services.list_budget_line_amounts",
+                return_value=amounts,
+            ),
+            patch(_RATE_QUERY, return_value=RATES),
+        ):
+            response = client.get(f"/api/v1/budgets/{budget.id}/converted?currency=usd")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["to_currency"] == "USD"
+        assert data["rate_date"] == "2025-01-03"
+        assert [line["converted_amount"] for line in data["lines"]] == [125.0, None, 12.5]
+        assert data["total"] == pytest.approx(137.5)
+
+    def test_rate_tables_are_cached(self):
+        budget = BudgetFactory.build(owner_id=CUSTOMER_ID, local_currency="GBP")
+
+        with (
+            patch("app.services.exchange_rate_services.get_budget", return_value=budget),
+            patch("app.services.exchange_rate_services.list_budget_line_amounts", return_value=[]),
+            patch(_RATE_QUERY, return_value=RATES) as mock_load,
+        ):
+            for _ in range(3):
+                client.get(
+                    f"/api/v1/budgets/{budget.id}/converted?currency=USD&rate_date=2025-01-03"
+                )
+
+        assert mock_load.call_count == 1
+
+    def test_unknown_currency_is_rejected(self):
+        response = client.get(f"/api/v1/budgets/{uuid4()}/converted?currency=ZZZ")
+        assert response.status_code == 422
+
+    def test_budget_without_local_currency_is_rejected(self):
+        budget = BudgetFactory.build(owner_id=CUSTOMER_ID, local_currency=None)
+
+        with (
+            patch("app.services.exchange_rate_services.get_budget", return_value=budget),
+            patch("app.services.exchange_rate_services.list_budget_line_amounts") as lines,
+        ):
+            response = client.get(f"/api/v1/budgets/{budget.id}/converted?currency=USD")
+
+        assert response.status_code == 422
+        assert response.json()["detail"] == "Budget has no local currency"
+        lines.assert_not_called()
+
+    def test_missing_rate_returns_404(self):
+        budget = BudgetFactory.build(owner_id=CUSTOMER_ID, local_currency="GBP")
+
+        with (
+            patch("app.services.exchange_rate_services.get_budget", return_value=budget),
+            patch("app.services.exchange_rate_services.list_budget_line_amounts", return_value=[]),
+            patch(_RATE_QUERY, return_value=RATES),
+        ):
+            response = client.get(f"/api/v1/budgets/{budget.id}/converted?currency=JPY")
+
+        assert response.status_code == 404
+
+
+def test_import_command_loads_rates_that_every_process_sees(tmp_path, capsys):
+    url = f"sqlite:///{tmp_path / 'budget.db'}"
+    engine = create_engine(url)
+    ExchangeRateModel.__table__.create(engine)
+    db = sessionmaker(bind=engine)()
+    xml = tmp_path / "eurofxref-daily.xml"
+    xml.write_text(
+        '<Envelope><Cube><Cube time="2025-01-03">'
+        '<Cube currency="USD" rate="1.25"/><Cube currency="GBP" rate="0.8"/>'
+        "</Cube></Cube></Envelope>"
+    )
+    csv = tmp_path / "rates.csv"
+    csv.write_text("date,base_currency,quote_currency,rate\n2025-01-03,EUR,USD,1.5\n")
+
+    with patch(_VERSION_QUERY, wraps=exchange_rates_version):
+        assert import_exchange_rates.main([str(xml), "--database-url", url]) == 0
+        # sqlite's now() has whole seconds; date the first import back
+        db.execute(update(ExchangeRateModel).values(imported_at=datetime(2025, 1, 3)))
+        db.commit()
+        assert (
+            exchange_rate_services.get_rate_table(db, date(2025, 1, 6)).rate("EUR", "USD") == 1.25
+        )
+
+        # Imported by another process: this one's cache must not be cleared by hand
+        with patch.object(exchange_rate_services.rate_tables, "invalidate"):
+            assert import_exchange_rates.main([str(csv), "--database-url", url]) == 0
+        assert exchange_rate_services.get_rate_table(db, date(2025, 1, 6)).rate("EUR", "USD") == 1.5
+
+    assert "2 rates in" in capsys.readouterr().out
+    db.close()
@@ -0,0 +1,186 @@
+"""
+Background ingestion of uploaded workbooks: job runner, SSE progress and upload API.
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import mapping_routes
+from app.core.config import settings
+from app.services.ingestion_jobs import (
+    FAILED,
+    SUCCEEDED,
+    IngestionJobStore,
+    IngestionRunner,
+    job_events,
+)
+from main import app
+from shared.security.dependencies import get_validated_user
+from tests.factories.user import make_valid_user
+
+
+def _wait(store, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = store.get(job_id)
+        if job.finished:
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+@pytest.fixture
+def runner():
+    runner = IngestionRunner(IngestionJobStore(None), max_workers=1)
+    yield runner
+    runner.shutdown()
+
+
+def test_job_reports_stages_and_result(tmp_path, runner):
+    upload = tmp_path / "donor.xlsx"
+    upload.write_bytes(b"xlsx")
+    seen = []
+
+    def work(file_path, report_stage):
+        for stage in ("fields", "fingerprint", "mapping"):
+            report_stage(stage)
+            seen.append(runner.store.get("job-1").progress)
+        return {"suggestions": [], "unknown": ["Staff"]}
+
+    runner.submit(str(upload), "donor.xlsx", work, job_id="job-1")
+    done = _wait(runner.store, "job-1")
+
+    assert done.status == SUCCEEDED and done.progress == 1.0
+    assert done.result == {"suggestions": [], "unknown": ["Staff"]}
+    assert seen == [0.1, 0.4, 0.5]
+    assert not upload.exists()
+
+
+def test_failed_job_keeps_the_error(tmp_path, runner):
+    def work(file_path, report_stage):
+        raise ValueError("not a workbook")
+
+    job = runner.submit(str(tmp_path / "missing.xlsx"), "missing.xlsx", work)
+
+    done = _wait(runner.store, job.id)
+    assert done.status == FAILED and done.error == "not a workbook"
+
+
+def test_events_stream_until_the_job_finishes(runner):
+    async def collect(job_id):
+        return [event async for event in job_events(runner.store, job_id, poll_interval=0.01)]
+
+    def work(file_path, report_stage):
+        report_stage("mapping")
+        time.sleep(0.05)
+        return {"suggestions": []}
+
+    job = runner.submit("/nonexistent.xlsx", "donor.xlsx", work)
+    events = asyncio.run(collect(job.id))
+
+    payloads = [json.loads(e.split("data: ", 1)[1]) for e in events]
+    assert all(e.startswith("event: progress\n") for e in events)
+    assert payloads[-1]["status"] == SUCCEEDED
+    assert [p["progress"] for p in payloads] == sorted(p["progress"] for p in payloads)
+
+    missing = asyncio.run(collect("unknown"))
+    assert missing[0].startswith("event: error\n")
+
+
+def test_upload_returns_a_job_and_runs_it(tmp_path, monkeypatch, runner):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(mapping_routes, "ingestion_runner", runner)
+    monkeypatch.setattr(mapping_routes, "job_store", runner.store)
+    monkeypatch.setattr(
+        mapping_routes,
+        "_ingest",
+        lambda user, template_id: lambda path, report: {"path": path, "template": template_id},
+    )
+    app.dependency_overrides[get_validated_user] = lambda: {"user_id": None}
+    client = TestClient(app)
+    try:
+        response = client.post(
+            "/api/v1/donor-mapping/uploads?donor_template_id=7",
+            files={"file": ("Donor form.xlsx", b"PK\x03\x04", "application/octet-stream")},
+        )
+        assert response.status_code == 202
+        body = response.json()
+        _wait(runner.store, body["job_id"])
+
+        status = client.get(f"/api/v1/donor-mapping/jobs/{body['job_id']}").json()
+        assert status["status"] == SUCCEEDED and status["file_name"] == "Donor form.xlsx"
+        assert status["result"]["template"] == 7
+        assert body["events_url"].endswith(f"/jobs/{body['job_id']}/events")
+
+        rejected = client.post(
+            "/api/v1/donor-mapping/uploads", files={"file": ("notes.txt", b"x", "text/plain")}
+        )
+        assert rejected.status_code == 400
+        assert client.get("/api/v1/donor-mapping/jobs/unknown").status_code == 404
+    finally:
+        app.dependency_overrides.pop(get_validated_user, None)
+
+
+def test_jobs_are_only_visible_to_their_uploader(tmp_path, monkeypatch, runner):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(mapping_routes, "ingestion_runner", runner)
+    monkeypatch.setattr(mapping_routes, "job_store", runner.store)
+    monkeypatch.setattr(
+        mapping_routes, "_ingest", lambda user, template_id: lambda path, report: {"path": path}
+    )
+    uploader, other = make_valid_user(), make_valid_user()
+    client = TestClient(app)
+    try:
+        app.dependency_overrides[get_validated_user] = lambda: uploader
+        job_id = client.post(
+            "/api/v1/donor-mapping/uploads",
+            files={"file": ("Donor form.xlsx", b"PK\x03\x04", "application/octet-stream")},
+        ).json()["job_id"]
+        _wait(runner.store, job_id)
+        assert client.get(f"/api/v1/donor-mapping/jobs/{job_id}").status_code == 200
+
+        app.dependency_overrides[get_validated_user] = lambda: other
+        assert client.get(f"/api/v1/donor-mapping/jobs/{job_id}").status_code == 404
+        assert client.get(f"/api/v1/donor-mapping/jobs/{job_id}/events").status_code == 404
+
+        app.dependency_overrides[get_validated_user] = lambda: make_valid_user(role="superuser")
+        assert client.get(f"/api/v1/donor-mapping/jobs/{job_id}").status_code == 200
+    finally:
+        app.dependency_overrides.pop(get_validated_user, None)
+
+
+def test_oversized_upload_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 10)
+    app.dependency_overrides[get_validated_user] = lambda: {"user_id": None}
+    try:
+        response = TestClient(app).post(
+            "/api/v1/donor-mapping/uploads",
+            files={"file": ("big.xlsx", b"x" * 11, "application/octet-stream")},
+        )
+    finally:
+        app.dependency_overrides.pop(get_validated_user, None)
+
+    assert response.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_upload_is_removed_when_the_job_cannot_be_started(tmp_path, monkeypatch, runner):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(mapping_routes, "ingestion_runner", runner)
+    runner.shutdown()  # submit now raises
+    app.dependency_overrides[get_validated_user] = lambda: {"user_id": None}
+    try:
+        response = TestClient(app, raise_server_exceptions=False).post(
+            "/api/v1/donor-mapping/uploads",
+            files={"file": ("donor.xlsx", b"xlsx", "application/octet-stream")},
+        )
+    finally:
+        app.dependency_overrides.pop(get_validated_user, None)
+
+    assert response.status_code == 500
+    assert list(tmp_path.iterdir()) == []
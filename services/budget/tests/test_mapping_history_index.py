@@ -0,0 +1,146 @@
+"""
+Tests for the nearest-neighbour index over historical semantic mappings.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.mapping_history_index import (
+    HistoryChange,
+    HistoryRecord,
+    MappingHistoryIndex,
+)
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def _vector(text: str) -> np.ndarray:
+    codes = [ord(ch) for ch in text.lower() if ord(ch) < 128]
+    return np.bincount(np.array(codes, dtype=np.int64), minlength=128).astype(np.float32)
+
+
+class FakeDb:
+    """Change feed honouring the inclusive `since` watermark."""
+
+    def __init__(self):
+        self.changes: list[HistoryChange] = []
+
+    def add(self, rid, value, mapped_key, minutes, eligible=True):
+        record = HistoryRecord(rid, value, "budget_category", mapped_key, 1.0)
+        self.changes.append(HistoryChange(record, eligible, T0 + timedelta(minutes=minutes)))
+
+    def load(self, db, since):
+        return [c for c in self.changes if since is None or c.changed_at >= since]
+
+
+@pytest.fixture
+def feed():
+    feed = FakeDb()
+    feed.add("1", "staff salaries", "staff_costs", 0)
+    feed.add("2", "office rent", "office_costs", 1)
+    feed.add("3", "flights", "travel", 2)
+    return feed
+
+
+@pytest.fixture
+def embedded():
+    return []
+
+
+def _index(feed, embedded, path=None, namespace="model:1"):
+    def embed(texts):
+        embedded.append(list(texts))
+        return np.stack([_vector(t) for t in texts])
+
+    return MappingHistoryIndex(path, namespace, embed=embed, load_changes=feed.load)
+
+
+def test_batch_query_returns_nearest_above_threshold(feed, embedded):
+    index = _index(feed, embedded)
+    assert index.sync(None) == 3
+
+    queries = np.stack([_vector(t) for t in ["Staff salaries (GBP)", "office rent", "zzzz"]])
+    hits = index.query(queries, min_score=0.9)
+
+    assert hits[0][0].mapped_key == "staff_costs"
+    assert 0.9 <= hits[0][1] < 1.0
+    assert hits[1][0].mapped_key == "office_costs"
+    assert hits[1][1] == pytest.approx(1.0)
+    assert hits[2] is None
+
+
+def test_sync_only_embeds_new_or_changed_rows(feed, embedded):
+    index = _index(feed, embedded)
+    index.sync(None)
+    assert index.sync(None) == 0
+
+    feed.add("4", "per diem", "travel", 3)
+    assert index.sync(None) == 1
+
+    assert embedded == [["staff salaries", "office rent", "flights"], ["per diem"]]
+    assert len(index) == 4
+
+
+def test_ineligible_rows_are_removed(feed, embedded):
+    index = _index(feed, embedded)
+    index.sync(None)
+
+    feed.add("2", "office rent", "office_costs", 5, eligible=False)
+    index.sync(None)
+
+    assert len(index) == 2
+    (hit,) = index.query(_vector("office rent")[None, :], min_score=0.99)
+    assert hit is None
+
+
+def test_index_is_persisted_and_reloaded(feed, embedded, tmp_path):
+    path = tmp_path / "history.npz"
+    _index(feed, embedded, path).sync(None)
+    assert path.exists()
+
+    reloaded_embedded: list = []
+    reloaded = _index(feed, reloaded_embedded, path)
+    (hit,) = reloaded.query(_vector("flights")[None, :], min_score=0.99)
+
+    assert hit[0].mapped_key == "travel"
+    assert reloaded.sync(None) == 0
+    assert reloaded_embedded == []
+
+
+def test_persisted_index_for_other_model_is_ignored(feed, embedded, tmp_path):
+    path = tmp_path / "history.npz"
+    _index(feed, embedded, path).sync(None)
+
+    other = _index(feed, [], path, namespace="model:2")
+    assert other.query(_vector("flights")[None, :], min_score=0.5) == [None]
+    assert other.sync(None) == 3
+
+
+def test_rows_committed_late_behind_the_watermark_are_picked_up(feed, embedded):
+    index = _index(feed, embedded)
+    index.sync(None)
+
+    # Stamped before the last row seen, committed after the sync
+    feed.add("4", "per diem", "travel", 1)
+    assert index.sync(None) == 1
+    assert index.sync(None) == 0
+
+    assert embedded == [["staff salaries", "office rent", "flights"], ["per diem"]]
+
+
+def test_failed_save_keeps_the_previous_file(feed, embedded, tmp_path, monkeypatch):
+    path = tmp_path / "history.npz"
+    _index(feed, embedded, path).sync(None)
+    saved = path.read_bytes()
+
+    def full_disk(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(np, "savez", full_disk)
+    feed.add("4", "per diem", "travel", 3)
+    _index(feed, [], path).sync(None)
+
+    assert path.read_bytes() == saved
+    assert [p.name for p in tmp_path.iterdir()] == ["history.npz"]
@@ -0,0 +1,219 @@
+"""
+Tests for embedding-based donor field suggestions in mapping_service.
+"""
+
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.models.mapping import MappingSource
+from app.services import mapping_service
+from app.services.canonical_index import CanonicalEntry, CanonicalIndexCache
+from app.services.embedding_cache import EmbeddingCache
+from app.services.mapping_history_index import HistoryChange, HistoryRecord, MappingHistoryIndex
+
+NGO_FIELDS = ["Staff salaries", "Office rent", "Flights"]
+DONOR_FIELDS = ["Personnel", "Premises", "Travel", "Equipment"]
+
+
+class FakeManager:
+    """Deterministic stand-in for the embedding model manager that records batch calls."""
+
+    available = True
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        return np.stack([mapping_service._fallback_vector(t) * 3.0 for t in texts])
+
+
+@pytest.fixture
+def fake_model():
+    manager = FakeManager()
+    with (
+        patch.object(mapping_service, "embedding_manager", manager),
+        patch.object(mapping_service, "embedding_cache", EmbeddingCache(None, "test", "1")),
+        patch.object(mapping_service, "USE_SEMANTIC_EMBEDDINGS", True),
+    ):
+        yield manager
+
+
+def _reference(ngo_fields, donor_fields):
+    """Pairwise _cosine loop the matrix implementation replaced."""
+    out = []
+    for nf in ngo_fields:
+        nf_vec = mapping_service._embedding(nf)
+        scores = [
+            mapping_service._cosine(nf_vec, mapping_service._embedding(df)) for df in donor_fields
+        ]
+        best = int(np.argmax(scores))
+        out.append((donor_fields[best], mapping_service._to_confidence(scores[best])))
+    return out
+
+
+class TestSuggestMapping:
+    def test_encodes_each_field_list_in_one_batch(self, fake_model):
+        mapping_service.suggest_mapping(NGO_FIELDS, DONOR_FIELDS)
+        assert fake_model.calls == [NGO_FIELDS, DONOR_FIELDS]
+
+    def test_matches_pairwise_cosine(self, fake_model):
+        result = mapping_service.suggest_mapping(NGO_FIELDS, DONOR_FIELDS)
+        assert [(r["donor_field"], r["confidence"]) for r in result] == _reference(
+            NGO_FIELDS, DONOR_FIELDS
+        )
+        assert all(r["alternatives"] == [] for r in result)
+
+    def test_top_k_alternatives_are_ranked(self, fake_model):
+        result = mapping_service.suggest_mapping(NGO_FIELDS, DONOR_FIELDS, top_k=3)
+        for row in result:
+            confidences = [alt["confidence"] for alt in row["alternatives"]]
+            assert len(confidences) == 3
+            assert confidences == sorted(confidences, reverse=True)
+            assert row["alternatives"][0]["donor_field"] == row["donor_field"]
+
+    def test_top_k_larger_than_donor_fields(self, fake_model):
+        result = mapping_service.suggest_mapping(["Travel"], DONOR_FIELDS[:2], top_k=5)
+        assert len(result[0]["alternatives"]) == 2
+
+    def test_no_donor_fields(self, fake_model):
+        assert mapping_service.suggest_mapping(NGO_FIELDS, []) == []
+
+
+def test_fallback_vectors_are_not_cached_with_model_vectors(fake_model):
+    fake_model.encode = lambda texts: np.ones((len(texts), 384), dtype=np.float32)
+    fake_model.available = False
+    assert mapping_service._embed_batch(["Staff", "Travel"]).shape == (2, 128)
+
+    fake_model.available = True
+    assert mapping_service._embed_batch(["Staff", "Rent"]).shape == (2, 384)
+
+
+def test_top_k_helper_orders_best_first():
+    scores = np.array([[0.1, 0.9, 0.5, 0.7]])
+    assert mapping_service._top_k(scores, 2).tolist() == [[1, 3]]
+    assert mapping_service._top_k(scores, 4).tolist() == [[1, 3, 2, 0]]
+
+
+UNKNOWN_VALUES = ["Staff cost", "Travel and per diem", "Project name:", "zzz", "Office rent"]
+
+
+def _reference_match(values):
+    """Per-pair loop over FIELD_PATTERNS / CATEGORY_KEYWORDS the index replaced."""
+    fields = {c: mapping_service._embedding(p) for p, c in mapping_service.FIELD_PATTERNS.items()}
+    categories = {
+        c: mapping_service._embedding(p) for p, c in mapping_service.CATEGORY_KEYWORDS.items()
+    }
+    out = []
+    for raw in values:
+        vec = mapping_service._embedding(raw)
+        f_name, f_score = max(
+            ((n, mapping_service._cosine(vec, v)) for n, v in fields.items()), key=lambda x: x[1]
+        )
+        c_name, c_score = max(
+            ((n, mapping_service._cosine(vec, v)) for n, v in categories.items()),
+            key=lambda x: x[1],
+        )
+        if f_score > c_score and f_score > 0.5:
+            out.append(("budget_field", f_name, mapping_service._to_confidence(f_score)))
+        elif c_score > 0.5:
+            out.append(("budget_category", c_name, mapping_service._to_confidence(c_score)))
+        else:
+            out.append(("ignored", None, 0.0))
+    return out
+
+
+class TestMatchUnknownFields:
+    @pytest.fixture
+    def approved_rows(self):
+        return []
+
+    @pytest.fixture
+    def index_cache(self, fake_model, approved_rows):
+        cache = CanonicalIndexCache(
+            base_entries=mapping_service._CANONICAL_ENTRIES,
+            embed=mapping_service._embed_batch,
+            load_entries=lambda db: [CanonicalEntry(*row) for row in approved_rows],
+            fingerprint=lambda db: len(approved_rows),
+        )
+        with patch.object(mapping_service, "canonical_index", cache):
+            yield cache
+
+    @staticmethod
+    def _items(values):
+        return [
+            {"raw_value": v, "normalized_value": mapping_service.normalize_value(v)} for v in values
+        ]
+
+    def test_matches_pairwise_reference(self, index_cache):
+        result = mapping_service._match_unknown_fields(self._items(UNKNOWN_VALUES), db=None)
+        assert [(r["mapped_to"], r["mapped_key"], r["confidence"]) for r in result] == (
+            _reference_match(UNKNOWN_VALUES)
+        )
+
+    def test_index_is_built_once_and_items_embedded_in_one_batch(self, index_cache, fake_model):
+        mapping_service._match_unknown_fields(self._items(UNKNOWN_VALUES), db=None)
+        mapping_service._match_unknown_fields(self._items(["Flights"]), db=None)
+        # one batch for the vocabulary, then one per call for the items
+        assert len(fake_model.calls) == 3
+        assert fake_model.calls[1] == UNKNOWN_VALUES
+
+    def test_approved_mappings_extend_the_vocabulary(self, index_cache, approved_rows):
+        assert len(index_cache.get(None)) == len(mapping_service._CANONICAL_ENTRIES)
+
+        approved_rows.append(("per diem allowance", "budget_category", "travel"))
+        (result,) = mapping_service._match_unknown_fields(
+            self._items(["Per diem allowance"]), db=None
+        )
+
+        assert len(index_cache.get(None)) == len(mapping_service._CANONICAL_ENTRIES) + 1
+        assert (result["mapped_to"], result["mapped_key"]) == ("budget_category", "travel")
+        assert result["confidence"] == 1.0
+
+    def test_semantic_matches_are_stored_as_ai_mappings(self, index_cache):
+        with (
+            patch.object(mapping_service, "RULE_BASED_MAPPING_ENABLED", False),
+            patch.object(
+                mapping_service, "get_semantic_field_mappings_by_normalized_values", return_value={}
+            ),
+            patch.object(mapping_service, "increment_semantic_field_mapping_usage"),
+            patch.object(
+                mapping_service, "_match_history", side_effect=lambda items, v, db: ([], items, v)
+            ),
+            patch.object(mapping_service, "bulk_create_semantic_field_mappings") as create,
+        ):
+            result = mapping_service.suggest_semantic_mapping(
+                ["Flights"], MagicMock(), {"user_id": None}
+            )
+
+        # Returned as "semantic", persisted with a source the enum knows
+        assert result["suggestions"][0]["source"] == "semantic"
+        assert [s["source"] for s in create.call_args.args[2]] == [MappingSource.AI]
+
+
+def test_history_resolves_near_misses_before_semantic_matching(fake_model):
+    change = HistoryChange(
+        HistoryRecord("1", "staff salaries", "budget_category", "staff_costs", 0.8),
+        eligible=True,
+        changed_at=datetime(2026, 1, 1),
+    )
+    history = MappingHistoryIndex(
+        None, "test", embed=mapping_service._embed_batch, load_changes=lambda db, since: [change]
+    )
+    items = [
+        {"raw_value": v, "normalized_value": mapping_service.normalize_value(v)}
+        for v in ["Staff salaries (GBP)", "Flights"]
+    ]
+    vectors = mapping_service._embed_batch([i["raw_value"] for i in items])
+
+    with patch.object(mapping_service, "mapping_history", history):
+        hits, remaining, remaining_vectors = mapping_service._match_history(items, vectors, None)
+
+    assert [h["mapped_key"] for h in hits] == ["staff_costs"]
+    assert hits[0]["source"] == "history"
+    assert 0.7 < hits[0]["confidence"] <= 0.8
+    assert remaining == items[1:]
+    np.testing.assert_array_equal(remaining_vectors, vectors[1:])
@@ -0,0 +1,135 @@
+"""
+Keyset pagination and filters on GET /budgets/ and GET /budget-lines/.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api import budget_line_routes, budget_routes
+from app.crud.budget_crud import BudgetFilters, list_budgets
+from app.crud.pagination import decode_cursor, encode_cursor
+from app.models.budget import BudgetCategoryModel, BudgetLineModel, BudgetModel
+from app.schemas.budget_schema import BudgetStatus
+from main import app
+from tests.factories.user import make_valid_user
+
+CUSTOMER_ID = str(uuid4())
+OTHER_CUSTOMER_ID = str(uuid4())
+START = datetime(2026, 1, 1)
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    for model in (BudgetModel, BudgetCategoryModel, BudgetLineModel):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    travel = BudgetCategoryModel(id=uuid4(), name="Travel")
+    session.add(travel)
+    for i in range(7):
+        budget = BudgetModel(
+            id=uuid4(),
+            name=f"Budget {i}",
+            owner_id=CUSTOMER_ID,
+            external_funder_name="Smith Foundation" if i % 2 else "Donor Corp",
+            status=BudgetStatus.confirmed if i in (1, 4) else BudgetStatus.draft,
+            # Budgets 2 and 3 share a timestamp: the id breaks the tie
+            created_at=START + timedelta(days=min(i, 2) if i < 4 else i),
+        )
+        session.add(budget)
+        session.add_all(
+            BudgetLineModel(
+                id=uuid4(),
+                budget_id=budget.id,
+                category_id=travel.id if j == 0 else None,
+                description=f"Line {i}.{j}",
+                amount=100.0,
+                created_at=budget.created_at,
+            )
+            for j in range(3)
+        )
+    session.add(BudgetModel(id=uuid4(), name="Other", owner_id=OTHER_CUSTOMER_ID))
+    session.commit()
+    session.info["travel_id"] = travel.id
+
+    app.dependency_overrides[budget_routes.get_db] = lambda: session
+    app.dependency_overrides[budget_line_routes.get_db] = lambda: session
+    app.dependency_overrides[budget_routes.get_validated_user] = lambda: make_valid_user(
+        customer_id=CUSTOMER_ID
+    )
+    with patch(
+        "app.services.budget_services.populate_budget_with_user_details",
+        new=AsyncMock(side_effect=lambda budgets, valid_user: [{"name": b.name} for b in budgets]),
+    ):
+        yield session
+    app.dependency_overrides = {}
+    session.close()
+
+
+def _pages(url, **params):
+    names, cursor = [], None
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        names.append([item.get("name") or item.get("description") for item in response.json()])
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            assert "link" not in response.headers
+            return names
+        assert response.headers["link"].endswith('rel="next"')
+
+
+def test_budgets_page_through_newest_first_without_gaps(db):
+    pages = _pages("/api/v1/budgets/", limit=3)
+
+    assert [len(p) for p in pages] == [3, 3, 1]
+    flat = [name for page in pages for name in page]
+    assert sorted(flat) == sorted(f"Budget {i}" for i in range(7))
+    assert flat[:3] == ["Budget 6", "Budget 5", "Budget 4"]
+    assert flat[-2:] == ["Budget 1", "Budget 0"]
+
+
+def test_budget_filters_are_applied_server_side(db):
+    confirmed = _pages("/api/v1/budgets/", status="confirmed")
+    assert confirmed == [["Budget 4", "Budget 1"]]
+
+    smith = _pages("/api/v1/budgets/", external_funder_name="Smith Foundation", limit=2)
+    assert smith == [["Budget 5", "Budget 3"], ["Budget 1"]]
+
+    window = _pages(
+        "/api/v1/budgets/",
+        created_from=(START + timedelta(days=2)).isoformat(),
+        created_to=(START + timedelta(days=5)).isoformat(),
+    )
+    assert sorted(window[0]) == ["Budget 2", "Budget 3", "Budget 4"]
+
+
+def test_budget_lines_filter_by_category(db):
+    pages = _pages("/api/v1/budget-lines/", category_id=str(db.info["travel_id"]), limit=4)
+
+    assert [len(p) for p in pages] == [4, 3]
+    assert all(name.endswith(".0") for page in pages for name in page)
+
+
+def test_page_size_is_capped_and_bad_cursors_rejected(db):
+    assert client.get("/api/v1/budgets/", params={"limit": 10_000}).status_code == 422
+    assert client.get("/api/v1/budgets/", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_cursor_round_trip_and_unbounded_listing(db):
+    created_at, row_id = START, uuid4()
+    assert decode_cursor(encode_cursor(created_at, row_id)) == (created_at, row_id)
+
+    page = list_budgets(db, customer_id=UUID(CUSTOMER_ID), filters=BudgetFilters(), limit=None)
+    assert len(page.items) == 7 and page.next_cursor is None
@@ -0,0 +1,141 @@
+"""
+Sheet-level template detection fanned out over a process pool.
+"""
+
+import functools
+import pickle
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from openpyxl import Workbook
+
+from app.services.template_detection import detector
+from app.services.template_detection.detector import detect_excel_structure, is_partial
+from app.services.template_detection.xlsx_reader import OpenpyxlReader, get_reader
+
+
+class StuckReader(OpenpyxlReader):
+    """Hangs before the first row of "Sheet 2", out of reach of the row-level check."""
+
+    def iter_rows(self, sheet_name):
+        if sheet_name == "Sheet 2":
+            time.sleep(120)
+        return super().iter_rows(sheet_name)
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    wb = Workbook()
+    wb.remove(wb.active)
+    for n in range(5):
+        ws = wb.create_sheet(f"Sheet {n}" if n else "Budget")
+        ws.append(["Notes"] * (n % 2))  # header row moves between sheets
+        ws.append(["Category", "Description", f"Total {n}"])
+        for row in range(30 + n):
+            ws.append([f"Line {row}", "text", row * n])
+        ws.append(["Total", None, 1000 + n])
+    wb.create_sheet("Cover").append(["Instructions only"])
+    path = tmp_path / "multi.xlsx"
+    wb.save(path)
+    return str(path)
+
+
+@pytest.mark.parametrize("backend", ["openpyxl", "sax"])
+def test_parallel_matches_sequential_in_sheet_order(workbook_path, backend):
+    sequential = detect_excel_structure(workbook_path, reader=get_reader(workbook_path, backend))
+
+    parallel = detect_excel_structure(
+        workbook_path, reader=get_reader(workbook_path, backend), max_workers=2, sheet_timeout=60
+    )
+
+    assert parallel == sequential
+    assert [s["sheet_name"] for s in parallel["sheets"]] == ["Budget"] + [
+        f"Sheet {n}" for n in range(1, 5)
+    ]
+
+
+def test_slow_sheets_are_left_out_and_reported(workbook_path):
+    names = ["Budget"] + [f"Sheet {n}" for n in range(1, 5)] + ["Cover"]
+    for structure in (
+        detect_excel_structure(workbook_path, max_workers=2, sheet_timeout=0),
+        detect_excel_structure(workbook_path, reader=get_reader(workbook_path), sheet_timeout=0),
+    ):
+        assert structure["sheets"] == []
+        assert structure["timed_out_sheets"] == names
+        assert is_partial(structure)
+    assert not is_partial(detect_excel_structure(workbook_path))
+
+
+def test_workers_keep_the_reader_options(workbook_path, monkeypatch):
+    reader = OpenpyxlReader(workbook_path, data_only=True)
+    factories = []
+    real_parallel = detector.detect_sheets_parallel
+
+    def spy(reader_factory, *args):
+        factories.append(reader_factory)
+        return real_parallel(reader_factory, *args)
+
+    monkeypatch.setattr(detector, "detect_sheets_parallel", spy)
+    parallel = detect_excel_structure(workbook_path, reader=reader, max_workers=2)
+
+    assert parallel == detect_excel_structure(workbook_path, reader=reader)
+    # What each pool process gets
+    rebuilt = pickle.loads(pickle.dumps(factories[0]))()
+    assert isinstance(rebuilt, OpenpyxlReader) and rebuilt.data_only
+
+
+def test_single_sheet_skips_the_pool(tmp_path, monkeypatch):
+    wb = Workbook()
+    wb.active.append(["Category", "Total"])
+    wb.active.append(["Staff", 10])
+    path = str(tmp_path / "one.xlsx")
+    wb.save(path)
+
+    def no_pool(max_workers):
+        raise AssertionError("pool started for a single sheet")
+
+    monkeypatch.setattr(detector, "_pool", no_pool)
+    assert len(detect_excel_structure(path, max_workers=4)["sheets"]) == 1
+
+
+def test_stuck_worker_is_reported_and_its_pool_replaced(workbook_path, monkeypatch):
+    monkeypatch.setattr(detector, "RESULT_MARGIN", 3.0)
+    detector._discard_pool(4)
+    pool = detector._pool(4)
+    workers = []
+    real_discard = detector._discard_pool
+
+    def discard(max_workers, terminate=False):
+        workers.extend(pool._processes.values())
+        real_discard(max_workers, terminate)
+
+    monkeypatch.setattr(detector, "_discard_pool", discard)
+    started = time.monotonic()
+
+    sheets, timed_out = detector.detect_sheets_parallel(
+        functools.partial(StuckReader, workbook_path),
+        ["Budget", "Sheet 1", "Sheet 2", "Sheet 3"],
+        max_workers=4,
+        sheet_timeout=1.0,
+    )
+
+    assert time.monotonic() - started < 30
+    assert timed_out == ["Sheet 2"]
+    assert [s["sheet_name"] for s in sheets] == ["Budget", "Sheet 1", "Sheet 3"]
+    assert detector._pool(4) is not pool
+    assert workers
+    for process in workers:
+        process.join(timeout=5)
+        assert not process.is_alive()
+
+
+def test_broken_pool_falls_back_to_in_process_detection(workbook_path, monkeypatch):
+    class BrokenPool:
+        def submit(self, *args):
+            raise BrokenProcessPool("worker died")
+
+    monkeypatch.setattr(detector, "_pool", lambda max_workers: BrokenPool())
+    expected = detect_excel_structure(workbook_path, reader=get_reader(workbook_path))
+
+    assert detect_excel_structure(workbook_path, max_workers=2) == expected
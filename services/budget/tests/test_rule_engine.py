@@ -0,0 +1,149 @@
+"""
+Tests for the compiled rule engine behind rule_based_suggestion.
+"""
+
+import itertools
+import random
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.crud.mapping_rule_crud import create_mapping_rule, list_mapping_rules
+from app.models.mapping import DonorTemplateModel, MappingRuleModel
+from app.services import mapping_service
+from app.services.rule_engine import EXACT, Rule, RuleSet, RuleSetCache
+
+
+def _cascade(value):
+    """The if/for cascade rule_based_suggestion used before the engine."""
+    v = mapping_service.normalize_value(value)
+    if v in mapping_service.CURRENCY_CODES:
+        return ("currency", "currency", 0.99)
+    for h in mapping_service.HEADER_KEYWORDS:
+        if h in v:
+            return ("header_metadata", None, 0.95)
+    for k, canonical in mapping_service.FIELD_PATTERNS.items():
+        if k in v:
+            return ("budget_field", canonical, 0.96)
+    for k, canonical in mapping_service.CATEGORY_KEYWORDS.items():
+        if k in v:
+            return ("budget_category", canonical, 0.94)
+    return None
+
+
+def _samples():
+    phrases = (
+        sorted(mapping_service.CURRENCY_CODES)
+        + mapping_service.HEADER_KEYWORDS
+        + list(mapping_service.FIELD_PATTERNS)
+        + list(mapping_service.CATEGORY_KEYWORDS)
+        + ["", "misc", "  ", "projec", "staf"]
+    )
+    rng = random.Random(7)
+    values = [" ".join(pair) for pair in itertools.product(phrases, repeat=2)]
+    values += ["".join(rng.sample(phrases, 3)) for _ in range(500)]
+    values += [p.upper() for p in phrases] + ['"GBP"', "Project Name (office)"]
+    return values
+
+
+def test_matches_original_cascade():
+    values = _samples()
+    assert [mapping_service.rule_based_suggestion(v) for v in values] == [
+        _cascade(v) for v in values
+    ]
+    assert mapping_service.rule_based_suggestions(values) == [_cascade(v) for v in values]
+
+
+def test_priority_then_declaration_order_decides():
+    rule_set = RuleSet(
+        [
+            Rule("staff", "budget_category", "staff_costs", 0.9, priority=30),
+            Rule("travel staff", "budget_category", "travel", 0.9, priority=30),
+            Rule("staff travel", "budget_field", "override", 0.9, priority=5),
+            Rule("usd", "currency", "currency", 0.99, priority=50, match_type=EXACT),
+        ]
+    )
+    assert rule_set.match("office staff").mapped_key == "staff_costs"
+    assert rule_set.match("travel staff").mapped_key == "staff_costs"
+    assert rule_set.match("our staff travel").mapped_key == "override"
+    assert rule_set.match("usd").mapped_to == "currency"
+    assert rule_set.match("usd staff").mapped_key == "staff_costs"
+    assert rule_set.match("nothing") is None
+
+
+def test_suffix_patterns_are_found_through_failure_links():
+    rule_set = RuleSet(
+        [
+            Rule("abcd", "x", "long", 1.0, priority=2),
+            Rule("bc", "x", "inner", 1.0, priority=1),
+        ]
+    )
+    assert rule_set.match("abce").mapped_key == "inner"
+    assert rule_set.match("xabcd").mapped_key == "inner"
+
+
+def test_large_rule_set_classifies_column():
+    rules = [Rule(f"donor phrase {i:05d}", "budget_field", f"key_{i}", 0.9) for i in range(5000)]
+    rule_set = RuleSet(mapping_service.DEFAULT_RULES + rules)
+    column = ["Donor phrase 04321 (GBP)", "Staff", "unknown"] * 100
+
+    result = rule_set.classify([mapping_service.normalize_value(v) for v in column])
+
+    assert result[:3] == [
+        ("budget_field", "key_4321", 0.9),
+        ("budget_category", "staff_costs", 0.94),
+        None,
+    ]
+    assert len(result) == 300
+
+
+def test_rule_set_cache_recompiles_only_when_rules_change():
+    stored: dict = {"acme": []}
+    loads = []
+
+    def load(db, scope):
+        loads.append(scope)
+        return stored[scope]
+
+    cache = RuleSetCache(
+        mapping_service.DEFAULT_RULES,
+        load_rules=load,
+        fingerprint=lambda db, scope: len(stored[scope]),
+    )
+    assert cache.get(None, "acme") is cache.base
+    assert cache.get(None, "acme") is cache.base
+    assert loads == ["acme"]
+
+    stored["acme"] = [Rule("per diem", "budget_category", "travel", 0.9, priority=1)]
+    scoped = cache.get(None, "acme")
+    assert scoped.match("per diem allowance").mapped_key == "travel"
+    assert cache.get(None, "acme") is scoped
+    assert loads == ["acme", "acme"]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    DonorTemplateModel.__table__.create(engine)
+    MappingRuleModel.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([DonorTemplateModel(id=1, name="A"), DonorTemplateModel(id=2, name="B")])
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_scoped_rules_are_loaded_per_customer_and_template(db):
+    customer, other = uuid.uuid4(), uuid.uuid4()
+    create_mapping_rule(db, None, "global", "budget_field", "g")
+    create_mapping_rule(db, None, "mine", "budget_field", "m", customer_id=customer)
+    create_mapping_rule(db, None, "theirs", "budget_field", "t", customer_id=other)
+    create_mapping_rule(db, None, "tpl", "budget_field", "tpl", priority=1, donor_template_id=1)
+    create_mapping_rule(db, None, "tpl2", "budget_field", "tpl2", donor_template_id=2)
+
+    patterns = [r.pattern for r in list_mapping_rules(db, customer, 1)]
+    assert patterns[0] == "tpl"
+    assert sorted(patterns[1:]) == ["global", "mine"]
+    assert [r.pattern for r in list_mapping_rules(db)] == ["global"]
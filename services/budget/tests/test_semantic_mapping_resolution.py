@@ -0,0 +1,116 @@
+"""
+Set-based resolution of known values in suggest_semantic_mapping.
+"""
+
+import uuid
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from app.models.mapping import MappingSource, SemanticFieldMappingModel
+from app.services import mapping_service
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_as_json(element, compiler, **kw):
+    return "JSON"
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    SemanticFieldMappingModel.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all(
+        [
+            SemanticFieldMappingModel(
+                id=uuid.uuid4(),
+                raw_value="Office costs",
+                normalized_value="office costs",
+                mapped_to="budget_category",
+                mapped_key="office_costs",
+                confidence=0.9,
+                source=MappingSource.HUMAN,
+                times_used=4,
+            ),
+            SemanticFieldMappingModel(
+                id=uuid.uuid4(),
+                raw_value="Travel",
+                normalized_value="travel",
+                mapped_to="budget_category",
+                mapped_key="travel",
+                confidence=0.8,
+                source=MappingSource.AI,
+                times_used=1,
+            ),
+        ]
+    )
+    session.commit()
+    statements: list[str] = []
+    event.listen(
+        engine, "before_cursor_execute", lambda *args: statements.append(args[2]), named=False
+    )
+    session.info["statements"] = statements
+    yield session
+    session.close()
+
+
+@pytest.fixture(autouse=True)
+def no_embeddings():
+    with (
+        patch.object(mapping_service, "RULE_BASED_MAPPING_ENABLED", False),
+        patch.object(mapping_service, "USE_SEMANTIC_EMBEDDINGS", False),
+    ):
+        yield
+
+
+def _times_used(db, normalized):
+    db.expire_all()
+    return (
+        db.query(SemanticFieldMappingModel).filter_by(normalized_value=normalized).one().times_used
+    )
+
+
+def test_known_values_resolve_with_one_select_and_grouped_updates(db):
+    values = ["Office costs", "OFFICE  costs", "Travel", "office costs", "Unheard of", "Travel"]
+
+    with patch.object(mapping_service, "_cache_get_many", return_value=[None]) as cache:
+        result = mapping_service.suggest_semantic_mapping(values, db, {"user_id": None})
+
+    statements = [s.split()[0] for s in db.info["statements"]]
+    assert statements == ["SELECT", "UPDATE", "UPDATE"]
+    cache.assert_called_once_with(["template_mapping:unheard of"])
+
+    assert [s["raw_value"] for s in result["suggestions"]] == [
+        "Office costs",
+        "OFFICE  costs",
+        "Travel",
+        "office costs",
+        "Travel",
+    ]
+    assert {s["mapped_key"] for s in result["suggestions"]} == {"office_costs", "travel"}
+    assert result["suggestions"][0]["times_used"] == 7
+    assert result["suggestions"][0]["source"] == "HUMAN"
+    assert result["unknown"] == [{"raw_value": "Unheard of", "normalized_value": "unheard of"}]
+
+    assert _times_used(db, "office costs") == 7
+    assert _times_used(db, "travel") == 3
+
+
+def test_cached_values_resolve_from_one_mget(db):
+    cached = {"mapped_to": "budget_field", "mapped_key": "project_name", "confidence": 0.7}
+    with patch.object(mapping_service, "_cache_get_many", return_value=[cached, None]) as cache:
+        result = mapping_service.suggest_semantic_mapping(
+            ["Project title", "Project title", "Mystery"], db, {"user_id": None}
+        )
+
+    cache.assert_called_once_with(["template_mapping:project title", "template_mapping:mystery"])
+    assert [(s["raw_value"], s["mapped_key"], s["source"]) for s in result["suggestions"]] == [
+        ("Project title", "project_name", "ai"),
+        ("Project title", "project_name", "ai"),
+    ]
+    assert [u["normalized_value"] for u in result["unknown"]] == ["mystery"]
@@ -0,0 +1,119 @@
+"""
+Streaming ExcelStructureDetector mode must match the DataFrame pipeline, and
+the DataFrame pipeline must keep producing the recorded golden output.
+"""
+
+import json
+from datetime import datetime, time
+from pathlib import Path
+
+import pytest
+from openpyxl import Workbook
+
+from app.services.template_detection.spreadsheet_reader import ExcelStructureDetector
+
+ROWS = [
+    ["Detailed budget", None, None, None],
+    ["Organisation name:", "Acme", None, None],
+    [None, None, None, None],
+    ["Category", "Unit", "Qty", "Total"],
+    ["1. Staff costs", "month", 12, "=B5*C5"],
+    ["Project manager", "month", "12", 3000.5],
+    ["Travel", "trip", "1 - 3", 0],
+    [None, 12, 14.5, "-3"],
+    ["   ", "", None, None],
+    ["Start date", datetime(2026, 1, 1), None, 1e-05],
+    ["Project manager", "Office rent", None, None],
+    ["Total project costs", None, None, "=SUM(D5:D10)"],
+]
+
+
+# Edge cases for the numeric-like test: padding, signs, ranges, unicode digits
+# and whitespace, falsy values, non-string cells
+GOLDEN_ROWS = ROWS + [
+    [" 42 ", "+7", "-0.5", "3."],
+    ["12\n", "\t", "\u00a0 9 \u00a0", "\u0661\u0662"],
+    ["1-2", "1 -2x", ".5", "1e3"],
+    [0, 0.0, False, True],
+    ["Consultant", 1e16, time(8, 30), "0"],
+    ["Sub-total", "=1+1", None, None],
+    ["  Audit fees  ", "Audit fees", "N/A", "-"],
+]
+
+GOLDEN_PATH = Path(__file__).parent / "golden" / "spreadsheet_reader_pipeline.json"
+
+
+def _save(rows, path):
+    wb = Workbook()
+    ws = wb.active
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return str(path)
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    return _save(ROWS, tmp_path / "template.xlsx")
+
+
+@pytest.fixture
+def golden_workbook_path(tmp_path):
+    return _save(GOLDEN_ROWS, tmp_path / "golden.xlsx")
+
+
+def golden_output(path: str) -> dict:
+    """DataFrame pipeline output with values as repr() so types are compared too."""
+    detector = ExcelStructureDetector(path)
+    df = detector.detect_structure()
+    detections = detector.to_detection_json(df)
+    return {
+        "cleaned": [[repr(v) for v in row] for row in df.itertuples(index=False)],
+        "possible_fields": sorted(detector.filter_list_of_possible_fields(df)),
+        "detections": [{**d, "value": repr(d["value"])} for d in detections],
+    }
+
+
+def test_detections_match_dataframe_pipeline(workbook_path):
+    legacy = ExcelStructureDetector(workbook_path)
+    expected = legacy.to_detection_json(legacy.detect_structure())
+
+    assert list(ExcelStructureDetector(workbook_path).iter_detections()) == expected
+
+
+def test_possible_fields_match_dataframe_pipeline(workbook_path):
+    legacy = ExcelStructureDetector(workbook_path)
+    expected = legacy.filter_list_of_possible_fields(legacy.detect_structure())
+
+    streamed = ExcelStructureDetector(workbook_path).stream_possible_fields()
+
+    assert streamed == expected
+    assert streamed[:3] == ["Detailed budget", "Organisation name:", "Acme"]
+
+
+def test_clean_rows_skip_formulas_and_numeric_rows(workbook_path):
+    rows = dict(ExcelStructureDetector(workbook_path).iter_clean_rows())
+
+    assert 5 not in rows and 12 not in rows  # formula rows
+    assert 3 not in rows and 8 not in rows  # empty / all numeric
+    assert rows[6] == ["Project manager", "month", None, None]
+    assert rows[7] == ["Travel", "trip", None, 0]
+
+
+def test_streaming_does_not_load_full_workbook(workbook_path):
+    detector = ExcelStructureDetector(workbook_path)
+    list(detector.iter_detections())
+    assert detector._wb is None
+
+
+def test_dataframe_pipeline_matches_golden_output(golden_workbook_path):
+    # Regenerate only for intended behaviour changes:
+    # GOLDEN_PATH.write_text(json.dumps(golden_output(golden_workbook_path), indent=1))
+    assert golden_output(golden_workbook_path) == json.loads(GOLDEN_PATH.read_text())
+
+
+def test_streaming_matches_golden_pipeline(golden_workbook_path):
+    legacy = ExcelStructureDetector(golden_workbook_path)
+    expected = legacy.to_detection_json(legacy.detect_structure())
+
+    assert list(ExcelStructureDetector(golden_workbook_path).iter_detections()) == expected
@@ -0,0 +1,251 @@
+"""
+Structural fingerprints and reuse of known donor templates.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from openpyxl import Workbook
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from app.models.mapping import (
+    DonorTemplateModel,
+    MappingSource,
+    SemanticFieldMappingModel,
+    TemplateFingerprintModel,
+)
+from app.services import template_fingerprint_service as service
+from app.services.template_detection import detection_cache
+from app.services.template_detection.detection_cache import DetectionCache
+from tests.factories.user import make_valid_user
+from app.services.template_detection.fingerprint import (
+    FingerprintIndex,
+    TemplateFingerprint,
+    compute_fingerprint,
+)
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_as_json(element, compiler, **kw):
+    return "JSON"
+
+
+def _template_rows(organisation, staff_label="Project manager", extra_category=None):
+    rows = [
+        ["Organisation name:", organisation],
+        [None, None],
+        ["Budget line", "Unit", "Quantity", "Total (GBP)"],
+        ["1. Staff costs", None, None, None],
+        [staff_label, "month", 12, 3000],
+        ["Total staff costs", None, None, "=D5"],
+        ["2. Travel", None, None, None],
+        ["Flights", "trip", 2, 800],
+        ["Total travel", None, None, "=D8"],
+    ]
+    if extra_category:
+        rows.append([extra_category, None, None, None])
+    rows.append(["Total project costs", None, None, "=D6+D9"])
+    return rows
+
+
+def _save(tmp_path, name, rows):
+    wb = Workbook()
+    for row in rows:
+        wb.active.append(row)
+    path = tmp_path / name
+    wb.save(path)
+    return str(path)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for model in (DonorTemplateModel, TemplateFingerprintModel, SemanticFieldMappingModel):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(detection_cache, "detection_cache", DetectionCache(None))
+    service.known_templates.invalidate()
+    yield
+    service.known_templates.invalidate()
+
+
+def test_fingerprint_ignores_filled_in_values(tmp_path):
+    acme = compute_fingerprint(_save(tmp_path, "acme.xlsx", _template_rows("Acme")))
+    other = compute_fingerprint(_save(tmp_path, "other.xlsx", _template_rows("Other NGO")))
+
+    assert acme.header_labels == ("budget_line", "unit", "quantity", "total_gbp")
+    assert acme.skeleton == (
+        "category:staff_costs",
+        "category_total:total_staff_costs",
+        "category:travel",
+        "category_total:total_travel",
+        "grand_total:total_project_costs",
+    )
+    assert acme.digest == other.digest
+
+
+def test_index_matches_exact_and_near_layouts():
+    known = TemplateFingerprint(
+        ("budget_line", "unit", "total"), ("category:staff", "category:travel")
+    )
+    unrelated = TemplateFingerprint(("name", "amount"), ("category:equipment",))
+    index = FingerprintIndex([("known", known), ("unrelated", unrelated)])
+
+    renamed = TemplateFingerprint(
+        ("budget_line", "unit", "total"), ("category:staff", "category:travel", "category:audit")
+    )
+    assert index.match(known, 0.85) == ("known", 1.0)
+    assert index.match(renamed, 0.8) == ("known", round(5 / 6, 4))
+    assert index.match(renamed, 0.9) is None
+    assert index.match(TemplateFingerprint((), ()), 0.0) is None
+
+
+def test_known_template_reuses_stored_mappings(tmp_path, db):
+    def fake_mapping(values, db, valid_user, donor_template_id=None):
+        calls.append(list(values))
+        return {
+            "suggestions": [
+                {"raw_value": v, "mapped_to": "budget_field", "mapped_key": v.lower()}
+                for v in values
+            ],
+            "unknown": [],
+        }
+
+    calls: list[list[str]] = []
+    user = {"user_id": None}
+    first = _save(tmp_path, "first.xlsx", _template_rows("Acme"))
+    second = _save(
+        tmp_path,
+        "second.xlsx",
+        _template_rows("Other NGO", staff_label="Finance officer", extra_category="3. Audit"),
+    )
+    db.add(DonorTemplateModel(id=7, name="Funder form"))
+    db.commit()
+
+    with patch.object(service, "suggest_semantic_mapping", side_effect=fake_mapping):
+        result = service.suggest_mappings_for_upload(first, db, user, donor_template_id=7)
+        assert result["template_match"] is None
+        assert db.query(TemplateFingerprintModel).count() == 1
+
+        result = service.suggest_mappings_for_upload(second, db, user)
+
+    assert result["template_match"]["donor_template_id"] == 7
+    assert calls[1] == ["Other NGO", "Finance officer", "3. Audit"]
+    values = [s["raw_value"] for s in result["suggestions"]]
+    assert values[:4] == ["Organisation name:", "Other NGO", "Budget line", "Unit"]
+    assert "Finance officer" in values and "Project manager" not in values
+
+
+def test_reused_labels_follow_corrections_and_new_labels_join_the_snapshot(tmp_path, db):
+    def fake_mapping(values, db, valid_user, donor_template_id=None):
+        calls.append(list(values))
+        return {
+            "suggestions": [
+                {"raw_value": v, "mapped_to": "budget_field", "mapped_key": v.lower()}
+                for v in values
+            ],
+            "unknown": [],
+        }
+
+    calls: list[list[str]] = []
+    user = {"user_id": None}
+    first = _save(tmp_path, "first.xlsx", _template_rows("Acme"))
+    second = _save(tmp_path, "second.xlsx", _template_rows("Acme", staff_label="Finance officer"))
+    db.add(DonorTemplateModel(id=7, name="Funder form"))
+    db.commit()
+
+    with patch.object(service, "suggest_semantic_mapping", side_effect=fake_mapping):
+        service.suggest_mappings_for_upload(first, db, user, donor_template_id=7)
+        # Corrected by a human after the template was remembered
+        flights = SemanticFieldMappingModel(
+            raw_value="Flights",
+            normalized_value="flights",
+            mapped_to="budget_category",
+            mapped_key="travel",
+            source=MappingSource.HUMAN,
+            times_used=1,
+            approved=True,
+        )
+        db.add(flights)
+        db.commit()
+        service.suggest_mappings_for_upload(second, db, user)
+        result = service.suggest_mappings_for_upload(second, db, user)
+
+    assert calls[1:] == [["Finance officer"]]  # remembered after the first match
+    by_value = {s["raw_value"]: s for s in result["suggestions"]}
+    assert (by_value["Flights"]["mapped_to"], by_value["Flights"]["mapped_key"]) == (
+        "budget_category",
+        "travel",
+    )
+    assert by_value["Finance officer"]["mapped_key"] == "finance officer"
+    db.refresh(flights)
+    assert flights.times_used == 3
+
+
+def test_unrelated_upload_is_mapped_in_full(tmp_path, db):
+    service.remember_template(
+        db,
+        None,
+        None,
+        7,
+        TemplateFingerprint(("name", "amount"), ("category:equipment",)),
+        mappings={"suggestions": [], "unknown": []},
+    )
+    path = _save(tmp_path, "new.xlsx", _template_rows("Acme"))
+
+    with patch.object(
+        service,
+        "suggest_semantic_mapping",
+        return_value={"suggestions": [], "unknown": []},
+    ) as mapping:
+        result = service.suggest_mappings_for_upload(path, db, {"user_id": None})
+
+    assert result["template_match"] is None
+    assert "Project manager" in mapping.call_args.args[0]
+
+
+def test_stored_mappings_are_not_shared_across_customers(tmp_path, db):
+    path = _save(tmp_path, "form.xlsx", _template_rows("Acme"))
+    db.add(DonorTemplateModel(id=7, name="Funder form"))
+    db.commit()
+    owner, other = make_valid_user(), make_valid_user()
+
+    def map_all(values, db, valid_user, donor_template_id=None):
+        suggestion = {"mapped_to": "budget_field", "mapped_key": str(valid_user["customer_id"])}
+        return {"suggestions": [{**suggestion, "raw_value": v} for v in values], "unknown": []}
+
+    with patch.object(service, "suggest_semantic_mapping", side_effect=map_all) as semantic:
+        service.suggest_mappings_for_upload(path, db, owner, donor_template_id=7)
+        elsewhere = service.suggest_mappings_for_upload(path, db, other)
+        again = service.suggest_mappings_for_upload(path, db, owner)
+
+    assert elsewhere["template_match"] is None
+    assert {s["mapped_key"] for s in elsewhere["suggestions"]} == {other["customer_id"]}
+    assert again["template_match"] == {"donor_template_id": 7, "score": 1.0}
+    assert semantic.call_count == 2  # the owner's repeat is served from the stored mappings
+
+
+def test_timed_out_detection_is_not_remembered(tmp_path, db, monkeypatch):
+    monkeypatch.setattr(detection_cache.settings, "DETECTION_MAX_WORKERS", 1)
+    monkeypatch.setattr(detection_cache.settings, "DETECTION_SHEET_TIMEOUT", 0)
+    path = _save(tmp_path, "slow.xlsx", _template_rows("Acme"))
+    db.add(DonorTemplateModel(id=7, name="Funder form"))
+    db.commit()
+
+    with patch.object(
+        service,
+        "suggest_semantic_mapping",
+        return_value={"suggestions": [], "unknown": []},
+    ):
+        service.suggest_mappings_for_upload(path, db, {"user_id": None}, donor_template_id=7)
+
+    assert db.query(TemplateFingerprintModel).count() == 0
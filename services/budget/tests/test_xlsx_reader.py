@@ -0,0 +1,214 @@
+"""
+SaxXlsxReader must read the same values as openpyxl's read-only mode.
+"""
+
+import zipfile
+from datetime import date, datetime, time
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from app.services.template_detection.detector import (
+    _sheet_structure,
+    detect_columns,
+    detect_excel_structure,
+    detect_header_row,
+    detect_totals,
+)
+from app.services.template_detection.spreadsheet_reader import ExcelStructureDetector
+from app.services.template_detection.xlsx_reader import (
+    FORMULA,
+    NUMBER,
+    STRING,
+    OpenpyxlReader,
+    SaxXlsxReader,
+    get_reader,
+)
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    wb = Workbook()
+    notes = wb.active
+    notes.title = "Notes"
+    notes.append(["Read me", "first"])
+
+    budget = wb.create_sheet("Budget")
+    budget["B3"] = "Category"
+    budget["C3"] = "Unit cost"
+    budget["D3"] = "Total £"
+    budget.append([None, "1. Staff", 1200, "=C4*2"])
+    budget.append([None, "Travel", 250.75, "=C5*2"])
+    budget["B8"] = "Start"
+    budget["C8"] = datetime(2026, 1, 31, 9, 30)
+    budget["D8"] = date(2026, 2, 1)
+    budget["E8"] = time(12, 15)
+    budget["B9"] = "Approved"
+    budget["C9"] = True
+    budget["D9"] = False
+    budget["B10"] = "Total project"
+    budget["D10"] = "=SUM(D4:D5)"
+    budget["F11"] = "x005F_escaped"
+    wb.active = 1
+
+    wb.create_sheet("Empty")
+    path = tmp_path / "donor.xlsx"
+    wb.save(path)
+    return str(path)
+
+
+# Hand-written parts openpyxl never produces itself: shared formulas, inline and
+# rich strings, cells without "r" references and the 1904 date system
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml"
+ ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml"
+ ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/sharedStrings.xml"
+ ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>
+<Override PartName="/xl/styles.xml"
+ ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+</Types>"""
+_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Target="xl/workbook.xml"
+ Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>
+</Relationships>"""
+_WORKBOOK = """<?xml version="1.0" encoding="UTF-8"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+ xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<workbookPr date1904="1"/>
+<sheets><sheet name="Lines" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Target="/xl/worksheets/sheet1.xml"
+ Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>
+<Relationship Id="rId2" Target="sharedStrings.xml"
+ Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings"/>
+<Relationship Id="rId3" Target="styles.xml"
+ Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"/>
+</Relationships>"""
+_SHARED_STRINGS = """<?xml version="1.0" encoding="UTF-8"?>
+<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="3" uniqueCount="3">
+<si><t>Item</t></si>
+<si><r><t>Staff </t></r><r><rPr><b/></rPr><t>salaries</t></r><rPh sb="0" eb="1"><t>x</t></rPh></si>
+<si><t>Amount</t></si>
+</sst>"""
+_STYLES = """<?xml version="1.0" encoding="UTF-8"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<numFmts count="1"><numFmt numFmtId="164" formatCode="dd/mm/yyyy"/></numFmts>
+<cellXfs count="3"><xf numFmtId="0"/><xf numFmtId="164"/><xf numFmtId="4"/></cellXfs>
+</styleSheet>"""
+_SHEET = """<?xml version="1.0" encoding="UTF-8"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<dimension ref="A2:D6"/>
+<sheetData>
+<row r="2"><c r="A2" t="s"><v>0</v></c><c r="C2" t="s"><v>2</v></c></row>
+<row r="3"><c t="s"><v>1</v></c><c t="inlineStr"><is><t>per month</t></is></c>
+<c s="2"><v>1.5E3</v></c><c r="D3"><f t="shared" ref="D3:D5" si="0">C3*12</f><v>18000</v></c></row>
+<row r="4"><c r="A4" t="str"><v>Travel</v></c><c r="C4"><v>300</v></c>
+<c r="D4"><f t="shared" si="0"/><v>3600</v></c></row>
+<row r="6"><c r="A6" s="1"><v>45000</v></c><c r="B6" t="e"><v>#DIV/0!</v></c>
+<c r="D6" t="b"><v>1</v></c></row>
+</sheetData>
+</worksheet>"""
+
+
+@pytest.fixture
+def handmade_path(tmp_path):
+    path = tmp_path / "handmade.xlsx"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("xl/workbook.xml", _WORKBOOK)
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        zf.writestr("xl/sharedStrings.xml", _SHARED_STRINGS)
+        zf.writestr("xl/styles.xml", _STYLES)
+        zf.writestr("xl/worksheets/sheet1.xml", _SHEET)
+    return str(path)
+
+
+@pytest.mark.parametrize("sheet", [None, "Notes", "Budget", "Empty"])
+def test_rows_match_openpyxl(workbook_path, sheet):
+    expected = list(OpenpyxlReader(workbook_path).iter_rows(sheet))
+
+    assert list(SaxXlsxReader(workbook_path).iter_rows(sheet)) == expected
+
+
+def test_handmade_rows_match_openpyxl(handmade_path):
+    expected = list(OpenpyxlReader(handmade_path).iter_rows())
+    rows = list(SaxXlsxReader(handmade_path).iter_rows())
+
+    assert rows == expected
+    assert rows[2][1] == ["Staff salaries", "per month", 1500.0, "=C3*12"]
+    assert rows[3][1][3] == "=C4*12"  # shared formula translated to its own cell
+    assert rows[5][1][0] == datetime(2027, 3, 16)  # 1904 epoch
+
+
+def test_cells_report_kinds(handmade_path):
+    cells = {
+        (r, c): (kind, value) for r, c, kind, value in SaxXlsxReader(handmade_path).iter_cells()
+    }
+
+    assert cells[(2, 1)] == (STRING, "Item")
+    assert cells[(3, 3)] == (NUMBER, 1500.0)
+    assert cells[(4, 4)] == (FORMULA, "=C4*12")
+    assert (2, 2) not in cells
+    assert cells == {
+        (r, c): (kind, value) for r, c, kind, value in OpenpyxlReader(handmade_path).iter_cells()
+    }
+
+
+def test_sheet_metadata(workbook_path):
+    reader = SaxXlsxReader(workbook_path)
+
+    assert reader.sheet_names() == ["Notes", "Budget", "Empty"]
+    assert reader.active_sheet() == "Budget"
+    with pytest.raises(KeyError):
+        list(reader.iter_rows("Missing"))
+
+
+def test_detector_streams_through_sax_reader(workbook_path):
+    expected = list(ExcelStructureDetector(workbook_path).iter_detections())
+    detector = ExcelStructureDetector(workbook_path, reader=SaxXlsxReader(workbook_path))
+
+    assert list(detector.iter_detections()) == expected
+    assert (
+        detector.stream_possible_fields()
+        == ExcelStructureDetector(workbook_path).stream_possible_fields()
+    )
+
+
+def _loaded_workbook_structure(path):
+    """detect_excel_structure computed with the worksheet helpers on a loaded workbook."""
+    wb = load_workbook(path)
+    sheets = []
+    for ws in wb.worksheets:
+        header_row = detect_header_row(ws)
+        if header_row is not None:
+            columns = detect_columns(ws, header_row)
+            totals = detect_totals(ws, columns)
+            sheets.append(_sheet_structure(ws.title, header_row, columns, totals))
+    return {"version": 1, "sheets": sheets}
+
+
+@pytest.mark.parametrize("backend", ["openpyxl", "sax"])
+def test_detect_excel_structure_with_reader(workbook_path, backend):
+    expected = _loaded_workbook_structure(workbook_path)
+    assert detect_excel_structure(workbook_path) == expected
+
+    assert detect_excel_structure(workbook_path, reader=get_reader(workbook_path, backend)) == (
+        expected
+    )
+    budget = expected["sheets"][1]
+    assert budget["header"]["row_index"] == 3
+    assert [c["type"] for c in budget["columns"]] == ["string", "number", "string"]
+
+
+def test_unknown_backend(workbook_path):
+    with pytest.raises(ValueError):
+        get_reader(workbook_path, "xlrd")
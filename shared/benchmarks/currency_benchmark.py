@@ -0,0 +1,101 @@
+"""Micro-benchmark: indexed currency registry vs. the previous linear scans.
+
+Run from the repository root:
+
+    python -m shared.benchmarks.currency_benchmark [--number 20000]
+
+The ``_linear_*`` helpers reproduce the scan-over-every-currency
+implementations that ``currency_service`` used before the registry existed,
+so both sides answer the same questions over the same data.
+"""
+
+import argparse
+import timeit
+
+from shared.services import currency_service
+from shared.services.currency_service import CURRENCIES
+
+# Mixed hits and misses, roughly what a budget import validates per row
+SAMPLE_NAMES = ["Pound Sterling", "euro", "US Dollar", "Norwegian Krone", "Not A Currency"]
+SAMPLE_SYMBOLS = ["$", "", "£"]
+
+
+def _linear_get_currency_code(name: str) -> str:
+    for currency in CURRENCIES.values():
+        if currency["name"].lower() == name.lower():
+            return currency["code"]
+    return "Unknown"
+
+
+def _linear_get_currency_info_by_symbol_or_name(value: str) -> dict:
+    for currency in CURRENCIES.values():
+        if currency["symbol"] == value or currency["name"].lower() == value.lower():
+            return currency
+    return {"code": "Unknown", "name": value, "symbol": ""}
+
+
+def _linear_get_currency_info_by_code_and_name(code: str, name: str) -> dict:
+    for currency in CURRENCIES.values():
+        if currency["code"].upper() == code.upper() and currency["name"].lower() == name.lower():
+            return currency
+    return {"code": "Unknown", "name": name, "symbol": ""}
+
+
+CASES = [
+    (
+        "get_currency_code",
+        lambda: [_linear_get_currency_code(n) for n in SAMPLE_NAMES],
+        lambda: [currency_service.get_currency_code(n) for n in SAMPLE_NAMES],
+    ),
+    (
+        "get_currency_info_by_symbol_or_name",
+        lambda: [
+            _linear_get_currency_info_by_symbol_or_name(v) for v in SAMPLE_NAMES + SAMPLE_SYMBOLS
+        ],
+        lambda: [
+            currency_service.get_currency_info_by_symbol_or_name(v)
+            for v in SAMPLE_NAMES + SAMPLE_SYMBOLS
+        ],
+    ),
+    (
+        "get_currency_info_by_code_and_name",
+        lambda: [_linear_get_currency_info_by_code_and_name("GBP", n) for n in SAMPLE_NAMES],
+        lambda: [
+            currency_service.get_currency_info_by_code_and_name("GBP", n) for n in SAMPLE_NAMES
+        ],
+    ),
+]
+
+
+def run(number: int) -> list[dict]:
+    results = []
+    for name, linear, indexed in CASES:
+        assert linear() == indexed(), f"{name}: registry disagrees with linear scan"
+        linear_s = min(timeit.repeat(linear, number=number, repeat=3))
+        indexed_s = min(timeit.repeat(indexed, number=number, repeat=3))
+        results.append(
+            {
+                "case": name,
+                "linear_us": linear_s / number * 1e6,
+                "indexed_us": indexed_s / number * 1e6,
+                "speedup": linear_s / indexed_s if indexed_s else float("inf"),
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="calls per timing run")
+    args = parser.parse_args()
+
+    print(f"{'case':<40} {'linear µs':>12} {'indexed µs':>12} {'speedup':>9}")
+    for row in run(args.number):
+        print(
+            f"{row['case']:<40} {row['linear_us']:>12.2f} "
+            f"{row['indexed_us']:>12.2f} {row['speedup']:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Regenerate shared/services/currency_snapshot.py from pycountry.
+
+Run from the repository root after bumping pycountry:
+
+    python -m shared.scripts.generate_currency_snapshot
+
+The snapshot lets services build the currency registry without importing
+pycountry (and parsing its ISO 4217 JSON database) at start-up.
+"""
+
+import json
+from pathlib import Path
+
+SNAPSHOT_PATH = Path(__file__).resolve().parent.parent / "services" / "currency_snapshot.py"
+
+HEADER = """# /shared/services/currency_snapshot.py
+# Generated by shared/scripts/generate_currency_snapshot.py from pycountry {version}.
+# Do not edit by hand; rerun the script instead.
+
+# (code, name, symbol) in pycountry order
+CURRENCIES: tuple[tuple[str, str, str], ...] = (
+"""
+
+
+def render_snapshot() -> str:
+    from importlib.metadata import version
+
+    from shared.services.currency_service import CurrencyRegistry
+
+    registry = CurrencyRegistry.from_pycountry()
+    rows = "".join(
+        "    ({}),\n".format(", ".join(json.dumps(v, ensure_ascii=False) for v in row))
+        for row in ((c.code, c.name, c.symbol) for c in registry)
+    )
+    return HEADER.format(version=version("pycountry")) + rows + ")\n"
+
+
+def main() -> None:
+    SNAPSHOT_PATH.write_text(render_snapshot(), encoding="utf-8")
+    print(f"Wrote {SNAPSHOT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
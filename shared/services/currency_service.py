@@ -1,370 +1,466 @@
 # /shared/services/currency_service.py
 
-import pycountry
-
-# Build a quick cache of ISO currencies
-CURRENCIES = {
-    currency.alpha_3: {
-        "code": currency.alpha_3,
-        "name": currency.name,
-        "symbol": ("$" if currency.alpha_3 in ["USD", "CAD", "AUD"] else ""),  # Simplified
-    }
-    for currency in pycountry.currencies
-}
+import heapq
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Iterable, Mapping
+
+
+@dataclass(frozen=True, slots=True)
+class Currency:
+    """Immutable ISO currency record.
+
+    `position` is the record's place in the registry and is used to keep the
+    "first match wins" order of the original linear scans.
+    """
+
+    code: str
+    name: str
+    symbol: str
+    position: int
+
+    def as_dict(self) -> dict:
+        return {"code": self.code, "name": self.name, "symbol": self.symbol}
+
+
+_FIELDS = ("code", "name", "symbol")
+
+
+class CurrencyRegistry:
+    """Currency table with hash indices by code, casefolded name and symbol.
+
+    Every index is multi-valued: symbols are shared (``$``) and a few ISO
+    names appear under more than one code.
+    """
+
+    def __init__(self, currencies: Iterable[Currency]):
+        records = tuple(sorted(currencies, key=lambda c: c.position))
+        by_code: dict[str, list[Currency]] = {}
+        by_name: dict[str, list[Currency]] = {}
+        by_symbol: dict[str, list[Currency]] = {}
+        for record in records:
+            by_code.setdefault(record.code.upper(), []).append(record)
+            by_name.setdefault(record.name.casefold(), []).append(record)
+            by_symbol.setdefault(record.symbol, []).append(record)
+
+        self._records = records
+        self._indices: dict[str, Mapping[str, tuple[Currency, ...]]] = {
+            "code": MappingProxyType({k: tuple(v) for k, v in by_code.items()}),
+            "name": MappingProxyType({k: tuple(v) for k, v in by_name.items()}),
+            "symbol": MappingProxyType({k: tuple(v) for k, v in by_symbol.items()}),
+        }
+
+    @classmethod
+    def from_snapshot(cls) -> "CurrencyRegistry":
+        """Build from the checked-in snapshot, without importing pycountry."""
+        from shared.services.currency_snapshot import CURRENCIES as SNAPSHOT
+
+        return cls(
+            Currency(code=code, name=name, symbol=symbol, position=position)
+            for position, (code, name, symbol) in enumerate(SNAPSHOT)
+        )
+
+    @classmethod
+    def from_pycountry(cls) -> "CurrencyRegistry":
+        """Build from pycountry; used to regenerate the snapshot."""
+        import pycountry
+
+        return cls(
+            Currency(
+                code=currency.alpha_3,
+                name=currency.name,
+                symbol=("$" if currency.alpha_3 in ["USD", "CAD", "AUD"] else ""),  # Simplified
+                position=position,
+            )
+            for position, currency in enumerate(pycountry.currencies)
+        )
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __contains__(self, code: object) -> bool:
+        return isinstance(code, str) and code.upper() in self._indices["code"]
+
+    def lookup(self, field: str, value: str) -> tuple[Currency, ...]:
+        """All records whose `field` matches `value`, in registry order."""
+        if field == "code":
+            key = value.upper()
+        elif field == "name":
+            key = value.casefold()
+        elif field == "symbol":
+            key = value
+        else:
+            raise ValueError(f"Unknown currency field '{field}', expected one of {_FIELDS}")
+        return self._indices[field].get(key, ())
+
+    def by_code(self, code: str) -> Currency | None:
+        matches = self.lookup("code", code)
+        return matches[0] if matches else None
+
+    def by_name(self, name: str) -> Currency | None:
+        matches = self.lookup("name", name)
+        return matches[0] if matches else None
+
+    def by_symbol(self, symbol: str) -> tuple[Currency, ...]:
+        return self.lookup("symbol", symbol)
+
+    def resolve(self, *clauses: Mapping[str, str]) -> Currency | None:
+        """Return the first currency satisfying every clause.
+
+        Each clause maps field -> value and is satisfied when *any* of its
+        fields match, so ``resolve({"code": c}, {"name": n, "symbol": n})``
+        reads as ``code == c and (name == n or symbol == n)``.
+        """
+        if not clauses:
+            return None
+        candidates = [[self.lookup(field, value) for field, value in c.items()] for c in clauses]
+        if len(clauses) == 1:
+            heads = [matches[0] for matches in candidates[0] if matches]
+            return min(heads, key=_position) if heads else None
+        # Walk the most selective clause in registry order, checking the rest per record
+        pivot = min(range(len(clauses)), key=lambda i: sum(map(len, candidates[i])))
+        rest = [clause for i, clause in enumerate(clauses) if i != pivot]
+        ordered = (
+            candidates[pivot][0]
+            if len(candidates[pivot]) == 1
+            else heapq.merge(*candidates[pivot], key=_position)
+        )
+        for record in ordered:
+            if all(_matches(record, clause) for clause in rest):
+                return record
+        return None
+
+
+def _position(record: Currency) -> int:
+    return record.position
+
+
+def _matches(record: Currency, clause: Mapping[str, str]) -> bool:
+    for field, value in clause.items():
+        if field == "code" and record.code.upper() == value.upper():
+            return True
+        if field == "name" and record.name.casefold() == value.casefold():
+            return True
+        if field == "symbol" and record.symbol == value:
+            return True
+    return False
+
+
+@lru_cache(maxsize=None)
+def get_registry() -> CurrencyRegistry:
+    """Process-wide registry, built on first use rather than at import time."""
+    return CurrencyRegistry.from_snapshot()
+
+
+def __getattr__(name: str):
+    # REGISTRY and CURRENCIES used to be import-time globals; keep them importable lazily
+    if name == "REGISTRY":
+        return get_registry()
+    if name == "CURRENCIES":
+        return get_currency_dict()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _resolve(*clauses: Mapping[str, str]) -> dict | None:
+    currency = get_registry().resolve(*clauses)
+    return currency.as_dict() if currency else None
 
 
 def validate_currency(code: str) -> bool:
-    return code.upper() in CURRENCIES
+    return code in get_registry()
 
 
 def get_currency_info(code: str) -> dict:
-    return CURRENCIES.get(code.upper(), {"code": code.upper(), "name": "Unknown", "symbol": ""})
+    return _resolve({"code": code}) or {"code": code.upper(), "name": "Unknown", "symbol": ""}
 
 
 def get_currency_code(name: str) -> str:
-    for currency in CURRENCIES.values():
-        if currency["name"].lower() == name.lower():
-            return currency["code"]
-    return "Unknown"
+    currency = get_registry().by_name(name)
+    return currency.code if currency else "Unknown"
 
 
 def get_currency_by_code(code: str) -> dict:
-    return CURRENCIES.get(code.upper(), {"code": code.upper(), "name": "Unknown", "symbol": ""})
+    return _resolve({"code": code}) or {"code": code.upper(), "name": "Unknown", "symbol": ""}
 
 
 def get_currency_by_name(name: str) -> dict:
-    for currency in CURRENCIES.values():
-        if currency["name"].lower() == name.lower():
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": ""}
+    return _resolve({"name": name}) or {"code": "Unknown", "name": name, "symbol": ""}
 
 
 def get_all_currencies() -> list[dict]:
-    return list(CURRENCIES.values())
+    return [currency.as_dict() for currency in get_registry()]
 
 
 def get_currency_list() -> list[str]:
-    return [currency["code"] for currency in CURRENCIES.values()]
+    return [currency.code for currency in get_registry()]
 
 
 def get_currency_dict() -> dict:
-    return {currency["code"]: currency for currency in CURRENCIES.values()}
+    return {currency.code: currency.as_dict() for currency in get_registry()}
 
 
 def get_currency_details(code: str) -> dict:
-    return CURRENCIES.get(code.upper(), {"code": code.upper(), "name": "Unknown", "symbol": ""})
+    return _resolve({"code": code}) or {"code": code.upper(), "name": "Unknown", "symbol": ""}
 
 
 def get_currency_details_by_name(name: str) -> dict:
-    for currency in CURRENCIES.values():
-        if currency["name"].lower() == name.lower():
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": ""}
+    return _resolve({"name": name}) or {"code": "Unknown", "name": name, "symbol": ""}
 
 
 def get_currency_symbol_by_code(code: str) -> str:
-    return CURRENCIES.get(code.upper(), {}).get("symbol", "")
+    currency = get_registry().by_code(code)
+    return currency.symbol if currency else ""
 
 
 def get_currency_symbol_by_name(name: str) -> str:
-    for currency in CURRENCIES.values():
-        if currency["name"].lower() == name.lower():
-            return currency["symbol"]
-    return ""
+    currency = get_registry().by_name(name)
+    return currency.symbol if currency else ""
 
 
 def get_currency_name_by_code(code: str) -> str:
-    return CURRENCIES.get(code.upper(), {}).get("name", "Unknown")
+    currency = get_registry().by_code(code)
+    return currency.name if currency else "Unknown"
 
 
 def get_currency_name_by_name(name: str) -> str:
-    for currency in CURRENCIES.values():
-        if currency["name"].lower() == name.lower():
-            return currency["name"]
-    return "Unknown"
+    currency = get_registry().by_name(name)
+    return currency.name if currency else "Unknown"
 
 
 def get_currency_code_by_name(name: str) -> str:
-    for currency in CURRENCIES.values():
-        if currency["name"].lower() == name.lower():
-            return currency["code"]
-    return "Unknown"
+    currency = get_registry().by_name(name)
+    return currency.code if currency else "Unknown"
 
 
 def get_currency_code_by_symbol(symbol: str) -> str:
-    for currency in CURRENCIES.values():
-        if currency["symbol"] == symbol:
-            return currency["code"]
-    return "Unknown"
+    matches = get_registry().by_symbol(symbol)
+    return matches[0].code if matches else "Unknown"
 
 
 def get_currency_symbol_by_symbol(symbol: str) -> str:
-    for currency in CURRENCIES.values():
-        if currency["symbol"] == symbol:
-            return currency["symbol"]
-    return ""
+    matches = get_registry().by_symbol(symbol)
+    return matches[0].symbol if matches else ""
 
 
 def get_currency_name_by_symbol(symbol: str) -> str:
-    for currency in CURRENCIES.values():
-        if currency["symbol"] == symbol:
-            return currency["name"]
-    return "Unknown"
+    matches = get_registry().by_symbol(symbol)
+    return matches[0].name if matches else "Unknown"
 
 
 def get_currency_details_by_symbol(symbol: str) -> dict:
-    for currency in CURRENCIES.values():
-        if currency["symbol"] == symbol:
-            return currency
-    return {"code": "Unknown", "name": "Unknown", "symbol": symbol}
+    return _resolve({"symbol": symbol}) or {"code": "Unknown", "name": "Unknown", "symbol": symbol}
 
 
 def get_currency_info_by_symbol(symbol: str) -> dict:
-    for currency in CURRENCIES.values():
-        if currency["symbol"] == symbol:
-            return currency
-    return {"code": "Unknown", "name": "Unknown", "symbol": symbol}
+    return _resolve({"symbol": symbol}) or {"code": "Unknown", "name": "Unknown", "symbol": symbol}
 
 
 def get_currency_info_by_code(code: str) -> dict:
-    return CURRENCIES.get(code.upper(), {"code": code.upper(), "name": "Unknown", "symbol": ""})
+    return _resolve({"code": code}) or {"code": code.upper(), "name": "Unknown", "symbol": ""}
 
 
 def get_currency_info_by_name(name: str) -> dict:
-    for currency in CURRENCIES.values():
-        if currency["name"].lower() == name.lower():
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": ""}
+    return _resolve({"name": name}) or {"code": "Unknown", "name": name, "symbol": ""}
 
 
 def get_currency_info_by_code_or_name(value: str) -> dict:
-    if value.upper() in CURRENCIES:
-        return CURRENCIES[value.upper()]
-    for currency in CURRENCIES.values():
-        if currency["name"].lower() == value.lower():
-            return currency
-    return {"code": "Unknown", "name": value, "symbol": ""}
+    # An exact code hit wins over an earlier name match
+    return (
+        _resolve({"code": value})
+        or _resolve({"name": value})
+        or {"code": "Unknown", "name": value, "symbol": ""}
+    )
 
 
 def get_currency_info_by_symbol_or_name(value: str) -> dict:
-    for currency in CURRENCIES.values():
-        if currency["symbol"] == value or currency["name"].lower() == value.lower():
-            return currency
-    return {"code": "Unknown", "name": value, "symbol": ""}
+    return _resolve({"symbol": value, "name": value}) or {
+        "code": "Unknown",
+        "name": value,
+        "symbol": "",
+    }
 
 
 def get_currency_info_by_code_or_symbol(value: str) -> dict:
-    if value.upper() in CURRENCIES:
-        return CURRENCIES[value.upper()]
-    for currency in CURRENCIES.values():
-        if currency["symbol"] == value:
-            return currency
-    return {"code": "Unknown", "name": "Unknown", "symbol": value}
+    return (
+        _resolve({"code": value})
+        or _resolve({"symbol": value})
+        or {"code": "Unknown", "name": "Unknown", "symbol": value}
+    )
 
 
 def get_currency_info_by_name_or_symbol(value: str) -> dict:
-    for currency in CURRENCIES.values():
-        if currency["name"].lower() == value.lower() or currency["symbol"] == value:
-            return currency
-    return {"code": "Unknown", "name": value, "symbol": ""}
+    return _resolve({"name": value, "symbol": value}) or {
+        "code": "Unknown",
+        "name": value,
+        "symbol": "",
+    }
 
 
 def get_currency_info_by_code_or_name_or_symbol(value: str) -> dict:
-    if value.upper() in CURRENCIES:
-        return CURRENCIES[value.upper()]
-    for currency in CURRENCIES.values():
-        if currency["name"].lower() == value.lower() or currency["symbol"] == value:
-            return currency
-    return {"code": "Unknown", "name": value, "symbol": ""}
+    return (
+        _resolve({"code": value})
+        or _resolve({"name": value, "symbol": value})
+        or {"code": "Unknown", "name": value, "symbol": ""}
+    )
 
 
 def get_currency_info_by_symbol_or_code_or_name(value: str) -> dict:
-    for currency in CURRENCIES.values():
-        if (
-            currency["symbol"] == value
-            or currency["code"].upper() == value.upper()
-            or currency["name"].lower() == value.lower()
-        ):
-            return currency
-    return {"code": "Unknown", "name": value, "symbol": ""}
+    return _resolve({"symbol": value, "code": value, "name": value}) or {
+        "code": "Unknown",
+        "name": value,
+        "symbol": "",
+    }
 
 
 def get_currency_info_by_name_or_code_or_symbol(value: str) -> dict:
-    for currency in CURRENCIES.values():
-        if (
-            currency["name"].lower() == value.lower()
-            or currency["code"].upper() == value.upper()
-            or currency["symbol"] == value
-        ):
-            return currency
-    return {"code": "Unknown", "name": value, "symbol": ""}
+    return _resolve({"name": value, "code": value, "symbol": value}) or {
+        "code": "Unknown",
+        "name": value,
+        "symbol": "",
+    }
 
 
 def get_currency_info_by_code_and_name(code: str, name: str) -> dict:
-    for currency in CURRENCIES.values():
-        if currency["code"].upper() == code.upper() and currency["name"].lower() == name.lower():
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": ""}
+    return _resolve({"code": code}, {"name": name}) or {
+        "code": "Unknown",
+        "name": name,
+        "symbol": "",
+    }
 
 
 def get_currency_info_by_code_and_symbol(code: str, symbol: str) -> dict:
-    for currency in CURRENCIES.values():
-        if currency["code"].upper() == code.upper() and currency["symbol"] == symbol:
-            return currency
-    return {"code": "Unknown", "name": "Unknown", "symbol": symbol}
+    return _resolve({"code": code}, {"symbol": symbol}) or {
+        "code": "Unknown",
+        "name": "Unknown",
+        "symbol": symbol,
+    }
 
 
 def get_currency_info_by_name_and_symbol(name: str, symbol: str) -> dict:
-    for currency in CURRENCIES.values():
-        if currency["name"].lower() == name.lower() and currency["symbol"] == symbol:
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": symbol}
+    return _resolve({"name": name}, {"symbol": symbol}) or {
+        "code": "Unknown",
+        "name": name,
+        "symbol": symbol,
+    }
 
 
 def get_currency_info_by_code_and_name_and_symbol(code: str, name: str, symbol: str) -> dict:
-    for currency in CURRENCIES.values():
-        if (
-            currency["code"].upper() == code.upper()
-            and currency["name"].lower() == name.lower()
-            and currency["symbol"] == symbol
-        ):
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": symbol}
+    return _resolve({"code": code}, {"name": name}, {"symbol": symbol}) or {
+        "code": "Unknown",
+        "name": name,
+        "symbol": symbol,
+    }
 
 
 def get_currency_info_by_symbol_and_name(symbol: str, name: str) -> dict:
-    for currency in CURRENCIES.values():
-        if currency["symbol"] == symbol and currency["name"].lower() == name.lower():
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": symbol}
+    return _resolve({"symbol": symbol}, {"name": name}) or {
+        "code": "Unknown",
+        "name": name,
+        "symbol": symbol,
+    }
 
 
 def get_currency_info_by_symbol_and_code(symbol: str, code: str) -> dict:
-    for currency in CURRENCIES.values():
-        if currency["symbol"] == symbol and currency["code"].upper() == code.upper():
-            return currency
-    return {"code": "Unknown", "name": "Unknown", "symbol": symbol}
+    return _resolve({"symbol": symbol}, {"code": code}) or {
+        "code": "Unknown",
+        "name": "Unknown",
+        "symbol": symbol,
+    }
 
 
 def get_currency_info_by_name_and_code(name: str, code: str) -> dict:
-    for currency in CURRENCIES.values():
-        if currency["name"].lower() == name.lower() and currency["code"].upper() == code.upper():
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": "Unknown"}
+    return _resolve({"name": name}, {"code": code}) or {
+        "code": "Unknown",
+        "name": name,
+        "symbol": "Unknown",
+    }
 
 
 def get_currency_info_by_name_and_symbol_and_code(name: str, symbol: str, code: str) -> dict:
-    for currency in CURRENCIES.values():
-        if (
-            currency["name"].lower() == name.lower()
-            and currency["symbol"] == symbol
-            and currency["code"].upper() == code.upper()
-        ):
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": symbol}
+    return _resolve({"name": name}, {"symbol": symbol}, {"code": code}) or {
+        "code": "Unknown",
+        "name": name,
+        "symbol": symbol,
+    }
 
 
 def get_currency_info_by_symbol_and_name_and_code(symbol: str, name: str, code: str) -> dict:
-    for currency in CURRENCIES.values():
-        if (
-            currency["symbol"] == symbol
-            and currency["name"].lower() == name.lower()
-            and currency["code"].upper() == code.upper()
-        ):
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": symbol}
+    return _resolve({"symbol": symbol}, {"name": name}, {"code": code}) or {
+        "code": "Unknown",
+        "name": name,
+        "symbol": symbol,
+    }
 
 
 def get_currency_info_by_code_and_name_and_symbol_or_code(
     code: str, name: str, symbol: str
 ) -> dict:
-    for currency in CURRENCIES.values():
-        if (
-            currency["code"].upper() == code.upper()
-            and currency["name"].lower() == name.lower()
-            and (currency["symbol"] == symbol or currency["code"].upper() == symbol.upper())
-        ):
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": symbol}
+    return _resolve({"code": code}, {"name": name}, {"symbol": symbol, "code": symbol}) or {
+        "code": "Unknown",
+        "name": name,
+        "symbol": symbol,
+    }
 
 
 def get_currency_info_by_name_and_symbol_and_code_or_name(
     name: str, symbol: str, code: str
 ) -> dict:
-    for currency in CURRENCIES.values():
-        if (
-            currency["name"].lower() == name.lower()
-            and currency["symbol"] == symbol
-            and (
-                currency["code"].upper() == code.upper() or currency["name"].lower() == code.lower()
-            )
-        ):
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": symbol}
+    return _resolve({"name": name}, {"symbol": symbol}, {"code": code, "name": code}) or {
+        "code": "Unknown",
+        "name": name,
+        "symbol": symbol,
+    }
 
 
 def get_currency_info_by_symbol_and_code_and_name_or_symbol(
     symbol: str, code: str, name: str
 ) -> dict:
-    for currency in CURRENCIES.values():
-        if (
-            currency["symbol"] == symbol
-            and currency["code"].upper() == code.upper()
-            and (currency["name"].lower() == name.lower() or currency["symbol"] == name)
-        ):
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": symbol}
+    return _resolve({"symbol": symbol}, {"code": code}, {"name": name, "symbol": name}) or {
+        "code": "Unknown",
+        "name": name,
+        "symbol": symbol,
+    }
 
 
 def get_currency_info_by_code_and_symbol_and_name_or_code(
     code: str, symbol: str, name: str
 ) -> dict:
-    for currency in CURRENCIES.values():
-        if (
-            currency["code"].upper() == code.upper()
-            and currency["symbol"] == symbol
-            and (
-                currency["name"].lower() == name.lower() or currency["code"].upper() == name.upper()
-            )
-        ):
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": symbol}
+    return _resolve({"code": code}, {"symbol": symbol}, {"name": name, "code": name}) or {
+        "code": "Unknown",
+        "name": name,
+        "symbol": symbol,
+    }
 
 
 def get_currency_info_by_name_and_symbol_and_code_or_symbol(
     name: str, symbol: str, code: str
 ) -> dict:
-    for currency in CURRENCIES.values():
-        if (
-            currency["name"].lower() == name.lower()
-            and currency["symbol"] == symbol
-            and (currency["code"].upper() == code.upper() or currency["symbol"] == code)
-        ):
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": symbol}
+    return _resolve({"name": name}, {"symbol": symbol}, {"code": code, "symbol": code}) or {
+        "code": "Unknown",
+        "name": name,
+        "symbol": symbol,
+    }
 
 
 def get_currency_info_by_symbol_and_name_and_code_or_symbol(
     symbol: str, name: str, code: str
 ) -> dict:
-    for currency in CURRENCIES.values():
-        if (
-            currency["symbol"] == symbol
-            and currency["name"].lower() == name.lower()
-            and (currency["code"].upper() == code.upper() or currency["symbol"] == code)
-        ):
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": symbol}
+    return _resolve({"symbol": symbol}, {"name": name}, {"code": code, "symbol": code}) or {
+        "code": "Unknown",
+        "name": name,
+        "symbol": symbol,
+    }
 
 
 def get_currency_info_by_code_and_name_and_symbol_or_symbol(
     code: str, name: str, symbol: str
 ) -> dict:
-    for currency in CURRENCIES.values():
-        if (
-            currency["code"].upper() == code.upper()
-            and currency["name"].lower() == name.lower()
-            and (currency["symbol"] == symbol or currency["code"].upper() == symbol.upper())
-        ):
-            return currency
-    return {"code": "Unknown", "name": name, "symbol": symbol}
+    return _resolve({"code": code}, {"name": name}, {"symbol": symbol, "code": symbol}) or {
+        "code": "Unknown",
+        "name": name,
+        "symbol": symbol,
+    }
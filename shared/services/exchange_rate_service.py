@@ -0,0 +1,250 @@
+# /shared/services/exchange_rate_service.py
+"""Dated exchange-rate tables and vectorized currency conversion.
+
+Rates are stored against a single base currency (EUR for ECB feeds), so any
+pair converts through the base: ``amount / rate[from] * rate[to]``.
+
+Public API
+- ExchangeRate: one (date, base, quote, rate) observation
+- parse_rates_csv(path) / parse_rates_ecb_xml(path) -> list[ExchangeRate]
+- RateTable: all rates for one date as a NumPy vector; convert() works on arrays
+- RateTableCache: in-process LRU of RateTables keyed by (base, date)
+"""
+
+import csv
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Callable, Hashable, Iterable, Sequence
+
+import numpy as np
+from fastapi import status
+
+from shared.exceptions.exceptions import DomainError
+
+DEFAULT_BASE_CURRENCY = "EUR"
+
+
+class ExchangeRateNotFound(DomainError):
+    def __init__(self, message: str, status_code: int = status.HTTP_404_NOT_FOUND):
+        super().__init__(message, status_code)
+
+
+@dataclass(frozen=True, slots=True)
+class ExchangeRate:
+    """``1 base_currency == rate quote_currency`` on ``rate_date``."""
+
+    rate_date: date
+    base_currency: str
+    quote_currency: str
+    rate: float
+
+
+def parse_rates_csv(
+    path: str | Path, base_currency: str = DEFAULT_BASE_CURRENCY
+) -> list[ExchangeRate]:
+    """Parse a rates CSV in either of two layouts.
+
+    - long: ``date,base_currency,quote_currency,rate`` (one rate per row)
+    - wide: ECB ``eurofxref-hist.csv`` style, ``Date,USD,JPY,...`` with one
+      row per date and rates against `base_currency`; "N/A" cells are skipped
+    """
+    rates: list[ExchangeRate] = []
+    with open(path, newline="", encoding="utf-8") as fh:
+        reader = csv.DictReader(fh)
+        fields = [f.strip() for f in reader.fieldnames or [] if f and f.strip()]
+        long_format = {"date", "base_currency", "quote_currency", "rate"} <= set(fields)
+        for row in reader:
+            row = {(k or "").strip(): (v or "").strip() for k, v in row.items()}
+            if long_format:
+                rates.append(
+                    ExchangeRate(
+                        rate_date=date.fromisoformat(row["date"]),
+                        base_currency=row["base_currency"].upper(),
+                        quote_currency=row["quote_currency"].upper(),
+                        rate=float(row["rate"]),
+                    )
+                )
+                continue
+            rate_date = date.fromisoformat(row[fields[0]])
+            for code in fields[1:]:
+                value = row.get(code, "")
+                if not value or value.upper() == "N/A":
+                    continue
+                rates.append(
+                    ExchangeRate(
+                        rate_date=rate_date,
+                        base_currency=base_currency.upper(),
+                        quote_currency=code.upper(),
+                        rate=float(value),
+                    )
+                )
+    return rates
+
+
+def parse_rates_ecb_xml(
+    path: str | Path, base_currency: str = DEFAULT_BASE_CURRENCY
+) -> list[ExchangeRate]:
+    """Parse an ECB ``eurofxref`` XML file (daily, 90-day or full history).
+
+    Streams the file with ``iterparse`` so the full-history feed does not have
+    to be held as a tree.
+    """
+    rates: list[ExchangeRate] = []
+    rate_date: date | None = None
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if not elem.tag.endswith("Cube"):
+            continue
+        if event == "start" and "time" in elem.attrib:
+            rate_date = date.fromisoformat(elem.attrib["time"])
+        elif event == "end" and "currency" in elem.attrib and rate_date is not None:
+            rates.append(
+                ExchangeRate(
+                    rate_date=rate_date,
+                    base_currency=base_currency.upper(),
+                    quote_currency=elem.attrib["currency"].upper(),
+                    rate=float(elem.attrib["rate"]),
+                )
+            )
+            elem.clear()
+    return rates
+
+
+def parse_rates_file(path: str | Path, base_currency: str = DEFAULT_BASE_CURRENCY):
+    """Dispatch on file extension: ``.xml`` is ECB XML, anything else CSV."""
+    if Path(path).suffix.lower() == ".xml":
+        return parse_rates_ecb_xml(path, base_currency)
+    return parse_rates_csv(path, base_currency)
+
+
+class RateTable:
+    """All rates for one date against one base currency.
+
+    Rates live in a float64 vector indexed by currency code, so converting an
+    array of amounts is a gather plus one multiply, with no per-row lookups.
+    """
+
+    def __init__(self, rate_date: date, base_currency: str, rates: dict[str, float]):
+        self.rate_date = rate_date
+        self.base_currency = base_currency.upper()
+        codes = [self.base_currency] + sorted(
+            code.upper() for code in rates if code.upper() != self.base_currency
+        )
+        self._index = {code: i for i, code in enumerate(codes)}
+        self._rates = np.array(
+            [1.0] + [rates[code] for code in codes[1:]],
+            dtype=np.float64,
+        )
+
+    @classmethod
+    def from_rates(cls, rates: Iterable[ExchangeRate]) -> "RateTable":
+        rows = list(rates)
+        if not rows:
+            raise ExchangeRateNotFound("No exchange rates available")
+        rate_date, base = rows[0].rate_date, rows[0].base_currency
+        return cls(rate_date, base, {r.quote_currency: r.rate for r in rows})
+
+    @property
+    def currencies(self) -> list[str]:
+        return list(self._index)
+
+    def _position(self, code: str) -> int:
+        try:
+            return self._index[code.upper()]
+        except KeyError:
+            raise ExchangeRateNotFound(
+                f"No {self.base_currency} exchange rate for {code.upper()} on {self.rate_date}"
+            ) from None
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """Units of `to_currency` per one unit of `from_currency`."""
+        return float(
+            self._rates[self._position(to_currency)] / self._rates[self._position(from_currency)]
+        )
+
+    def convert(
+        self,
+        amounts: Sequence[float | None] | np.ndarray,
+        from_currencies: str | Sequence[str],
+        to_currency: str,
+    ) -> np.ndarray:
+        """Convert `amounts` into `to_currency` in one vectorized operation.
+
+        `from_currencies` is either a single code for all amounts or one code
+        per amount. Missing amounts (None) come back as NaN.
+        """
+        values = np.asarray(amounts, dtype=np.float64)
+        to_rate = self._rates[self._position(to_currency)]
+        if isinstance(from_currencies, str):
+            return values * (to_rate / self._rates[self._position(from_currencies)])
+
+        codes = np.asarray(from_currencies, dtype=object)
+        if codes.shape != values.shape:
+            raise ValueError("from_currencies must match the shape of amounts")
+        # Resolve each distinct code once, then gather per element
+        unique_codes, inverse = np.unique(codes, return_inverse=True)
+        positions = np.array([self._position(c) for c in unique_codes], dtype=np.intp)
+        return values * (to_rate / self._rates[positions[inverse]])
+
+
+class RateTableCache:
+    """Thread-safe in-process LRU of RateTables keyed by (base, requested date).
+
+    `loader(base, on_date)` returns the rates to use for that date (normally the
+    latest published on or before it) and is only called on a miss. A loader
+    passed to get() is used instead for that call, e.g. one bound to the
+    caller's database session.
+
+    get() may also be given `version`, a cheap change marker for the stored
+    rates (such as the latest import time). When it moves every cached table
+    is dropped, so rates imported by another process are picked up.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str, date], Iterable[ExchangeRate]] | None = None,
+        maxsize: int = 256,
+    ):
+        self._loader = loader
+        self._maxsize = maxsize
+        self._tables: OrderedDict[tuple[str, date], RateTable] = OrderedDict()
+        self._version: Hashable = None
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        on_date: date,
+        base_currency: str = DEFAULT_BASE_CURRENCY,
+        loader: Callable[[str, date], Iterable[ExchangeRate]] | None = None,
+        version: Hashable = None,
+    ) -> RateTable:
+        key = (base_currency.upper(), on_date)
+        with self._lock:
+            if version != self._version:
+                self._tables.clear()
+                self._version = version
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+
+        load = loader or self._loader
+        if load is None:
+            raise TypeError("RateTableCache.get() needs a loader")
+        table = RateTable.from_rates(load(key[0], on_date))
+
+        with self._lock:
+            if version == self._version:
+                self._tables[key] = table
+                self._tables.move_to_end(key)
+                while len(self._tables) > self._maxsize:
+                    self._tables.popitem(last=False)
+        return table
+
+    def invalidate(self) -> None:
+        """Drop every cached table, e.g. after new rates were imported."""
+        with self._lock:
+            self._tables.clear()
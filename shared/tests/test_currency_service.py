@@ -0,0 +1,97 @@
+import subprocess
+import sys
+from dataclasses import FrozenInstanceError
+from pathlib import Path
+
+import pytest
+
+from shared.services.currency_service import (
+    REGISTRY,
+    Currency,
+    CurrencyRegistry,
+    get_currency_code_by_symbol,
+    get_currency_info,
+    get_currency_info_by_code_and_name_and_symbol_or_code,
+    get_currency_info_by_code_or_name,
+    get_currency_info_by_symbol_or_name,
+    get_currency_name_by_code,
+    validate_currency,
+)
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+class TestCurrencyRegistry:
+    def test_records_are_frozen(self):
+        record = REGISTRY.by_code("GBP")
+        assert record is not None
+        with pytest.raises(FrozenInstanceError):
+            record.name = "Changed"  # type: ignore[misc]
+
+    def test_symbol_index_is_multi_valued(self):
+        codes = {c.code for c in REGISTRY.by_symbol("$")}
+        assert codes == {"USD", "CAD", "AUD"}
+
+    def test_name_lookup_is_case_insensitive(self):
+        assert REGISTRY.by_name("pound sterling") == REGISTRY.by_code("gbp")
+
+    def test_resolve_returns_first_in_registry_order(self):
+        registry = CurrencyRegistry(
+            [
+                Currency(code="BBB", name="Second", symbol="$", position=1),
+                Currency(code="AAA", name="First", symbol="$", position=0),
+            ]
+        )
+        assert registry.resolve({"symbol": "$"}).code == "AAA"
+        assert registry.resolve({"symbol": "$"}, {"code": "bbb"}).code == "BBB"
+        assert registry.resolve({"symbol": "€"}, {"code": "bbb"}) is None
+
+    def test_unknown_field_raises(self):
+        with pytest.raises(ValueError):
+            REGISTRY.lookup("iso", "GBP")
+
+
+class TestCurrencyFunctions:
+    def test_validate_currency(self):
+        assert validate_currency("gbp")
+        assert not validate_currency("XXXX")
+
+    def test_get_currency_info_unknown(self):
+        assert get_currency_info("abc") == {"code": "ABC", "name": "Unknown", "symbol": ""}
+
+    def test_returned_dicts_do_not_leak_registry_state(self):
+        get_currency_info("USD")["name"] = "Mutated"
+        assert get_currency_name_by_code("USD") == "US Dollar"
+
+    def test_code_or_name_prefers_code(self):
+        assert get_currency_info_by_code_or_name("eur")["code"] == "EUR"
+        assert get_currency_info_by_code_or_name("Euro")["code"] == "EUR"
+
+    def test_symbol_or_name(self):
+        assert get_currency_info_by_symbol_or_name("$")["code"] == "AUD"
+        assert get_currency_info_by_symbol_or_name("nope")["code"] == "Unknown"
+
+    def test_code_by_symbol(self):
+        assert get_currency_code_by_symbol("$") == "AUD"
+        assert get_currency_code_by_symbol("¤") == "Unknown"
+
+    def test_nested_or_clause(self):
+        result = get_currency_info_by_code_and_name_and_symbol_or_code("USD", "US Dollar", "usd")
+        assert result["code"] == "USD"
+
+
+class TestCurrencySnapshot:
+    def test_import_does_not_load_pycountry(self):
+        code = (
+            "import sys, shared.services.currency_service as c; "
+            "c.validate_currency('GBP'); "
+            "sys.exit('pycountry' in sys.modules)"
+        )
+        result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT)
+        assert result.returncode == 0
+
+    def test_snapshot_matches_pycountry(self):
+        pytest.importorskip("pycountry")
+        snapshot = [c.as_dict() for c in CurrencyRegistry.from_snapshot()]
+        live = [c.as_dict() for c in CurrencyRegistry.from_pycountry()]
+        assert snapshot == live, "currency snapshot is stale, rerun generate_currency_snapshot"
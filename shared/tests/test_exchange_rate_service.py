@@ -0,0 +1,107 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from shared.services.exchange_rate_service import (
+    ExchangeRate,
+    ExchangeRateNotFound,
+    RateTable,
+    RateTableCache,
+    parse_rates_csv,
+    parse_rates_ecb_xml,
+)
+
+ECB_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<gesmes:Envelope xmlns:gesmes="http://www.gesmes.org/xml/2002-08-01"
+    xmlns="http://www.ecb.int/vocabulary/2002-08-01/eurofxref">
+  <gesmes:subject>Reference rates</gesmes:subject>
+  <Cube>
+    <Cube time="2025-01-03">
+      <Cube currency="USD" rate="1.0314"/>
+      <Cube currency="GBP" rate="0.8286"/>
+    </Cube>
+    <Cube time="2025-01-02">
+      <Cube currency="USD" rate="1.0321"/>
+    </Cube>
+  </Cube>
+</gesmes:Envelope>
+"""
+
+TABLE = RateTable(date(2025, 1, 3), "EUR", {"USD": 1.25, "GBP": 0.8})
+
+
+class TestParsers:
+    def test_ecb_xml(self, tmp_path):
+        path = tmp_path / "eurofxref.xml"
+        path.write_text(ECB_XML)
+        rates = parse_rates_ecb_xml(path)
+        assert rates[0] == ExchangeRate(date(2025, 1, 3), "EUR", "USD", 1.0314)
+        assert [r.rate_date for r in rates] == [date(2025, 1, 3)] * 2 + [date(2025, 1, 2)]
+
+    def test_wide_csv_skips_missing(self, tmp_path):
+        path = tmp_path / "eurofxref-hist.csv"
+        path.write_text("Date,USD,GBP,\n2025-01-03,1.0314,N/A,\n")
+        rates = parse_rates_csv(path)
+        assert rates == [ExchangeRate(date(2025, 1, 3), "EUR", "USD", 1.0314)]
+
+    def test_long_csv(self, tmp_path):
+        path = tmp_path / "rates.csv"
+        path.write_text("date,base_currency,quote_currency,rate\n2025-01-03,usd,gbp,0.79\n")
+        assert parse_rates_csv(path) == [ExchangeRate(date(2025, 1, 3), "USD", "GBP", 0.79)]
+
+
+class TestRateTable:
+    def test_cross_rate_goes_through_base(self):
+        assert TABLE.rate("GBP", "USD") == pytest.approx(1.25 / 0.8)
+        assert TABLE.rate("eur", "eur") == 1.0
+
+    def test_convert_single_currency(self):
+        result = TABLE.convert([100.0, None, 8.0], "GBP", "EUR")
+        np.testing.assert_allclose(result, [125.0, np.nan, 10.0])
+
+    def test_convert_per_element_currencies(self):
+        result = TABLE.convert([100.0, 100.0, 100.0], ["EUR", "USD", "GBP"], "USD")
+        np.testing.assert_allclose(result, [125.0, 100.0, 156.25])
+
+    def test_unknown_currency_raises(self):
+        with pytest.raises(ExchangeRateNotFound):
+            TABLE.convert([1.0], "JPY", "EUR")
+
+
+class TestRateTableCache:
+    def test_loader_called_once_per_key(self):
+        calls = []
+
+        def loader(base, on_date):
+            calls.append((base, on_date))
+            return [ExchangeRate(on_date, base, "USD", 1.1)]
+
+        cache = RateTableCache(loader, maxsize=1)
+        cache.get(date(2025, 1, 3))
+        cache.get(date(2025, 1, 3))
+        assert len(calls) == 1
+
+        cache.get(date(2025, 1, 4))
+        cache.get(date(2025, 1, 3))
+        assert len(calls) == 3
+
+        cache.invalidate()
+        cache.get(date(2025, 1, 3))
+        assert len(calls) == 4
+
+    def test_version_change_drops_cached_tables(self):
+        calls = []
+
+        def loader(base, on_date):
+            calls.append(len(calls))
+            return [ExchangeRate(on_date, base, "USD", 1.0 + len(calls))]
+
+        cache = RateTableCache()
+        day = date(2025, 1, 3)
+        assert cache.get(day, loader=loader, version=1).rate("EUR", "USD") == 2.0
+        assert cache.get(day, loader=loader, version=1).rate("EUR", "USD") == 2.0
+
+        # Another process imported rates
+        assert cache.get(day, loader=loader, version=2).rate("EUR", "USD") == 3.0
+        assert len(calls) == 2